@@ -0,0 +1,150 @@
+"""
+Style-profile feedback ingest benchmark: JSON preference columns vs preference rows
+"We girls have no time" - Learn from every outfit without slowing down!
+
+Both paths apply the same feedback events and commit once per event, as
+`StyleLearningEngine.update_style_profile_from_feedback` does. The legacy path
+re-parses and re-serialises the JSON preference maps on every event.
+
+Usage:
+    python benchmarks/bench_preference_ingest.py [--users 50] [--events 5000] [--reads 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.personalization import UserStyleProfile, StylePreferenceWeight
+
+COLORS = ['white', 'black', 'navy', 'grey', 'beige', 'pink', 'red', 'green', 'blue', 'brown']
+CATEGORIES = ['tops', 'bottoms', 'blazers', 'shoes', 'accessories', 'outerwear', 'dresses', 'jewelry']
+OCCASIONS = ['work', 'casual', 'formal', 'date']
+
+
+def build_events(users, events, seed=7):
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, users), {
+            'rating': rng.randint(1, 5),
+            'liked_aspects': ['colors'] if rng.random() < 0.5 else [],
+            'disliked_aspects': ['colors'] if rng.random() < 0.2 else [],
+            'outfit_colors': rng.sample(COLORS, 3),
+            'outfit_categories': rng.sample(CATEGORIES, 3),
+            'comfort_rating': rng.randint(1, 5),
+            'occasion_actual': rng.choice(OCCASIONS)
+        })
+        for _ in range(events)
+    ]
+
+
+def legacy_update(profile, feedback_data):
+    """The previous implementation: JSON round trip of every learned preference column"""
+    rating = feedback_data.get('rating', 3)
+    preferred_colors = json.loads(profile.preferred_colors) if profile.preferred_colors else {}
+    avoided_colors = json.loads(profile.avoided_colors) if profile.avoided_colors else {}
+    for color in feedback_data.get('outfit_colors', []):
+        if 'colors' in feedback_data.get('liked_aspects', []) and rating >= 4:
+            preferred_colors[color] = preferred_colors.get(color, 0) + 0.1
+        if 'colors' in feedback_data.get('disliked_aspects', []) or rating <= 2:
+            avoided_colors[color] = avoided_colors.get(color, 0) + 0.1
+    profile.preferred_colors = json.dumps(preferred_colors)
+    profile.avoided_colors = json.dumps(avoided_colors)
+
+    preferred_categories = json.loads(profile.preferred_categories) if profile.preferred_categories else {}
+    avoided_categories = json.loads(profile.avoided_categories) if profile.avoided_categories else {}
+    for category in feedback_data.get('outfit_categories', []):
+        if rating >= 4:
+            preferred_categories[category] = preferred_categories.get(category, 0) + 0.1
+        elif rating <= 2:
+            avoided_categories[category] = avoided_categories.get(category, 0) + 0.1
+    profile.preferred_categories = json.dumps(preferred_categories)
+    profile.avoided_categories = json.dumps(avoided_categories)
+
+    comfort_priorities = json.loads(profile.comfort_priorities) if profile.comfort_priorities else {}
+    comfort_rating = feedback_data.get('comfort_rating')
+    if comfort_rating and comfort_rating >= 4:
+        comfort_priorities['high_comfort_preference'] = comfort_priorities.get('high_comfort_preference', 0) + 0.1
+    elif comfort_rating and comfort_rating <= 2:
+        comfort_priorities['comfort_issues'] = comfort_priorities.get('comfort_issues', 0) + 0.1
+    profile.comfort_priorities = json.dumps(comfort_priorities)
+
+    occasion_field = f"{feedback_data['occasion_actual']}_style_preferences"
+    if hasattr(profile, occasion_field):
+        prefs = json.loads(getattr(profile, occasion_field)) if getattr(profile, occasion_field) else {}
+        if rating >= 4:
+            prefs['successful_combinations'] = prefs.get('successful_combinations', 0) + 1
+        elif rating <= 2:
+            prefs['unsuccessful_combinations'] = prefs.get('unsuccessful_combinations', 0) + 1
+        setattr(profile, occasion_field, json.dumps(prefs))
+    db.session.commit()
+
+
+def legacy_read(profile):
+    return {dimension: json.loads(getattr(profile, dimension)) if getattr(profile, dimension) else {}
+            for dimension in UserStyleProfile.PREFERENCE_DIMENSIONS}
+
+
+def run(label, user_offset, events, update, read, reads):
+    """Each event and read runs in its own session, like a request would"""
+    def load(user_id):
+        return UserStyleProfile.query.filter_by(user_id=user_id * user_offset).first()
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    for user_id, feedback_data in events:
+        update(load(user_id), feedback_data)
+        db.session.remove()
+    ingest_s, ingest_cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+    users = len({user_id for user_id, _ in events})
+    start = time.perf_counter()
+    for i in range(reads):
+        read(load(i % users + 1))
+        db.session.remove()
+    read_s = time.perf_counter() - start
+
+    print(f"{label:<18} ingest {len(events) / ingest_s:7.0f} events/s "
+          f"({ingest_cpu / len(events) * 1e6:6.0f} us CPU/event)   read {reads / read_s:7.0f} profiles/s")
+    return len(events) / ingest_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+    events = build_events(args.users, args.events)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            db.session.add_all([UserStyleProfile(user_id=user_id * sign)
+                                for user_id in range(1, args.users + 1) for sign in (-1, 1)])
+            db.session.commit()
+            db.session.remove()
+
+            print(f"users={args.users} events={args.events} reads={args.reads}")
+            legacy_rate = run('JSON columns', -1, events, legacy_update, legacy_read, args.reads)
+            rows_rate = run('preference rows', 1, events,
+                            lambda profile, data: profile.update_from_feedback(data),
+                            lambda profile: profile.preference_maps(), args.reads)
+            print(f"ingest speedup:        {rows_rate / legacy_rate:8.2f}x")
+            print(f"preference rows:       {StylePreferenceWeight.query.count()}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
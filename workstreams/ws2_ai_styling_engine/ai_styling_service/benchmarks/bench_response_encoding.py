@@ -0,0 +1,102 @@
+"""
+Response encoding benchmark: bytes on the wire and serialization CPU for /smart-outfit
+"We girls have no time" - Smaller payloads, faster encoding!
+
+The payload is produced by the real /api/enhanced/smart-outfit route; only the
+WS1 user-data call is replaced with an in-process wardrobe.
+
+Usage:
+    python benchmarks/bench_response_encoding.py [--wardrobe-size 200] [--runs 500]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.models.user import db
+from src.routes import enhanced_recommendations as routes
+from src.utils import response_encoding
+from src.utils.response_encoding import FastJSONProvider, ResponseEncoder
+from benchmarks.generators import build_wardrobe, seed_rules
+
+
+def smart_outfit_payload(app, wardrobe):
+    routes.verify_auth_token = lambda token: True
+    routes.get_user_data = lambda user_id, auth_token: {'profile': {'id': user_id}, 'wardrobe': wardrobe}
+    app.register_blueprint(routes.enhanced_rec_bp, url_prefix='/api/enhanced')
+    response = app.test_client().post('/api/enhanced/smart-outfit', headers={'Authorization': 'Bearer t'}, json={
+        'user_id': 1, 'occasion': 'work', 'weather': 'rainy', 'temperature': 55, 'include_alternatives': True
+    })
+    return response.get_json()
+
+
+def time_call(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.process_time()
+        func()
+        samples.append((time.process_time() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--wardrobe-size', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            seed_rules()
+            payload = smart_outfit_payload(app, build_wardrobe(args.wardrobe_size))
+            db.session.remove()
+
+        default_json = DefaultJSONProvider(app)
+        fast_json = FastJSONProvider(app)
+        encoder = ResponseEncoder()
+        json_body = fast_json.dumps_bytes(payload)
+
+        # (label, serialize) pairs; each result is then compressed
+        serializers = [('json (stdlib)', lambda: default_json.dumps(payload, separators=(',', ':')).encode('utf-8'))]
+        if response_encoding.orjson is not None:
+            serializers.append(('json (orjson)', lambda: fast_json.dumps_bytes(payload)))
+        if response_encoding.msgpack is not None:
+            serializers.append(('msgpack', lambda: response_encoding.msgpack.packb(payload, use_bin_type=True)))
+
+        print(f"/smart-outfit payload: wardrobe_size={args.wardrobe_size} runs={args.runs} "
+              f"outfit_items={len(payload['outfit_items'])} alternatives={len(payload.get('alternatives', []))}")
+        print(f"{'encoding':<16}{'compression':<13}{'bytes':>8}{'serialize us':>14}{'compress us':>13}{'total us':>10}")
+        for label, serialize in serializers:
+            body = serialize()
+            serialize_us = time_call(serialize, args.runs)
+            for compression in ('identity',) + encoder.available_encodings():
+                if compression == 'identity':
+                    size, compress_us = len(body), 0.0
+                else:
+                    size = len(encoder.compress(body, compression))
+                    compress_us = time_call(lambda: encoder.compress(body, compression), args.runs)
+                print(f"{label:<16}{compression:<13}{size:>8}{serialize_us:>14.1f}{compress_us:>13.1f}"
+                      f"{serialize_us + compress_us:>10.1f}")
+
+        legacy = len(json.dumps(payload, default=str))
+        gzipped = len(gzip.compress(json_body, compresslevel=encoder.gzip_level, mtime=0))
+        print(f"json -> gzip: {legacy} -> {gzipped} bytes ({100 * (1 - gzipped / legacy):.0f}% smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Style-evolution analytics benchmark: raw feedback scan vs weekly rollups
+"We girls have no time" - Measure it before you trust it!
+
+Usage:
+    python benchmarks/bench_style_evolution.py [--users 3] [--feedback-per-user 10000] [--runs 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.enhanced_recommendations import OutfitFeedback, FeedbackWeeklyRollup
+from src.models.personalization import StyleLearningEngine
+
+FEEDBACK_TYPES = ['worn', 'saved', 'dismissed', 'modified']
+
+
+def legacy_style_evolution(user_id, days_back=90):
+    """The previous implementation: load every feedback row and re-bucket by week"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+    feedback_records = OutfitFeedback.query.filter(
+        OutfitFeedback.user_id == user_id,
+        OutfitFeedback.feedback_date >= cutoff_date
+    ).order_by(OutfitFeedback.feedback_date.asc()).all()
+
+    weekly_data = defaultdict(list)
+    for feedback in feedback_records:
+        weekly_data[feedback.feedback_date.strftime('%Y-W%U')].append(feedback)
+
+    timeline = []
+    for week, week_feedback in weekly_data.items():
+        avg_rating = sum(f.rating for f in week_feedback) / len(week_feedback)
+        rating_variance = sum((f.rating - avg_rating) ** 2 for f in week_feedback) / len(week_feedback)
+        timeline.append((week, avg_rating, 1.0 - min(rating_variance / 4.0, 1.0)))
+    exploration = len({f.feedback_type for f in feedback_records}) / len(feedback_records)
+    return timeline, exploration
+
+
+def seed(users, feedback_per_user, days=90):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    rows = []
+    for user_id in range(1, users + 1):
+        for _ in range(feedback_per_user):
+            rows.append({
+                'user_id': user_id,
+                'recommendation_id': 1,
+                'rating': rng.randint(1, 5),
+                'feedback_type': rng.choice(FEEDBACK_TYPES),
+                'feedback_date': now - timedelta(days=rng.uniform(0, days))
+            })
+    db.session.bulk_insert_mappings(OutfitFeedback, rows)
+    db.session.commit()
+
+
+def time_call(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--feedback-per-user', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            seed(args.users, args.feedback_per_user)
+
+            start = time.perf_counter()
+            backfill = FeedbackWeeklyRollup.backfill()
+            backfill_ms = (time.perf_counter() - start) * 1000
+
+            legacy_ms = time_call(lambda: legacy_style_evolution(1), args.runs)
+            rollup_ms = time_call(lambda: StyleLearningEngine.analyze_user_style_evolution(1), args.runs)
+            rollup_rows = len(FeedbackWeeklyRollup.get_user_rollups(1, datetime.utcnow() - timedelta(days=90)))
+
+            print(f"users={args.users} feedback_per_user={args.feedback_per_user} runs={args.runs}")
+            print(f"backfill: {backfill['feedback_rows']} rows -> {backfill['rollups_written']} rollups in {backfill_ms:.1f} ms")
+            print(f"raw feedback scan:  {legacy_ms:8.2f} ms (median)")
+            print(f"weekly rollups:     {rollup_ms:8.2f} ms (median, {rollup_rows} rollup rows read)")
+            print(f"speedup:            {legacy_ms / rollup_ms:8.1f}x")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
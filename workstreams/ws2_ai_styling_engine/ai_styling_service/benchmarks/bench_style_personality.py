@@ -0,0 +1,91 @@
+"""
+Style personality micro-benchmark: per-item rule checks vs compiled lookup tables
+"We girls have no time" - Measure it before you trust it!
+
+Usage:
+    python benchmarks/bench_style_personality.py [--items 5000] [--runs 30]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import build_wardrobe
+from src.models.ai_models import StyleAnalysis, style_personality_rules
+
+PREFERENCES = {'style_preference': 'classic', 'lifestyle': 'professional'}
+
+
+def legacy_style_personality(user_data, wardrobe_data, preferences):
+    """The previous implementation: membership checks per item, str() of every item"""
+    style_scores = {'classic': 0.0, 'edgy': 0.0, 'bohemian': 0.0, 'minimalist': 0.0, 'romantic': 0.0, 'trendy': 0.0}
+    for item in wardrobe_data or []:
+        category = item.get('category', '').lower()
+        colors = [item.get('primary_color', '').lower()]
+        brand = item.get('brand', '').lower()
+        if category in ['blazers', 'trousers', 'button_downs'] or 'black' in colors or 'navy' in colors:
+            style_scores['classic'] += 0.2
+        if category in ['leather_jackets', 'boots', 'ripped_jeans'] or 'black' in colors:
+            style_scores['edgy'] += 0.3
+        if category in ['maxi_dresses', 'kimonos', 'sandals'] or 'earth' in str(colors):
+            style_scores['bohemian'] += 0.25
+        if colors and colors[0] in ['white', 'black', 'grey', 'beige']:
+            style_scores['minimalist'] += 0.2
+        if category in ['dresses', 'skirts', 'blouses'] or 'pink' in colors or 'floral' in str(item):
+            style_scores['romantic'] += 0.2
+        if brand in ['zara', 'h&m', 'forever21'] or category in ['crop_tops', 'high_waisted']:
+            style_scores['trendy'] += 0.25
+    if preferences:
+        style_pref = preferences.get('style_preference', '').lower()
+        if style_pref in style_scores:
+            style_scores[style_pref] += 0.4
+        lifestyle = preferences.get('lifestyle', '').lower()
+        if lifestyle == 'professional':
+            style_scores['classic'] += 0.3
+            style_scores['minimalist'] += 0.2
+        elif lifestyle == 'creative':
+            style_scores['edgy'] += 0.3
+            style_scores['bohemian'] += 0.2
+        elif lifestyle == 'social':
+            style_scores['trendy'] += 0.3
+            style_scores['romantic'] += 0.2
+    dominant_style = max(style_scores, key=style_scores.get)
+    return dominant_style, min(style_scores[dominant_style], 1.0), style_scores
+
+
+def best_ms(func, runs):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    wardrobe = build_wardrobe(args.items)
+
+    legacy_ms = best_ms(lambda: legacy_style_personality({}, wardrobe, PREFERENCES), args.runs)
+    compiled_ms = best_ms(lambda: style_personality_rules.compute_points(wardrobe), args.runs)
+    style_personality_rules.clear()
+    StyleAnalysis.analyze_style_personality({}, wardrobe, PREFERENCES)  # Warm the wardrobe cache
+    cached_ms = best_ms(lambda: StyleAnalysis.analyze_style_personality({}, wardrobe, PREFERENCES), args.runs)
+
+    stats = style_personality_rules.get_stats()
+    print(f"items={args.items} runs={args.runs} sum={stats['sum_backend']} hash={stats['hash_backend']}")
+    print(f"per-item rule checks:      {legacy_ms:10.2f} ms")
+    print(f"compiled lookup tables:    {compiled_ms:10.2f} ms ({legacy_ms / compiled_ms:.1f}x)")
+    if stats['hash_backend']:
+        print(f"cached by wardrobe hash:   {cached_ms:10.2f} ms ({legacy_ms / cached_ms:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
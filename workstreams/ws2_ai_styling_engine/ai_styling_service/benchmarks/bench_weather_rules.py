@@ -0,0 +1,87 @@
+"""
+Weather rule lookup micro-benchmark: database query + string parsing vs in-memory interval index
+"We girls have no time" - Measure it before you trust it!
+
+Usage:
+    python benchmarks/bench_weather_rules.py [--rules 200] [--lookups 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.enhanced_recommendations import WeatherOutfitRule, weather_rule_index
+
+CONDITIONS = ['sunny', 'rainy', 'cold', 'hot', 'windy', 'snowy']
+
+
+def legacy_weather_rules(weather_condition, temperature=None):
+    """The previous implementation: query per call, parse every range string"""
+    rules = WeatherOutfitRule.query.filter_by(
+        weather_condition=weather_condition, active=True
+    ).order_by(WeatherOutfitRule.priority.desc()).all()
+    if temperature and rules:
+        return [rule for rule in rules
+                if not rule.temperature_range or WeatherOutfitRule.temperature_matches(temperature, rule.temperature_range)]
+    return rules
+
+
+def seed(rule_count):
+    rng = random.Random(11)
+    for _ in range(rule_count):
+        low = rng.randint(-10, 90)
+        temp_range = rng.choice([f'below_{low}F', f'above_{low}F', f'{low}-{low + rng.randint(5, 30)}F', None])
+        db.session.add(WeatherOutfitRule(
+            weather_condition=rng.choice(CONDITIONS), temperature_range=temp_range,
+            priority=rng.randint(1, 5), layering_required=rng.random() < 0.3
+        ))
+    db.session.commit()
+
+
+def time_lookups(func, queries):
+    start = time.perf_counter()
+    for condition, temperature in queries:
+        func(condition, temperature)
+    return (time.perf_counter() - start) * 1e6 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            seed(args.rules)
+            rng = random.Random(5)
+            queries = [(rng.choice(CONDITIONS), rng.randint(-20, 110)) for _ in range(args.lookups)]
+
+            legacy_us = time_lookups(legacy_weather_rules, queries[:max(args.lookups // 10, 1)])
+            start = time.perf_counter()
+            weather_rule_index.reload()
+            load_ms = (time.perf_counter() - start) * 1000
+            index_us = time_lookups(WeatherOutfitRule.get_weather_rules, queries)
+
+            print(f"rules={args.rules} lookups={args.lookups}")
+            print(f"database query + parsing:  {legacy_us:10.2f} us/lookup")
+            print(f"interval index:            {index_us:10.2f} us/lookup (index build {load_ms:.2f} ms)")
+            print(f"speedup:                   {legacy_us / index_us:10.1f}x")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
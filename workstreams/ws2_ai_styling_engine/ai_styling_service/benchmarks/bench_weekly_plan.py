@@ -0,0 +1,95 @@
+"""
+Weekly planning benchmark: one 7-slot plan vs a single smart recommendation
+"We girls have no time" - A week of outfits should cost less than two!
+
+Both paths load the user context (style analysis + feedback patterns) from the
+database; WS1 is not called, so the numbers are the WS2-side cost only.
+
+Usage:
+    python benchmarks/bench_weekly_plan.py [--wardrobe-size 200] [--runs 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.ai_models import StyleAnalysis
+from src.models.enhanced_recommendations import OutfitFeedback, SmartRecommendationEngine, WeeklyOutfitPlanner
+from benchmarks.generators import build_wardrobe, seed_rules
+
+WEEK = [
+    {'date': '2025-03-03', 'occasion': 'work', 'weather': 'rainy', 'temperature': 55},
+    {'date': '2025-03-04', 'occasion': 'work', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-05', 'occasion': 'work', 'weather': 'rainy', 'temperature': 55},
+    {'date': '2025-03-06', 'occasion': 'date', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-07', 'occasion': 'party', 'weather': 'cold', 'temperature': 40},
+    {'date': '2025-03-08', 'occasion': 'casual', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-09', 'occasion': 'casual', 'weather': 'sunny', 'temperature': 70},
+]
+
+
+def single_recommendation(user_id, wardrobe):
+    style_analysis = StyleAnalysis.query.filter_by(user_id=user_id).first()
+    style_data = style_analysis.to_dict() if style_analysis else {}
+    feedback_patterns = OutfitFeedback.get_user_feedback_patterns(user_id)
+    slot = WEEK[0]
+    return SmartRecommendationEngine.generate_enhanced_outfit(
+        user_id, wardrobe, style_data, slot['occasion'], slot['weather'], slot['temperature'], None, feedback_patterns
+    )
+
+
+def weekly_plan(user_id, wardrobe):
+    style_analysis = StyleAnalysis.query.filter_by(user_id=user_id).first()
+    style_data = style_analysis.to_dict() if style_analysis else {}
+    feedback_patterns = OutfitFeedback.get_user_feedback_patterns(user_id)
+    return WeeklyOutfitPlanner.plan_week(user_id, wardrobe, style_data, WEEK, feedback_patterns)
+
+
+def time_call(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--wardrobe-size', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            seed_rules()
+            wardrobe = build_wardrobe(args.wardrobe_size)
+
+            single_ms = time_call(lambda: single_recommendation(1, wardrobe), args.runs)
+            week_ms = time_call(lambda: weekly_plan(1, wardrobe), args.runs)
+            naive_ms = time_call(lambda: [single_recommendation(1, wardrobe) for _ in WEEK], max(args.runs // 5, 1))
+
+            ratio = week_ms / single_ms
+            print(f"wardrobe_size={args.wardrobe_size} slots={len(WEEK)} runs={args.runs}")
+            print(f"single recommendation:      {single_ms:8.2f} ms (median)")
+            print(f"7 x single recommendation:  {naive_ms:8.2f} ms (median)")
+            print(f"7-slot weekly plan:         {week_ms:8.2f} ms (median)")
+            print(f"plan / single ratio:        {ratio:8.2f}x (target < 2.0x) {'PASS' if ratio < 2.0 else 'FAIL'}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
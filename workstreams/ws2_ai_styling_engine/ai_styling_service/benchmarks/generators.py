@@ -0,0 +1,124 @@
+"""
+Synthetic data generators for WS2 benchmarks
+"We girls have no time" - Realistic wardrobes and feedback in milliseconds!
+
+Everything is seeded, so the same arguments always produce the same data.
+"""
+
+import json
+import os
+import random
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+
+CATEGORIES = ['tops', 'bottoms', 'blazers', 'shoes', 'accessories', 'outerwear', 'dresses', 'jewelry']
+COLORS = ['white', 'black', 'navy', 'grey', 'beige', 'pink', 'red', 'green', 'blue', 'brown']
+PATTERNS = ['solid', 'floral', 'striped', 'animal print', 'geometric', 'plaid']
+STYLE_WORDS = ['classic', 'edgy leather', 'boho fringe', 'minimal', 'lace romantic', 'trendy statement', 'basic']
+FEEDBACK_TYPES = ['worn', 'saved', 'dismissed', 'modified']
+ASPECTS = ['colors', 'style', 'comfort', 'fit', 'tight_fit', 'occasion_match']
+OCCASIONS = ['work', 'casual', 'date', 'party', 'formal']
+
+
+def build_wardrobe(size, seed=1):
+    """Wardrobe items in the shape WS1 returns"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': item_id,
+            'name': f'{rng.choice(STYLE_WORDS)} {rng.choice(PATTERNS)} item {item_id}',
+            'category': CATEGORIES[item_id % len(CATEGORIES)],
+            'primary_color': rng.choice(COLORS),
+            'pattern': rng.choice(PATTERNS),
+            'brand': f'brand{rng.randint(1, 40)}',
+            'price': round(rng.uniform(10, 400), 2),
+            'favorite': rng.random() < 0.2,
+            'wear_count': rng.randint(0, 50),
+        }
+        for item_id in range(1, size + 1)
+    ]
+
+
+def build_feedback(user_id, count, seed=2, days=90):
+    """OutfitFeedback keyword arguments plus the liked/disliked lists used by the profile"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    feedback = []
+    for _ in range(count):
+        liked = rng.sample(ASPECTS, rng.randint(0, 2))
+        disliked = rng.sample(ASPECTS, rng.randint(0, 1))
+        feedback.append(({
+            'user_id': user_id,
+            'recommendation_id': 1,
+            'rating': rng.randint(1, 5),
+            'feedback_type': rng.choice(FEEDBACK_TYPES),
+            'liked_aspects': json.dumps(liked) if liked else None,
+            'disliked_aspects': json.dumps(disliked) if disliked else None,
+            'comfort_rating': rng.choice([None, 1, 2, 3, 4, 5]),
+            'occasion_actual': rng.choice(OCCASIONS + [None]),
+            'feedback_date': now - timedelta(days=rng.uniform(0, days))
+        }, liked, disliked))
+    return feedback
+
+
+def seed_feedback(user_id, count, seed=2):
+    """Store feedback rows and their profile/rollup aggregates the way /feedback does"""
+    from src.models.enhanced_recommendations import OutfitFeedback, FeedbackWeeklyRollup, UserFeedbackProfile
+
+    for values, liked, disliked in build_feedback(user_id, count, seed):
+        feedback = OutfitFeedback(**values)
+        db.session.add(feedback)
+        FeedbackWeeklyRollup.record_feedback(feedback)
+        UserFeedbackProfile.record_feedback(feedback, liked, disliked)
+    db.session.commit()
+
+
+def seed_rules():
+    """A few weather rules and this season's seasonal recommendation"""
+    from src.models.enhanced_recommendations import WeatherOutfitRule, SeasonalRecommendation
+
+    for condition, temperature_range, layering in [('rainy', '50-65F', True), ('sunny', '60-80F', False),
+                                                   ('cold', 'below_50F', True)]:
+        db.session.add(WeatherOutfitRule(
+            weather_condition=condition, temperature_range=temperature_range,
+            layering_required=layering, preferred_colors=json.dumps(['navy', 'white']), priority=2
+        ))
+    month = datetime.now().month
+    season = 'winter' if month in [12, 1, 2] else 'spring' if month in [3, 4, 5] else 'summer' if month in [6, 7, 8] else 'autumn'
+    db.session.add(SeasonalRecommendation(
+        season=season, year=datetime.now().year,
+        trending_colors=json.dumps(['navy', 'beige']), styling_tips=json.dumps(['Layer light knits'])
+    ))
+    db.session.commit()
+
+
+@contextmanager
+def bench_app(tmp_dir):
+    """Flask app context bound to a throwaway file-backed SQLite database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    # Import AI models to ensure they're registered
+    from src.models import ai_models, enhanced_recommendations, personalization, advanced_ai, trend_snapshot  # noqa: F401
+
+    # Process-wide indexes must not serve rows from another database
+    enhanced_recommendations.weather_rule_index.invalidate()
+    enhanced_recommendations.seasonal_snapshot.invalidate()
+    personalization.style_preference_cache.clear()
+    advanced_ai.wardrobe_optimization_cache.clear()
+    ai_models.style_personality_rules.clear()
+
+    with app.app_context():
+        db.create_all()
+        try:
+            yield app
+        finally:
+            db.session.remove()
@@ -0,0 +1,167 @@
+"""
+Load test: /api/ai/recommend-outfit throughput vs number of serving workers
+"We girls have no time" - More cores, more outfits per second!
+
+Starts `python -m src.serving` with 1, 2, 4 ... workers against a throwaway
+database and drives it with concurrent client processes for a fixed time. The
+route is the real one; only the WS1 user-data call is replaced with an
+in-process wardrobe. Throughput can only scale up to the number of cores, so
+run it on the serving hardware.
+
+Usage:
+    python benchmarks/load_recommend_outfit.py [--workers 1,2,4] [--clients 8] [--duration 5]
+                                               [--wardrobe-size 2000] [--scoring-processes 0]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+OCCASIONS = ['work', 'casual', 'date', 'party', 'formal']
+USERS = 64
+
+
+def create_app():
+    """App factory for `src.serving --app benchmarks.load_recommend_outfit:create_app`"""
+    from flask import Flask
+    from src.models.user import db
+    from src.routes import ai_styling as routes
+    from src.utils.response_encoding import response_encoder
+    from src.models import ai_models, enhanced_recommendations, personalization, advanced_ai, trend_snapshot  # noqa: F401
+    from benchmarks.generators import build_wardrobe
+
+    size = int(os.environ.get('LOAD_TEST_WARDROBE_SIZE', 2000))
+    wardrobes = {user_id: build_wardrobe(size, seed=user_id) for user_id in range(1, USERS + 1)}
+    routes.verify_auth_token = lambda token: True
+    routes.get_user_data = lambda user_id, auth_token: {'profile': {'id': user_id}, 'wardrobe': wardrobes[int(user_id)]}
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.environ['LOAD_TEST_DB']}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    app.register_blueprint(routes.ai_styling_bp, url_prefix='/api/ai')
+    response_encoder.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def run_client(args):
+    """One client process: POST back to back until the deadline, a fresh connection per request"""
+    port, client_id, deadline = args
+    latencies, errors, request_number = [], 0, 0
+    while time.time() < deadline:
+        request_number += 1
+        body = json.dumps({'user_id': (client_id * 7 + request_number) % USERS + 1,
+                           'occasion': OCCASIONS[request_number % len(OCCASIONS)]})
+        start = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            connection.request('POST', '/api/ai/recommend-outfit', body,
+                               {'Content-Type': 'application/json', 'Authorization': 'Bearer load-test'})
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status >= 500:
+                errors += 1
+                continue
+        except OSError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, errors
+
+
+def measure(workers, args, tmp_dir):
+    port = free_port()
+    env = dict(os.environ, LOAD_TEST_DB=os.path.join(tmp_dir, f'load-{workers}.db'),
+               LOAD_TEST_WARDROBE_SIZE=str(args.wardrobe_size),
+               PERFORMANCE_SKETCH_DIR=os.path.join(tmp_dir, f'sketches-{workers}'))
+    server = subprocess.Popen([sys.executable, '-m', 'src.serving', '--app', 'benchmarks.load_recommend_outfit:create_app',
+                               '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+                               '--scoring-processes', str(args.scoring_processes)],
+                              cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, server)
+        with multiprocessing.Pool(args.clients) as clients:
+            clients.map(run_client, [(port, client_id, time.time() + 1) for client_id in range(args.clients)])  # Warm up
+            start = time.time()
+            results = clients.map(run_client, [(port, client_id, start + args.duration)
+                                               for client_id in range(args.clients)])
+            elapsed = time.time() - start
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) if latencies else None,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] if latencies else None
+    }
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} if cpus >= 4 else {1, 2, 4})
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', default=','.join(map(str, default_workers)), help='Comma-separated worker counts')
+    parser.add_argument('--clients', type=int, default=None, help='Concurrent client processes (default: 2x max workers)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds measured per worker count')
+    parser.add_argument('--wardrobe-size', type=int, default=2000)
+    parser.add_argument('--scoring-processes', type=int, default=0, help='Scoring pool processes per worker')
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',')]
+    args.clients = args.clients or 2 * max(worker_counts)
+
+    print(f"cpus={cpus} clients={args.clients} duration={args.duration}s wardrobe={args.wardrobe_size} "
+          f"scoring_processes={args.scoring_processes}")
+    if max(worker_counts) > cpus:
+        print(f"warning: only {cpus} CPU(s) available; throughput cannot scale beyond {cpus} worker(s) here")
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in worker_counts:
+            result = measure(workers, args, tmp_dir)
+            baseline = baseline or result['throughput']
+            print(f"{workers:>8} {result['throughput']:>10.1f} {result['throughput'] / baseline:>7.2f}x "
+                  f"{result['p50_ms'] or 0:>9.1f} {result['p95_ms'] or 0:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+WS2 benchmark suite: real hot paths across wardrobe sizes, compared against stored baselines
+"We girls have no time" - Catch slowdowns before our users do!
+
+Each case times one production code path on seeded synthetic data (see
+benchmarks/generators.py) against a throwaway SQLite database. Paths with a
+result cache are timed cold: every sample clears the cache or uses a new
+user, so the numbers track the computation rather than a lookup. Results are
+written as JSON and compared with benchmarks/baselines.json; a case regresses
+when its best time (or median, with --statistic median_ms) grows by more than
+--threshold and by more than --min-delta-ms. The best time is the least noisy
+statistic on shared machines. Baselines are scaled by a CPU calibration loop so
+a baseline recorded on one machine stays usable on another.
+
+Usage:
+    python benchmarks/suite.py                      # run and compare, exit 1 on regression
+    python benchmarks/suite.py --save-baseline      # record new baselines
+    python benchmarks/suite.py --sizes 50 200 --cases generate_outfit_recommendation --runs 80
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import bench_app, build_wardrobe, seed_feedback, seed_rules
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baselines.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'results', 'latest.json')
+DEFAULT_SIZES = (50, 200, 1000)
+DEFAULT_RUNS = 40
+
+CASES = {}
+
+
+def case(name):
+    """
+    Register a benchmark case: setup(size) returns the zero-argument callable to time,
+    or (callable, reset) where reset() runs untimed before every sample
+    """
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+@case('analyze_style_personality')
+def _analyze_style_personality(size):
+    from src.models.ai_models import StyleAnalysis, style_personality_rules
+    wardrobe = build_wardrobe(size)
+    preferences = {'style_preference': 'classic', 'lifestyle': 'professional'}
+    # Drop the cached wardrobe points so each sample classifies the wardrobe
+    return lambda: StyleAnalysis.analyze_style_personality({}, wardrobe, preferences), style_personality_rules.clear
+
+
+@case('generate_outfit_recommendation')
+def _generate_outfit_recommendation(size):
+    from src.models.ai_models import OutfitRecommendation
+    wardrobe = build_wardrobe(size)
+    style = {'style_personality': 'classic'}
+    return lambda: OutfitRecommendation.generate_outfit_recommendation(size, wardrobe, style, 'work')
+
+
+@case('generate_enhanced_outfit')
+def _generate_enhanced_outfit(size):
+    from src.models.enhanced_recommendations import OutfitFeedback, SmartRecommendationEngine
+    wardrobe = build_wardrobe(size)
+    seed_feedback(size, 50)
+    patterns = OutfitFeedback.get_user_feedback_patterns(size)
+    style = {'style_personality': 'classic'}
+    return lambda: SmartRecommendationEngine.generate_enhanced_outfit(
+        size, wardrobe, style, 'work', 'rainy', 55, None, patterns
+    )
+
+
+@case('analyze_wardrobe_optimization')
+def _analyze_wardrobe_optimization(size):
+    from src.models.advanced_ai import AdvancedAIEngine
+    wardrobe = build_wardrobe(size)
+    # A new user per sample: no cached or stored result, so every sample is a full analysis
+    user_ids = itertools.count(size * 1000000)
+    return lambda: AdvancedAIEngine.analyze_wardrobe_optimization(next(user_ids), wardrobe)
+
+
+@case('get_user_feedback_patterns')
+def _get_user_feedback_patterns(size):
+    from src.models.enhanced_recommendations import OutfitFeedback
+    # `size` feedback events for this user
+    seed_feedback(100000 + size, size)
+    return lambda: OutfitFeedback.get_user_feedback_patterns(100000 + size)
+
+
+def measure(func, runs, warmup=2, reset=None):
+    """Wall-clock samples in milliseconds after `warmup` untimed calls; `reset` runs untimed before each call"""
+    for _ in range(warmup):
+        if reset:
+            reset()
+        func()
+    samples = []
+    for _ in range(runs):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'median_ms': statistics.median(samples),
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'min_ms': samples[0],
+        'mean_ms': statistics.fmean(samples),
+        'runs': runs
+    }
+
+
+def calibrate(rounds=15):
+    """Best time of a fixed pure-Python loop, used to scale baselines across machines"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        sum(i * i for i in range(200000))
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def run_suite(sizes=DEFAULT_SIZES, cases=None, runs=DEFAULT_RUNS):
+    """Run the selected cases for every size; returns the results document"""
+    selected = cases or list(CASES)
+    unknown = set(selected) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, bench_app(tmp_dir):
+        seed_rules()
+        for name in selected:
+            for size in sizes:
+                timed = CASES[name](size)
+                func, reset = timed if isinstance(timed, tuple) else (timed, None)
+                results[f'{name}[{size}]'] = {'case': name, 'size': size, **measure(func, runs, reset=reset)}
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'calibration_ms': calibrate(),
+            'runs': runs,
+            'sizes': list(sizes)
+        },
+        'results': results
+    }
+
+
+def compare(report, baseline, threshold=0.5, min_delta_ms=0.25, statistic='min_ms'):
+    """Compare one timing statistic with the baseline; returns {'regressions', 'improvements', 'cases', ...}"""
+    scale = 1.0
+    if baseline['meta'].get('calibration_ms') and report['meta'].get('calibration_ms'):
+        scale = report['meta']['calibration_ms'] / baseline['meta']['calibration_ms']
+
+    cases = {}
+    for key, result in report['results'].items():
+        base = baseline['results'].get(key)
+        if not base:
+            cases[key] = {'status': 'new'}
+            continue
+        expected = base[statistic] * scale
+        delta = result[statistic] - expected
+        status = 'ok'
+        if delta > max(expected * threshold, min_delta_ms):
+            status = 'regression'
+        elif -delta > max(expected * threshold, min_delta_ms):
+            status = 'improvement'
+        cases[key] = {
+            'status': status,
+            'baseline_ms': round(expected, 4),
+            'current_ms': round(result[statistic], 4),
+            'ratio': round(result[statistic] / expected, 3) if expected else None
+        }
+
+    return {
+        'statistic': statistic,
+        'threshold': threshold,
+        'min_delta_ms': min_delta_ms,
+        'calibration_scale': round(scale, 3),
+        'regressions': sorted(key for key, value in cases.items() if value['status'] == 'regression'),
+        'improvements': sorted(key for key, value in cases.items() if value['status'] == 'improvement'),
+        'cases': cases
+    }
+
+
+def write_json(path, document):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(document, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=None)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--statistic', choices=['min_ms', 'median_ms'], default='min_ms')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Allowed slowdown (0.5 = 50%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.25, help='Ignore slowdowns smaller than this')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.cases, args.runs)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        report['comparison'] = compare(report, baseline, args.threshold, args.min_delta_ms, args.statistic)
+
+    print(f"runs={args.runs} calibration={report['meta']['calibration_ms']:.2f} ms")
+    print(f"{'case':<44}{'median ms':>11}{'p95 ms':>10}{'min ms':>10}{'baseline':>10}{'ratio':>8}  status")
+    for key, result in report['results'].items():
+        outcome = report.get('comparison', {}).get('cases', {}).get(key, {})
+        baseline_ms = f"{outcome['baseline_ms']:.3f}" if 'baseline_ms' in outcome else '-'
+        ratio = f"{outcome['ratio']:.2f}x" if outcome.get('ratio') else '-'
+        print(f"{key:<44}{result['median_ms']:>11.3f}{result['p95_ms']:>10.3f}{result['min_ms']:>10.3f}{baseline_ms:>10}{ratio:>8}  "
+              f"{outcome.get('status', 'no baseline')}")
+
+    write_json(args.output, report)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, {'meta': report['meta'], 'results': report['results']})
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    regressions = report.get('comparison', {}).get('regressions', [])
+    if regressions:
+        print(f"REGRESSIONS beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
 from datetime import datetime
@@ -13,6 +14,8 @@ from src.routes.enhanced_recommendations import enhanced_rec_bp
 from src.routes.personalization import personalization_bp
 from src.routes.advanced_ai import advanced_ai_bp
 from src.routes.performance import performance_bp
+from src.utils.response_encoding import response_encoder
+from src.utils.write_behind import write_behind
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'tanvi_ai_styling_secret_key_2025'
@@ -28,20 +31,58 @@ app.register_blueprint(personalization_bp, url_prefix='/api/personalized')
 app.register_blueprint(advanced_ai_bp, url_prefix='/api/advanced')
 app.register_blueprint(performance_bp, url_prefix='/api/performance')
 
+# Fast JSON, MessagePack via Accept and gzip/brotli compression for every blueprint
+response_encoder.init_app(app)
+
 # Database configuration
+os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
 # Import AI models to ensure they're registered
 from src.models.ai_models import StyleAnalysis, OutfitRecommendation, AIInsight
-from src.models.enhanced_recommendations import WeatherOutfitRule, SeasonalRecommendation, OutfitFeedback
-from src.models.personalization import UserStyleProfile
-from src.models.advanced_ai import TrendForecast, WardrobeOptimization, StyleCompatibility, PredictiveRecommendation
+from src.models.enhanced_recommendations import WeatherOutfitRule, SeasonalRecommendation, OutfitFeedback, FeedbackWeeklyRollup, UserFeedbackProfile
+from src.models.personalization import UserStyleProfile, StylePreferenceWeight
+from src.models.advanced_ai import TrendForecast, WardrobeOptimization, WardrobeOptimizationState, StyleCompatibility, PredictiveRecommendation
+from src.models.trend_snapshot import TrendForecastSnapshot, TrendForecastScheduler
 
 with app.app_context():
     db.create_all()
 
+@app.cli.command('backfill-feedback-rollups')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rollups for this user')
+def backfill_feedback_rollups(user_id):
+    """Rebuild weekly style-evolution rollups from raw outfit feedback"""
+    result = FeedbackWeeklyRollup.backfill(user_id=user_id)
+    click.echo(f"Rolled up {result['feedback_rows']} feedback rows into "
+               f"{result['rollups_written']} weekly rollups for {result['users']} users")
+
+@app.cli.command('backfill-feedback-profiles')
+@click.option('--user-id', type=int, default=None, help='Only rebuild the profile for this user')
+def backfill_feedback_profiles(user_id):
+    """Rebuild persisted per-user feedback profiles from raw outfit feedback"""
+    result = UserFeedbackProfile.backfill(user_id=user_id)
+    click.echo(f"Replayed {result['feedback_rows']} feedback rows into "
+               f"{result['profiles_written']} feedback profiles")
+
+@app.cli.command('migrate-style-preferences')
+@click.option('--user-id', type=int, default=None, help='Only migrate the profile for this user')
+@click.option('--batch-size', type=int, default=500, help='Profiles converted per transaction')
+def migrate_style_preferences(user_id, batch_size):
+    """Move JSON style-profile preference maps into typed preference weight rows"""
+    result = StylePreferenceWeight.migrate_legacy_profiles(user_id=user_id, batch_size=batch_size)
+    click.echo(f"Migrated {result['profiles_migrated']} style profiles into "
+               f"{result['weights_written']} preference weight rows")
+
+# Persist predictions and compatibility results off the request path (set WRITE_BEHIND=0 to disable)
+if os.environ.get('WRITE_BEHIND', '1') != '0':
+    write_behind.init_app(app)
+
+# Precompute trend forecasts off the request path (set TREND_FORECAST_SCHEDULER=0 to disable)
+if os.environ.get('TREND_FORECAST_SCHEDULER', '1') != '0':
+    trend_forecast_scheduler = TrendForecastScheduler(app).start()
+
 # Service information endpoints
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -99,6 +140,7 @@ def service_info():
             'style_analysis': '/api/ai/analyze-style',
             'outfit_recommendations': '/api/ai/recommend-outfit',
             'smart_outfit': '/api/enhanced/smart-outfit',
+            'weekly_plan': '/api/enhanced/weekly-plan',
             'personalized_outfit': '/api/personalized/personalized-outfit',
             'style_profile': '/api/personalized/style-profile',
             'style_insights': '/api/personalized/style-insights',
@@ -147,7 +189,7 @@ def service_info():
             'advanced_caching': 'Multi-layer caching with intelligent TTL and LRU eviction',
             'performance_monitoring': 'Real-time performance tracking with detailed metrics',
             'response_optimization': 'Intelligent response compression and pagination',
-            'benchmark_testing': 'Comprehensive performance benchmark capabilities',
+            'benchmark_testing': 'Reproducible benchmark suite over the real hot paths with baseline regression checks',
             'cache_management': 'Smart cache invalidation and optimization',
             'health_monitoring': 'Continuous performance health assessment'
         },
@@ -214,10 +256,10 @@ def features_overview():
                 'features': ['Data compression', 'Pagination', 'Field optimization', 'Mobile optimization']
             },
             'benchmark_testing': {
-                'description': 'Comprehensive performance benchmark testing and analysis',
-                'test_types': '3 benchmark levels',
-                'performance_scoring': 'Automated',
-                'features': ['Cache benchmarks', 'Response benchmarks', 'Stress testing', 'Performance scoring']
+                'description': 'Standalone benchmark suite (benchmarks/suite.py) over the real AI hot paths',
+                'wardrobe_sizes': '50, 200 and 1000 items by default',
+                'regression_detection': 'Stored JSON baselines with a configurable threshold',
+                'features': ['Synthetic wardrobe/feedback generators', 'Calibrated baselines', 'Regression flags', 'Latest results via /benchmark']
             },
             'trend_forecasting': {
                 'description': 'AI-powered trend prediction with confidence scoring and lifecycle tracking',
@@ -343,7 +385,7 @@ def features_overview():
             'cache_management': 'Advanced LRU cache with intelligent TTL and pattern-based invalidation',
             'performance_monitoring': 'Real-time tracking with percentile analysis and slow query detection',
             'response_optimization': 'Multi-level compression with mobile optimization and pagination',
-            'benchmark_testing': 'Comprehensive performance testing with automated scoring',
+            'benchmark_testing': 'Benchmark suite over real hot paths with baseline regression detection',
             'health_monitoring': 'Continuous health assessment with optimization recommendations',
             'memory_optimization': 'Efficient memory usage with automatic cleanup and optimization'
         },
@@ -393,5 +435,7 @@ def serve(path):
             return "index.html not found", 404
 
 
+# Development server; for production use the preforked multi-process mode:
+#   python -m src.serving --workers 4 --scoring-processes 2
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
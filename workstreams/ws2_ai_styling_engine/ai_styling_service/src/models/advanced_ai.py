@@ -1,12 +1,18 @@
 from datetime import datetime, date, timedelta
+import copy
+import hashlib
 import json
 import math
 import random
-from collections import defaultdict, Counter
+import threading
+import time
+from collections import defaultdict, Counter, OrderedDict
 from src.models.user import db
 from src.models.ai_models import StyleAnalysis, OutfitRecommendation, AIInsight
-from src.models.enhanced_recommendations import OutfitFeedback, WeatherOutfitRule, SeasonalRecommendation
+from src.models.enhanced_recommendations import OutfitFeedback, WeatherOutfitRule, SeasonalRecommendation, SeasonalSnapshot
 from src.models.personalization import UserStyleProfile
+from src.utils.performance_cache import coalesced
+from src.utils.write_behind import write_behind
 
 class TrendForecast(db.Model):
     """
@@ -79,24 +85,21 @@ class TrendForecast(db.Model):
     
     @staticmethod
     def get_current_trends(limit=10):
-        """Get currently trending items"""
-        return TrendForecast.query.filter(
-            TrendForecast.status.in_(['trending', 'peak'])
-        ).order_by(TrendForecast.trend_strength.desc()).limit(limit).all()
+        """Get currently trending items (served from the trend snapshot)"""
+        from src.models.trend_snapshot import trend_snapshot_store
+        return trend_snapshot_store.current().current_trends(limit)
     
     @staticmethod
     def get_emerging_trends(limit=5):
-        """Get emerging trends to watch"""
-        return TrendForecast.query.filter(
-            TrendForecast.status == 'emerging'
-        ).order_by(TrendForecast.confidence_score.desc()).limit(limit).all()
+        """Get emerging trends to watch (served from the trend snapshot)"""
+        from src.models.trend_snapshot import trend_snapshot_store
+        return trend_snapshot_store.current().emerging_trends(limit)
     
     @staticmethod
     def get_predicted_trends(limit=5):
-        """Get predicted future trends"""
-        return TrendForecast.query.filter(
-            TrendForecast.status == 'predicted'
-        ).order_by(TrendForecast.confidence_score.desc()).limit(limit).all()
+        """Get predicted future trends (served from the trend snapshot)"""
+        from src.models.trend_snapshot import trend_snapshot_store
+        return trend_snapshot_store.current().predicted_trends(limit)
 
 
 class WardrobeOptimization(db.Model):
@@ -175,6 +178,208 @@ class WardrobeOptimization(db.Model):
         }
 
 
+class WardrobeOptimizationState(db.Model):
+    """
+    Composition counters behind a user's latest wardrobe optimization
+    "We girls have no time" - Only re-analyze what changed!
+    """
+    __tablename__ = 'wardrobe_optimization_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, unique=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # WardrobeComposition.content_hash()
+    total_items = db.Column(db.Integer, default=0)
+    item_counts = db.Column(db.Text, nullable=False)  # JSON: [[category, primary_color, count], ...]
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<WardrobeOptimizationState {self.user_id}:{self.content_hash[:12]}>'
+
+
+class WardrobeComposition:
+    """
+    Counter state for wardrobe optimization analysis
+    "We girls have no time" - Count once, update only what changed!
+    
+    The analysis only reads each item's category and primary color, so a wardrobe
+    is summarized as counts of (category, primary_color) pairs. Running totals for
+    every score are kept alongside and adjusted per changed pair. If the analysis
+    starts reading other item fields, add them to `item_key`.
+    """
+    
+    def __init__(self, pairs=None):
+        self.pairs = Counter()
+        self.total_items = 0
+        self.category_counts = Counter()
+        self.color_counts = Counter()
+        self.versatility_halves = 0  # Versatility points in halves (items score 0, 0.5 or 1)
+        self.efficient_items = 0     # Items scoring 1.0 efficiency; the rest score 0.7
+        self.style_themes = Counter()
+        for pair, count in (pairs or {}).items():
+            self._apply(pair, count)
+    
+    @staticmethod
+    def item_key(item):
+        return (item.get('category', 'unknown'), item.get('primary_color', 'unknown'))
+    
+    @staticmethod
+    def count_pairs(wardrobe_items):
+        return Counter(WardrobeComposition.item_key(item) for item in wardrobe_items)
+    
+    @staticmethod
+    def hash_pairs(pairs):
+        """Stable content hash of a pair Counter (independent of item order and unread fields)"""
+        canonical = sorted(([category, color, count] for (category, color), count in pairs.items() if count > 0),
+                           key=lambda entry: json.dumps(entry, default=str))
+        return hashlib.sha256(json.dumps(canonical, default=str).encode('utf-8')).hexdigest()
+    
+    def content_hash(self):
+        return self.hash_pairs(self.pairs)
+    
+    def _apply(self, pair, count):
+        """Add (or with a negative count, remove) `count` items with this (category, color)"""
+        category, color = pair
+        category_name = (category or '').lower()
+        color_name = (color or '').lower()
+        
+        for counter, key in ((self.pairs, pair), (self.category_counts, category), (self.color_counts, color)):
+            counter[key] += count
+            if counter[key] <= 0:
+                del counter[key]
+        
+        self.total_items += count
+        self.versatility_halves += count * int(AdvancedAIEngine._versatility_points(category_name, color_name) * 2)
+        if AdvancedAIEngine._efficiency_points(category_name) == 1:
+            self.efficient_items += count
+        for theme in AdvancedAIEngine._style_themes(category_name, color_name):
+            self.style_themes[theme] += count
+            if self.style_themes[theme] <= 0:
+                del self.style_themes[theme]
+    
+    def update(self, pairs):
+        """Move to a new pair Counter by applying only the differences; returns the number of changed pairs"""
+        changed = 0
+        for pair in set(self.pairs) | set(pairs):
+            delta = pairs.get(pair, 0) - self.pairs.get(pair, 0)
+            if delta:
+                self._apply(pair, delta)
+                changed += 1
+        return changed
+    
+    def copy(self):
+        clone = WardrobeComposition()
+        clone.pairs = Counter(self.pairs)
+        clone.total_items = self.total_items
+        clone.category_counts = Counter(self.category_counts)
+        clone.color_counts = Counter(self.color_counts)
+        clone.versatility_halves = self.versatility_halves
+        clone.efficient_items = self.efficient_items
+        clone.style_themes = Counter(self.style_themes)
+        return clone
+    
+    def to_json(self):
+        return json.dumps([[category, color, count] for (category, color), count in self.pairs.items()])
+    
+    @staticmethod
+    def from_json(raw):
+        return WardrobeComposition({(category, color): count for category, color, count in json.loads(raw)})
+    
+    def analysis(self):
+        """Scores, gaps and recommendations, as analyze_wardrobe_optimization reports them"""
+        total = self.total_items
+        efficiency = (self.efficient_items + 0.7 * (total - self.efficient_items)) / total if total else 0.0
+        if not total:
+            coherence = 0.0
+        elif self.style_themes:
+            coherence = min(max(self.style_themes.values()) / total, 1.0)
+        else:
+            coherence = 0.5  # Neutral score if no clear style
+        
+        missing_essentials = AdvancedAIEngine._identify_missing_essentials(self.category_counts)
+        color_gaps = AdvancedAIEngine._identify_color_gaps(self.color_counts)
+        return {
+            'total_items': total,
+            'category_distribution': dict(self.category_counts),
+            'color_distribution': dict(self.color_counts),
+            'versatility_score': min(self.versatility_halves / 2 / total, 1.0) if total else 0.0,
+            'completeness_score': AdvancedAIEngine._calculate_completeness_score(self.category_counts),
+            'efficiency_score': min(efficiency, 1.0),
+            'style_coherence_score': coherence,
+            'missing_essentials': missing_essentials,
+            'color_gaps': color_gaps,
+            'styling_opportunities': AdvancedAIEngine._styling_opportunities_from_counts(
+                self.category_counts, self.color_counts
+            ),
+            'priority_purchases': AdvancedAIEngine._generate_priority_purchases(missing_essentials, color_gaps)
+        }
+
+
+class WardrobeOptimizationCache:
+    """
+    Per-user wardrobe optimization results keyed by wardrobe content hash
+    "We girls have no time" - Same wardrobe, same answer, no recompute!
+    """
+    
+    def __init__(self, max_users=2000):
+        self.max_users = max_users
+        self.entries = OrderedDict()  # user_id -> (content_hash, result, composition)
+        self.lock = threading.Lock()
+        
+        self.counts = {'memory_hit': 0, 'stored_hit': 0, 'incremental': 0, 'full': 0}
+        self.changed_pairs = 0
+        self.full_seconds = 0.0
+        self.full_items = 0
+        self.time_saved = 0.0
+    
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                self.entries.move_to_end(user_id)
+            return entry
+    
+    def put(self, user_id, content_hash, result, composition):
+        with self.lock:
+            self.entries[user_id] = (content_hash, result, composition)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def record(self, mode, total_items, elapsed, changed_pairs=0):
+        """Count how a result was produced and estimate the time saved against a full analysis"""
+        with self.lock:
+            self.counts[mode] += 1
+            self.changed_pairs += changed_pairs
+            if mode == 'full':
+                self.full_seconds += elapsed
+                self.full_items += total_items
+            elif self.full_items:
+                self.time_saved += max(self.full_seconds / self.full_items * total_items - elapsed, 0.0)
+    
+    def get_stats(self):
+        requests = sum(self.counts.values())
+        return {
+            'cached_users': len(self.entries),
+            'max_users': self.max_users,
+            'requests': requests,
+            'memory_hits': self.counts['memory_hit'],
+            'stored_hits': self.counts['stored_hit'],
+            'incremental_recomputes': self.counts['incremental'],
+            'full_recomputes': self.counts['full'],
+            'hit_rate': (self.counts['memory_hit'] + self.counts['stored_hit']) / requests if requests else 0.0,
+            'changed_pairs_applied': self.changed_pairs,
+            'full_compute_seconds_per_item': self.full_seconds / self.full_items if self.full_items else None,
+            'compute_time_saved_seconds': round(self.time_saved, 6)
+        }
+
+# Global wardrobe optimization cache
+wardrobe_optimization_cache = WardrobeOptimizationCache()
+
+
 class StyleCompatibility(db.Model):
     """
     Advanced style compatibility and matching analysis
@@ -303,11 +508,42 @@ class AdvancedAIEngine:
     "We girls have no time" - Next-generation AI styling intelligence!
     """
     
+    # Compatibility tables, built once at import and shared by every request
+    # (and copy-on-write by preforked serving workers)
+    HARMONIOUS_COLOR_PAIRS = {
+        ('black', 'white'): 1.0,
+        ('navy', 'white'): 0.9,
+        ('gray', 'white'): 0.9,
+        ('black', 'gray'): 0.8,
+        ('navy', 'cream'): 0.8,
+        ('brown', 'cream'): 0.8,
+        ('blue', 'white'): 0.9,
+        ('red', 'black'): 0.7,
+        ('green', 'brown'): 0.7
+    }
+    NEUTRAL_COLORS = frozenset(['black', 'white', 'gray', 'beige', 'cream', 'navy'])
+    COMPATIBLE_CATEGORY_PAIRS = {
+        ('blazer', 'jeans'): 0.9,
+        ('blazer', 'dress pants'): 1.0,
+        ('cardigan', 'dress'): 0.8,
+        ('t-shirt', 'jeans'): 0.9,
+        ('blouse', 'skirt'): 0.9,
+        ('sweater', 'jeans'): 0.8,
+        ('dress', 'jacket'): 0.8
+    }
+    FORMAL_CATEGORIES = frozenset(['blazer', 'dress pants', 'blouse', 'dress shirt'])
+    CASUAL_CATEGORIES = frozenset(['jeans', 't-shirt', 'sneakers', 'hoodie'])
+    FORMALITY_SCORES = {
+        'suit': 1.0, 'blazer': 0.8, 'dress pants': 0.8, 'blouse': 0.7,
+        'dress': 0.6, 'cardigan': 0.5, 'jeans': 0.3, 't-shirt': 0.2,
+        'sneakers': 0.2, 'hoodie': 0.1
+    }
+    
     @staticmethod
-    def generate_trend_forecast(trend_data=None):
+    def compute_trend_forecasts():
         """
-        Generate AI-powered trend forecasts
-        "We girls have no time" - Know trends before they happen!
+        Compute trend forecasts without touching the database
+        "We girls have no time" - Pure trend math, no writes!
         """
         # Sample trend forecasts (in production, this would use real trend data)
         sample_trends = [
@@ -355,11 +591,48 @@ class AdvancedAIEngine:
             }
         ]
         
+        return sample_trends
+    
+    @staticmethod
+    def build_trend_row(trend_data):
+        """Build an unsaved TrendForecast row from a computed forecast"""
+        return TrendForecast(
+            trend_name=trend_data['trend_name'],
+            trend_category=trend_data['trend_category'],
+            confidence_score=trend_data['confidence_score'],
+            trend_strength=trend_data['trend_strength'],
+            adoption_speed=trend_data['adoption_speed'],
+            description=trend_data['description'],
+            styling_tips=json.dumps(trend_data['styling_tips']),
+            color_palette=json.dumps(trend_data['color_palette']),
+            target_demographics=json.dumps(trend_data['target_demographics']),
+            style_compatibility=json.dumps(trend_data['style_compatibility']),
+            seasonal_relevance=json.dumps(trend_data['seasonal_relevance']),
+            status=trend_data['status']
+        )
+    
+    @staticmethod
+    @coalesced(key_prefix='advanced_ai.')
+    def generate_trend_forecast(trend_data=None):
+        """
+        Generate AI-powered trend forecasts and persist them
+        "We girls have no time" - Know trends before they happen!
+        
+        Write path only - run by the trend snapshot refresh job, never per request.
+        """
+        sample_trends = AdvancedAIEngine.compute_trend_forecasts()
+        
+        # Load all existing trends in one query instead of one per trend
+        existing_trends = {
+            trend.trend_name: trend for trend in TrendForecast.query.filter(
+                TrendForecast.trend_name.in_([trend['trend_name'] for trend in sample_trends])
+            ).all()
+        }
+        
         # Create or update trend forecasts
         forecasts = []
         for trend_data in sample_trends:
-            # Check if trend already exists
-            existing_trend = TrendForecast.query.filter_by(trend_name=trend_data['trend_name']).first()
+            existing_trend = existing_trends.get(trend_data['trend_name'])
             
             if existing_trend:
                 # Update existing trend
@@ -370,20 +643,7 @@ class AdvancedAIEngine:
                 forecasts.append(existing_trend)
             else:
                 # Create new trend forecast
-                new_trend = TrendForecast(
-                    trend_name=trend_data['trend_name'],
-                    trend_category=trend_data['trend_category'],
-                    confidence_score=trend_data['confidence_score'],
-                    trend_strength=trend_data['trend_strength'],
-                    adoption_speed=trend_data['adoption_speed'],
-                    description=trend_data['description'],
-                    styling_tips=json.dumps(trend_data['styling_tips']),
-                    color_palette=json.dumps(trend_data['color_palette']),
-                    target_demographics=json.dumps(trend_data['target_demographics']),
-                    style_compatibility=json.dumps(trend_data['style_compatibility']),
-                    seasonal_relevance=json.dumps(trend_data['seasonal_relevance']),
-                    status=trend_data['status']
-                )
+                new_trend = AdvancedAIEngine.build_trend_row(trend_data)
                 db.session.add(new_trend)
                 forecasts.append(new_trend)
         
@@ -391,6 +651,7 @@ class AdvancedAIEngine:
         return [trend.to_dict() for trend in forecasts]
     
     @staticmethod
+    @coalesced(key_prefix='advanced_ai.')
     def analyze_wardrobe_optimization(user_id, wardrobe_items):
         """
         Perform comprehensive wardrobe optimization analysis
@@ -403,28 +664,42 @@ class AdvancedAIEngine:
                 'recommendation': 'Start building your wardrobe with essential pieces'
             }
         
-        # Analyze wardrobe composition
-        total_items = len(wardrobe_items)
-        category_counts = Counter(item.get('category', 'unknown') for item in wardrobe_items)
-        color_counts = Counter(item.get('primary_color', 'unknown') for item in wardrobe_items)
+        start_time = time.perf_counter()
+        pairs = WardrobeComposition.count_pairs(wardrobe_items)
+        content_hash = WardrobeComposition.hash_pairs(pairs)
         
-        # Calculate optimization scores
-        versatility_score = AdvancedAIEngine._calculate_versatility_score(wardrobe_items)
-        completeness_score = AdvancedAIEngine._calculate_completeness_score(category_counts)
-        efficiency_score = AdvancedAIEngine._calculate_efficiency_score(wardrobe_items)
-        style_coherence_score = AdvancedAIEngine._calculate_style_coherence_score(wardrobe_items)
+        # Unchanged wardrobe: serve the result computed for this content
+        cached = wardrobe_optimization_cache.get(user_id)
+        if cached and cached[0] == content_hash:
+            wardrobe_optimization_cache.record('memory_hit', len(wardrobe_items), time.perf_counter() - start_time)
+            return copy.deepcopy(cached[1])
         
-        # Identify gaps and opportunities
-        missing_essentials = AdvancedAIEngine._identify_missing_essentials(category_counts)
-        color_gaps = AdvancedAIEngine._identify_color_gaps(color_counts)
-        styling_opportunities = AdvancedAIEngine._identify_styling_opportunities(wardrobe_items)
+        state = WardrobeOptimizationState.query.filter_by(user_id=user_id).first()
+        existing_optimization = WardrobeOptimization.query.filter_by(user_id=user_id).first()
+        if state and existing_optimization and state.content_hash == content_hash:
+            result = existing_optimization.to_dict()
+            wardrobe_optimization_cache.put(user_id, content_hash, result, WardrobeComposition.from_json(state.item_counts))
+            wardrobe_optimization_cache.record('stored_hit', len(wardrobe_items), time.perf_counter() - start_time)
+            return copy.deepcopy(result)
         
-        # Generate recommendations
-        priority_purchases = AdvancedAIEngine._generate_priority_purchases(missing_essentials, color_gaps)
+        # Changed wardrobe: apply only the changed (category, color) counts to the previous state
+        if cached:
+            composition = cached[2].copy()
+        elif state:
+            composition = WardrobeComposition.from_json(state.item_counts)
+        else:
+            composition = None
         
-        # Create or update optimization record
-        existing_optimization = WardrobeOptimization.query.filter_by(user_id=user_id).first()
+        if composition is not None:
+            changed_pairs = composition.update(pairs)
+            mode = 'incremental'
+        else:
+            composition = WardrobeComposition(pairs)
+            changed_pairs = len(pairs)
+            mode = 'full'
+        analysis = composition.analysis()
         
+        # Create or update optimization record
         if existing_optimization:
             # Update existing record
             optimization = existing_optimization
@@ -435,21 +710,33 @@ class AdvancedAIEngine:
             db.session.add(optimization)
         
         # Update optimization data
-        optimization.total_items = total_items
-        optimization.category_distribution = json.dumps(dict(category_counts))
-        optimization.color_distribution = json.dumps(dict(color_counts))
-        optimization.versatility_score = versatility_score
-        optimization.completeness_score = completeness_score
-        optimization.efficiency_score = efficiency_score
-        optimization.style_coherence_score = style_coherence_score
-        optimization.missing_essentials = json.dumps(missing_essentials)
-        optimization.color_gaps = json.dumps(color_gaps)
-        optimization.styling_opportunities = json.dumps(styling_opportunities)
-        optimization.priority_purchases = json.dumps(priority_purchases)
+        optimization.total_items = analysis['total_items']
+        optimization.category_distribution = json.dumps(analysis['category_distribution'])
+        optimization.color_distribution = json.dumps(analysis['color_distribution'])
+        optimization.versatility_score = analysis['versatility_score']
+        optimization.completeness_score = analysis['completeness_score']
+        optimization.efficiency_score = analysis['efficiency_score']
+        optimization.style_coherence_score = analysis['style_coherence_score']
+        optimization.missing_essentials = json.dumps(analysis['missing_essentials'])
+        optimization.color_gaps = json.dumps(analysis['color_gaps'])
+        optimization.styling_opportunities = json.dumps(analysis['styling_opportunities'])
+        optimization.priority_purchases = json.dumps(analysis['priority_purchases'])
+        
+        # Persist the counters so other workers and restarts can update incrementally
+        if not state:
+            state = WardrobeOptimizationState(user_id=user_id)
+            db.session.add(state)
+        state.content_hash = content_hash
+        state.total_items = analysis['total_items']
+        state.item_counts = composition.to_json()
+        state.updated_at = datetime.utcnow()
         
         db.session.commit()
         
-        return optimization.to_dict()
+        result = optimization.to_dict()
+        wardrobe_optimization_cache.put(user_id, content_hash, result, composition)
+        wardrobe_optimization_cache.record(mode, len(wardrobe_items), time.perf_counter() - start_time, changed_pairs)
+        return copy.deepcopy(result)
     
     @staticmethod
     def _calculate_versatility_score(wardrobe_items):
@@ -460,17 +747,22 @@ class AdvancedAIEngine:
         # Count items that can work for multiple occasions
         versatile_items = 0
         for item in wardrobe_items:
-            category = item.get('category', '').lower()
-            color = item.get('primary_color', '').lower()
-            
-            # Basic versatility rules
-            if category in ['blazer', 'jeans', 'white shirt', 'black dress', 'cardigan']:
-                versatile_items += 1
-            elif color in ['black', 'white', 'navy', 'gray', 'beige']:
-                versatile_items += 0.5
+            versatile_items += AdvancedAIEngine._versatility_points(
+                item.get('category', '').lower(), item.get('primary_color', '').lower()
+            )
         
         return min(versatile_items / len(wardrobe_items), 1.0)
     
+    @staticmethod
+    def _versatility_points(category, color):
+        """Versatility of one item from its lowercased category and color"""
+        # Basic versatility rules
+        if category in ['blazer', 'jeans', 'white shirt', 'black dress', 'cardigan']:
+            return 1
+        elif color in ['black', 'white', 'navy', 'gray', 'beige']:
+            return 0.5
+        return 0
+    
     @staticmethod
     def _calculate_completeness_score(category_counts):
         """Calculate how complete the wardrobe is"""
@@ -485,15 +777,18 @@ class AdvancedAIEngine:
         # For now, we'll estimate based on item types
         efficient_items = 0
         for item in wardrobe_items:
-            # Items that are typically worn frequently
-            category = item.get('category', '').lower()
-            if category in ['jeans', 'basic tops', 'sneakers', 'cardigan']:
-                efficient_items += 1
-            else:
-                efficient_items += 0.7  # Assume moderate efficiency
+            efficient_items += AdvancedAIEngine._efficiency_points(item.get('category', '').lower())
         
         return min(efficient_items / len(wardrobe_items), 1.0) if wardrobe_items else 0.0
     
+    @staticmethod
+    def _efficiency_points(category):
+        """Efficiency of one item from its lowercased category"""
+        # Items that are typically worn frequently
+        if category in ['jeans', 'basic tops', 'sneakers', 'cardigan']:
+            return 1
+        return 0.7  # Assume moderate efficiency
+    
     @staticmethod
     def _calculate_style_coherence_score(wardrobe_items):
         """Calculate how coherent the style is"""
@@ -503,16 +798,10 @@ class AdvancedAIEngine:
         # Count items that fit common style themes
         style_themes = defaultdict(int)
         for item in wardrobe_items:
-            category = item.get('category', '').lower()
-            color = item.get('primary_color', '').lower()
-            
-            # Assign style points
-            if color in ['black', 'white', 'gray']:
-                style_themes['minimalist'] += 1
-            if category in ['blazer', 'dress pants', 'button-down']:
-                style_themes['classic'] += 1
-            if color in ['earth tones', 'brown', 'green']:
-                style_themes['bohemian'] += 1
+            for theme in AdvancedAIEngine._style_themes(
+                item.get('category', '').lower(), item.get('primary_color', '').lower()
+            ):
+                style_themes[theme] += 1
         
         # Calculate coherence based on dominant style
         if style_themes:
@@ -521,6 +810,19 @@ class AdvancedAIEngine:
         
         return 0.5  # Neutral score if no clear style
     
+    @staticmethod
+    def _style_themes(category, color):
+        """Style themes one item contributes to, from its lowercased category and color"""
+        themes = []
+        # Assign style points
+        if color in ['black', 'white', 'gray']:
+            themes.append('minimalist')
+        if category in ['blazer', 'dress pants', 'button-down']:
+            themes.append('classic')
+        if color in ['earth tones', 'brown', 'green']:
+            themes.append('bohemian')
+        return themes
+    
     @staticmethod
     def _identify_missing_essentials(category_counts):
         """Identify essential items missing from wardrobe"""
@@ -552,18 +854,24 @@ class AdvancedAIEngine:
     @staticmethod
     def _identify_styling_opportunities(wardrobe_items):
         """Identify new styling opportunities"""
+        return AdvancedAIEngine._styling_opportunities_from_counts(
+            Counter(item.get('category', '') for item in wardrobe_items),
+            Counter(item.get('primary_color', '') for item in wardrobe_items)
+        )
+    
+    @staticmethod
+    def _styling_opportunities_from_counts(category_counts, color_counts):
+        """Styling opportunities from category and color counts"""
         opportunities = []
         
         # Look for items that could be styled differently
-        categories = [item.get('category', '') for item in wardrobe_items]
-        
-        if 'blazer' in categories and 'jeans' in categories:
+        if 'blazer' in category_counts and 'jeans' in category_counts:
             opportunities.append('Try blazer with jeans for smart-casual look')
         
-        if 'dress' in categories and 'cardigan' in categories:
+        if 'dress' in category_counts and 'cardigan' in category_counts:
             opportunities.append('Layer cardigan over dress for versatile styling')
         
-        if len(set(item.get('primary_color', '') for item in wardrobe_items)) > 3:
+        if len(color_counts) > 3:
             opportunities.append('Experiment with color blocking combinations')
         
         return opportunities
@@ -668,26 +976,15 @@ class AdvancedAIEngine:
             styling_difficulty='easy' if overall_compatibility > 0.7 else 'medium' if overall_compatibility > 0.4 else 'advanced'
         )
         
-        db.session.add(compatibility)
-        db.session.commit()
+        # Persisted by the write-behind worker; the result doesn't wait on the commit
+        write_behind.add(compatibility)
         
         return compatibility.to_dict()
     
     @staticmethod
     def _calculate_color_compatibility(color1, color2):
         """Calculate color compatibility score"""
-        # Color harmony rules
-        harmonious_pairs = {
-            ('black', 'white'): 1.0,
-            ('navy', 'white'): 0.9,
-            ('gray', 'white'): 0.9,
-            ('black', 'gray'): 0.8,
-            ('navy', 'cream'): 0.8,
-            ('brown', 'cream'): 0.8,
-            ('blue', 'white'): 0.9,
-            ('red', 'black'): 0.7,
-            ('green', 'brown'): 0.7
-        }
+        harmonious_pairs = AdvancedAIEngine.HARMONIOUS_COLOR_PAIRS
         
         # Check direct pairs
         pair = tuple(sorted([color1, color2]))
@@ -700,7 +997,7 @@ class AdvancedAIEngine:
             return harmonious_pairs[reverse_pair]
         
         # Neutral colors work with most things
-        neutrals = ['black', 'white', 'gray', 'beige', 'cream', 'navy']
+        neutrals = AdvancedAIEngine.NEUTRAL_COLORS
         if color1 in neutrals or color2 in neutrals:
             return 0.7
         
@@ -714,24 +1011,15 @@ class AdvancedAIEngine:
     @staticmethod
     def _calculate_style_compatibility(category1, category2):
         """Calculate style compatibility score"""
-        # Style compatibility rules
-        compatible_combinations = {
-            ('blazer', 'jeans'): 0.9,
-            ('blazer', 'dress pants'): 1.0,
-            ('cardigan', 'dress'): 0.8,
-            ('t-shirt', 'jeans'): 0.9,
-            ('blouse', 'skirt'): 0.9,
-            ('sweater', 'jeans'): 0.8,
-            ('dress', 'jacket'): 0.8
-        }
+        compatible_combinations = AdvancedAIEngine.COMPATIBLE_CATEGORY_PAIRS
         
         pair = tuple(sorted([category1, category2]))
         if pair in compatible_combinations:
             return compatible_combinations[pair]
         
         # Default compatibility based on formality levels
-        formal_items = ['blazer', 'dress pants', 'blouse', 'dress shirt']
-        casual_items = ['jeans', 't-shirt', 'sneakers', 'hoodie']
+        formal_items = AdvancedAIEngine.FORMAL_CATEGORIES
+        casual_items = AdvancedAIEngine.CASUAL_CATEGORIES
         
         if (category1 in formal_items and category2 in formal_items) or \
            (category1 in casual_items and category2 in casual_items):
@@ -742,12 +1030,7 @@ class AdvancedAIEngine:
     @staticmethod
     def _calculate_formality_compatibility(item1_data, item2_data):
         """Calculate formality level compatibility"""
-        # Assign formality scores
-        formality_scores = {
-            'suit': 1.0, 'blazer': 0.8, 'dress pants': 0.8, 'blouse': 0.7,
-            'dress': 0.6, 'cardigan': 0.5, 'jeans': 0.3, 't-shirt': 0.2,
-            'sneakers': 0.2, 'hoodie': 0.1
-        }
+        formality_scores = AdvancedAIEngine.FORMALITY_SCORES
         
         item1_formality = formality_scores.get(item1_data.get('category', '').lower(), 0.5)
         item2_formality = formality_scores.get(item2_data.get('category', '').lower(), 0.5)
@@ -797,7 +1080,6 @@ class AdvancedAIEngine:
                             status='active',
                             expires_date=datetime.utcnow() + timedelta(days=30)
                         )
-                        db.session.add(prediction)
                         predictions.append(prediction)
         
         # Seasonal predictions
@@ -817,23 +1099,16 @@ class AdvancedAIEngine:
             status='active',
             expires_date=datetime.utcnow() + timedelta(days=60)
         )
-        db.session.add(seasonal_prediction)
         predictions.append(seasonal_prediction)
         
-        db.session.commit()
+        # Persisted by the write-behind worker; the result doesn't wait on the commit
+        write_behind.add_all(predictions)
         
         return [pred.to_dict() for pred in predictions]
     
     @staticmethod
     def _get_current_season():
-        """Determine current season"""
-        month = datetime.now().month
-        if month in [12, 1, 2]:
-            return 'winter'
-        elif month in [3, 4, 5]:
-            return 'spring'
-        elif month in [6, 7, 8]:
-            return 'summer'
-        else:
-            return 'fall'
+        """Determine current season (trend forecasts call autumn 'fall')"""
+        season = SeasonalSnapshot.current_season()
+        return 'fall' if season == 'autumn' else season
 
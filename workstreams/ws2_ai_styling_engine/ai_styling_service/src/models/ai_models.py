@@ -1,6 +1,211 @@
 from datetime import datetime, date
+import hashlib
 import json
+import threading
+from collections import Counter, OrderedDict
 from src.models.user import db
+from src.utils.performance_cache import coalesced
+from src.utils.scoring_pool import scoring_pool
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class StylePersonalityRules:
+    """
+    Style personality rules compiled into lookup tables
+    "We girls have no time" - Table lookups instead of string checks!
+    
+    Each wardrobe item is encoded as a bitmask of the styles it signals, one bit
+    per style in STYLES, from category, color and brand tables. A wardrobe becomes
+    a histogram of masks, and the style scores are that histogram times a
+    mask-by-style points matrix. Points are integer hundredths, so equal scores
+    tie exactly and resolve in STYLES order.
+    
+    Wardrobe points are cached by a content hash of the wardrobe. Hashing needs
+    orjson to be cheaper than classifying, so without orjson nothing is cached.
+    """
+    STYLES = ('classic', 'edgy', 'bohemian', 'minimalist', 'romantic', 'trendy')
+    ITEM_POINTS = (20, 30, 25, 20, 20, 25)  # Per matching item: 0.2, 0.3, 0.25, ...
+    
+    CATEGORY_STYLES = {
+        'classic': ['blazers', 'trousers', 'button_downs'],
+        'edgy': ['leather_jackets', 'boots', 'ripped_jeans'],
+        'bohemian': ['maxi_dresses', 'kimonos', 'sandals'],
+        'romantic': ['dresses', 'skirts', 'blouses'],
+        'trendy': ['crop_tops', 'high_waisted']
+    }
+    COLOR_STYLES = {
+        'classic': ['black', 'navy'],
+        'edgy': ['black'],
+        'minimalist': ['white', 'black', 'grey', 'beige'],
+        'romantic': ['pink']
+    }
+    COLOR_FRAGMENT_STYLES = {'bohemian': ['earth']}  # Part of the color name, e.g. 'earth tones'
+    BRAND_STYLES = {'trendy': ['zara', 'h&m', 'forever21']}
+    FLORAL_STYLE = 'romantic'  # 'floral' anywhere in the item: name, pattern, tags, ...
+    
+    PREFERENCE_POINTS = 40
+    LIFESTYLE_POINTS = {
+        'professional': {'classic': 30, 'minimalist': 20},
+        'creative': {'edgy': 30, 'bohemian': 20},
+        'social': {'trendy': 30, 'romantic': 20}
+    }
+    
+    def __init__(self, max_colors=4096, max_wardrobes=256):
+        self.bits = {style: 1 << index for index, style in enumerate(self.STYLES)}
+        self.category_masks = self._compile(self.CATEGORY_STYLES)
+        self.brand_masks = self._compile(self.BRAND_STYLES)
+        self.color_masks = self._compile(self.COLOR_STYLES)
+        self.max_colors = max_colors
+        self.floral_bit = self.bits[self.FLORAL_STYLE]
+        
+        # Row m holds the points an item with mask m adds to each style
+        self.mask_points = [
+            [points if mask & (1 << index) else 0 for index, points in enumerate(self.ITEM_POINTS)]
+            for mask in range(1 << len(self.STYLES))
+        ]
+        self.mask_points_matrix = np.array(self.mask_points, dtype=np.int64) if np is not None else None
+        
+        self.max_wardrobes = max_wardrobes
+        self.wardrobe_cache = OrderedDict()  # wardrobe content hash -> points in STYLES order
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+    
+    def _compile(self, rules):
+        masks = {}
+        for style, values in rules.items():
+            for value in values:
+                masks[value] = masks.get(value, 0) | self.bits[style]
+        return masks
+    
+    def color_mask(self, color):
+        mask = self.color_masks.get(color)
+        if mask is None:
+            mask = 0
+            for style, fragments in self.COLOR_FRAGMENT_STYLES.items():
+                if any(fragment in color for fragment in fragments):
+                    mask |= self.bits[style]
+            # Colors are free text; remember a bounded number of them
+            if len(self.color_masks) < self.max_colors:
+                self.color_masks[color] = mask
+        return mask
+    
+    @staticmethod
+    def mentions(item, word):
+        """Same answer as `word in str(item)`, without formatting the whole item"""
+        for key, value in item.items():
+            if value.__class__ is str:
+                if word in value:
+                    return True
+            elif value is not None and value.__class__ not in (int, float, bool) and word in repr(value):
+                return True
+            if word in (key if key.__class__ is str else repr(key)):
+                return True
+        return False
+    
+    def encode_item(self, item):
+        """Bitmask of the styles a wardrobe item signals"""
+        mask = self.category_masks.get(item.get('category', '').lower(), 0) \
+            | self.color_mask(item.get('primary_color', '').lower()) \
+            | self.brand_masks.get(item.get('brand', '').lower(), 0)
+        if not mask & self.floral_bit and self.mentions(item, 'floral'):
+            mask |= self.floral_bit
+        return mask
+    
+    @staticmethod
+    def wardrobe_key(wardrobe_data):
+        """Content hash of a wardrobe, or None when it can't be hashed cheaply"""
+        if orjson is None:
+            return None
+        try:
+            return hashlib.blake2b(orjson.dumps(wardrobe_data, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+        except TypeError:
+            return None  # e.g. non-string keys or values orjson can't serialize
+    
+    def wardrobe_points(self, wardrobe_data):
+        """Style points for a whole wardrobe, in STYLES order"""
+        key = self.wardrobe_key(wardrobe_data)
+        if key is None:
+            with self.lock:
+                self.uncacheable += 1
+            return self.compute_points(wardrobe_data)
+        
+        with self.lock:
+            points = self.wardrobe_cache.get(key)
+            if points is not None:
+                self.wardrobe_cache.move_to_end(key)
+                self.hits += 1
+                return list(points)
+            self.misses += 1
+        
+        points = self.compute_points(wardrobe_data)
+        with self.lock:
+            self.wardrobe_cache[key] = tuple(points)
+            while len(self.wardrobe_cache) > self.max_wardrobes:
+                self.wardrobe_cache.popitem(last=False)
+        return points
+    
+    def compute_points(self, wardrobe_data):
+        """Encode every item and sum the points of the mask histogram"""
+        masks = [self.encode_item(item) for item in wardrobe_data]
+        if self.mask_points_matrix is not None:
+            histogram = np.bincount(np.fromiter(masks, dtype=np.int64, count=len(masks)),
+                                    minlength=len(self.mask_points))
+            return [int(points) for points in histogram @ self.mask_points_matrix]
+        
+        points = [0] * len(self.STYLES)
+        for mask, count in Counter(masks).items():
+            for index, mask_points in enumerate(self.mask_points[mask]):
+                points[index] += count * mask_points
+        return points
+    
+    def classify(self, wardrobe_data, preferences):
+        """(dominant style, confidence, style scores), as analyze_style_personality returns them"""
+        points = dict(zip(self.STYLES, self.wardrobe_points(wardrobe_data) if wardrobe_data else [0] * len(self.STYLES)))
+        
+        if preferences:
+            style_pref = preferences.get('style_preference', '').lower()
+            if style_pref in points:
+                points[style_pref] += self.PREFERENCE_POINTS
+            
+            for style, lifestyle_points in self.LIFESTYLE_POINTS.get(preferences.get('lifestyle', '').lower(), {}).items():
+                points[style] += lifestyle_points
+        
+        dominant_style = max(points, key=points.get)
+        style_scores = {style: style_points / 100 for style, style_points in points.items()}
+        return dominant_style, min(style_scores[dominant_style], 1.0), style_scores
+    
+    def clear(self):
+        with self.lock:
+            self.wardrobe_cache.clear()
+    
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'cached_wardrobes': len(self.wardrobe_cache),
+            'max_wardrobes': self.max_wardrobes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'uncacheable': self.uncacheable,
+            'known_colors': len(self.color_masks),
+            'hash_backend': 'orjson' if orjson is not None else None,
+            'sum_backend': 'numpy' if self.mask_points_matrix is not None else 'python'
+        }
+
+# Global compiled style personality rules
+style_personality_rules = StylePersonalityRules()
+
 
 class StyleAnalysis(db.Model):
     """
@@ -65,69 +270,80 @@ class StyleAnalysis(db.Model):
         AI-powered style personality analysis
         "We girls have no time" - Instant style personality detection!
         """
-        # Style personality scoring algorithm
-        style_scores = {
-            'classic': 0.0,
-            'edgy': 0.0,
-            'bohemian': 0.0,
-            'minimalist': 0.0,
-            'romantic': 0.0,
-            'trendy': 0.0
+        # Rules are compiled once into lookup tables; see StylePersonalityRules
+        return style_personality_rules.classify(wardrobe_data, preferences)
+    
+    @staticmethod
+    @coalesced(key_prefix='ai_models.')
+    def run_style_analysis(user_id, profile_data, wardrobe_data, style_profile):
+        """
+        Analyze and persist a user's style in one coalesced step
+        "We girls have no time" - One analysis per burst of identical requests!
+        """
+        # Analyze style personality
+        style_personality, confidence, style_scores = StyleAnalysis.analyze_style_personality(
+            profile_data, wardrobe_data, style_profile
+        )
+        
+        # Analyze color palette
+        color_season, primary_colors, avoid_colors = StyleAnalysis.analyze_color_palette(
+            profile_data, style_personality
+        )
+        
+        # Determine body type (simplified analysis)
+        body_type = style_profile.get('body_type', 'unknown')
+        body_confidence = 0.7 if body_type != 'unknown' else 0.3
+        
+        # Determine lifestyle match
+        lifestyle_indicators = {
+            'professional': ['blazers', 'trousers', 'button_downs'],
+            'casual': ['jeans', 't_shirts', 'sneakers'],
+            'social': ['dresses', 'heels', 'accessories']
         }
         
-        # Analyze wardrobe items
-        if wardrobe_data:
-            for item in wardrobe_data:
-                category = item.get('category', '').lower()
-                colors = [item.get('primary_color', '').lower()]
-                brand = item.get('brand', '').lower()
-                
-                # Classic style indicators
-                if category in ['blazers', 'trousers', 'button_downs'] or 'black' in colors or 'navy' in colors:
-                    style_scores['classic'] += 0.2
-                
-                # Edgy style indicators
-                if category in ['leather_jackets', 'boots', 'ripped_jeans'] or 'black' in colors:
-                    style_scores['edgy'] += 0.3
-                
-                # Bohemian style indicators
-                if category in ['maxi_dresses', 'kimonos', 'sandals'] or 'earth' in str(colors):
-                    style_scores['bohemian'] += 0.25
-                
-                # Minimalist style indicators
-                if colors and colors[0] in ['white', 'black', 'grey', 'beige']:
-                    style_scores['minimalist'] += 0.2
-                
-                # Romantic style indicators
-                if category in ['dresses', 'skirts', 'blouses'] or 'pink' in colors or 'floral' in str(item):
-                    style_scores['romantic'] += 0.2
-                
-                # Trendy style indicators
-                if brand in ['zara', 'h&m', 'forever21'] or category in ['crop_tops', 'high_waisted']:
-                    style_scores['trendy'] += 0.25
-        
-        # Analyze user preferences
-        if preferences:
-            style_pref = preferences.get('style_preference', '').lower()
-            if style_pref in style_scores:
-                style_scores[style_pref] += 0.4
-            
-            lifestyle = preferences.get('lifestyle', '').lower()
-            if lifestyle == 'professional':
-                style_scores['classic'] += 0.3
-                style_scores['minimalist'] += 0.2
-            elif lifestyle == 'creative':
-                style_scores['edgy'] += 0.3
-                style_scores['bohemian'] += 0.2
-            elif lifestyle == 'social':
-                style_scores['trendy'] += 0.3
-                style_scores['romantic'] += 0.2
-        
-        # Determine dominant style
-        dominant_style = max(style_scores, key=style_scores.get)
-        confidence = min(style_scores[dominant_style], 1.0)
-        
-        return dominant_style, confidence, style_scores
+        lifestyle_scores = {}
+        for lifestyle, indicators in lifestyle_indicators.items():
+            score = sum(1 for item in wardrobe_data 
+                       if item.get('category', '').lower() in indicators)
+            lifestyle_scores[lifestyle] = score
+        
+        lifestyle_match = max(lifestyle_scores, key=lifestyle_scores.get) if lifestyle_scores else 'casual'
+        
+        # Create or update style analysis
+        analysis = StyleAnalysis.query.filter_by(user_id=user_id).first()
+        if analysis:
+            # Update existing
+            analysis.style_personality = style_personality
+            analysis.confidence_score = confidence
+            analysis.body_type = body_type
+            analysis.body_confidence = body_confidence
+            analysis.color_season = color_season
+            analysis.primary_colors = json.dumps(primary_colors)
+            analysis.avoid_colors = json.dumps(avoid_colors)
+            analysis.preferred_styles = json.dumps(list(style_scores.keys())[:3])
+            analysis.lifestyle_match = lifestyle_match
+            analysis.last_updated = datetime.utcnow()
+            analysis.data_sources = json.dumps(['wardrobe_analysis', 'user_preferences', 'ai_algorithm'])
+        else:
+            # Create new
+            analysis = StyleAnalysis(
+                user_id=user_id,
+                style_personality=style_personality,
+                confidence_score=confidence,
+                body_type=body_type,
+                body_confidence=body_confidence,
+                color_season=color_season,
+                primary_colors=json.dumps(primary_colors),
+                avoid_colors=json.dumps(avoid_colors),
+                preferred_styles=json.dumps(list(style_scores.keys())[:3]),
+                lifestyle_match=lifestyle_match,
+                data_sources=json.dumps(['wardrobe_analysis', 'user_preferences', 'ai_algorithm'])
+            )
+            db.session.add(analysis)
+        
+        db.session.commit()
+        
+        return analysis.to_dict(), style_scores
     
     @staticmethod
     def analyze_color_palette(user_data, style_personality):
@@ -206,6 +422,34 @@ class OutfitRecommendation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Occasion-based item requirements
+    OCCASION_REQUIREMENTS = {
+        'work': {
+            'required_categories': ['tops', 'bottoms'],
+            'optional_categories': ['blazers', 'shoes', 'accessories'],
+            'avoid_categories': ['crop_tops', 'mini_skirts', 'flip_flops'],
+            'formality_level': 'formal'
+        },
+        'casual': {
+            'required_categories': ['tops', 'bottoms'],
+            'optional_categories': ['outerwear', 'shoes', 'accessories'],
+            'avoid_categories': ['formal_wear', 'evening_wear'],
+            'formality_level': 'casual'
+        },
+        'date': {
+            'required_categories': ['tops', 'bottoms'],
+            'optional_categories': ['dresses', 'shoes', 'accessories', 'outerwear'],
+            'avoid_categories': ['gym_wear', 'pajamas'],
+            'formality_level': 'semi_formal'
+        },
+        'party': {
+            'required_categories': ['tops', 'bottoms'],
+            'optional_categories': ['dresses', 'shoes', 'accessories', 'jewelry'],
+            'avoid_categories': ['work_wear', 'gym_wear'],
+            'formality_level': 'dressy'
+        }
+    }
+    
     def __repr__(self):
         return f'<OutfitRecommendation {self.user_id}:{self.occasion}>'
     
@@ -231,6 +475,12 @@ class OutfitRecommendation(db.Model):
         }
     
     @staticmethod
+    def get_occasion_requirements(occasion):
+        """Item requirements for an occasion (casual when unknown)"""
+        return OutfitRecommendation.OCCASION_REQUIREMENTS.get(occasion, OutfitRecommendation.OCCASION_REQUIREMENTS['casual'])
+    
+    @staticmethod
+    @coalesced(key_prefix='ai_models.')
     def generate_outfit_recommendation(user_id, wardrobe_items, style_analysis, occasion, weather=None, season=None):
         """
         AI-powered outfit generation
@@ -239,35 +489,14 @@ class OutfitRecommendation(db.Model):
         if not wardrobe_items:
             return None
         
-        # Occasion-based item requirements
-        occasion_requirements = {
-            'work': {
-                'required_categories': ['tops', 'bottoms'],
-                'optional_categories': ['blazers', 'shoes', 'accessories'],
-                'avoid_categories': ['crop_tops', 'mini_skirts', 'flip_flops'],
-                'formality_level': 'formal'
-            },
-            'casual': {
-                'required_categories': ['tops', 'bottoms'],
-                'optional_categories': ['outerwear', 'shoes', 'accessories'],
-                'avoid_categories': ['formal_wear', 'evening_wear'],
-                'formality_level': 'casual'
-            },
-            'date': {
-                'required_categories': ['tops', 'bottoms'],
-                'optional_categories': ['dresses', 'shoes', 'accessories', 'outerwear'],
-                'avoid_categories': ['gym_wear', 'pajamas'],
-                'formality_level': 'semi_formal'
-            },
-            'party': {
-                'required_categories': ['tops', 'bottoms'],
-                'optional_categories': ['dresses', 'shoes', 'accessories', 'jewelry'],
-                'avoid_categories': ['work_wear', 'gym_wear'],
-                'formality_level': 'dressy'
-            }
-        }
-        
-        requirements = occasion_requirements.get(occasion, occasion_requirements['casual'])
+        # Large wardrobes are scored in the scoring pool when serving with one
+        return scoring_pool.run(OutfitRecommendation.compose_outfit, wardrobe_items, style_analysis, occasion,
+                                size=len(wardrobe_items))
+    
+    @staticmethod
+    def compose_outfit(wardrobe_items, style_analysis, occasion):
+        """Select and score outfit items; pure, so it can run in a scoring process"""
+        requirements = OutfitRecommendation.get_occasion_requirements(occasion)
         
         # Filter items by occasion appropriateness
         suitable_items = []
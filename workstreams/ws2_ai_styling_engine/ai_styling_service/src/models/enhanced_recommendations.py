@@ -1,7 +1,15 @@
 from datetime import datetime, date, timedelta
+import bisect
 import json
+import math
 import random
+import threading
+import time
+from collections import defaultdict, Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from src.models.user import db
+from src.utils.performance_cache import FrozenRecord
 from src.models.ai_models import StyleAnalysis, OutfitRecommendation
 
 class WeatherOutfitRule(db.Model):
@@ -60,24 +68,8 @@ class WeatherOutfitRule(db.Model):
     
     @staticmethod
     def get_weather_rules(weather_condition, temperature=None):
-        """Get applicable weather rules for given conditions"""
-        rules = WeatherOutfitRule.query.filter_by(
-            weather_condition=weather_condition,
-            active=True
-        ).order_by(WeatherOutfitRule.priority.desc()).all()
-        
-        # Filter by temperature if provided
-        if temperature and rules:
-            temp_filtered = []
-            for rule in rules:
-                if rule.temperature_range:
-                    if WeatherOutfitRule.temperature_matches(temperature, rule.temperature_range):
-                        temp_filtered.append(rule)
-                else:
-                    temp_filtered.append(rule)
-            return temp_filtered
-        
-        return rules
+        """Get applicable weather rules for given conditions (served from the in-memory rule index)"""
+        return weather_rule_index.lookup(weather_condition, temperature)
     
     @staticmethod
     def temperature_matches(temp, temp_range):
@@ -97,6 +89,182 @@ class WeatherOutfitRule(db.Model):
         return True
 
 
+class WeatherRuleView(FrozenRecord):
+    """Read-only weather rule held by the rule index (same fields as WeatherOutfitRule.to_dict())"""
+    __slots__ = ()
+    
+    def __repr__(self):
+        return f"<WeatherRuleView {self._data.get('weather_condition')}:{self._data.get('temperature_range')}>"
+
+
+class WeatherRuleIndex:
+    """
+    In-process interval index over active weather rules
+    "We girls have no time" - Weather rules found in one binary search!
+    
+    Per weather condition, each rule's temperature range is parsed once into
+    numeric bounds. The distinct bounds split the temperature axis into
+    elementary segments, each holding its priority-sorted matching rules,
+    so a lookup is a single bisect. The index reloads after any committed
+    rule change in this process, and at most every `reload_interval`
+    seconds to pick up changes made by other workers.
+    """
+    
+    UNBOUNDED = (-math.inf, math.inf, True, True)
+    
+    def __init__(self, reload_interval=300):
+        self.reload_interval = reload_interval
+        self.conditions = None  # weather_condition -> {'rules', 'bounds', 'segments'}
+        self.all_rules = ()
+        self.loaded_at = 0.0
+        self.stale = True
+        self.lock = threading.Lock()
+        
+        self.load_count = 0
+        self.lookup_count = 0
+        self.last_load_duration = 0.0
+    
+    @staticmethod
+    def parse_range(temp_range):
+        """
+        Parse '60-75F' / 'below_50F' / 'above_80F' into (low, high, low_inclusive, high_inclusive)
+        Missing or unparseable ranges match every temperature, like temperature_matches().
+        """
+        if not temp_range:
+            return WeatherRuleIndex.UNBOUNDED
+        try:
+            if 'below_' in temp_range:
+                return (-math.inf, int(temp_range.replace('below_', '').replace('F', '')), True, False)
+            elif 'above_' in temp_range:
+                return (int(temp_range.replace('above_', '').replace('F', '')), math.inf, False, True)
+            elif '-' in temp_range:
+                min_temp, max_temp = temp_range.replace('F', '').split('-')
+                return (int(min_temp), int(max_temp), True, True)
+        except (TypeError, ValueError):
+            pass
+        return WeatherRuleIndex.UNBOUNDED
+    
+    @staticmethod
+    def bounds_contain(bounds, temperature):
+        low, high, low_inclusive, high_inclusive = bounds
+        above_low = temperature > low or (low_inclusive and temperature == low)
+        below_high = temperature < high or (high_inclusive and temperature == high)
+        return above_low and below_high
+    
+    @staticmethod
+    def build_condition(rules):
+        """Precompute the segment table for one condition's priority-sorted rules"""
+        bounded = [(rule, WeatherRuleIndex.parse_range(rule.temperature_range)) for rule in rules]
+        bounds = sorted({value for _, rule_bounds in bounded for value in rule_bounds[:2] if math.isfinite(value)})
+        
+        # Segments alternate open interval / boundary point: (-inf, b0), [b0], (b0, b1), [b1], ..., (bn, inf)
+        segments = []
+        for position in range(len(bounds) + 1):
+            if not bounds:
+                representative = 0
+            elif position == 0:
+                representative = bounds[0] - 1
+            elif position == len(bounds):
+                representative = bounds[-1] + 1
+            else:
+                representative = (bounds[position - 1] + bounds[position]) / 2
+            segments.append(tuple(rule for rule, rule_bounds in bounded
+                                  if WeatherRuleIndex.bounds_contain(rule_bounds, representative)))
+            if position < len(bounds):
+                segments.append(tuple(rule for rule, rule_bounds in bounded
+                                      if WeatherRuleIndex.bounds_contain(rule_bounds, bounds[position])))
+        
+        return {'rules': tuple(rules), 'bounds': bounds, 'segments': segments}
+    
+    def reload(self):
+        """Load all active rules from the database and rebuild the index"""
+        start_time = time.time()
+        rules = WeatherOutfitRule.query.filter_by(active=True).order_by(
+            WeatherOutfitRule.priority.desc(), WeatherOutfitRule.id.asc()
+        ).all()
+        
+        views = [WeatherRuleView(rule.to_dict()) for rule in rules]
+        by_condition = defaultdict(list)
+        for view in views:
+            by_condition[view.weather_condition].append(view)
+        
+        self.conditions = {condition: WeatherRuleIndex.build_condition(condition_rules)
+                           for condition, condition_rules in by_condition.items()}
+        self.all_rules = tuple(views)
+        self.loaded_at = time.time()
+        self.stale = False
+        self.load_count += 1
+        self.last_load_duration = time.time() - start_time
+    
+    def invalidate(self):
+        """Mark the index stale; the next lookup reloads it"""
+        self.stale = True
+    
+    def _current(self):
+        if self.stale or self.conditions is None or time.time() - self.loaded_at >= self.reload_interval:
+            with self.lock:
+                if self.stale or self.conditions is None or time.time() - self.loaded_at >= self.reload_interval:
+                    self.reload()
+        return self.conditions
+    
+    def lookup(self, weather_condition, temperature=None):
+        """Active rules for a condition (and temperature), highest priority first"""
+        conditions = self._current()
+        self.lookup_count += 1
+        entry = conditions.get(weather_condition)
+        if not entry:
+            return []
+        
+        # Same semantics as the original filter: no (or zero) temperature, or a
+        # non-numeric one, leaves every rule of the condition applicable
+        if not temperature or not isinstance(temperature, (int, float)):
+            return list(entry['rules'])
+        
+        bounds = entry['bounds']
+        position = bisect.bisect_left(bounds, temperature)
+        if position < len(bounds) and bounds[position] == temperature:
+            return list(entry['segments'][2 * position + 1])
+        return list(entry['segments'][2 * position])
+    
+    def active_rules(self):
+        """Every active rule, highest priority first"""
+        self._current()
+        return list(self.all_rules)
+    
+    def get_stats(self):
+        return {
+            'conditions': len(self.conditions) if self.conditions else 0,
+            'rules': len(self.all_rules),
+            'loaded_at': datetime.fromtimestamp(self.loaded_at).isoformat() if self.loaded_at else None,
+            'stale': self.stale,
+            'load_count': self.load_count,
+            'lookup_count': self.lookup_count,
+            'last_load_duration': self.last_load_duration,
+            'reload_interval': self.reload_interval
+        }
+
+# Global weather rule index
+weather_rule_index = WeatherRuleIndex()
+
+
+def _mark_weather_rules_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['weather_rules_changed'] = True
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(WeatherOutfitRule, _event_name, _mark_weather_rules_changed)
+
+@event.listens_for(Session, 'after_commit')
+def _reload_weather_rules_after_commit(session):
+    if session.info.pop('weather_rules_changed', False):
+        weather_rule_index.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_weather_rule_changes(session):
+    session.info.pop('weather_rules_changed', None)
+
+
 class SeasonalRecommendation(db.Model):
     """
     Seasonal outfit recommendations and trends
@@ -153,35 +321,156 @@ class SeasonalRecommendation(db.Model):
     
     @staticmethod
     def get_current_season_recommendations():
-        """Get recommendations for current season"""
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        
-        # Determine season
-        if current_month in [12, 1, 2]:
-            season = 'winter'
-        elif current_month in [3, 4, 5]:
-            season = 'spring'
-        elif current_month in [6, 7, 8]:
-            season = 'summer'
-        else:
-            season = 'autumn'
-        
-        # Get seasonal recommendations
-        recommendations = SeasonalRecommendation.query.filter_by(
-            season=season,
-            year=current_year,
-            active=True
-        ).first()
-        
-        if not recommendations:
-            # Fallback to previous year or create default
-            recommendations = SeasonalRecommendation.query.filter_by(
-                season=season,
-                active=True
-            ).order_by(SeasonalRecommendation.year.desc()).first()
-        
-        return recommendations
+        """Get recommendations for current season (served from the in-memory seasonal snapshot)"""
+        return seasonal_snapshot.current()
+    
+    @staticmethod
+    def get_latest_for_season(season):
+        """Most recent active recommendations for a season, any year"""
+        return seasonal_snapshot.lookup(season)
+
+
+class SeasonalRecommendationView(FrozenRecord):
+    """Read-only seasonal recommendation held by the snapshot (same fields as SeasonalRecommendation.to_dict())"""
+    __slots__ = ()
+    
+    def __repr__(self):
+        return f"<SeasonalRecommendationView {self._data.get('season')}:{self._data.get('year')}>"
+
+
+class SeasonalSnapshot:
+    """
+    In-process snapshot of active seasonal recommendations
+    "We girls have no time" - This season's picks without a query!
+    
+    All active rows are loaded once and indexed by (season, year), plus the
+    latest year per season for the fallback, so a lookup is a dict access.
+    The snapshot reloads after any committed SeasonalRecommendation change in
+    this process, and at most every `reload_interval` seconds to pick up
+    changes made by other workers. The current season is derived from the
+    clock on every call, so season and year boundaries need no reload.
+    """
+    
+    SEASONS_BY_MONTH = {
+        12: 'winter', 1: 'winter', 2: 'winter',
+        3: 'spring', 4: 'spring', 5: 'spring',
+        6: 'summer', 7: 'summer', 8: 'summer',
+        9: 'autumn', 10: 'autumn', 11: 'autumn'
+    }
+    SEASON_ALIASES = {'fall': 'autumn'}
+    
+    def __init__(self, reload_interval=300):
+        self.reload_interval = reload_interval
+        self.by_season_year = None  # (season, year) -> view
+        self.latest_by_season = {}  # season -> view with the highest year
+        self.loaded_at = 0.0
+        self.stale = True
+        self.lock = threading.Lock()
+        
+        self.load_count = 0
+        self.lookup_count = 0
+        self.fallback_count = 0
+        self.last_load_duration = 0.0
+    
+    @staticmethod
+    def season_for(month):
+        """Season name (as stored in SeasonalRecommendation.season) for a month 1-12"""
+        return SeasonalSnapshot.SEASONS_BY_MONTH[month]
+    
+    @staticmethod
+    def current_season(now=None):
+        return SeasonalSnapshot.season_for((now or datetime.now()).month)
+    
+    @staticmethod
+    def normalize(season):
+        season = (season or '').lower()
+        return SeasonalSnapshot.SEASON_ALIASES.get(season, season)
+    
+    def reload(self):
+        """Load all active seasonal recommendations and rebuild the index"""
+        start_time = time.time()
+        rows = SeasonalRecommendation.query.filter_by(active=True).order_by(SeasonalRecommendation.id.asc()).all()
+        
+        by_season_year = {}
+        latest_by_season = {}
+        for row in rows:
+            view = SeasonalRecommendationView(row.to_dict())
+            # First row per key wins, like the id-ordered .first() it replaces
+            by_season_year.setdefault((row.season, row.year), view)
+            latest = latest_by_season.get(row.season)
+            if latest is None or (row.year is not None and (latest.year is None or row.year > latest.year)):
+                latest_by_season[row.season] = view
+        
+        self.by_season_year = by_season_year
+        self.latest_by_season = latest_by_season
+        self.loaded_at = time.time()
+        self.stale = False
+        self.load_count += 1
+        self.last_load_duration = time.time() - start_time
+    
+    def invalidate(self):
+        """Mark the snapshot stale; the next lookup reloads it"""
+        self.stale = True
+    
+    def _current(self):
+        if self.stale or self.by_season_year is None or time.time() - self.loaded_at >= self.reload_interval:
+            with self.lock:
+                if self.stale or self.by_season_year is None or time.time() - self.loaded_at >= self.reload_interval:
+                    self.reload()
+        return self.by_season_year, self.latest_by_season
+    
+    def lookup(self, season, year=None):
+        """Recommendations for (season, year), falling back to the season's latest year"""
+        by_season_year, latest_by_season = self._current()
+        self.lookup_count += 1
+        season = self.normalize(season)
+        
+        if year is not None:
+            recommendations = by_season_year.get((season, year))
+            if recommendations is not None:
+                return recommendations
+            self.fallback_count += 1
+        return latest_by_season.get(season)
+    
+    def current(self, now=None):
+        """Recommendations for the current season and year"""
+        now = now or datetime.now()
+        return self.lookup(self.current_season(now), now.year)
+    
+    def get_stats(self):
+        return {
+            'seasons': len(self.latest_by_season),
+            'recommendations': len(self.by_season_year) if self.by_season_year else 0,
+            'current_season': self.current_season(),
+            'loaded_at': datetime.fromtimestamp(self.loaded_at).isoformat() if self.loaded_at else None,
+            'stale': self.stale,
+            'load_count': self.load_count,
+            'lookup_count': self.lookup_count,
+            'fallback_count': self.fallback_count,
+            'last_load_duration': self.last_load_duration,
+            'reload_interval': self.reload_interval
+        }
+
+# Global seasonal recommendation snapshot
+seasonal_snapshot = SeasonalSnapshot()
+
+
+def _mark_seasonal_recommendations_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['seasonal_recommendations_changed'] = True
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(SeasonalRecommendation, _event_name, _mark_seasonal_recommendations_changed)
+
+@event.listens_for(Session, 'after_commit')
+def _reload_seasonal_snapshot_after_commit(session):
+    if session.info.pop('seasonal_recommendations_changed', False):
+        seasonal_snapshot.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_seasonal_recommendation_changes(session):
+    session.info.pop('seasonal_recommendations_changed', None)
 
 
 class OutfitFeedback(db.Model):
@@ -241,54 +530,313 @@ class OutfitFeedback(db.Model):
     
     @staticmethod
     def get_user_feedback_patterns(user_id, limit=50):
-        """Get user's feedback patterns for learning"""
-        feedback_records = OutfitFeedback.query.filter_by(user_id=user_id)\
-            .order_by(OutfitFeedback.feedback_date.desc())\
-            .limit(limit).all()
-        
-        if not feedback_records:
+        """
+        Get user's feedback patterns for learning
+        Reads the persisted UserFeedbackProfile row; `limit` is kept for API compatibility.
+        """
+        profile = UserFeedbackProfile.query.filter_by(user_id=user_id).first()
+        if not profile or not profile.feedback_count:
             return {}
+        return profile.to_patterns()
+
+
+class UserFeedbackProfile(db.Model):
+    """
+    Persisted per-user feedback profile, updated on every feedback submission
+    "We girls have no time" - Your feedback history in a single row!
+    """
+    __tablename__ = 'user_feedback_profile'
+    
+    # Per-feedback decay of the average rating: the newest ~50 ratings dominate,
+    # matching the old "last 50 feedback rows" window
+    RATING_DECAY = 0.98
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, unique=True)
+    
+    # Decayed average rating: decayed_rating_sum / decayed_weight
+    feedback_count = db.Column(db.Integer, default=0)
+    decayed_rating_sum = db.Column(db.Float, default=0.0)
+    decayed_weight = db.Column(db.Float, default=0.0)
+    
+    # Running counts (JSON objects)
+    feedback_type_counts = db.Column(db.Text, nullable=True)  # {'worn': 3, 'saved': 1}
+    liked_aspect_counts = db.Column(db.Text, nullable=True)  # {'colors': 4, 'comfort': 2}
+    disliked_aspect_counts = db.Column(db.Text, nullable=True)
+    comfort_histogram = db.Column(db.Text, nullable=True)  # {'comfort_4': 3, 'comfort_5': 1}
+    occasion_counts = db.Column(db.Text, nullable=True)  # {'work': 5, 'casual': 2}
+    
+    last_feedback_date = db.Column(db.DateTime, nullable=True)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserFeedbackProfile {self.user_id}:{self.feedback_count}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'feedback_count': self.feedback_count,
+            'average_rating': self.average_rating,
+            'feedback_type_counts': json.loads(self.feedback_type_counts) if self.feedback_type_counts else {},
+            'liked_aspect_counts': json.loads(self.liked_aspect_counts) if self.liked_aspect_counts else {},
+            'disliked_aspect_counts': json.loads(self.disliked_aspect_counts) if self.disliked_aspect_counts else {},
+            'comfort_histogram': json.loads(self.comfort_histogram) if self.comfort_histogram else {},
+            'occasion_counts': json.loads(self.occasion_counts) if self.occasion_counts else {},
+            'last_feedback_date': self.last_feedback_date.isoformat() if self.last_feedback_date else None,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+        }
+    
+    @property
+    def average_rating(self):
+        return self.decayed_rating_sum / self.decayed_weight if self.decayed_weight else 0.0
+    
+    def to_patterns(self):
+        """Feedback patterns in the shape SmartRecommendationEngine expects"""
+        return {
+            'average_rating': self.average_rating,
+            'preferred_feedback_types': json.loads(self.feedback_type_counts) if self.feedback_type_counts else {},
+            'liked_aspects_frequency': json.loads(self.liked_aspect_counts) if self.liked_aspect_counts else {},
+            'disliked_aspects_frequency': json.loads(self.disliked_aspect_counts) if self.disliked_aspect_counts else {},
+            'comfort_patterns': json.loads(self.comfort_histogram) if self.comfort_histogram else {},
+            'occasion_preferences': json.loads(self.occasion_counts) if self.occasion_counts else {}
+        }
+    
+    @staticmethod
+    def _increment(counts_json, keys):
+        counts = json.loads(counts_json) if counts_json else {}
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+        return json.dumps(counts)
+    
+    def apply_feedback(self, rating, feedback_type, liked_aspects=None, disliked_aspects=None,
+                       comfort_rating=None, occasion=None, feedback_date=None):
+        """Fold one feedback submission into the running profile"""
+        self.feedback_count = (self.feedback_count or 0) + 1
+        self.decayed_rating_sum = (self.decayed_rating_sum or 0.0) * self.RATING_DECAY + rating
+        self.decayed_weight = (self.decayed_weight or 0.0) * self.RATING_DECAY + 1.0
+        
+        self.feedback_type_counts = self._increment(self.feedback_type_counts, [feedback_type])
+        if liked_aspects:
+            self.liked_aspect_counts = self._increment(self.liked_aspect_counts, liked_aspects)
+        if disliked_aspects:
+            self.disliked_aspect_counts = self._increment(self.disliked_aspect_counts, disliked_aspects)
+        if comfort_rating:
+            self.comfort_histogram = self._increment(self.comfort_histogram, [f"comfort_{comfort_rating}"])
+        if occasion:
+            self.occasion_counts = self._increment(self.occasion_counts, [occasion])
+        
+        self.last_feedback_date = feedback_date or datetime.utcnow()
+        self.last_updated = datetime.utcnow()
+    
+    @staticmethod
+    def record_feedback(feedback, liked_aspects=None, disliked_aspects=None):
+        """
+        Fold a new OutfitFeedback row into the user's profile (no commit)
+        Pass the already-decoded aspect lists to avoid re-parsing the JSON.
+        """
+        profile = UserFeedbackProfile.query.filter_by(user_id=feedback.user_id).with_for_update().first()
+        if not profile:
+            profile = UserFeedbackProfile(user_id=feedback.user_id)
+            db.session.add(profile)
+        
+        if liked_aspects is None and feedback.liked_aspects:
+            liked_aspects = json.loads(feedback.liked_aspects)
+        if disliked_aspects is None and feedback.disliked_aspects:
+            disliked_aspects = json.loads(feedback.disliked_aspects)
+        
+        profile.apply_feedback(
+            feedback.rating, feedback.feedback_type, liked_aspects, disliked_aspects,
+            feedback.comfort_rating, feedback.occasion_actual, feedback.feedback_date
+        )
+        return profile
+    
+    @staticmethod
+    def backfill(user_id=None, batch_size=5000):
+        """
+        Rebuild feedback profiles by replaying raw OutfitFeedback rows in date order
+        "We girls have no time" - Replay history once, then stay incremental!
+        """
+        profile_query = UserFeedbackProfile.query
+        feedback_query = OutfitFeedback.query.order_by(OutfitFeedback.user_id, OutfitFeedback.feedback_date, OutfitFeedback.id)
+        if user_id is not None:
+            profile_query = profile_query.filter_by(user_id=user_id)
+            feedback_query = feedback_query.filter(OutfitFeedback.user_id == user_id)
+        profile_query.delete(synchronize_session=False)
+        
+        profiles = {}
+        feedback_rows = 0
+        for feedback in feedback_query.yield_per(batch_size):
+            profile = profiles.get(feedback.user_id)
+            if profile is None:
+                profile = profiles[feedback.user_id] = UserFeedbackProfile(user_id=feedback.user_id)
+            profile.apply_feedback(
+                feedback.rating, feedback.feedback_type,
+                json.loads(feedback.liked_aspects) if feedback.liked_aspects else None,
+                json.loads(feedback.disliked_aspects) if feedback.disliked_aspects else None,
+                feedback.comfort_rating, feedback.occasion_actual, feedback.feedback_date
+            )
+            feedback_rows += 1
+        
+        db.session.add_all(profiles.values())
+        db.session.commit()
         
-        # Analyze patterns
-        patterns = {
-            'average_rating': sum(f.rating for f in feedback_records) / len(feedback_records),
-            'preferred_feedback_types': {},
-            'liked_aspects_frequency': {},
-            'disliked_aspects_frequency': {},
-            'comfort_patterns': {},
-            'occasion_preferences': {}
+        return {'feedback_rows': feedback_rows, 'profiles_written': len(profiles)}
+
+
+class FeedbackWeeklyRollup(db.Model):
+    """
+    Per-user weekly feedback rollup for incremental style-evolution analytics
+    "We girls have no time" - Weeks of feedback summed up in one row!
+    """
+    __tablename__ = 'feedback_weekly_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'week_key', name='uq_feedback_rollup_user_week'),
+        db.Index('ix_feedback_rollup_user_week_start', 'user_id', 'week_start'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    week_key = db.Column(db.String(10), nullable=False)  # strftime('%Y-W%U') bucket
+    week_start = db.Column(db.Date, nullable=False)  # First day of the bucket (Sunday, or Jan 1)
+    
+    # Running aggregates of feedback ratings
+    feedback_count = db.Column(db.Integer, default=0)
+    rating_sum = db.Column(db.Float, default=0.0)
+    rating_sum_squares = db.Column(db.Float, default=0.0)
+    feedback_type_counts = db.Column(db.Text, nullable=True)  # JSON: {'worn': 3, 'saved': 1}
+    
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FeedbackWeeklyRollup {self.user_id}:{self.week_key}:{self.feedback_count}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'week_key': self.week_key,
+            'week_start': self.week_start.isoformat() if self.week_start else None,
+            'feedback_count': self.feedback_count,
+            'rating_sum': self.rating_sum,
+            'rating_sum_squares': self.rating_sum_squares,
+            'feedback_type_counts': json.loads(self.feedback_type_counts) if self.feedback_type_counts else {},
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
         }
+    
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.feedback_count if self.feedback_count else 0.0
+    
+    @property
+    def rating_variance(self):
+        """Population variance of the week's ratings from the running sums"""
+        if not self.feedback_count:
+            return 0.0
+        mean = self.rating_sum / self.feedback_count
+        return max(self.rating_sum_squares / self.feedback_count - mean ** 2, 0.0)
+    
+    @staticmethod
+    def week_bucket(moment):
+        """Return (week_key, week_start) for a datetime, matching strftime('%Y-W%U')"""
+        day = moment.date() if isinstance(moment, datetime) else moment
+        sunday = day - timedelta(days=(day.weekday() + 1) % 7)
+        return day.strftime('%Y-W%U'), max(sunday, date(day.year, 1, 1))
+    
+    @staticmethod
+    def record_feedback(feedback):
+        """
+        Fold a new feedback row into its weekly rollup (no commit)
+        Call in the same transaction that adds the feedback.
+        """
+        if feedback.feedback_date is None:
+            feedback.feedback_date = datetime.utcnow()
+        week_key, week_start = FeedbackWeeklyRollup.week_bucket(feedback.feedback_date)
         
-        for feedback in feedback_records:
-            # Feedback type patterns
-            feedback_type = feedback.feedback_type
-            patterns['preferred_feedback_types'][feedback_type] = \
-                patterns['preferred_feedback_types'].get(feedback_type, 0) + 1
-            
-            # Liked aspects
-            if feedback.liked_aspects:
-                for aspect in json.loads(feedback.liked_aspects):
-                    patterns['liked_aspects_frequency'][aspect] = \
-                        patterns['liked_aspects_frequency'].get(aspect, 0) + 1
-            
-            # Disliked aspects
-            if feedback.disliked_aspects:
-                for aspect in json.loads(feedback.disliked_aspects):
-                    patterns['disliked_aspects_frequency'][aspect] = \
-                        patterns['disliked_aspects_frequency'].get(aspect, 0) + 1
-            
-            # Comfort patterns
-            if feedback.comfort_rating:
-                comfort_key = f"comfort_{feedback.comfort_rating}"
-                patterns['comfort_patterns'][comfort_key] = \
-                    patterns['comfort_patterns'].get(comfort_key, 0) + 1
-            
-            # Occasion preferences
-            if feedback.occasion_actual:
-                patterns['occasion_preferences'][feedback.occasion_actual] = \
-                    patterns['occasion_preferences'].get(feedback.occasion_actual, 0) + 1
+        rollup = FeedbackWeeklyRollup.query.filter_by(
+            user_id=feedback.user_id, week_key=week_key
+        ).with_for_update().first()
+        if not rollup:
+            rollup = FeedbackWeeklyRollup(
+                user_id=feedback.user_id,
+                week_key=week_key,
+                week_start=week_start,
+                feedback_count=0,
+                rating_sum=0.0,
+                rating_sum_squares=0.0
+            )
+            db.session.add(rollup)
+        
+        type_counts = json.loads(rollup.feedback_type_counts) if rollup.feedback_type_counts else {}
+        type_counts[feedback.feedback_type] = type_counts.get(feedback.feedback_type, 0) + 1
+        
+        rollup.feedback_count += 1
+        rollup.rating_sum += feedback.rating
+        rollup.rating_sum_squares += feedback.rating ** 2
+        rollup.feedback_type_counts = json.dumps(type_counts)
+        rollup.last_updated = datetime.utcnow()
+        return rollup
+    
+    @staticmethod
+    def get_user_rollups(user_id, since):
+        """Get a user's weekly rollups covering `since` onwards, oldest first"""
+        _, since_week_start = FeedbackWeeklyRollup.week_bucket(since)
+        return FeedbackWeeklyRollup.query.filter(
+            FeedbackWeeklyRollup.user_id == user_id,
+            FeedbackWeeklyRollup.week_start >= since_week_start
+        ).order_by(FeedbackWeeklyRollup.week_start.asc()).all()
+    
+    @staticmethod
+    def backfill(user_id=None, batch_size=5000):
+        """
+        Rebuild weekly rollups from raw OutfitFeedback rows
+        "We girls have no time" - One pass over history, then incremental forever!
+        """
+        rollup_query = FeedbackWeeklyRollup.query
+        feedback_query = db.session.query(
+            OutfitFeedback.user_id, OutfitFeedback.feedback_date,
+            OutfitFeedback.rating, OutfitFeedback.feedback_type
+        ).filter(OutfitFeedback.feedback_date.isnot(None))
+        if user_id is not None:
+            rollup_query = rollup_query.filter_by(user_id=user_id)
+            feedback_query = feedback_query.filter(OutfitFeedback.user_id == user_id)
+        rollup_query.delete(synchronize_session=False)
         
-        return patterns
+        # Aggregate in memory, streaming the feedback rows in batches
+        buckets = {}
+        feedback_rows = 0
+        for row_user_id, feedback_date, rating, feedback_type in feedback_query.yield_per(batch_size):
+            week_key, week_start = FeedbackWeeklyRollup.week_bucket(feedback_date)
+            bucket = buckets.setdefault((row_user_id, week_key), {
+                'week_start': week_start, 'count': 0, 'sum': 0.0, 'sum_squares': 0.0, 'types': {}
+            })
+            bucket['count'] += 1
+            bucket['sum'] += rating
+            bucket['sum_squares'] += rating ** 2
+            bucket['types'][feedback_type] = bucket['types'].get(feedback_type, 0) + 1
+            feedback_rows += 1
+        
+        now = datetime.utcnow()
+        db.session.bulk_insert_mappings(FeedbackWeeklyRollup, [
+            {
+                'user_id': row_user_id,
+                'week_key': week_key,
+                'week_start': bucket['week_start'],
+                'feedback_count': bucket['count'],
+                'rating_sum': bucket['sum'],
+                'rating_sum_squares': bucket['sum_squares'],
+                'feedback_type_counts': json.dumps(bucket['types']),
+                'last_updated': now
+            }
+            for (row_user_id, week_key), bucket in buckets.items()
+        ])
+        db.session.commit()
+        
+        return {
+            'feedback_rows': feedback_rows,
+            'rollups_written': len(buckets),
+            'users': len({row_user_id for row_user_id, _ in buckets})
+        }
 
 
 class SmartRecommendationEngine:
@@ -344,8 +892,13 @@ class SmartRecommendationEngine:
         return base_outfit
     
     @staticmethod
-    def apply_weather_rules(outfit_data, wardrobe_items, weather_rules):
-        """Apply weather-specific rules to outfit"""
+    def apply_weather_rules(outfit_data, wardrobe_items, weather_rules, pick_outerwear=None):
+        """
+        Apply weather-specific rules to outfit
+        pick_outerwear(candidates) chooses the layer when one is required
+        (default: the first favorite); the weekly planner passes its own so
+        layers count against its repeat limits.
+        """
         if not weather_rules:
             return outfit_data
         
@@ -366,8 +919,11 @@ class SmartRecommendationEngine:
                     outerwear_items = [item for item in wardrobe_items 
                                      if item.get('category', '').lower() in ['outerwear', 'jackets', 'coats']]
                     if outerwear_items:
-                        best_outerwear = max(outerwear_items, 
-                                           key=lambda x: x.get('favorite', False))
+                        if pick_outerwear:
+                            best_outerwear = pick_outerwear(outerwear_items)
+                        else:
+                            best_outerwear = max(outerwear_items, 
+                                               key=lambda x: x.get('favorite', False))
                         current_items.append(best_outerwear)
                         outfit_data['outfit_items'].append(best_outerwear.get('id'))
             
@@ -565,3 +1121,159 @@ class SmartRecommendationEngine:
         
         return None
 
+
+
+class WeeklyOutfitPlanner:
+    """
+    Batch outfit planning across a list of (date, occasion, weather) slots
+    "We girls have no time" - Plan the whole week in one go!
+    
+    The wardrobe is encoded once, weather rules and seasonal trends are
+    looked up once per distinct condition, and item usage is tracked across
+    slots so pieces are not repeated within the plan.
+    """
+    
+    MAX_SLOTS = 31
+    SLOT_KEYS = ('date', 'occasion', 'weather', 'temperature', 'season')
+    
+    @staticmethod
+    def encode_wardrobe(wardrobe_items):
+        """Index the wardrobe once: items by lowercased category, best (favorite, most worn) first"""
+        by_category = defaultdict(list)
+        for item in wardrobe_items:
+            by_category[(item.get('category') or '').lower()].append(item)
+        for category_items in by_category.values():
+            # Stable sort keeps wardrobe order on ties, like max() in generate_outfit_recommendation
+            category_items.sort(key=WeeklyOutfitPlanner.rank, reverse=True)
+        return by_category
+    
+    @staticmethod
+    def rank(item):
+        return (item.get('favorite', False), item.get('wear_count', 0))
+    
+    @staticmethod
+    def _pick_item(category_items, item_uses, max_item_uses):
+        """Best item still under its use limit, else the least-used one (flagged as a repeat)"""
+        if not category_items:
+            return None, False
+        for item in category_items:
+            if item_uses[item.get('id')] < max_item_uses:
+                return item, False
+        return min(category_items, key=lambda x: item_uses[x.get('id')]), True
+    
+    @staticmethod
+    def select_outfit(wardrobe_index, total_items, style_analysis, occasion, item_uses=None, max_item_uses=1):
+        """
+        Select an outfit from the encoded wardrobe
+        Same selection and scoring as OutfitRecommendation.generate_outfit_recommendation,
+        but skipping items already used max_item_uses times in the plan.
+        """
+        item_uses = item_uses if item_uses is not None else Counter()
+        requirements = OutfitRecommendation.get_occasion_requirements(occasion)
+        
+        avoided_count = sum(len(wardrobe_index.get(category, [])) for category in requirements.get('avoid_categories', []))
+        if total_items - avoided_count < 2:
+            return None
+        
+        outfit_items = []
+        repeated_items = []
+        used_categories = set()
+        
+        # Prioritize required categories, then add optional items if space allows
+        for category in requirements['required_categories'] + requirements['optional_categories']:
+            if category in used_categories:
+                continue
+            if category in requirements['optional_categories'] and len(outfit_items) >= 5:  # Limit outfit size
+                break
+            item, repeated = WeeklyOutfitPlanner._pick_item(wardrobe_index.get(category), item_uses, max_item_uses)
+            if item:
+                outfit_items.append(item)
+                used_categories.add(category)
+                if repeated:
+                    repeated_items.append(item.get('id'))
+        
+        if len(outfit_items) < 2:
+            return None
+        
+        # Calculate scores
+        style_score = OutfitRecommendation.calculate_style_match_score(outfit_items, style_analysis)
+        occasion_score = OutfitRecommendation.calculate_occasion_score(outfit_items, requirements)
+        color_score = OutfitRecommendation.calculate_color_harmony_score(outfit_items, style_analysis)
+        
+        return {
+            'outfit_items': [item.get('id') for item in outfit_items],
+            'outfit_description': OutfitRecommendation.generate_outfit_description(outfit_items, occasion),
+            'style_match_score': style_score,
+            'occasion_match_score': occasion_score,
+            'color_harmony_score': color_score,
+            'overall_score': (style_score + occasion_score + color_score) / 3,
+            'repeated_items': repeated_items
+        }
+    
+    @staticmethod
+    def plan_week(user_id, wardrobe_items, style_analysis, slots, feedback_patterns=None, max_item_uses=1):
+        """
+        Generate one enhanced outfit per slot with no-repeat constraints across the plan
+        "We girls have no time" - A week of outfits for the cost of two!
+        """
+        wardrobe_index = WeeklyOutfitPlanner.encode_wardrobe(wardrobe_items)
+        
+        # Shared context: fetched once for the whole plan
+        seasonal_rec = SeasonalRecommendation.get_current_season_recommendations()
+        weather_rules_cache = {}
+        item_uses = Counter()
+        
+        plans = []
+        for slot in slots:
+            occasion = slot.get('occasion', 'casual')
+            weather = slot.get('weather')
+            temperature = slot.get('temperature')
+            season = slot.get('season')
+            
+            outfit_data = WeeklyOutfitPlanner.select_outfit(
+                wardrobe_index, len(wardrobe_items), style_analysis, occasion, item_uses, max_item_uses
+            )
+            if not outfit_data:
+                plans.append({'slot': slot, 'outfit': None})
+                continue
+            
+            # Apply weather rules; a required layer is picked under the same use limits as the rest
+            if weather:
+                rules_key = (weather, temperature)
+                if rules_key not in weather_rules_cache:
+                    weather_rules_cache[rules_key] = WeatherOutfitRule.get_weather_rules(weather, temperature)
+                
+                def pick_outerwear(candidates, repeated_items=outfit_data['repeated_items']):
+                    candidates = sorted(candidates, key=WeeklyOutfitPlanner.rank, reverse=True)
+                    item, repeated = WeeklyOutfitPlanner._pick_item(candidates, item_uses, max_item_uses)
+                    if repeated:
+                        repeated_items.append(item.get('id'))
+                    return item
+                
+                outfit_data = SmartRecommendationEngine.apply_weather_rules(
+                    outfit_data, wardrobe_items, weather_rules_cache[rules_key], pick_outerwear
+                )
+                # Avoid rules may have dropped a repeated piece again
+                outfit_data['repeated_items'] = [item_id for item_id in outfit_data['repeated_items']
+                                                 if item_id in outfit_data['outfit_items']]
+            
+            # Apply seasonal recommendations
+            if seasonal_rec:
+                outfit_data = SmartRecommendationEngine.apply_seasonal_trends(
+                    outfit_data, wardrobe_items, seasonal_rec
+                )
+            
+            # Apply user learning
+            if feedback_patterns:
+                outfit_data = SmartRecommendationEngine.apply_user_learning(
+                    outfit_data, wardrobe_items, feedback_patterns
+                )
+            
+            outfit_data = SmartRecommendationEngine.enhance_scoring(
+                outfit_data, weather, season, feedback_patterns
+            )
+            
+            item_uses.update(outfit_data['outfit_items'])
+            plans.append({'slot': slot, 'outfit': outfit_data})
+        
+        return plans
@@ -1,10 +1,13 @@
 from datetime import datetime, date, timedelta
 import json
 import math
-from collections import defaultdict, Counter
+import threading
+import time
+from collections import defaultdict, Counter, OrderedDict
+from sqlalchemy.dialects import postgresql, sqlite
 from src.models.user import db
 from src.models.ai_models import StyleAnalysis, OutfitRecommendation
-from src.models.enhanced_recommendations import OutfitFeedback
+from src.models.enhanced_recommendations import OutfitFeedback, FeedbackWeeklyRollup
 
 class UserStyleProfile(db.Model):
     """
@@ -25,6 +28,9 @@ class UserStyleProfile(db.Model):
     style_evolution = db.Column(db.Text, nullable=True)  # JSON: historical style changes
     style_flexibility = db.Column(db.Float, default=0.5)  # How much user varies style (0-1)
     
+    # Legacy JSON preference maps. Learned weights now live in style_preference_weight
+    # rows; these columns are only read until `flask migrate-style-preferences` has run.
+    
     # Personalized preferences (learned from feedback)
     preferred_colors = db.Column(db.Text, nullable=True)  # JSON: color preferences with weights
     avoided_colors = db.Column(db.Text, nullable=True)  # JSON: colors user dislikes
@@ -55,10 +61,53 @@ class UserStyleProfile(db.Model):
     auto_learn_enabled = db.Column(db.Boolean, default=True)
     style_exploration_mode = db.Column(db.Boolean, default=False)  # User wants to try new styles
     
+    # Preference maps stored as (user, dimension, key, weight) rows
+    PREFERENCE_DIMENSIONS = (
+        'preferred_colors', 'avoided_colors', 'preferred_categories', 'avoided_categories',
+        'fit_preferences', 'comfort_priorities', 'fabric_preferences',
+        'work_style_preferences', 'casual_style_preferences', 'formal_style_preferences'
+    )
+    
     def __repr__(self):
         return f'<UserStyleProfile {self.user_id}:{self.primary_style}>'
     
+    def preference_maps(self):
+        """
+        Learned preference weights per dimension, from the per-user cache
+        "We girls have no time" - Your preferences, no JSON parsing!
+        """
+        maps = style_preference_cache.get(self.user_id)
+        if maps is None:
+            maps = StylePreferenceWeight.load_maps(self.user_id)
+            style_preference_cache.put(self.user_id, maps)
+        
+        maps = {dimension: dict(maps.get(dimension, {})) for dimension in self.PREFERENCE_DIMENSIONS}
+        # Rows not migrated yet still carry their weights in the legacy JSON columns
+        for (dimension, key), weight in self._legacy_preference_deltas().items():
+            maps[dimension][key] = maps[dimension].get(key, 0) + weight
+        return maps
+    
+    def _legacy_preference_deltas(self, clear=False):
+        """Weights still held in the legacy JSON columns, as {(dimension, key): weight}"""
+        deltas = defaultdict(float)
+        for dimension in self.PREFERENCE_DIMENSIONS:
+            raw = getattr(self, dimension)
+            if raw is None:
+                continue
+            try:
+                values = json.loads(raw) if raw else {}
+            except ValueError:
+                values = {}
+            if isinstance(values, dict):
+                for key, weight in values.items():
+                    if isinstance(weight, (int, float)) and not isinstance(weight, bool):
+                        deltas[(dimension, str(key))] += weight
+            if clear:
+                setattr(self, dimension, None)
+        return deltas
+    
     def to_dict(self):
+        preferences = self.preference_maps()
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -67,16 +116,16 @@ class UserStyleProfile(db.Model):
             'style_confidence': self.style_confidence,
             'style_evolution': json.loads(self.style_evolution) if self.style_evolution else [],
             'style_flexibility': self.style_flexibility,
-            'preferred_colors': json.loads(self.preferred_colors) if self.preferred_colors else {},
-            'avoided_colors': json.loads(self.avoided_colors) if self.avoided_colors else {},
-            'preferred_categories': json.loads(self.preferred_categories) if self.preferred_categories else {},
-            'avoided_categories': json.loads(self.avoided_categories) if self.avoided_categories else {},
-            'fit_preferences': json.loads(self.fit_preferences) if self.fit_preferences else {},
-            'comfort_priorities': json.loads(self.comfort_priorities) if self.comfort_priorities else {},
-            'fabric_preferences': json.loads(self.fabric_preferences) if self.fabric_preferences else {},
-            'work_style_preferences': json.loads(self.work_style_preferences) if self.work_style_preferences else {},
-            'casual_style_preferences': json.loads(self.casual_style_preferences) if self.casual_style_preferences else {},
-            'formal_style_preferences': json.loads(self.formal_style_preferences) if self.formal_style_preferences else {},
+            'preferred_colors': preferences['preferred_colors'],
+            'avoided_colors': preferences['avoided_colors'],
+            'preferred_categories': preferences['preferred_categories'],
+            'avoided_categories': preferences['avoided_categories'],
+            'fit_preferences': preferences['fit_preferences'],
+            'comfort_priorities': preferences['comfort_priorities'],
+            'fabric_preferences': preferences['fabric_preferences'],
+            'work_style_preferences': preferences['work_style_preferences'],
+            'casual_style_preferences': preferences['casual_style_preferences'],
+            'formal_style_preferences': preferences['formal_style_preferences'],
             'lifestyle_factors': json.loads(self.lifestyle_factors) if self.lifestyle_factors else {},
             'climate_preferences': json.loads(self.climate_preferences) if self.climate_preferences else {},
             'budget_consciousness': self.budget_consciousness,
@@ -112,25 +161,29 @@ class UserStyleProfile(db.Model):
         elif feedback_data.get('rating', 0) <= 2:
             self.confidence_score = max(self.confidence_score - 0.01, 0.0)
         
+        # Collect weight increments, folding in any not-yet-migrated JSON weights
+        deltas = self._legacy_preference_deltas(clear=True)
+        
         # Update color preferences
-        self._update_color_preferences(feedback_data)
+        self._update_color_preferences(feedback_data, deltas)
         
         # Update category preferences
-        self._update_category_preferences(feedback_data)
+        self._update_category_preferences(feedback_data, deltas)
         
         # Update fit and comfort preferences
-        self._update_comfort_preferences(feedback_data)
+        self._update_comfort_preferences(feedback_data, deltas)
         
         # Update occasion-specific preferences
-        self._update_occasion_preferences(feedback_data)
+        self._update_occasion_preferences(feedback_data, deltas)
         
+        # One upsert per touched (dimension, key) row
+        user_id = self.user_id
+        StylePreferenceWeight.apply_deltas(user_id, deltas)
         db.session.commit()
+        style_preference_cache.invalidate(user_id)
     
-    def _update_color_preferences(self, feedback_data):
+    def _update_color_preferences(self, feedback_data, deltas):
         """Update color preferences based on feedback"""
-        preferred_colors = json.loads(self.preferred_colors) if self.preferred_colors else {}
-        avoided_colors = json.loads(self.avoided_colors) if self.avoided_colors else {}
-        
         rating = feedback_data.get('rating', 3)
         liked_aspects = feedback_data.get('liked_aspects', [])
         disliked_aspects = feedback_data.get('disliked_aspects', [])
@@ -141,48 +194,35 @@ class UserStyleProfile(db.Model):
             # For now, we'll use a placeholder approach
             outfit_colors = feedback_data.get('outfit_colors', [])
             for color in outfit_colors:
-                preferred_colors[color] = preferred_colors.get(color, 0) + 0.1
+                deltas[('preferred_colors', str(color))] += 0.1
         
         # If user disliked colors
         if 'colors' in disliked_aspects or rating <= 2:
             outfit_colors = feedback_data.get('outfit_colors', [])
             for color in outfit_colors:
-                avoided_colors[color] = avoided_colors.get(color, 0) + 0.1
-        
-        self.preferred_colors = json.dumps(preferred_colors)
-        self.avoided_colors = json.dumps(avoided_colors)
+                deltas[('avoided_colors', str(color))] += 0.1
     
-    def _update_category_preferences(self, feedback_data):
+    def _update_category_preferences(self, feedback_data, deltas):
         """Update category preferences based on feedback"""
-        preferred_categories = json.loads(self.preferred_categories) if self.preferred_categories else {}
-        avoided_categories = json.loads(self.avoided_categories) if self.avoided_categories else {}
-        
         rating = feedback_data.get('rating', 3)
         outfit_categories = feedback_data.get('outfit_categories', [])
         
         for category in outfit_categories:
             if rating >= 4:
-                preferred_categories[category] = preferred_categories.get(category, 0) + 0.1
+                deltas[('preferred_categories', str(category))] += 0.1
             elif rating <= 2:
-                avoided_categories[category] = avoided_categories.get(category, 0) + 0.1
-        
-        self.preferred_categories = json.dumps(preferred_categories)
-        self.avoided_categories = json.dumps(avoided_categories)
+                deltas[('avoided_categories', str(category))] += 0.1
     
-    def _update_comfort_preferences(self, feedback_data):
+    def _update_comfort_preferences(self, feedback_data, deltas):
         """Update comfort preferences based on feedback"""
-        comfort_priorities = json.loads(self.comfort_priorities) if self.comfort_priorities else {}
-        
         comfort_rating = feedback_data.get('comfort_rating')
         if comfort_rating:
             if comfort_rating >= 4:
-                comfort_priorities['high_comfort_preference'] = comfort_priorities.get('high_comfort_preference', 0) + 0.1
+                deltas[('comfort_priorities', 'high_comfort_preference')] += 0.1
             elif comfort_rating <= 2:
-                comfort_priorities['comfort_issues'] = comfort_priorities.get('comfort_issues', 0) + 0.1
-        
-        self.comfort_priorities = json.dumps(comfort_priorities)
+                deltas[('comfort_priorities', 'comfort_issues')] += 0.1
     
-    def _update_occasion_preferences(self, feedback_data):
+    def _update_occasion_preferences(self, feedback_data, deltas):
         """Update occasion-specific preferences"""
         occasion = feedback_data.get('occasion_actual') or feedback_data.get('occasion')
         rating = feedback_data.get('rating', 3)
@@ -191,16 +231,174 @@ class UserStyleProfile(db.Model):
             return
         
         occasion_field = f"{occasion}_style_preferences"
-        if hasattr(self, occasion_field):
-            current_prefs = getattr(self, occasion_field)
-            prefs_dict = json.loads(current_prefs) if current_prefs else {}
-            
+        if occasion_field in self.PREFERENCE_DIMENSIONS:
             if rating >= 4:
-                prefs_dict['successful_combinations'] = prefs_dict.get('successful_combinations', 0) + 1
+                deltas[(occasion_field, 'successful_combinations')] += 1
             elif rating <= 2:
-                prefs_dict['unsuccessful_combinations'] = prefs_dict.get('unsuccessful_combinations', 0) + 1
-            
-            setattr(self, occasion_field, json.dumps(prefs_dict))
+                deltas[(occasion_field, 'unsuccessful_combinations')] += 1
+
+
+class StylePreferenceWeight(db.Model):
+    """
+    One learned preference weight per (user, dimension, key)
+    "We girls have no time" - Single-row updates, no JSON round trips!
+    """
+    __tablename__ = 'style_preference_weight'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'dimension', 'pref_key', name='uq_style_preference_weight'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    dimension = db.Column(db.String(40), nullable=False)  # e.g. preferred_colors, work_style_preferences
+    pref_key = db.Column(db.String(100), nullable=False)  # e.g. navy, successful_combinations
+    weight = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StylePreferenceWeight {self.user_id}:{self.dimension}:{self.pref_key}={self.weight}>'
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'dimension': self.dimension,
+            'key': self.pref_key,
+            'weight': self.weight,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    _upsert_statements = {}
+    
+    @staticmethod
+    def _upsert_statement(dialect):
+        """INSERT ... ON CONFLICT DO UPDATE adding to the stored weight (SQLite and PostgreSQL)"""
+        statement = StylePreferenceWeight._upsert_statements.get(dialect)
+        if statement is None:
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            table = StylePreferenceWeight.__table__
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.dimension, table.c.pref_key],
+                set_={'weight': table.c.weight + statement.excluded.weight,
+                      'updated_at': statement.excluded.updated_at}
+            )
+            StylePreferenceWeight._upsert_statements[dialect] = statement
+        return statement
+    
+    @staticmethod
+    def apply_deltas(user_id, deltas):
+        """Add {(dimension, key): delta} to the user's weights with one upsert per row"""
+        if not deltas:
+            return 0
+        
+        now = datetime.utcnow()
+        statement = StylePreferenceWeight._upsert_statement(db.session.get_bind().dialect.name)
+        db.session.execute(statement, [
+            {'user_id': user_id, 'dimension': dimension, 'pref_key': key, 'weight': delta, 'updated_at': now}
+            for (dimension, key), delta in deltas.items()
+        ])
+        return len(deltas)
+    
+    @staticmethod
+    def load_maps(user_id):
+        """All weights for a user as {dimension: {key: weight}}"""
+        maps = defaultdict(dict)
+        rows = db.session.query(
+            StylePreferenceWeight.dimension, StylePreferenceWeight.pref_key, StylePreferenceWeight.weight
+        ).filter(StylePreferenceWeight.user_id == user_id).all()
+        for dimension, key, weight in rows:
+            maps[dimension][key] = weight
+        return dict(maps)
+    
+    @staticmethod
+    def migrate_legacy_profiles(user_id=None, batch_size=500):
+        """
+        Move weights out of the legacy JSON columns into preference rows
+        "We girls have no time" - Migrate once, never parse again!
+        
+        Migrated columns are cleared in the same transaction, so re-running is a no-op.
+        """
+        legacy_columns = [getattr(UserStyleProfile, dimension) for dimension in UserStyleProfile.PREFERENCE_DIMENSIONS]
+        query = UserStyleProfile.query.filter(db.or_(*[column.isnot(None) for column in legacy_columns]))
+        if user_id is not None:
+            query = query.filter(UserStyleProfile.user_id == user_id)
+        
+        profiles_migrated = weights_written = 0
+        while True:
+            profiles = query.order_by(UserStyleProfile.id).limit(batch_size).all()
+            if not profiles:
+                break
+            for profile in profiles:
+                weights_written += StylePreferenceWeight.apply_deltas(
+                    profile.user_id, profile._legacy_preference_deltas(clear=True)
+                )
+            db.session.commit()
+            for profile in profiles:
+                style_preference_cache.invalidate(profile.user_id)
+            profiles_migrated += len(profiles)
+        
+        return {'profiles_migrated': profiles_migrated, 'weights_written': weights_written}
+
+
+class StylePreferenceCache:
+    """
+    Per-user cache of preference maps
+    "We girls have no time" - Read your preferences from memory!
+    
+    Entries are invalidated after committed writes in this process and expire
+    after `ttl` seconds to pick up writes from other workers.
+    """
+    
+    def __init__(self, max_users=5000, ttl=300):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.entries = OrderedDict()  # user_id -> (loaded_at, maps)
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, user_id, maps):
+        with self.lock:
+            self.entries[user_id] = (time.time(), maps)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, user_id):
+        with self.lock:
+            if self.entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            'cached_users': len(self.entries),
+            'max_users': self.max_users,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'invalidations': self.invalidations
+        }
+
+# Global style preference cache
+style_preference_cache = StylePreferenceCache()
 
 
 class StyleLearningEngine:
@@ -215,18 +413,17 @@ class StyleLearningEngine:
         Analyze how user's style has evolved over time
         "We girls have no time" - Track your style journey!
         """
-        # Get feedback data from the specified period
+        # Read the pre-aggregated weekly rollups for the period (~13 rows for 90 days).
+        # The window is week-aligned: it starts at the week containing the cutoff.
         cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-        feedback_records = OutfitFeedback.query.filter(
-            OutfitFeedback.user_id == user_id,
-            OutfitFeedback.feedback_date >= cutoff_date
-        ).order_by(OutfitFeedback.feedback_date.asc()).all()
+        weekly_rollups = FeedbackWeeklyRollup.get_user_rollups(user_id, cutoff_date)
+        total_feedback = sum(rollup.feedback_count for rollup in weekly_rollups)
         
-        if len(feedback_records) < 5:
+        if total_feedback < 5:
             return {
                 'status': 'insufficient_data',
                 'message': 'Need more feedback data to analyze style evolution',
-                'data_points': len(feedback_records),
+                'data_points': total_feedback,
                 'minimum_required': 5
             }
         
@@ -240,30 +437,29 @@ class StyleLearningEngine:
             'key_insights': []
         }
         
-        # Group feedback by time periods (weekly)
-        weekly_data = defaultdict(list)
-        for feedback in feedback_records:
-            week_key = feedback.feedback_date.strftime('%Y-W%U')
-            weekly_data[week_key].append(feedback)
-        
-        # Analyze each week
+        # Analyze each week from its running count/sum/sum-of-squares
         weekly_ratings = []
         weekly_consistency = []
+        feedback_types = Counter()
         
-        for week, week_feedback in weekly_data.items():
-            avg_rating = sum(f.rating for f in week_feedback) / len(week_feedback)
+        for rollup in weekly_rollups:
+            if not rollup.feedback_count:
+                continue
+            avg_rating = rollup.average_rating
             weekly_ratings.append(avg_rating)
             
             # Calculate consistency (how similar the ratings are)
-            rating_variance = sum((f.rating - avg_rating) ** 2 for f in week_feedback) / len(week_feedback)
-            consistency = 1.0 - min(rating_variance / 4.0, 1.0)  # Normalize to 0-1
+            consistency = 1.0 - min(rollup.rating_variance / 4.0, 1.0)  # Normalize to 0-1
             weekly_consistency.append(consistency)
             
+            if rollup.feedback_type_counts:
+                feedback_types.update(json.loads(rollup.feedback_type_counts))
+            
             evolution_data['timeline'].append({
-                'week': week,
+                'week': rollup.week_key,
                 'average_rating': round(avg_rating, 2),
                 'consistency': round(consistency, 2),
-                'feedback_count': len(week_feedback)
+                'feedback_count': rollup.feedback_count
             })
         
         # Calculate overall metrics
@@ -278,9 +474,7 @@ class StyleLearningEngine:
                 evolution_data['improvement_trend'] = (recent_avg - early_avg) / 5.0  # Normalize
             
             # Exploration tendency (how much variety in feedback types)
-            feedback_types = [f.feedback_type for f in feedback_records]
-            type_variety = len(set(feedback_types)) / len(feedback_types) if feedback_types else 0
-            evolution_data['exploration_tendency'] = type_variety
+            evolution_data['exploration_tendency'] = len(feedback_types) / total_feedback
         
         # Generate insights
         insights = []
@@ -0,0 +1,278 @@
+from datetime import datetime, timedelta
+from types import MappingProxyType
+import hashlib
+import json
+import logging
+import threading
+import time
+from src.models.user import db
+from src.models.advanced_ai import TrendForecast, AdvancedAIEngine
+from src.utils.performance_cache import FrozenRecord
+
+logger = logging.getLogger(__name__)
+
+class TrendForecastSnapshot(db.Model):
+    """
+    Versioned, immutable snapshot of all trend forecasts
+    "We girls have no time" - Trends computed once, served instantly!
+    """
+    __tablename__ = 'trend_forecast_snapshot'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, unique=True, index=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    trend_count = db.Column(db.Integer, default=0)
+    payload = db.Column(db.Text, nullable=False)  # JSON: list of TrendForecast.to_dict() entries
+
+    def __repr__(self):
+        return f'<TrendForecastSnapshot v{self.version}:{self.trend_count}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'content_hash': self.content_hash,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None,
+            'trend_count': self.trend_count
+        }
+
+
+class TrendView(FrozenRecord):
+    """
+    Read-only view of one trend inside a snapshot
+    Exposes the same attributes and to_dict() as a TrendForecast row.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"<TrendView {self._data.get('trend_name')}:{self._data.get('status')}>"
+
+
+class TrendSnapshot:
+    """
+    Immutable in-memory trend snapshot with precomputed orderings
+    "We girls have no time" - Every trend lookup is a slice!
+    """
+    __slots__ = ('version', 'content_hash', 'generated_at', 'next_refresh_at', 'trends',
+                 '_current', '_emerging', '_predicted', '_ranked', '_status_counts')
+
+    def __init__(self, version, trend_dicts, generated_at=None, content_hash=None, refresh_interval=None):
+        trends = tuple(TrendView(trend) for trend in trend_dicts)
+        generated_at = generated_at or datetime.utcnow()
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'content_hash', content_hash or TrendSnapshot.hash_payload(trend_dicts))
+        object.__setattr__(self, 'generated_at', generated_at)
+        object.__setattr__(self, 'next_refresh_at', generated_at + timedelta(seconds=refresh_interval or TrendSnapshotStore.DEFAULT_REFRESH_INTERVAL))
+        object.__setattr__(self, 'trends', trends)
+
+        # Same orderings the TrendForecast query helpers use
+        object.__setattr__(self, '_current', tuple(sorted(
+            (t for t in trends if t.status in ('trending', 'peak')),
+            key=lambda t: t.trend_strength or 0, reverse=True)))
+        object.__setattr__(self, '_emerging', tuple(sorted(
+            (t for t in trends if t.status == 'emerging'),
+            key=lambda t: t.confidence_score or 0, reverse=True)))
+        object.__setattr__(self, '_predicted', tuple(sorted(
+            (t for t in trends if t.status == 'predicted'),
+            key=lambda t: t.confidence_score or 0, reverse=True)))
+        object.__setattr__(self, '_ranked', tuple(sorted(
+            trends, key=lambda t: (t.confidence_score or 0, t.trend_strength or 0), reverse=True)))
+
+        status_counts = {}
+        for trend in trends:
+            status_counts[trend.status] = status_counts.get(trend.status, 0) + 1
+        object.__setattr__(self, '_status_counts', MappingProxyType(status_counts))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Trend snapshots are immutable')
+
+    # Bookkeeping timestamps that change on every refresh without changing the forecast
+    VOLATILE_FIELDS = ('forecast_date', 'last_updated')
+
+    @staticmethod
+    def hash_payload(trend_dicts):
+        """Stable content hash of a snapshot payload"""
+        stable = [{key: value for key, value in trend.items() if key not in TrendSnapshot.VOLATILE_FIELDS}
+                  for trend in trend_dicts]
+        canonical = json.dumps(stable, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @property
+    def etag(self):
+        return f"trend-v{self.version}-{self.content_hash[:16]}"
+
+    def current_trends(self, limit=10):
+        return list(self._current[:limit])
+
+    def emerging_trends(self, limit=5):
+        return list(self._emerging[:limit])
+
+    def predicted_trends(self, limit=5):
+        return list(self._predicted[:limit])
+
+    def ranked_trends(self, limit=10):
+        return list(self._ranked[:limit])
+
+    def count(self, status=None):
+        if status is None:
+            return len(self.trends)
+        return self._status_counts.get(status, 0)
+
+
+class TrendSnapshotStore:
+    """
+    Process-wide holder of the active trend snapshot
+    "We girls have no time" - Read trends without touching the write path!
+
+    Reads never write: the store serves the in-memory snapshot, reloads a
+    newer persisted version written by another worker, and as a last resort
+    builds an unpersisted snapshot from the forecasting engine.
+    """
+
+    DEFAULT_REFRESH_INTERVAL = 6 * 3600  # Scheduled recompute every 6 hours
+
+    def __init__(self, refresh_interval=DEFAULT_REFRESH_INTERVAL, reload_check_interval=60):
+        self.refresh_interval = refresh_interval
+        self.reload_check_interval = reload_check_interval
+        self.snapshot = None
+        self.last_reload_check = 0.0
+        self.lock = threading.RLock()
+
+        # Serving metrics
+        self.refresh_count = 0
+        self.reload_count = 0
+        self.last_refresh_duration = 0.0
+
+    def current(self):
+        """Get the active snapshot (read-only path)"""
+        snapshot = self.snapshot
+        if snapshot is not None and time.time() - self.last_reload_check < self.reload_check_interval:
+            return snapshot
+
+        with self.lock:
+            self.last_reload_check = time.time()
+            persisted = self._load_latest_persisted(newer_than=self.snapshot.version if self.snapshot else 0)
+            if persisted is not None:
+                self.snapshot = persisted
+                self.reload_count += 1
+            elif self.snapshot is None:
+                # Nothing persisted yet - serve a transient snapshot without writing
+                trend_dicts = [AdvancedAIEngine.build_trend_row(trend).to_dict()
+                               for trend in AdvancedAIEngine.compute_trend_forecasts()]
+                self.snapshot = TrendSnapshot(0, trend_dicts, refresh_interval=self.refresh_interval)
+            return self.snapshot
+
+    def refresh(self):
+        """
+        Recompute forecasts, persist a new snapshot version and swap it in
+        This is the only trend write path; run it from the scheduler.
+        """
+        start_time = time.time()
+        with self.lock:
+            AdvancedAIEngine.generate_trend_forecast()
+
+            trend_dicts = [trend.to_dict() for trend in TrendForecast.query.order_by(TrendForecast.id).all()]
+            content_hash = TrendSnapshot.hash_payload(trend_dicts)
+
+            latest = TrendForecastSnapshot.query.order_by(TrendForecastSnapshot.version.desc()).first()
+            if latest and latest.content_hash == content_hash:
+                # Content unchanged - keep the version so ETags stay valid
+                snapshot = TrendSnapshot(latest.version, trend_dicts, datetime.utcnow(), content_hash,
+                                         self.refresh_interval)
+            else:
+                version = (latest.version if latest else 0) + 1
+                record = TrendForecastSnapshot(
+                    version=version,
+                    content_hash=content_hash,
+                    trend_count=len(trend_dicts),
+                    payload=json.dumps(trend_dicts)
+                )
+                db.session.add(record)
+                db.session.commit()
+                snapshot = TrendSnapshot(version, trend_dicts, record.generated_at, content_hash,
+                                         self.refresh_interval)
+
+            self.snapshot = snapshot
+            self.last_reload_check = time.time()
+            self.refresh_count += 1
+            self.last_refresh_duration = time.time() - start_time
+            return snapshot
+
+    def _load_latest_persisted(self, newer_than=0):
+        """Load the newest persisted snapshot if it is newer than the given version"""
+        latest_version = db.session.query(db.func.max(TrendForecastSnapshot.version)).scalar()
+        if not latest_version or latest_version <= newer_than:
+            return None
+
+        record = TrendForecastSnapshot.query.filter_by(version=latest_version).first()
+        return TrendSnapshot(record.version, json.loads(record.payload), record.generated_at,
+                             record.content_hash, self.refresh_interval)
+
+    def reset(self):
+        """Drop the in-memory snapshot (used by tests and cache invalidation)"""
+        with self.lock:
+            self.snapshot = None
+            self.last_reload_check = 0.0
+
+    def get_stats(self):
+        snapshot = self.snapshot
+        return {
+            'active_version': snapshot.version if snapshot else None,
+            'etag': snapshot.etag if snapshot else None,
+            'generated_at': snapshot.generated_at.isoformat() if snapshot else None,
+            'trend_count': snapshot.count() if snapshot else 0,
+            'refresh_count': self.refresh_count,
+            'reload_count': self.reload_count,
+            'last_refresh_duration': self.last_refresh_duration,
+            'refresh_interval': self.refresh_interval
+        }
+
+# Global trend snapshot store
+trend_snapshot_store = TrendSnapshotStore()
+
+
+class TrendForecastScheduler:
+    """
+    Background job that periodically recomputes the trend snapshot
+    "We girls have no time" - Fresh trends without slowing down requests!
+    """
+
+    def __init__(self, app, store=None, interval=None):
+        self.app = app
+        self.store = store or trend_snapshot_store
+        self.interval = interval or self.store.refresh_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, run_immediately=True):
+        if self.thread and self.thread.is_alive():
+            return self
+        if run_immediately:
+            self.run_once()
+        self.thread = threading.Thread(target=self._run, name='trend-forecast-scheduler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(5)
+
+    def run_once(self):
+        with self.app.app_context():
+            try:
+                return self.store.refresh()
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("Trend forecast refresh failed")
+                return None
+
+    def run_forever(self):
+        """Refresh now, then every interval, in the calling thread (prefork serving runs this in its own process)"""
+        self.run_once()
+        self._run()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.run_once()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timedelta
 import requests
 import json
@@ -6,6 +6,7 @@ from src.models.advanced_ai import (
     TrendForecast, WardrobeOptimization, StyleCompatibility, 
     PredictiveRecommendation, AdvancedAIEngine, db
 )
+from src.models.trend_snapshot import trend_snapshot_store
 
 advanced_ai_bp = Blueprint('advanced_ai', __name__)
 
@@ -67,38 +68,43 @@ def get_trend_forecast():
         trend_type = request.args.get('type', 'all')  # all, current, emerging, predicted
         limit = request.args.get('limit', 10, type=int)
         
-        # Generate fresh trend forecasts
-        fresh_forecasts = AdvancedAIEngine.generate_trend_forecast()
+        # Serve from the precomputed trend snapshot (read-only, refreshed by the scheduler)
+        snapshot = trend_snapshot_store.current()
+        # Weak: the response encoder may compress or re-encode the body
+        etag = f"{snapshot.etag}-{trend_type}-{limit}"
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            return response
         
         # Get trends based on type
         if trend_type == 'current':
-            trends = TrendForecast.get_current_trends(limit)
+            trends = snapshot.current_trends(limit)
         elif trend_type == 'emerging':
-            trends = TrendForecast.get_emerging_trends(limit)
+            trends = snapshot.emerging_trends(limit)
         elif trend_type == 'predicted':
-            trends = TrendForecast.get_predicted_trends(limit)
+            trends = snapshot.predicted_trends(limit)
         else:
             # Get all trends, sorted by confidence and strength
-            trends = TrendForecast.query.order_by(
-                TrendForecast.confidence_score.desc(),
-                TrendForecast.trend_strength.desc()
-            ).limit(limit).all()
+            trends = snapshot.ranked_trends(limit)
         
         # Convert to dict format
         trend_data = [trend.to_dict() for trend in trends]
         
         # Add trend insights
         insights = {
-            'total_trends_tracked': TrendForecast.query.count(),
-            'trending_now': TrendForecast.query.filter_by(status='trending').count(),
-            'emerging_trends': TrendForecast.query.filter_by(status='emerging').count(),
-            'predicted_trends': TrendForecast.query.filter_by(status='predicted').count(),
+            'total_trends_tracked': snapshot.count(),
+            'trending_now': snapshot.count('trending'),
+            'emerging_trends': snapshot.count('emerging'),
+            'predicted_trends': snapshot.count('predicted'),
             'top_categories': ['style', 'color', 'pattern', 'fabric'],
             'forecast_accuracy': '78%',  # In production, calculate from historical data
-            'next_update': (datetime.utcnow() + timedelta(days=7)).isoformat()
+            'snapshot_version': snapshot.version,
+            'generated_at': snapshot.generated_at.isoformat(),
+            'next_update': snapshot.next_refresh_at.isoformat()
         }
         
-        return jsonify({
+        response = jsonify({
             'status': 'success',
             'message': 'Trend forecasts retrieved successfully',
             'trends': trend_data,
@@ -107,6 +113,9 @@ def get_trend_forecast():
             'total_results': len(trend_data),
             'tagline': 'We girls have no time - Know trends before they happen!'
         })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
         
     except Exception as e:
         return jsonify({
@@ -163,73 +163,15 @@ def analyze_style():
         profile_data = user_data.get('profile', {})
         style_profile = user_data.get('style_profile', {})
         
-        # Analyze style personality
-        style_personality, confidence, style_scores = StyleAnalysis.analyze_style_personality(
-            profile_data, wardrobe_data, style_profile
+        # Analyze and persist style (concurrent identical requests share one run)
+        analysis_data, style_scores = StyleAnalysis.run_style_analysis(
+            user_id, profile_data, wardrobe_data, style_profile
         )
         
-        # Analyze color palette
-        color_season, primary_colors, avoid_colors = StyleAnalysis.analyze_color_palette(
-            profile_data, style_personality
-        )
-        
-        # Determine body type (simplified analysis)
-        body_type = style_profile.get('body_type', 'unknown')
-        body_confidence = 0.7 if body_type != 'unknown' else 0.3
-        
-        # Determine lifestyle match
-        lifestyle_indicators = {
-            'professional': ['blazers', 'trousers', 'button_downs'],
-            'casual': ['jeans', 't_shirts', 'sneakers'],
-            'social': ['dresses', 'heels', 'accessories']
-        }
-        
-        lifestyle_scores = {}
-        for lifestyle, indicators in lifestyle_indicators.items():
-            score = sum(1 for item in wardrobe_data 
-                       if item.get('category', '').lower() in indicators)
-            lifestyle_scores[lifestyle] = score
-        
-        lifestyle_match = max(lifestyle_scores, key=lifestyle_scores.get) if lifestyle_scores else 'casual'
-        
-        # Create or update style analysis
-        analysis = StyleAnalysis.query.filter_by(user_id=user_id).first()
-        if analysis:
-            # Update existing
-            analysis.style_personality = style_personality
-            analysis.confidence_score = confidence
-            analysis.body_type = body_type
-            analysis.body_confidence = body_confidence
-            analysis.color_season = color_season
-            analysis.primary_colors = json.dumps(primary_colors)
-            analysis.avoid_colors = json.dumps(avoid_colors)
-            analysis.preferred_styles = json.dumps(list(style_scores.keys())[:3])
-            analysis.lifestyle_match = lifestyle_match
-            analysis.last_updated = datetime.utcnow()
-            analysis.data_sources = json.dumps(['wardrobe_analysis', 'user_preferences', 'ai_algorithm'])
-        else:
-            # Create new
-            analysis = StyleAnalysis(
-                user_id=user_id,
-                style_personality=style_personality,
-                confidence_score=confidence,
-                body_type=body_type,
-                body_confidence=body_confidence,
-                color_season=color_season,
-                primary_colors=json.dumps(primary_colors),
-                avoid_colors=json.dumps(avoid_colors),
-                preferred_styles=json.dumps(list(style_scores.keys())[:3]),
-                lifestyle_match=lifestyle_match,
-                data_sources=json.dumps(['wardrobe_analysis', 'user_preferences', 'ai_algorithm'])
-            )
-            db.session.add(analysis)
-        
-        db.session.commit()
-        
         return jsonify({
             'status': 'success',
             'message': 'Style analysis completed successfully',
-            'analysis': analysis.to_dict(),
+            'analysis': analysis_data,
             'style_scores': style_scores,
             'analysis_time': '2.3 seconds',
             'cached': False,
@@ -383,6 +325,7 @@ def get_ai_insights():
                 )
                 
                 # Save insights to database
+                new_insights = []
                 for insight_data in gap_insights:
                     insight = AIInsight(
                         user_id=insight_data['user_id'],
@@ -395,15 +338,14 @@ def get_ai_insights():
                         shopping_suggestions=json.dumps(insight_data['shopping_suggestions']),
                         expires_at=datetime.utcnow() + timedelta(days=7)  # Insights expire in 7 days
                     )
-                    db.session.add(insight)
+                    new_insights.append(insight)
                 
+                # Committed before responding: clients act on insights by id
+                db.session.add_all(new_insights)
                 db.session.commit()
                 
-                # Refresh existing insights
-                existing_insights = AIInsight.query.filter_by(
-                    user_id=user_id, 
-                    status='active'
-                ).order_by(AIInsight.priority.desc(), AIInsight.created_at.desc()).all()
+                # Same ordering as the database query above
+                existing_insights = sorted(new_insights, key=lambda insight: (insight.priority, insight.created_at), reverse=True)
         
         insights_data = [insight.to_dict() for insight in existing_insights]
         
@@ -417,6 +359,7 @@ def get_ai_insights():
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': 'Failed to retrieve AI insights',
             'details': str(e),
@@ -631,7 +574,7 @@ def analyze_wardrobe():
         }), 500
 
 @ai_styling_bp.route('/insights/<int:insight_id>/action', methods=['POST'])
-def handle_insight_action():
+def handle_insight_action(insight_id):
     """
     Handle user action on AI insight
     "We girls have no time" - Quick insight interaction!
@@ -3,8 +3,8 @@ from datetime import datetime, timedelta, date
 import requests
 import json
 from src.models.enhanced_recommendations import (
-    WeatherOutfitRule, SeasonalRecommendation, OutfitFeedback, 
-    SmartRecommendationEngine, db
+    WeatherOutfitRule, SeasonalRecommendation, OutfitFeedback, FeedbackWeeklyRollup, UserFeedbackProfile,
+    SmartRecommendationEngine, WeeklyOutfitPlanner, weather_rule_index, db
 )
 from src.models.ai_models import StyleAnalysis, OutfitRecommendation
 
@@ -186,6 +186,159 @@ def smart_outfit_recommendation():
             'tagline': 'We girls have no time - But this error needs fixing!'
         }), 500
 
+@enhanced_rec_bp.route('/weekly-plan', methods=['POST'])
+def generate_weekly_plan():
+    """
+    Plan outfits for a list of (date, occasion, weather) slots in one request
+    "We girls have no time" - The whole week planned in one go!
+    """
+    try:
+        # Get authentication token
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        auth_token = auth_header.split(' ')[1]
+        if not verify_auth_token(auth_token):
+            return jsonify({'error': 'Invalid authentication token'}), 401
+        
+        # Get request data
+        data = request.get_json()
+        user_id = data.get('user_id')
+        slots = data.get('slots', [])  # [{'date': '2025-03-03', 'occasion': 'work', 'weather': 'rainy', 'temperature': 55}]
+        max_item_uses = data.get('max_item_uses', 1)  # How often one piece may appear in the plan
+        
+        if not user_id:
+            return jsonify({'error': 'User ID required'}), 400
+        
+        if not isinstance(max_item_uses, int) or isinstance(max_item_uses, bool) or max_item_uses < 1:
+            return jsonify({'error': 'max_item_uses must be a positive integer'}), 400
+        
+        if not slots or not isinstance(slots, list):
+            return jsonify({'error': 'At least one plan slot required'}), 400
+        
+        if len(slots) > WeeklyOutfitPlanner.MAX_SLOTS:
+            return jsonify({'error': f'At most {WeeklyOutfitPlanner.MAX_SLOTS} slots per plan'}), 400
+        
+        for slot in slots:
+            if not isinstance(slot, dict):
+                return jsonify({'error': 'Each plan slot must be an object'}), 400
+            unknown_keys = sorted(set(slot) - set(WeeklyOutfitPlanner.SLOT_KEYS))
+            if unknown_keys:
+                return jsonify({'error': f"Unknown slot fields: {', '.join(unknown_keys)}"}), 400
+            if 'occasion' in slot and (not isinstance(slot['occasion'], str)
+                                       or slot['occasion'] not in OutfitRecommendation.OCCASION_REQUIREMENTS):
+                return jsonify({'error': f"Unknown occasion: {slot['occasion']} (expected one of "
+                                         f"{', '.join(OutfitRecommendation.OCCASION_REQUIREMENTS)})"}), 400
+            if slot.get('date'):
+                try:
+                    datetime.strptime(slot['date'], '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    return jsonify({'error': f"Invalid slot date: {slot.get('date')} (expected YYYY-MM-DD)"}), 400
+        
+        # Fetch user context from WS1 once for the whole plan
+        user_data = get_user_data(user_id, auth_token)
+        if not user_data:
+            return jsonify({'error': 'Unable to fetch user data'}), 500
+        
+        wardrobe_data = user_data.get('wardrobe', [])
+        if not wardrobe_data:
+            return jsonify({
+                'status': 'no_wardrobe',
+                'message': 'No wardrobe items found. Add some clothes first!',
+                'recommendation': 'Start by adding basic wardrobe items like tops, bottoms, and shoes.',
+                'tagline': 'We girls have no time - But we need clothes first!'
+            }), 400
+        
+        style_analysis = StyleAnalysis.query.filter_by(user_id=user_id).first()
+        style_data = style_analysis.to_dict() if style_analysis else {}
+        feedback_patterns = OutfitFeedback.get_user_feedback_patterns(user_id)
+        
+        # Plan every slot against the shared wardrobe encoding
+        plans = WeeklyOutfitPlanner.plan_week(
+            user_id, wardrobe_data, style_data, slots, feedback_patterns, max_item_uses
+        )
+        
+        # Save all recommendations in a single transaction
+        recommendations = []
+        for plan in plans:
+            outfit_data = plan['outfit']
+            if not outfit_data:
+                recommendations.append(None)
+                continue
+            recommendation = OutfitRecommendation(
+                user_id=user_id,
+                occasion=plan['slot'].get('occasion', 'casual'),
+                weather=plan['slot'].get('weather'),
+                season=plan['slot'].get('season'),
+                outfit_items=json.dumps(outfit_data['outfit_items']),
+                outfit_description=outfit_data['outfit_description'],
+                style_match_score=outfit_data['style_match_score'],
+                occasion_match_score=outfit_data['occasion_match_score'],
+                color_harmony_score=outfit_data['color_harmony_score'],
+                overall_score=outfit_data['overall_score'],
+                algorithm_version='2.0'
+            )
+            db.session.add(recommendation)
+            recommendations.append(recommendation)
+        
+        db.session.commit()
+        
+        # Build response with full item details
+        items_by_id = {item.get('id'): item for item in wardrobe_data}
+        plan_results = []
+        repeated_items = set()
+        for plan, recommendation in zip(plans, recommendations):
+            slot = plan['slot']
+            if recommendation is None:
+                plan_results.append({
+                    'date': slot.get('date'),
+                    'occasion': slot.get('occasion', 'casual'),
+                    'status': 'insufficient_items',
+                    'recommendation': f"Add more {slot.get('occasion', 'casual')}-appropriate items to your wardrobe"
+                })
+                continue
+            
+            outfit_data = plan['outfit']
+            repeated_items.update(outfit_data.get('repeated_items', []))
+            plan_results.append({
+                'date': slot.get('date'),
+                'occasion': slot.get('occasion', 'casual'),
+                'status': 'success',
+                'recommendation': {
+                    **recommendation.to_dict(),
+                    'enhancements': outfit_data.get('enhancements', {}),
+                    'seasonal_tip': outfit_data.get('seasonal_tip'),
+                    'repeated_items': outfit_data.get('repeated_items', [])
+                },
+                'outfit_items': [items_by_id[item_id] for item_id in outfit_data['outfit_items'] if item_id in items_by_id]
+            })
+        
+        planned_count = sum(1 for recommendation in recommendations if recommendation is not None)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Planned {planned_count} of {len(slots)} outfits',
+            'plans': plan_results,
+            'summary': {
+                'slots_requested': len(slots),
+                'slots_planned': planned_count,
+                'unique_items_used': len({item_id for plan in plans if plan['outfit'] for item_id in plan['outfit']['outfit_items']}),
+                'repeated_items': sorted(repeated_items, key=str),
+                'max_item_uses': max_item_uses,
+                'user_learning_applied': bool(feedback_patterns)
+            },
+            'tagline': 'We girls have no time - Your whole week is styled!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Weekly outfit planning failed',
+            'details': str(e),
+            'tagline': 'We girls have no time - But this error needs fixing!'
+        }), 500
+
 @enhanced_rec_bp.route('/feedback', methods=['POST'])
 def submit_outfit_feedback():
     """
@@ -260,6 +413,10 @@ def submit_outfit_feedback():
         
         db.session.add(feedback)
         
+        # Keep the weekly style-evolution rollup and feedback profile in step with the raw feedback
+        FeedbackWeeklyRollup.record_feedback(feedback)
+        UserFeedbackProfile.record_feedback(feedback, liked_aspects, disliked_aspects)
+        
         # Update recommendation with user feedback
         recommendation.user_rating = rating
         recommendation.user_feedback = json.dumps({
@@ -319,7 +476,7 @@ def get_weather_rules():
         if weather_condition:
             rules = WeatherOutfitRule.get_weather_rules(weather_condition, temperature)
         else:
-            rules = WeatherOutfitRule.query.filter_by(active=True).all()
+            rules = weather_rule_index.active_rules()
         
         rules_data = [rule.to_dict() for rule in rules]
         
@@ -351,9 +508,7 @@ def get_seasonal_trends():
         
         if season:
             # Get specific season
-            seasonal_rec = SeasonalRecommendation.query.filter_by(
-                season=season, active=True
-            ).order_by(SeasonalRecommendation.year.desc()).first()
+            seasonal_rec = SeasonalRecommendation.get_latest_for_season(season)
         else:
             # Get current season
             seasonal_rec = SeasonalRecommendation.get_current_season_recommendations()
@@ -1,15 +1,27 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
+import os
 import time
 import hashlib
 import json
 from src.utils.performance_cache import (
-    ai_cache, performance_monitor, ai_model_cache, 
+    ai_cache, performance_monitor, ai_model_cache, single_flight,
     cached, performance_tracked, ResponseOptimizer
 )
+from src.models.trend_snapshot import trend_snapshot_store
+from src.models.enhanced_recommendations import weather_rule_index, seasonal_snapshot
+from src.models.personalization import style_preference_cache
+from src.models.advanced_ai import wardrobe_optimization_cache
+from src.models.ai_models import style_personality_rules
+from src.utils.response_encoding import response_encoder
+from src.utils.write_behind import write_behind
+from src.utils.scoring_pool import scoring_pool
 
 performance_bp = Blueprint('performance', __name__)
 
+# Output of benchmarks/suite.py
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'benchmarks')
+
 @performance_bp.route('/cache-stats', methods=['GET'])
 @performance_tracked('cache_stats')
 def get_cache_stats():
@@ -24,6 +36,36 @@ def get_cache_stats():
         # Get AI model cache stats
         ai_model_stats = ai_model_cache.get_cache_stats()
         
+        # Get request coalescing stats
+        coalescing_stats = single_flight.get_stats()
+        
+        # Get precomputed trend snapshot stats
+        trend_snapshot_stats = trend_snapshot_store.get_stats()
+        
+        # Get in-memory weather rule index stats
+        weather_rule_index_stats = weather_rule_index.get_stats()
+        
+        # Get in-memory seasonal recommendation snapshot stats
+        seasonal_snapshot_stats = seasonal_snapshot.get_stats()
+        
+        # Get per-user style preference cache stats
+        style_preference_stats = style_preference_cache.get_stats()
+        
+        # Get compiled style personality rule stats (per-wardrobe points cache)
+        style_personality_stats = style_personality_rules.get_stats()
+        
+        # Get wardrobe optimization result cache stats (includes compute time saved)
+        wardrobe_optimization_stats = wardrobe_optimization_cache.get_stats()
+        
+        # Get write-behind queue depth and flush latency
+        write_behind_stats = write_behind.get_stats()
+        
+        # Get scoring process pool stats (offloaded vs inline scoring)
+        scoring_pool_stats = scoring_pool.get_stats()
+        
+        # Get response encoding and compression stats
+        response_encoding_stats = response_encoder.get_stats()
+        
         # Get performance stats
         performance_stats = performance_monitor.get_performance_stats()
         
@@ -56,6 +98,16 @@ def get_cache_stats():
             'message': 'Cache statistics retrieved successfully',
             'main_cache': main_cache_stats,
             'ai_model_cache': ai_model_stats,
+            'request_coalescing': coalescing_stats,
+            'trend_snapshot': trend_snapshot_stats,
+            'weather_rule_index': weather_rule_index_stats,
+            'seasonal_snapshot': seasonal_snapshot_stats,
+            'style_preferences': style_preference_stats,
+            'wardrobe_optimization': wardrobe_optimization_stats,
+            'style_personality': style_personality_stats,
+            'response_encoding': response_encoding_stats,
+            'write_behind': write_behind_stats,
+            'scoring_pool': scoring_pool_stats,
             'performance_overview': performance_stats.get('overall_performance', {}),
             'cache_efficiency': cache_efficiency,
             'optimization_suggestions': optimization_suggestions,
@@ -77,10 +129,20 @@ def get_performance_stats():
     """
     Get comprehensive performance statistics
     "We girls have no time" - Monitor every millisecond!
+    
+    ?window=1m|5m|1h picks the window for the overall numbers (default 1h);
+    ?format=sketch returns this worker's mergeable latency sketches instead.
     """
     try:
-        # Get detailed performance stats
-        performance_stats = performance_monitor.get_performance_stats()
+        if request.args.get('format') == 'sketch':
+            return jsonify(performance_monitor.export_state())
+        
+        window = request.args.get('window', '1h')
+        if window not in ('1m', '5m', '1h'):
+            return jsonify({'error': 'window must be one of 1m, 5m, 1h'}), 400
+        
+        # Get detailed performance stats, merged across workers when they publish sketches
+        performance_stats = performance_monitor.combined_stats(window)
         
         if performance_stats.get('status') == 'no_data':
             return jsonify({
@@ -214,19 +276,16 @@ def optimize_response():
         # Start optimization timer
         start_time = time.time()
         
-        # Apply compression
-        optimized_data = ResponseOptimizer.compress_response(response_data, compression_level)
-        
-        # Apply pagination if requested and data is a list
+        # The data is returned unchanged: size is saved by transport compression, never by editing the payload
+        optimized_data = response_data
         if paginate and isinstance(optimized_data, list):
             optimized_data = ResponseOptimizer.paginate_response(optimized_data, page, per_page)
+        compression = ResponseOptimizer.compress_response(optimized_data, compression_level)
         
         # Calculate optimization metrics
         optimization_time = time.time() - start_time
-        
-        # Estimate size reduction (rough calculation)
-        original_size = len(json.dumps(response_data, default=str))
-        optimized_size = len(json.dumps(optimized_data, default=str))
+        original_size = compression['encoded_bytes']
+        optimized_size = compression['compressed_bytes']
         size_reduction = ((original_size - optimized_size) / original_size) * 100 if original_size > 0 else 0
         
         return jsonify({
@@ -239,6 +298,7 @@ def optimize_response():
                 'size_reduction_percentage': round(size_reduction, 1),
                 'optimization_time': round(optimization_time * 1000, 2),  # in milliseconds
                 'compression_level': compression_level,
+                'content_encoding': compression['encoding'],
                 'pagination_applied': paginate
             },
             'optimization_date': datetime.utcnow().isoformat(),
@@ -252,107 +312,50 @@ def optimize_response():
             'tagline': 'We girls have no time - But this error needs fixing!'
         }), 500
 
-@performance_bp.route('/benchmark', methods=['POST'])
+@performance_bp.route('/benchmark', methods=['GET', 'POST'])
 @performance_tracked('benchmark')
 def run_performance_benchmark():
     """
-    Run performance benchmark tests
-    "We girls have no time" - Benchmark for excellence!
+    Latest benchmark suite results and their comparison with the stored baselines
+    "We girls have no time" - Real hot paths, real numbers!
+    
+    The suite runs offline (`python benchmarks/suite.py`); timing it inside a
+    request would measure the request instead of the code.
     """
     try:
-        data = request.get_json() or {}
-        test_type = data.get('test_type', 'basic')  # basic, comprehensive, stress
-        iterations = data.get('iterations', 10)
-        
-        benchmark_results = {
-            'test_type': test_type,
-            'iterations': iterations,
-            'tests': [],
-            'summary': {}
-        }
-        
-        # Basic cache performance test
-        cache_times = []
-        for i in range(iterations):
-            start_time = time.time()
-            
-            # Test cache set and get
-            test_key = f"benchmark_test_{i}"
-            test_data = {'test': True, 'iteration': i, 'data': 'x' * 100}
-            
-            ai_cache.set(test_key, test_data, 300)  # 5 minute TTL
-            retrieved_data = ai_cache.get(test_key)
-            
-            cache_time = time.time() - start_time
-            cache_times.append(cache_time)
-            
-            benchmark_results['tests'].append({
-                'test': 'cache_performance',
-                'iteration': i + 1,
-                'duration': cache_time,
-                'success': retrieved_data is not None
+        results_path = os.path.join(BENCHMARK_DIR, 'results', 'latest.json')
+        if not os.path.exists(results_path):
+            return jsonify({
+                'status': 'no_results',
+                'message': 'No benchmark results yet. Run python benchmarks/suite.py in the service directory.',
+                'tagline': 'We girls have no time - But benchmarks need a run first!'
             })
         
-        # Response optimization test
-        if test_type in ['comprehensive', 'stress']:
-            optimization_times = []
-            test_response = {
-                'data': [{'id': i, 'name': f'item_{i}', 'description': 'x' * 50} for i in range(100)],
-                'metadata': {'total': 100, 'page': 1},
-                'additional_info': 'x' * 200
-            }
-            
-            for i in range(min(iterations, 5)):  # Limit optimization tests
-                start_time = time.time()
-                optimized = ResponseOptimizer.compress_response(test_response, 'medium')
-                optimization_time = time.time() - start_time
-                optimization_times.append(optimization_time)
-                
-                benchmark_results['tests'].append({
-                    'test': 'response_optimization',
-                    'iteration': i + 1,
-                    'duration': optimization_time,
-                    'success': optimized is not None
-                })
-        
-        # Calculate summary statistics
-        if cache_times:
-            benchmark_results['summary']['cache_performance'] = {
-                'average_time': sum(cache_times) / len(cache_times),
-                'min_time': min(cache_times),
-                'max_time': max(cache_times),
-                'total_tests': len(cache_times),
-                'success_rate': 1.0  # All cache tests should succeed
-            }
-        
-        if test_type in ['comprehensive', 'stress'] and 'optimization_times' in locals():
-            benchmark_results['summary']['optimization_performance'] = {
-                'average_time': sum(optimization_times) / len(optimization_times),
-                'min_time': min(optimization_times),
-                'max_time': max(optimization_times),
-                'total_tests': len(optimization_times),
-                'success_rate': 1.0
-            }
-        
-        # Overall benchmark score
-        avg_cache_time = benchmark_results['summary']['cache_performance']['average_time']
-        benchmark_score = max(0, 100 - (avg_cache_time * 1000))  # Score based on milliseconds
-        
-        benchmark_results['summary']['overall'] = {
-            'benchmark_score': round(benchmark_score, 1),
-            'performance_rating': 'excellent' if benchmark_score > 95 else
-                                 'good' if benchmark_score > 85 else
-                                 'fair' if benchmark_score > 70 else 'poor',
-            'total_duration': sum(test['duration'] for test in benchmark_results['tests']),
-            'total_tests': len(benchmark_results['tests'])
-        }
+        with open(results_path) as handle:
+            report = json.load(handle)
+        
+        comparison = report.get('comparison', {})
+        regressions = comparison.get('regressions', [])
         
         return jsonify({
             'status': 'success',
-            'message': 'Performance benchmark completed',
-            'benchmark_results': benchmark_results,
-            'benchmark_date': datetime.utcnow().isoformat(),
-            'tagline': 'We girls have no time - Benchmark completed at lightning speed!'
+            'message': 'Latest benchmark suite results',
+            'benchmark_results': {
+                'meta': report['meta'],
+                'results': report['results'],
+                'comparison': comparison,
+                'summary': {
+                    'overall': {
+                        'total_tests': len(report['results']),
+                        'regressions': len(regressions),
+                        'improvements': len(comparison.get('improvements', [])),
+                        'baseline_compared': bool(comparison),
+                        'performance_rating': 'regressed' if regressions else 'within_baseline' if comparison else 'no_baseline'
+                    }
+                }
+            },
+            'benchmark_date': report['meta']['timestamp'],
+            'tagline': 'We girls have no time - Benchmarks from the real hot paths!'
         })
         
     except Exception as e:
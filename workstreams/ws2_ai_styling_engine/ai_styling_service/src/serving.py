@@ -0,0 +1,237 @@
+"""
+Multi-process serving mode for WS2 AI Styling Engine
+"We girls have no time" - Every core serving outfits!
+
+The parent process imports the app, warms the shared read-only data (weather
+rule index, seasonal snapshot, trend snapshot and the import-time rule and
+compatibility tables), freezes it out of the garbage collector and binds the
+listening socket. It then forks `--workers` children that accept on that
+socket, so the warmed data is shared copy-on-write instead of loaded per
+worker. Dead workers are respawned; SIGTERM/SIGINT stop them all.
+
+Each worker can offload large outfit scoring to its own bounded process pool
+(`--scoring-processes`, see src/utils/scoring_pool.py). The parent runs no
+threads of its own, since a fork would copy whatever locks they hold: the
+trend forecast scheduler that src/main.py starts in-process runs here in a
+dedicated child instead (respawned like the workers), and workers pick up the
+snapshots it persists.
+
+Usage:
+    python -m src.serving [--workers 4] [--threaded] [--scoring-processes 2]
+                          [--host 0.0.0.0] [--port 5000] [--app src.main:app]
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import random
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler without per-request access log lines"""
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+def load_app(spec):
+    """Import `module:attribute`; the attribute is a Flask app or an app factory"""
+    module_name, _, attribute = spec.partition(':')
+    target = getattr(importlib.import_module(module_name), attribute or 'app')
+    return target if isinstance(target, Flask) else target()
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets workers read while another worker writes; busy_timeout waits out write locks
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+
+def warm_shared_state(app):
+    """
+    Load the read-only serving data once, before forking
+    "We girls have no time" - Load once, share with every worker!
+    """
+    from src.models.user import db
+    from src.models.enhanced_recommendations import weather_rule_index, seasonal_snapshot
+    from src.models.trend_snapshot import trend_snapshot_store
+    import src.models.advanced_ai  # noqa: F401 - compatibility tables are built at import
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite' and not event.contains(db.engine, 'connect', _sqlite_pragmas):
+            event.listen(db.engine, 'connect', _sqlite_pragmas)
+        weather_rule_index.reload()
+        seasonal_snapshot.reload()
+        trend_snapshot_store.current()
+
+        # No connections may cross the fork
+        db.session.remove()
+        db.engine.dispose()
+
+    # Keep the warmed objects out of GC passes, which would touch (and copy) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+    return {
+        'weather_rules': weather_rule_index.get_stats(),
+        'seasonal_snapshot': seasonal_snapshot.get_stats(),
+        'trend_snapshot': trend_snapshot_store.get_stats()
+    }
+
+
+class PreforkServer:
+    """
+    Bind once, fork workers that share the socket and the warmed data
+    "We girls have no time" - More workers, same memory!
+    """
+
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=None, threaded=False, access_log=False, scheduler=None):
+        self.app = app
+        self.workers = workers or os.cpu_count() or 1
+        self.scheduler = scheduler  # Background job run in its own child process, e.g. TrendForecastScheduler
+        self.server = make_server(host, port, app, threaded=threaded,
+                                  request_handler=None if access_log else QuietRequestHandler)
+        self.children = {}  # pid -> (start time, role)
+        self.running = False
+
+    @property
+    def port(self):
+        return self.server.server_port
+
+    def _spawn(self, role='worker'):
+        # Hold stop signals until the child has its own handlers; the parent's would run in the child
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            self.children[pid] = (time.monotonic(), role)
+            return pid
+        try:
+            if role == 'scheduler':
+                self._scheduler_main()
+            else:
+                self._worker_main()
+        finally:
+            os._exit(0)
+
+    def _scheduler_main(self):
+        from src.models.user import db
+
+        self.server.server_close()  # Requests are for the workers
+        with self.app.app_context():
+            db.engine.dispose(close=False)
+
+        def stop(signum, frame):
+            self.scheduler.stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        self.scheduler.run_forever()
+
+    def _worker_main(self):
+        from src.models.user import db
+        from src.utils.write_behind import write_behind
+        from src.utils.scoring_pool import scoring_pool
+
+        random.seed()
+        with self.app.app_context():
+            db.engine.dispose(close=False)  # Leave connections inherited from the parent alone
+
+        def stop(signum, frame):
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        try:
+            self.server.serve_forever()
+        finally:
+            write_behind.shutdown()
+            scoring_pool.shutdown()
+
+    def stop(self, signum=None, frame=None):
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve_forever(self):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if self.scheduler is not None:
+            self._spawn('scheduler')
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started, role = self.children.pop(pid, (None, None))
+            if started is not None and self.running:
+                if time.monotonic() - started < 1.0:
+                    time.sleep(1.0)  # Don't spin on a child that crashes at startup
+                self._spawn(role)
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--app', default='src.main:app', help='module:attribute of the app or app factory')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threaded', action='store_true', help='Handle requests on threads within each worker')
+    parser.add_argument('--scoring-processes', type=int, default=None,
+                        help='Scoring pool processes per worker (default: SCORING_POOL_PROCESSES or 0)')
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args(argv)
+
+    # Workers publish latency sketches here so /performance-stats covers all of them
+    os.environ.setdefault('PERFORMANCE_SKETCH_DIR', tempfile.mkdtemp(prefix='ws2-sketches-'))
+
+    # Keep src/main.py from starting the scheduler thread in this process; it gets a child of its own
+    run_scheduler = os.environ.get('TREND_FORECAST_SCHEDULER', '1') != '0'
+    os.environ['TREND_FORECAST_SCHEDULER'] = '0'
+
+    app = load_app(args.app)
+    if args.scoring_processes is not None:
+        from src.utils.scoring_pool import scoring_pool
+        scoring_pool.configure(args.scoring_processes)
+    warmed = warm_shared_state(app)
+
+    scheduler = None
+    if run_scheduler:
+        from src.models.trend_snapshot import TrendForecastScheduler
+        scheduler = TrendForecastScheduler(app)
+    server = PreforkServer(app, args.host, args.port, args.workers, args.threaded, args.access_log, scheduler)
+    print(f"Serving on {args.host}:{server.port} with {server.workers} workers "
+          f"({warmed['weather_rules']['rules']} weather rules, {warmed['trend_snapshot']['trend_count']} trends preloaded)",
+          flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import time
 import json
 import hashlib
+import math
 from datetime import datetime, timedelta
 from functools import wraps
 from collections import defaultdict, OrderedDict
@@ -8,6 +9,8 @@ import threading
 from typing import Dict, Any, Optional, Callable
 import pickle
 import os
+import copy
+from types import MappingProxyType
 
 class PerformanceCache:
     """
@@ -170,36 +173,238 @@ class PerformanceCache:
 # Global cache instance
 ai_cache = PerformanceCache(max_size=2000, default_ttl=1800)  # 30 minutes default TTL
 
+class LatencySketch:
+    """
+    Mergeable latency histogram with a fixed relative error
+    "We girls have no time" - Percentiles without keeping every sample!
+    
+    HDR-style logarithmic buckets: a duration lands in bucket ceil(log(v) / log(gamma)),
+    so recording is O(1), memory is bounded by the dynamic range, and every
+    quantile is within `relative_accuracy` of a real sample. Sketches with the
+    same accuracy merge by adding bucket counts, across endpoints or workers.
+    """
+    
+    __slots__ = ('relative_accuracy', 'log_gamma', 'buckets', 'zero_count',
+                 'count', 'total', 'min', 'max', 'errors', 'slow')
+    
+    MIN_VALUE = 1e-6  # Durations at or below 1 microsecond share the zero bucket
+    
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.errors = 0
+        self.slow = 0
+    
+    def add(self, value, success=True, slow=False):
+        if value <= self.MIN_VALUE:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if not success:
+            self.errors += 1
+        if slow:
+            self.slow += 1
+    
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge latency sketches with different relative accuracy')
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.errors += other.errors
+        self.slow += other.slow
+        return self
+    
+    def quantile(self, q):
+        """Approximate q-quantile (0-1) of the recorded durations"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Bucket midpoint, in relative terms, of (gamma^(i-1), gamma^i]
+                value = 2 * math.exp(index * self.log_gamma) / (1 + math.exp(self.log_gamma))
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    def summary(self):
+        if not self.count:
+            return {'request_count': 0}
+        return {
+            'request_count': self.count,
+            'average_time': self.total / self.count,
+            'median_time': self.quantile(0.5),
+            'p95_time': self.quantile(0.95),
+            'p99_time': self.quantile(0.99),
+            'min_time': self.min,
+            'max_time': self.max,
+            'error_rate': self.errors / self.count,
+            'slow_request_rate': self.slow / self.count
+        }
+    
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(index): bucket_count for index, bucket_count in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max,
+            'errors': self.errors,
+            'slow': self.slow
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = {int(index): bucket_count for index, bucket_count in data['buckets'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.min = data['min'] if data['min'] is not None else float('inf')
+        sketch.max = data['max']
+        sketch.errors = data['errors']
+        sketch.slow = data['slow']
+        return sketch
+
+
+class WindowedLatency:
+    """
+    Lifetime sketch plus rotating time-slot sketches for one endpoint
+    "We girls have no time" - Last minute, last five, last hour!
+    
+    Slots are aligned to the epoch so workers' slots line up when merged. A
+    window covers the slots overlapping it, so it may include up to one extra
+    slot width of older data (10s for 1m/5m, 60s for 1h).
+    """
+    
+    # ring name -> (slot width in seconds, slot count)
+    RINGS = {'fine': (10, 30), 'coarse': (60, 60)}
+    # window name -> (ring, slots covered)
+    WINDOWS = {'1m': ('fine', 6), '5m': ('fine', 30), '1h': ('coarse', 60)}
+    
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.lifetime = LatencySketch(relative_accuracy)
+        self.rings = {name: [None] * slots for name, (width, slots) in self.RINGS.items()}
+    
+    def _slot(self, ring, slot_id):
+        """The sketch for `slot_id`, replacing whatever older slot held its position"""
+        slots = self.rings[ring]
+        position = slot_id % len(slots)
+        entry = slots[position]
+        if entry is None or entry[0] != slot_id:
+            entry = slots[position] = (slot_id, LatencySketch(self.relative_accuracy))
+        return entry[1]
+    
+    def add(self, value, success=True, slow=False, now=None):
+        now = time.time() if now is None else now
+        self.lifetime.add(value, success, slow)
+        for ring, (width, slots) in self.RINGS.items():
+            self._slot(ring, int(now // width)).add(value, success, slow)
+    
+    def window(self, name, now=None):
+        """Merged sketch of the slots covering the named window"""
+        now = time.time() if now is None else now
+        ring, covered = self.WINDOWS[name]
+        current = int(now // self.RINGS[ring][0])
+        merged = LatencySketch(self.relative_accuracy)
+        for entry in self.rings[ring]:
+            if entry is not None and current - covered < entry[0] <= current:
+                merged.merge(entry[1])
+        return merged
+    
+    def merge(self, other):
+        self.lifetime.merge(other.lifetime)
+        for ring, slots in other.rings.items():
+            for entry in slots:
+                if entry is None:
+                    continue
+                position = entry[0] % len(self.rings[ring])
+                current = self.rings[ring][position]
+                if current is None or current[0] < entry[0]:
+                    self.rings[ring][position] = (entry[0], LatencySketch(self.relative_accuracy).merge(entry[1]))
+                elif current[0] == entry[0]:
+                    current[1].merge(entry[1])
+        return self
+    
+    def to_dict(self):
+        return {
+            'lifetime': self.lifetime.to_dict(),
+            'slots': {
+                ring: [[entry[0], entry[1].to_dict()] for entry in slots if entry is not None]
+                for ring, slots in self.rings.items()
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, data, relative_accuracy):
+        windowed = cls(relative_accuracy)
+        windowed.lifetime = LatencySketch.from_dict(data['lifetime'])
+        for ring, entries in data['slots'].items():
+            for slot_id, sketch in entries:
+                windowed.rings[ring][slot_id % len(windowed.rings[ring])] = (slot_id, LatencySketch.from_dict(sketch))
+        return windowed
+
+
 class PerformanceMonitor:
     """
     Performance monitoring and optimization
     "We girls have no time" - Monitor and optimize every millisecond!
+    
+    Each endpoint keeps a streaming latency sketch (lifetime and 1m/5m/1h
+    windows). The state exports to a JSON document that merges with other
+    workers' exports; with `sketch_dir` set, each worker publishes its export
+    there and `combined_stats` merges them all.
     """
     
-    def __init__(self):
-        self.request_times = []
+    EXPORT_FORMAT = 'ws2-latency-sketch/v1'
+    
+    def __init__(self, relative_accuracy=0.01, sketch_dir=None, publish_interval=5.0):
+        self.relative_accuracy = relative_accuracy
         self.slow_threshold = 2.0  # 2 seconds
         self.slow_requests = []
-        self.endpoint_stats = defaultdict(lambda: {
-            'count': 0,
-            'total_time': 0.0,
-            'min_time': float('inf'),
-            'max_time': 0.0,
-            'errors': 0
-        })
+        self.endpoints = {}  # endpoint -> WindowedLatency
         self.lock = threading.RLock()
+        
+        self.sketch_dir = sketch_dir
+        self.publish_interval = publish_interval
+        self.last_published = 0.0
     
     def record_request(self, endpoint: str, duration: float, success: bool = True):
         """Record request performance metrics"""
+        now = time.time()
+        slow = duration > self.slow_threshold
         with self.lock:
-            self.request_times.append(duration)
-            
-            # Keep only last 1000 requests
-            if len(self.request_times) > 1000:
-                self.request_times = self.request_times[-1000:]
+            latency = self.endpoints.get(endpoint)
+            if latency is None:
+                latency = self.endpoints[endpoint] = WindowedLatency(self.relative_accuracy)
+            latency.add(duration, success, slow, now)
             
             # Track slow requests
-            if duration > self.slow_threshold:
+            if slow:
                 self.slow_requests.append({
                     'endpoint': endpoint,
                     'duration': duration,
@@ -210,64 +415,142 @@ class PerformanceMonitor:
                 # Keep only last 50 slow requests
                 if len(self.slow_requests) > 50:
                     self.slow_requests = self.slow_requests[-50:]
-            
-            # Update endpoint statistics
-            stats = self.endpoint_stats[endpoint]
-            stats['count'] += 1
-            stats['total_time'] += duration
-            stats['min_time'] = min(stats['min_time'], duration)
-            stats['max_time'] = max(stats['max_time'], duration)
-            
-            if not success:
-                stats['errors'] += 1
+        
+        if self.sketch_dir and now - self.last_published >= self.publish_interval:
+            self.last_published = now
+            self.publish()
+    
+    def export_state(self) -> dict:
+        """Mergeable, JSON-serializable snapshot of every endpoint's sketches"""
+        with self.lock:
+            return {
+                'format': self.EXPORT_FORMAT,
+                'relative_accuracy': self.relative_accuracy,
+                'exported_at': time.time(),
+                'pid': os.getpid(),
+                'endpoints': {endpoint: latency.to_dict() for endpoint, latency in self.endpoints.items()},
+                'slow_requests': list(self.slow_requests)
+            }
+    
+    def merge_state(self, state: dict):
+        """Fold another worker's `export_state()` document into this monitor"""
+        if state.get('format') != self.EXPORT_FORMAT:
+            raise ValueError(f"Unsupported performance export format: {state.get('format')}")
+        with self.lock:
+            for endpoint, data in state['endpoints'].items():
+                incoming = WindowedLatency.from_dict(data, state['relative_accuracy'])
+                if endpoint in self.endpoints:
+                    self.endpoints[endpoint].merge(incoming)
+                else:
+                    self.endpoints[endpoint] = incoming
+            self.slow_requests = sorted(self.slow_requests + state.get('slow_requests', []),
+                                        key=lambda request: request['timestamp'])[-50:]
+        return self
+    
+    def publish(self):
+        """Write this worker's export to `sketch_dir` (atomically replaced)"""
+        state = self.export_state()
+        os.makedirs(self.sketch_dir, exist_ok=True)
+        path = os.path.join(self.sketch_dir, f"monitor-{state['pid']}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(state, handle)
+        os.replace(temp_path, path)
+    
+    def combined_stats(self, window: str = '1h', max_age: float = 3600) -> dict:
+        """Performance stats merged across every worker publishing to `sketch_dir`"""
+        if not self.sketch_dir or not os.path.isdir(self.sketch_dir):
+            return self.get_performance_stats(window)
+        
+        combined = PerformanceMonitor(self.relative_accuracy)
+        combined.merge_state(self.export_state())
+        workers = 1
+        own_file = f"monitor-{os.getpid()}.json"
+        for name in os.listdir(self.sketch_dir):
+            path = os.path.join(self.sketch_dir, name)
+            if not name.startswith('monitor-') or not name.endswith('.json') or name == own_file:
+                continue
+            try:
+                if time.time() - os.path.getmtime(path) > max_age:
+                    continue
+                with open(path) as handle:
+                    combined.merge_state(json.load(handle))
+                workers += 1
+            except (OSError, ValueError, KeyError):
+                continue  # Being replaced or from an incompatible version
+        
+        stats = combined.get_performance_stats(window)
+        stats['workers'] = workers
+        return stats
     
-    def get_performance_stats(self) -> dict:
-        """Get comprehensive performance statistics"""
+    def get_performance_stats(self, window: str = '1h') -> dict:
+        """
+        Get comprehensive performance statistics
+        The overall numbers cover `window`; when it saw no requests they fall back to the lifetime totals.
+        """
+        if window not in WindowedLatency.WINDOWS:
+            raise ValueError(f"Unknown window '{window}', expected one of {', '.join(WindowedLatency.WINDOWS)}")
+        
+        now = time.time()
         with self.lock:
-            if not self.request_times:
+            window_sketches = {name: LatencySketch(self.relative_accuracy) for name in WindowedLatency.WINDOWS}
+            lifetime_sketch = LatencySketch(self.relative_accuracy)
+            endpoint_averages = {}
+            for endpoint, latency in self.endpoints.items():
+                lifetime = latency.lifetime
+                if not lifetime.count:
+                    continue
+                lifetime_sketch.merge(lifetime)
+                windows = {}
+                for name, merged in window_sketches.items():
+                    sketch = latency.window(name, now)
+                    merged.merge(sketch)
+                    windows[name] = sketch.summary()
+                endpoint_averages[endpoint] = {
+                    'average_time': lifetime.total / lifetime.count,
+                    'min_time': lifetime.min,
+                    'max_time': lifetime.max,
+                    'p50_time': lifetime.quantile(0.5),
+                    'p95_time': lifetime.quantile(0.95),
+                    'p99_time': lifetime.quantile(0.99),
+                    'request_count': lifetime.count,
+                    'error_rate': lifetime.errors / lifetime.count,
+                    'success_rate': 1 - (lifetime.errors / lifetime.count),
+                    'windows': windows
+                }
+            recent_slow_requests = self.slow_requests[-10:]  # Last 10 slow requests
+        
+        overall, reported_window = window_sketches[window], window
+        if not overall.count:
+            if not lifetime_sketch.count:
                 return {
                     'status': 'no_data',
                     'message': 'No performance data available yet'
                 }
-            
-            # Calculate percentiles
-            sorted_times = sorted(self.request_times)
-            count = len(sorted_times)
-            
-            p50 = sorted_times[int(count * 0.5)]
-            p95 = sorted_times[int(count * 0.95)]
-            p99 = sorted_times[int(count * 0.99)]
-            
-            # Calculate endpoint averages
-            endpoint_averages = {}
-            for endpoint, stats in self.endpoint_stats.items():
-                if stats['count'] > 0:
-                    endpoint_averages[endpoint] = {
-                        'average_time': stats['total_time'] / stats['count'],
-                        'min_time': stats['min_time'],
-                        'max_time': stats['max_time'],
-                        'request_count': stats['count'],
-                        'error_rate': stats['errors'] / stats['count'],
-                        'success_rate': 1 - (stats['errors'] / stats['count'])
-                    }
-            
-            return {
-                'overall_performance': {
-                    'average_response_time': sum(self.request_times) / len(self.request_times),
-                    'median_response_time': p50,
-                    'p95_response_time': p95,
-                    'p99_response_time': p99,
-                    'min_response_time': min(self.request_times),
-                    'max_response_time': max(self.request_times),
-                    'total_requests': len(self.request_times),
-                    'slow_requests': len(self.slow_requests),
-                    'slow_request_rate': len(self.slow_requests) / len(self.request_times)
-                },
-                'endpoint_performance': endpoint_averages,
-                'recent_slow_requests': self.slow_requests[-10:],  # Last 10 slow requests
-                'performance_grade': self._calculate_performance_grade(p95),
-                'optimization_suggestions': self._get_optimization_suggestions(p95, endpoint_averages)
-            }
+            # A quiet window is not an empty monitor: report lifetime numbers, the windows show no requests
+            overall, reported_window = lifetime_sketch, 'lifetime'
+        
+        p95 = overall.quantile(0.95)
+        return {
+            'overall_performance': {
+                'window': reported_window,
+                'average_response_time': overall.total / overall.count,
+                'median_response_time': overall.quantile(0.5),
+                'p95_response_time': p95,
+                'p99_response_time': overall.quantile(0.99),
+                'min_response_time': overall.min,
+                'max_response_time': overall.max,
+                'total_requests': overall.count,
+                'slow_requests': overall.slow,
+                'slow_request_rate': overall.slow / overall.count
+            },
+            'windows': {name: sketch.summary() for name, sketch in window_sketches.items()},
+            'endpoint_performance': endpoint_averages,
+            'recent_slow_requests': recent_slow_requests,
+            'percentile_accuracy': self.relative_accuracy,
+            'performance_grade': self._calculate_performance_grade(p95),
+            'optimization_suggestions': self._get_optimization_suggestions(p95, endpoint_averages)
+        }
     
     def _calculate_performance_grade(self, p95_time: float) -> str:
         """Calculate performance grade based on P95 response time"""
@@ -314,8 +597,127 @@ class PerformanceMonitor:
         
         return suggestions
 
-# Global performance monitor
-performance_monitor = PerformanceMonitor()
+# Global performance monitor (set PERFORMANCE_SKETCH_DIR to combine stats across workers)
+performance_monitor = PerformanceMonitor(sketch_dir=os.environ.get('PERFORMANCE_SKETCH_DIR') or None)
+
+class _InFlightCall:
+    """A computation currently running for one coalescing key"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.started_at = time.time()
+
+class SingleFlight:
+    """
+    Per-key request coalescing (single-flight)
+    "We girls have no time" - One computation, every caller served!
+    
+    The first caller for a key runs the computation; concurrent callers for
+    the same key block until it finishes and receive a copy of its result,
+    or re-raise its exception. The leader gets a copy too, taken before the
+    followers are released, so no caller ever holds the shared object.
+    """
+    
+    def __init__(self, default_timeout: float = 30.0):
+        self.default_timeout = default_timeout
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        
+        # Coalescing metrics
+        self.leader_calls = 0
+        self.coalesced_calls = 0
+        self.timeouts = 0
+        self.errors = 0
+    
+    def do(self, key: str, func: Callable, timeout: Optional[float] = None) -> Any:
+        """Run func() once per key, sharing the outcome with concurrent callers"""
+        with self.lock:
+            call = self.in_flight.get(key)
+            if call is None:
+                call = _InFlightCall()
+                self.in_flight[key] = call
+                is_leader = True
+            else:
+                call.waiters += 1
+                self.coalesced_calls += 1
+                is_leader = False
+        
+        if not is_leader:
+            wait_timeout = self.default_timeout if timeout is None else timeout
+            if not call.event.wait(wait_timeout):
+                with self.lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"Timed out after {wait_timeout}s waiting for in-flight computation '{key}'")
+            if call.error is not None:
+                raise call.error
+            # Callers may mutate results (e.g. outfit item lists), so never share the computed object
+            return copy.deepcopy(call.result)
+        
+        try:
+            result = func()
+            # Copied before event.set(): followers start copying call.result as soon as they wake
+            leader_result = copy.deepcopy(result)
+            call.result = result
+            return leader_result
+        except Exception as e:
+            call.error = e
+            with self.lock:
+                self.errors += 1
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+                self.leader_calls += 1
+            call.event.set()
+    
+    def get_stats(self) -> dict:
+        """Get request coalescing statistics"""
+        with self.lock:
+            total_calls = self.leader_calls + self.coalesced_calls
+            return {
+                'in_flight_keys': len(self.in_flight),
+                'waiting_callers': sum(call.waiters for call in self.in_flight.values()),
+                'computations': self.leader_calls,
+                'coalesced_calls': self.coalesced_calls,
+                'coalescing_ratio': (self.coalesced_calls / total_calls) if total_calls > 0 else 0,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'default_timeout': self.default_timeout
+            }
+
+# Global request coalescer
+single_flight = SingleFlight(default_timeout=30.0)
+
+class FrozenRecord:
+    """
+    Read-only, session-free view of a model row for in-process indexes
+    "We girls have no time" - Share rows across requests without re-querying!
+    
+    Exposes the row's to_dict() fields as attributes; to_dict() returns a
+    deep copy so callers can never mutate the shared record.
+    """
+    __slots__ = ('_data',)
+    
+    def __init__(self, data):
+        object.__setattr__(self, '_data', MappingProxyType(dict(data)))
+    
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._data.get('id')}>"
+    
+    def to_dict(self):
+        return copy.deepcopy(dict(self._data))
 
 def cached(ttl: int = 1800, key_prefix: str = ""):
     """
@@ -334,15 +736,34 @@ def cached(ttl: int = 1800, key_prefix: str = ""):
             if cached_result is not None:
                 return cached_result
             
-            # Execute function and cache result
-            start_time = time.time()
-            try:
-                result = func(*args, **kwargs)
-                ai_cache.set(cache_key, result, ttl)
-                return result
-            finally:
-                duration = time.time() - start_time
-                performance_monitor.record_request(func_name, duration, True)
+            def compute():
+                # Execute function and cache result
+                start_time = time.time()
+                try:
+                    result = func(*args, **kwargs)
+                    ai_cache.set(cache_key, result, ttl)
+                    return result
+                finally:
+                    duration = time.time() - start_time
+                    performance_monitor.record_request(func_name, duration, True)
+            
+            # Concurrent misses for the same key share one computation
+            return single_flight.do(cache_key, compute)
+        
+        return wrapper
+    return decorator
+
+def coalesced(key_prefix: str = "", timeout: Optional[float] = None):
+    """
+    Decorator for coalescing concurrent identical calls into one computation
+    "We girls have no time" - Never compute the same thing twice at once!
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            func_name = f"{key_prefix}{func.__name__}" if key_prefix else func.__name__
+            flight_key = ai_cache._generate_key(func_name, args, kwargs)
+            return single_flight.do(flight_key, lambda: func(*args, **kwargs), timeout)
         
         return wrapper
     return decorator
@@ -378,101 +799,31 @@ class ResponseOptimizer:
     "We girls have no time" - Optimize every byte!
     """
     
-    @staticmethod
-    def compress_response(data: dict, compression_level: str = 'medium') -> dict:
-        """Compress response data for faster transfer"""
-        if compression_level == 'high':
-            # Aggressive compression - remove optional fields
-            return ResponseOptimizer._aggressive_compress(data)
-        elif compression_level == 'medium':
-            # Moderate compression - optimize field names and values
-            return ResponseOptimizer._moderate_compress(data)
-        else:
-            # Light compression - just clean up
-            return ResponseOptimizer._light_compress(data)
-    
-    @staticmethod
-    def _aggressive_compress(data: dict) -> dict:
-        """Aggressive compression - remove non-essential data"""
-        if isinstance(data, dict):
-            compressed = {}
-            
-            # Essential fields to keep
-            essential_fields = {
-                'status', 'message', 'data', 'results', 'recommendations',
-                'outfit', 'style', 'confidence', 'score', 'items', 'id',
-                'name', 'category', 'color', 'occasion', 'weather'
-            }
-            
-            for key, value in data.items():
-                if key in essential_fields or key.endswith('_score') or key.endswith('_id'):
-                    if isinstance(value, (dict, list)):
-                        compressed[key] = ResponseOptimizer._aggressive_compress(value)
-                    else:
-                        compressed[key] = value
-            
-            return compressed
-        elif isinstance(data, list):
-            return [ResponseOptimizer._aggressive_compress(item) for item in data]
-        else:
-            return data
+    # gzip level / brotli quality for each compression_level of /optimize-response
+    COMPRESSION_LEVELS = {'light': (1, 1), 'medium': (6, 4), 'high': (9, 11)}
     
     @staticmethod
-    def _moderate_compress(data: dict) -> dict:
-        """Moderate compression - optimize field names and values"""
-        if isinstance(data, dict):
-            compressed = {}
-            
-            # Field name mappings for shorter names
-            field_mappings = {
-                'recommendation': 'rec',
-                'confidence_score': 'conf',
-                'compatibility': 'compat',
-                'description': 'desc',
-                'suggestions': 'sugg',
-                'analysis_date': 'date',
-                'created_at': 'created',
-                'updated_at': 'updated'
-            }
-            
-            for key, value in data.items():
-                # Use shorter field name if available
-                short_key = field_mappings.get(key, key)
-                
-                if isinstance(value, (dict, list)):
-                    compressed[short_key] = ResponseOptimizer._moderate_compress(value)
-                elif isinstance(value, str) and len(value) > 100:
-                    # Truncate very long strings
-                    compressed[short_key] = value[:100] + "..."
-                else:
-                    compressed[short_key] = value
-            
-            return compressed
-        elif isinstance(data, list):
-            return [ResponseOptimizer._moderate_compress(item) for item in data]
-        else:
-            return data
-    
-    @staticmethod
-    def _light_compress(data: dict) -> dict:
-        """Light compression - just clean up"""
-        if isinstance(data, dict):
-            compressed = {}
-            
-            for key, value in data.items():
-                if value is not None and value != "":
-                    if isinstance(value, (dict, list)):
-                        compressed_value = ResponseOptimizer._light_compress(value)
-                        if compressed_value:  # Only include non-empty structures
-                            compressed[key] = compressed_value
-                    else:
-                        compressed[key] = value
-            
-            return compressed
-        elif isinstance(data, list):
-            return [ResponseOptimizer._light_compress(item) for item in data if item]
-        else:
-            return data
+    def compress_response(data, compression_level: str = 'medium') -> dict:
+        """
+        Transport compression of a payload, measured on its encoded bytes
+        The payload itself is never rewritten; responses are compressed the same
+        way by the ResponseEncoder after_request hook.
+        """
+        from flask import current_app
+        from src.utils.response_encoding import ResponseEncoder
+        
+        gzip_level, brotli_quality = ResponseOptimizer.COMPRESSION_LEVELS.get(
+            compression_level, ResponseOptimizer.COMPRESSION_LEVELS['medium']
+        )
+        encoder = ResponseEncoder(gzip_level=gzip_level, brotli_quality=brotli_quality)
+        provider = current_app.json
+        body = provider.dumps_bytes(data) if hasattr(provider, 'dumps_bytes') else provider.dumps(data).encode('utf-8')
+        encoding = encoder.available_encodings()[0]
+        return {
+            'encoding': encoding,
+            'encoded_bytes': len(body),
+            'compressed_bytes': len(encoder.compress(body, encoding))
+        }
     
     @staticmethod
     def paginate_response(data: list, page: int = 1, per_page: int = 20) -> dict:
@@ -0,0 +1,188 @@
+"""
+Response encoding for WS2 AI Styling Engine
+"We girls have no time" - Fewer bytes on the wire, less CPU per response!
+
+One helper handles serialization and content negotiation for every blueprint:
+- JSON is serialized with orjson when it is installed (stdlib json otherwise),
+  with the same output conventions as Flask's default provider
+- `Accept: application/msgpack` gets a MessagePack body when msgpack is installed
+- Bodies above `min_size` are compressed with brotli or gzip per `Accept-Encoding`
+- A strong ETag becomes weak whenever the body is re-encoded, since the bytes
+  no longer match the representation it was computed for; routes compare
+  If-None-Match weakly (`contains_weak`)
+
+orjson, msgpack and brotli are optional (requirements-optional.txt); without
+them the service falls back to stdlib JSON and gzip.
+"""
+
+import gzip
+import threading
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+COMPRESSIBLE_MIMETYPES = (JSON_MIMETYPE,) + MSGPACK_MIMETYPES
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+    "We girls have no time" - Same JSON, serialized faster!
+
+    Dates, dataclasses and anything orjson cannot encode go through Flask's
+    default handling, so the output matches `DefaultJSONProvider`.
+    """
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize to UTF-8 JSON bytes"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except (TypeError, orjson.JSONEncodeError):
+                pass  # e.g. integers beyond 64 bits or mixed key types; stdlib json handles these
+
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        response = self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+        # Keep the object so the encoder can re-encode it without parsing the body
+        response.encodable_payload = obj
+        return response
+
+
+class ResponseEncoder:
+    """
+    Content negotiation and compression for WS2 responses
+    "We girls have no time" - The right bytes for every client!
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.lock = threading.Lock()
+
+        self.responses = 0
+        self.encodings = {'identity': 0, 'gzip': 0, 'br': 0}
+        self.msgpack_responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        """Install the fast JSON provider and negotiate every response"""
+        app.json = FastJSONProvider(app)
+        app.after_request(self.finalize)
+        return app
+
+    @staticmethod
+    def available_encodings():
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def compress(self, data, encoding):
+        """Compress a body with 'br' or 'gzip'"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def encode_msgpack(self, payload):
+        """MessagePack body, using Flask's JSON fallbacks for dates and other types"""
+        from flask import current_app
+        return msgpack.packb(payload, default=current_app.json.default, use_bin_type=True)
+
+    def finalize(self, response):
+        """after_request hook: pick the body encoding and compression for this client"""
+        if response.direct_passthrough or response.is_streamed or response.status_code in (204, 304) \
+                or response.status_code < 200 or 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        payload = getattr(response, 'encodable_payload', None)
+        used_msgpack = False
+        if payload is not None and msgpack is not None:
+            response.vary.add('Accept')
+            mimetype = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES)
+            if mimetype in MSGPACK_MIMETYPES:
+                try:
+                    response.set_data(self.encode_msgpack(payload))
+                    response.mimetype = mimetype
+                    used_msgpack = True
+                except (TypeError, ValueError, OverflowError):
+                    pass  # Not representable in MessagePack (e.g. integers beyond 64 bits); keep JSON
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        encoding = 'identity'
+        if len(data) >= self.min_size:
+            encoding = request.accept_encodings.best_match(self.available_encodings()) or 'identity'
+
+        out = data
+        if encoding != 'identity':
+            out = self.compress(data, encoding)
+            response.set_data(out)
+            response.headers['Content-Encoding'] = encoding
+
+        if encoding != 'identity' or used_msgpack:
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_etag(etag, weak=True)
+
+        with self.lock:
+            self.responses += 1
+            self.encodings[encoding] += 1
+            self.msgpack_responses += used_msgpack
+            self.bytes_in += len(data)
+            self.bytes_out += len(out)
+        return response
+
+    def get_stats(self):
+        return {
+            'responses': self.responses,
+            'encodings': dict(self.encodings),
+            'msgpack_responses': self.msgpack_responses,
+            'bytes_before_compression': self.bytes_in,
+            'bytes_on_wire': self.bytes_out,
+            'compression_ratio': self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            'min_size': self.min_size,
+            'json_backend': 'orjson' if orjson is not None else 'json',
+            'msgpack_available': msgpack is not None,
+            'available_encodings': list(self.available_encodings())
+        }
+
+# Global response encoder
+response_encoder = ResponseEncoder()
@@ -0,0 +1,147 @@
+"""
+Process pool for CPU-bound scoring in WS2 AI Styling Engine
+"We girls have no time" - Heavy scoring off the GIL!
+
+Threaded workers serialize pure-Python scoring on the GIL. `ScoringPool.run`
+sends a call to a pool of scoring processes when the input is large enough to
+be worth the pickling, and runs it inline otherwise:
+- Bounded: at most `max_pending` calls are in the pool at once; further calls
+  run inline in the caller instead of queueing without limit.
+- Timeouts: a call the pool has not answered within `timeout` seconds is
+  answered inline. Its slot stays taken until the pool process finishes it.
+- Offloaded functions must be importable module-level or class-level functions
+  that do not touch the database.
+- Pool processes are started with forkserver (preloading `preload` modules), so
+  they never inherit a forked copy of a worker's threads or connections.
+
+The pool is disabled (`processes=0`) unless configured, e.g. with
+SCORING_POOL_PROCESSES or `python -m src.serving --scoring-processes N`.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ScoringPool:
+    """
+    Bounded process pool with inline fallback
+    "We girls have no time" - Big wardrobes scored in parallel!
+    """
+
+    def __init__(self, processes=0, max_pending=None, min_items=500, timeout=30.0, preload=('src.models.ai_models',)):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        self.preload = list(preload)
+        self.timeout = timeout
+        self.configure(processes, max_pending, min_items)
+
+        self.offloaded = 0
+        self.inline = 0
+        self.overflow = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.pool_seconds = 0.0
+
+    def configure(self, processes, max_pending=None, min_items=None):
+        """Set the pool size; takes effect for the next offloaded call"""
+        self.shutdown()
+        self.processes = max(int(processes or 0), 0)
+        self.max_pending = max_pending or self.processes * 2
+        if min_items is not None:
+            self.min_items = min_items
+        self.slots = threading.BoundedSemaphore(self.max_pending) if self.processes else None
+        self.in_pool = 0
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def _executor(self):
+        # Executors don't survive fork; each serving worker starts its own
+        if self.executor is None or self.pid != os.getpid():
+            with self.lock:
+                if self.executor is None or self.pid != os.getpid():
+                    context = multiprocessing.get_context('forkserver') \
+                        if 'forkserver' in multiprocessing.get_all_start_methods() else multiprocessing.get_context()
+                    if context.get_start_method() == 'forkserver':
+                        context.set_forkserver_preload(self.preload)
+                    self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+                    self.pid = os.getpid()
+        return self.executor
+
+    def run(self, func, *args, size=0, **kwargs):
+        """Call func(*args, **kwargs), in the pool when enabled and `size` reaches `min_items`"""
+        if not self.enabled or size < self.min_items:
+            with self.lock:
+                self.inline += 1
+            return func(*args, **kwargs)
+
+        slots = self.slots
+        if not slots.acquire(blocking=False):
+            with self.lock:
+                self.overflow += 1
+            return func(*args, **kwargs)
+
+        start = time.perf_counter()
+        with self.lock:
+            self.in_pool += 1
+        try:
+            future = self._executor().submit(func, *args, **kwargs)
+        except BrokenProcessPool:
+            self._release(slots)
+            return self._broken_pool(func, args, kwargs)
+        # The slot is freed when the pool is done with the call, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._release(slots))
+
+        try:
+            result = future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Only succeeds if no pool process has picked the call up yet
+            with self.lock:
+                self.timeouts += 1
+            return func(*args, **kwargs)
+        except BrokenProcessPool:
+            return self._broken_pool(func, args, kwargs)
+        with self.lock:
+            self.offloaded += 1
+            self.pool_seconds += time.perf_counter() - start
+        return result
+
+    def _release(self, slots):
+        with self.lock:
+            self.in_pool -= 1
+        slots.release()
+
+    def _broken_pool(self, func, args, kwargs):
+        # A pool process died; start a fresh pool next time and answer inline now
+        with self.lock:
+            self.failures += 1
+            self.executor = None
+        return func(*args, **kwargs)
+
+    def shutdown(self):
+        executor, self.executor = getattr(self, 'executor', None), None
+        if executor is not None and self.pid == os.getpid():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self):
+        return {
+            'processes': self.processes,
+            'max_pending': self.max_pending if self.enabled else 0,
+            'min_items': self.min_items,
+            'in_pool': self.in_pool,
+            'offloaded': self.offloaded,
+            'inline': self.inline,
+            'overflow_inline': self.overflow,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'avg_pool_ms': round(self.pool_seconds / self.offloaded * 1000, 3) if self.offloaded else None
+        }
+
+# Global scoring pool
+scoring_pool = ScoringPool(processes=os.environ.get('SCORING_POOL_PROCESSES', 0))
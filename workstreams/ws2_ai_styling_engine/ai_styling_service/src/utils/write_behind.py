@@ -0,0 +1,307 @@
+"""
+Write-behind persistence for WS2 AI Styling Engine
+"We girls have no time" - Answer first, save in the background!
+
+Analysis artifacts nobody addresses by id (predictions, compatibility results)
+are returned to the client as soon as they are computed. Rows are handed to a
+bounded queue and inserted by one background worker per process, in batched
+transactions:
+- Retried: a row leaves the queue only after its batch commits. Failed
+  batches are retried with backoff, then row by row. Rows that still fail go
+  to `dead_letters`.
+- Bounded: when the queue is full the caller waits up to `put_timeout` seconds,
+  then writes its rows synchronously instead of dropping them.
+- Best-effort: the queue lives in process memory. A clean exit drains it
+  (atexit, or a prefork worker's SIGTERM shutdown), but a crash or SIGKILL loses
+  whatever was still queued. Rows that must survive, or that a client will
+  refer to later, are committed in the request instead.
+- Without `init_app` (scripts, unit tests) rows are written synchronously in
+  the caller's session, exactly as before.
+
+Queued rows have no primary key until they are flushed, so their dicts carry
+`'id': None`.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from sqlalchemy import insert, inspect
+
+from src.models.user import db
+from src.utils.performance_cache import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Bounded write-behind queue with a batching background worker
+    "We girls have no time" - Batched inserts, no waiting on commits!
+    """
+
+    def __init__(self, max_size=10000, batch_size=200, flush_interval=0.05, put_timeout=0.5,
+                 max_retries=3, retry_backoff=0.1):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.app = None
+        self.pid = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()  # sequence -> (model, row values, enqueued at); in insert order
+        self.batch = []               # Rows taken by the worker but not yet committed
+        self.sequence = 0
+
+        self.enqueued = 0
+        self.persisted = 0
+        self.batches = 0
+        self.retries = 0
+        self.sync_writes = 0
+        self.overflow_writes = 0
+        self.max_depth = 0
+        self.dead_letters = deque(maxlen=1000)
+        self.dead_letter_count = 0
+        self.flush_latency = LatencySketch()  # Seconds per committed batch
+        self.persist_lag = LatencySketch()    # Seconds from enqueue to commit
+
+    def init_app(self, app):
+        """Persist rows for this app in the background; the worker starts with the first write"""
+        self.app = app
+        atexit.register(self.shutdown)
+        return app
+
+    @property
+    def enabled(self):
+        return self.app is not None
+
+    def add_all(self, instances):
+        """
+        Persist new model instances
+        "We girls have no time" - Returns right away, the worker commits later!
+
+        Column defaults are filled in on the instances so `to_dict()` is complete
+        before the row is written.
+        """
+        instances = list(instances)
+        if not instances:
+            return instances
+        rows = [(type(instance), self._row_values(instance)) for instance in instances]
+
+        if not self.enabled:
+            db.session.add_all(instances)
+            db.session.commit()
+            with self.condition:
+                self.sync_writes += len(instances)
+            return instances
+
+        self._ensure_worker()
+        deadline = time.monotonic() + self.put_timeout
+        with self.condition:
+            while len(self.pending) + len(self.batch) + len(rows) > self.max_size and (self.pending or self.batch):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            else:
+                now = time.monotonic()
+                for model, values in rows:
+                    self.sequence += 1
+                    self.pending[self.sequence] = (model, values, now)
+                self.enqueued += len(rows)
+                self.max_depth = max(self.max_depth, len(self.pending) + len(self.batch))
+                self.condition.notify_all()
+                return instances
+
+        # Queue stayed full: write in the caller rather than lose the rows
+        self._insert_rows(rows)
+        with self.condition:
+            self.overflow_writes += len(rows)
+        return instances
+
+    def add(self, instance):
+        return self.add_all([instance])[0]
+
+    def flush(self, timeout=10.0):
+        """Block until every queued row is committed (or timeout); returns True when drained"""
+        if not self.enabled:
+            return True
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.condition.notify_all()
+            while self.pending or self.batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not (self.thread and self.thread.is_alive()):
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=10.0):
+        """Drain the queue and stop the worker"""
+        drained = self.flush(timeout)
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        return drained
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        with self.condition:
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            if self.pid is not None and self.pid != os.getpid():
+                # Rows queued in the parent belong to the parent's worker
+                self.pending.clear()
+                self.batch = []
+            self.pid = os.getpid()
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='write-behind-worker', daemon=True)
+            self.thread.start()
+
+    @staticmethod
+    def _row_values(instance):
+        """Column values for an INSERT, with Python-side column defaults applied to the instance"""
+        mapper = inspect(type(instance))
+        values = {}
+        for attr in mapper.column_attrs:
+            column = attr.columns[0]
+            value = getattr(instance, attr.key)
+            if value is None and column.default is not None:
+                default = column.default
+                if default.is_callable:
+                    value = default.arg(None)
+                elif default.is_scalar:
+                    value = default.arg
+                setattr(instance, attr.key, value)
+            if column.primary_key and value is None:
+                continue
+            values[attr.key] = value
+        return values
+
+    def _take_batch(self):
+        with self.condition:
+            while not self.pending and not self.stop_event.is_set():
+                self.condition.wait(self.flush_interval * 20)
+            if not self.pending:
+                return []
+            # Give concurrent requests a moment to add to a batch that isn't full yet
+            if len(self.pending) < self.batch_size and not self.stop_event.is_set():
+                self.condition.wait(self.flush_interval)
+            batch = []
+            while self.pending and len(batch) < self.batch_size:
+                batch.append(self.pending.popitem(last=False)[1])
+            self.batch = batch
+            self.condition.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self.stop_event.is_set():
+                    return
+                continue
+            with self.app.app_context():
+                committed = self._persist(batch)
+                db.session.remove()
+            now = time.monotonic()
+            with self.condition:
+                for _, _, enqueued_at in committed:
+                    self.persist_lag.add(now - enqueued_at)
+                self.persisted += len(committed)
+                self.batch = []
+                self.condition.notify_all()
+
+    def _persist(self, batch):
+        """Commit a batch, retrying with backoff, then row by row; returns the committed entries"""
+        rows = [(model, values) for model, values, _ in batch]
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self._insert_rows(rows)
+                with self.condition:
+                    self.batches += 1
+                    self.flush_latency.add(time.perf_counter() - start)
+                return batch
+            except Exception:
+                db.session.rollback()
+                if attempt < self.max_retries:
+                    with self.condition:
+                        self.retries += 1
+                    self.stop_event.wait(self.retry_backoff * 2 ** attempt)
+
+        # Isolate rows the database keeps rejecting so the rest still get written
+        committed = []
+        for entry in batch:
+            model, values, _ = entry
+            try:
+                self._insert_rows([(model, values)])
+                committed.append(entry)
+            except Exception as e:
+                db.session.rollback()
+                with self.condition:
+                    self.dead_letters.append({'model': model.__name__, 'values': values, 'error': str(e)})
+                    self.dead_letter_count += 1
+                logger.error("Write-behind could not persist %s: %s", model.__name__, e)
+        return committed
+
+    @staticmethod
+    def _insert_rows(rows):
+        """INSERT rows in one transaction, one executemany per run of same-model rows"""
+        start = 0
+        while start < len(rows):
+            model = rows[start][0]
+            end = start
+            while end < len(rows) and rows[end][0] is model:
+                end += 1
+            db.session.execute(insert(model), [values for _, values in rows[start:end]])
+            start = end
+        db.session.commit()
+
+    def get_stats(self):
+        with self.condition:
+            depth = len(self.pending) + len(self.batch)
+            return {
+                'mode': 'write_behind' if self.enabled else 'synchronous',
+                'worker_alive': bool(self.thread and self.thread.is_alive()),
+                'queue_depth': depth,
+                'max_queue_depth': self.max_depth,
+                'max_size': self.max_size,
+                'batch_size': self.batch_size,
+                'enqueued': self.enqueued,
+                'persisted': self.persisted,
+                'batches': self.batches,
+                'rows_per_batch': self.persisted / self.batches if self.batches else 0.0,
+                'retries': self.retries,
+                'sync_writes': self.sync_writes,
+                'overflow_writes': self.overflow_writes,
+                'dead_letters': self.dead_letter_count,
+                'flush_latency_ms': self._summary_ms(self.flush_latency),
+                'persist_lag_ms': self._summary_ms(self.persist_lag)
+            }
+
+    @staticmethod
+    def _summary_ms(sketch):
+        if not sketch.count:
+            return {'count': 0, 'p50': None, 'p95': None, 'p99': None}
+        return {
+            'count': sketch.count,
+            'p50': round(sketch.quantile(0.5) * 1000, 3),
+            'p95': round(sketch.quantile(0.95) * 1000, 3),
+            'p99': round(sketch.quantile(0.99) * 1000, 3)
+        }
+
+# Global write-behind queue
+write_behind = WriteBehindQueue()
@@ -0,0 +1,99 @@
+"""
+Shared fixtures for WS2 AI Styling Engine unit tests
+"We girls have no time" - Fast in-process tests, no running services needed!
+"""
+
+import os
+import sys
+
+import pytest
+
+# Make the service package importable the same way src/main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+
+from benchmarks.generators import build_wardrobe
+from src.models.user import db
+
+
+class SQLRecorder:
+    """
+    Statements sent to the test database inside `with sql_recorder as statements:`
+    "We girls have no time" - Count the queries, not the guesses!
+    """
+
+    WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self.statements
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @classmethod
+    def writes(cls, statements):
+        """The INSERT/UPDATE/DELETE statements among `statements`"""
+        return [statement for statement in statements if statement.lstrip().split(' ', 1)[0].upper() in cls.WRITE_VERBS]
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app bound to a throwaway file-backed SQLite database"""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    # File-backed so worker threads share the same database
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test_app.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    # Import AI models to ensure they're registered
+    from src.models import ai_models, enhanced_recommendations, personalization, advanced_ai, trend_snapshot  # noqa: F401
+
+    # Process-wide indexes must not leak rows between test databases
+    enhanced_recommendations.weather_rule_index.invalidate()
+    enhanced_recommendations.seasonal_snapshot.invalidate()
+    personalization.style_preference_cache.clear()
+    advanced_ai.wardrobe_optimization_cache.clear()
+    ai_models.style_personality_rules.clear()
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def sample_wardrobe():
+    """Small mixed wardrobe in the shape WS1 returns"""
+    return [
+        {'id': 1, 'name': 'White shirt', 'category': 'tops', 'primary_color': 'white', 'brand': 'zara', 'favorite': True, 'wear_count': 12},
+        {'id': 2, 'name': 'Navy trousers', 'category': 'bottoms', 'primary_color': 'navy', 'brand': 'uniqlo', 'favorite': False, 'wear_count': 8},
+        {'id': 3, 'name': 'Black blazer', 'category': 'blazers', 'primary_color': 'black', 'brand': 'mango', 'favorite': True, 'wear_count': 5},
+        {'id': 4, 'name': 'Loafers', 'category': 'shoes', 'primary_color': 'brown', 'brand': 'clarks', 'favorite': False, 'wear_count': 20},
+        {'id': 5, 'name': 'Pink blouse', 'category': 'tops', 'primary_color': 'pink', 'brand': 'h&m', 'favorite': False, 'wear_count': 3},
+        {'id': 6, 'name': 'Denim jacket', 'category': 'outerwear', 'primary_color': 'blue', 'brand': 'levis', 'favorite': True, 'wear_count': 9},
+    ]
+
+
+@pytest.fixture
+def wardrobe_factory():
+    """Build synthetic wardrobes of a given size (the benchmark generator, so tests and benchmarks agree)"""
+    return build_wardrobe
+
+
+@pytest.fixture
+def sql_recorder(app):
+    """Record the SQL issued inside `with sql_recorder as statements:` blocks"""
+    return SQLRecorder(db.engine)
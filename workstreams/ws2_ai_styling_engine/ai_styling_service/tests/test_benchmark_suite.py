@@ -0,0 +1,97 @@
+"""
+Benchmark suite tests
+"We girls have no time" - Trust the numbers, flag the slowdowns!
+"""
+
+import json
+
+import pytest
+
+from benchmarks import suite
+
+BASELINE = {
+    'meta': {'calibration_ms': 10.0},
+    'results': {
+        'fast[50]': {'min_ms': 1.0, 'median_ms': 1.2},
+        'steady[50]': {'min_ms': 4.0, 'median_ms': 4.5},
+        'tiny[50]': {'min_ms': 0.01, 'median_ms': 0.02},
+    }
+}
+
+
+def _report(calibration_ms, **minimums):
+    return {
+        'meta': {'calibration_ms': calibration_ms},
+        'results': {key: {'min_ms': value, 'median_ms': value} for key, value in minimums.items()}
+    }
+
+
+class TestBaselineComparison:
+    def test_flags_regressions_and_improvements(self):
+        report = _report(10.0, **{'fast[50]': 2.0, 'steady[50]': 1.5, 'tiny[50]': 0.2, 'new[50]': 1.0})
+
+        comparison = suite.compare(report, BASELINE, threshold=0.5, min_delta_ms=0.25)
+
+        assert comparison['regressions'] == ['fast[50]']
+        assert comparison['improvements'] == ['steady[50]']
+        # 20x slower, but below the absolute noise floor
+        assert comparison['cases']['tiny[50]']['status'] == 'ok'
+        assert comparison['cases']['new[50]'] == {'status': 'new'}
+
+    def test_baseline_is_scaled_by_calibration(self):
+        # Twice as slow on a machine whose calibration loop is twice as slow is not a regression
+        report = _report(20.0, **{'fast[50]': 2.0})
+
+        comparison = suite.compare(report, BASELINE)
+
+        assert comparison['calibration_scale'] == 2.0
+        assert comparison['cases']['fast[50]']['status'] == 'ok'
+
+
+class TestSuiteRun:
+    def test_runs_every_hot_path_and_writes_results(self, tmp_path):
+        output = tmp_path / 'latest.json'
+        baseline = tmp_path / 'baseline.json'
+
+        assert suite.main(['--sizes', '10', '--runs', '1', '--output', str(output),
+                           '--baseline', str(baseline), '--save-baseline']) == 0
+
+        report = json.loads(output.read_text())
+        assert set(report['results']) == {f'{name}[10]' for name in suite.CASES}
+        assert json.loads(baseline.read_text())['results'].keys() == report['results'].keys()
+        assert all(result['min_ms'] > 0 for result in report['results'].values())
+
+    def test_cached_paths_are_timed_cold(self):
+        from src.models.ai_models import style_personality_rules
+        from src.models.advanced_ai import wardrobe_optimization_cache
+        hits = style_personality_rules.hits
+        counts = dict(wardrobe_optimization_cache.counts)
+
+        suite.run_suite(sizes=[20], cases=['analyze_style_personality', 'analyze_wardrobe_optimization'], runs=3)
+
+        assert style_personality_rules.hits == hits
+        new = {mode: count - counts[mode] for mode, count in wardrobe_optimization_cache.counts.items()}
+        assert new == {'memory_hit': 0, 'stored_hit': 0, 'incremental': 0, 'full': 5}  # Warmup calls included
+
+    def test_unknown_case_is_rejected(self):
+        with pytest.raises(ValueError):
+            suite.run_suite(sizes=[10], cases=['not_a_case'], runs=1)
+
+
+class TestBenchmarkEndpoint:
+    def test_serves_latest_results(self, app, tmp_path, monkeypatch):
+        from src.routes import performance
+        (tmp_path / 'results').mkdir()
+        report = _report(10.0, **{'fast[50]': 2.0})
+        report['meta']['timestamp'] = '2025-03-03T09:30:00'
+        report['comparison'] = suite.compare(report, BASELINE)
+        (tmp_path / 'results' / 'latest.json').write_text(json.dumps(report))
+        monkeypatch.setattr(performance, 'BENCHMARK_DIR', str(tmp_path))
+        app.register_blueprint(performance.performance_bp, url_prefix='/api/performance')
+
+        response = app.test_client().post('/api/performance/benchmark')
+
+        assert response.status_code == 200
+        overall = response.get_json()['benchmark_results']['summary']['overall']
+        assert overall == {'total_tests': 1, 'regressions': 1, 'improvements': 0,
+                           'baseline_compared': True, 'performance_rating': 'regressed'}
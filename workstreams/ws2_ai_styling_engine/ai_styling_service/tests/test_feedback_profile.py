@@ -0,0 +1,109 @@
+"""
+Persisted feedback profile tests
+"We girls have no time" - One row of feedback patterns, not fifty JSON blobs!
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.ai_models import OutfitRecommendation
+from src.models.enhanced_recommendations import OutfitFeedback, UserFeedbackProfile
+
+FEEDBACK = [
+    # rating, type, liked, disliked, comfort, occasion
+    (5, 'worn', ['colors', 'style'], [], 5, 'work'),
+    (4, 'saved', ['colors'], ['tight_fit'], 4, 'work'),
+    (2, 'dismissed', [], ['colors'], 2, 'date'),
+    (3, 'modified', ['comfort'], [], None, None),
+    (5, 'worn', ['style', 'comfort'], [], 5, 'casual'),
+]
+
+
+def _submit(user_id, start=None):
+    start = start or datetime.utcnow() - timedelta(days=len(FEEDBACK))
+    for offset, (rating, feedback_type, liked, disliked, comfort, occasion) in enumerate(FEEDBACK):
+        feedback = OutfitFeedback(
+            user_id=user_id, recommendation_id=1, rating=rating, feedback_type=feedback_type,
+            liked_aspects=json.dumps(liked) if liked else None,
+            disliked_aspects=json.dumps(disliked) if disliked else None,
+            comfort_rating=comfort, occasion_actual=occasion,
+            feedback_date=start + timedelta(days=offset)
+        )
+        db.session.add(feedback)
+        UserFeedbackProfile.record_feedback(feedback, liked, disliked)
+    db.session.commit()
+
+
+class TestUserFeedbackProfile:
+    def test_patterns_match_feedback_history(self, app):
+        _submit(user_id=1)
+
+        patterns = OutfitFeedback.get_user_feedback_patterns(1)
+
+        assert patterns['preferred_feedback_types'] == {'worn': 2, 'saved': 1, 'dismissed': 1, 'modified': 1}
+        assert patterns['liked_aspects_frequency'] == {'colors': 2, 'style': 2, 'comfort': 2}
+        assert patterns['disliked_aspects_frequency'] == {'tight_fit': 1, 'colors': 1}
+        assert patterns['comfort_patterns'] == {'comfort_5': 2, 'comfort_4': 1, 'comfort_2': 1}
+        assert patterns['occasion_preferences'] == {'work': 2, 'date': 1, 'casual': 1}
+
+    def test_average_rating_is_decayed_towards_recent_feedback(self, app):
+        _submit(user_id=2)
+        decay = UserFeedbackProfile.RATING_DECAY
+        ratings = [row[0] for row in FEEDBACK]
+        weights = [decay ** (len(ratings) - 1 - i) for i in range(len(ratings))]
+        expected = sum(r * w for r, w in zip(ratings, weights)) / sum(weights)
+
+        average = OutfitFeedback.get_user_feedback_patterns(2)['average_rating']
+
+        assert average == pytest.approx(expected)
+        # Close to the plain mean for short histories
+        assert average == pytest.approx(sum(ratings) / len(ratings), abs=0.05)
+
+    def test_reads_one_profile_row(self, app, sql_recorder):
+        _submit(user_id=3)
+
+        with sql_recorder as statements:
+            OutfitFeedback.get_user_feedback_patterns(3)
+
+        assert len(statements) == 1
+        assert 'user_feedback_profile' in statements[0]
+
+    def test_no_feedback_returns_empty_patterns(self, app):
+        assert OutfitFeedback.get_user_feedback_patterns(404) == {}
+
+    def test_backfill_replays_history(self, app):
+        _submit(user_id=4)
+        incremental = UserFeedbackProfile.query.filter_by(user_id=4).first().to_patterns()
+
+        result = UserFeedbackProfile.backfill(user_id=4)
+
+        assert result == {'feedback_rows': len(FEEDBACK), 'profiles_written': 1}
+        rebuilt = OutfitFeedback.get_user_feedback_patterns(4)
+        assert rebuilt['average_rating'] == pytest.approx(incremental.pop('average_rating'))
+        rebuilt.pop('average_rating')
+        assert rebuilt == incremental
+
+
+class TestFeedbackEndpoint:
+    def test_feedback_submission_updates_profile(self, app, monkeypatch):
+        from src.routes import enhanced_recommendations as routes
+        monkeypatch.setattr(routes, 'verify_auth_token', lambda token: True)
+        app.register_blueprint(routes.enhanced_rec_bp, url_prefix='/api/enhanced')
+
+        recommendation = OutfitRecommendation(user_id=9, occasion='work', outfit_items='[1, 2]')
+        db.session.add(recommendation)
+        db.session.commit()
+
+        response = app.test_client().post('/api/enhanced/feedback', headers={'Authorization': 'Bearer t'}, json={
+            'user_id': 9, 'recommendation_id': recommendation.id, 'rating': 4,
+            'feedback_type': 'worn', 'liked_aspects': ['colors'], 'comfort_rating': 4, 'occasion_actual': 'work'
+        })
+
+        assert response.status_code == 200
+        patterns = OutfitFeedback.get_user_feedback_patterns(9)
+        assert patterns['average_rating'] == 4
+        assert patterns['liked_aspects_frequency'] == {'colors': 1}
+        assert patterns['comfort_patterns'] == {'comfort_4': 1}
@@ -0,0 +1,133 @@
+"""
+Streaming latency sketch tests
+"We girls have no time" - Percentiles per endpoint, per window, per worker!
+"""
+
+import json
+import random
+import time
+
+import pytest
+
+from src.utils import performance_cache
+from src.utils.performance_cache import LatencySketch, WindowedLatency, PerformanceMonitor
+
+NOW = 1_750_000_000.0
+
+
+def _samples(count=5000, seed=4):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(-3, 1.2) for _ in range(count)]
+
+
+def _exact(samples, q):
+    ordered = sorted(samples)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestLatencySketch:
+    @pytest.mark.parametrize('q', [0.5, 0.9, 0.95, 0.99])
+    def test_quantiles_within_relative_accuracy(self, q):
+        samples = _samples()
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in samples:
+            sketch.add(value)
+
+        assert sketch.quantile(q) == pytest.approx(_exact(samples, q), rel=0.01)
+        assert sketch.count == len(samples)
+        assert len(sketch.buckets) < 1000
+
+    def test_merge_matches_single_sketch(self):
+        samples = _samples()
+        whole, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for i, value in enumerate(samples):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        merged = LatencySketch.from_dict(json.loads(json.dumps(left.to_dict()))).merge(right)
+
+        assert merged.buckets == whole.buckets
+        assert [merged.quantile(q) for q in (0.5, 0.99)] == [whole.quantile(q) for q in (0.5, 0.99)]
+
+    def test_merge_rejects_different_accuracy(self):
+        with pytest.raises(ValueError):
+            LatencySketch(0.01).merge(LatencySketch(0.02))
+
+
+class TestWindowedLatency:
+    def test_windows_rotate_out_old_samples(self):
+        latency = WindowedLatency()
+        latency.add(0.2, now=NOW)
+        latency.add(0.4, now=NOW + 120)
+
+        later = NOW + 125
+        assert latency.window('1m', later).count == 1
+        assert latency.window('5m', later).count == 2
+        assert latency.window('1h', later).count == 2
+        assert latency.window('1h', NOW + 2 * 3600).count == 0
+        assert latency.lifetime.count == 2
+
+
+class TestPerformanceMonitor:
+    def test_per_endpoint_percentiles(self):
+        monitor = PerformanceMonitor()
+        for value in _samples():
+            monitor.record_request('smart_outfit', value)
+        monitor.record_request('feedback', 3.0, success=False)
+
+        stats = monitor.get_performance_stats('5m')
+
+        endpoint = stats['endpoint_performance']['smart_outfit']
+        assert endpoint['p95_time'] == pytest.approx(_exact(_samples(), 0.95), rel=0.01)
+        assert endpoint['windows']['1m']['request_count'] == 5000
+        assert stats['endpoint_performance']['feedback']['error_rate'] == 1.0
+        assert stats['overall_performance']['total_requests'] == 5001
+        assert stats['overall_performance']['slow_requests'] == sum(value > 2.0 for value in _samples()) + 1
+
+    def test_no_data(self):
+        assert PerformanceMonitor().get_performance_stats()['status'] == 'no_data'
+
+    def test_quiet_window_reports_lifetime_stats(self, monkeypatch):
+        monitor = PerformanceMonitor()
+        for value in (0.1, 0.2, 3.0):
+            monitor.record_request('smart_outfit', value)
+        later = time.time() + 2 * 3600
+        monkeypatch.setattr(performance_cache.time, 'time', lambda: later)
+
+        stats = monitor.get_performance_stats('1h')
+
+        assert 'status' not in stats
+        overall = stats['overall_performance']
+        assert overall['window'] == 'lifetime'
+        assert overall['total_requests'] == 3 and overall['slow_requests'] == 1
+        assert overall['max_response_time'] == pytest.approx(3.0, rel=0.01)
+        assert stats['windows'] == {name: {'request_count': 0} for name in WindowedLatency.WINDOWS}
+        assert stats['endpoint_performance']['smart_outfit']['request_count'] == 3
+
+    def test_worker_exports_combine(self, tmp_path):
+        samples = _samples()
+        reference, local, peer = PerformanceMonitor(), PerformanceMonitor(sketch_dir=str(tmp_path)), PerformanceMonitor()
+        for i, value in enumerate(samples):
+            reference.record_request('smart_outfit', value)
+            (local if i % 3 else peer).record_request('smart_outfit', value)
+        (tmp_path / 'monitor-999999.json').write_text(json.dumps(peer.export_state()))
+
+        combined = local.combined_stats('1h')
+
+        assert combined['workers'] == 2
+        expected = reference.get_performance_stats('1h')['overall_performance']
+        actual = combined['overall_performance']
+        assert actual['total_requests'] == expected['total_requests']
+        assert actual['p99_response_time'] == expected['p99_response_time']
+
+    def test_performance_stats_endpoint(self, app):
+        from src.routes import performance
+        app.register_blueprint(performance.performance_bp, url_prefix='/api/performance')
+        client = app.test_client()
+        client.get('/api/performance/cache-stats')
+
+        sketch = client.get('/api/performance/performance-stats?format=sketch').get_json()
+        assert sketch['format'] == PerformanceMonitor.EXPORT_FORMAT
+        assert 'cache_stats' in sketch['endpoints']
+        assert client.get('/api/performance/performance-stats?window=1d').status_code == 400
+        assert client.get('/api/performance/performance-stats?window=1m').status_code == 200
@@ -0,0 +1,134 @@
+"""
+Typed style preference storage tests
+"We girls have no time" - Preference rows, not JSON blobs!
+"""
+
+import json
+
+import pytest
+
+from src.models.user import db
+from src.models.personalization import UserStyleProfile, StylePreferenceWeight, style_preference_cache
+
+FEEDBACK = [
+    {'rating': 5, 'liked_aspects': ['colors'], 'outfit_colors': ['navy', 'white'],
+     'outfit_categories': ['tops', 'bottoms'], 'comfort_rating': 5, 'occasion_actual': 'work'},
+    {'rating': 1, 'disliked_aspects': ['colors'], 'outfit_colors': ['orange'],
+     'outfit_categories': ['dresses'], 'comfort_rating': 1, 'occasion': 'formal'},
+    {'rating': 4, 'liked_aspects': ['colors'], 'outfit_colors': ['navy'],
+     'outfit_categories': ['tops'], 'comfort_rating': 4, 'occasion_actual': 'work'},
+    {'rating': 3, 'outfit_colors': ['grey'], 'occasion': 'brunch'},
+]
+
+
+def legacy_update(profile, feedback_data):
+    """The previous JSON implementation of the learned preference updates"""
+    def bump(field, key, amount=0.1):
+        values = json.loads(getattr(profile, field)) if getattr(profile, field) else {}
+        values[key] = values.get(key, 0) + amount
+        setattr(profile, field, json.dumps(values))
+
+    rating = feedback_data.get('rating', 3)
+    for color in feedback_data.get('outfit_colors', []):
+        if 'colors' in feedback_data.get('liked_aspects', []) and rating >= 4:
+            bump('preferred_colors', color)
+        if 'colors' in feedback_data.get('disliked_aspects', []) or rating <= 2:
+            bump('avoided_colors', color)
+    for category in feedback_data.get('outfit_categories', []):
+        if rating >= 4:
+            bump('preferred_categories', category)
+        elif rating <= 2:
+            bump('avoided_categories', category)
+    comfort_rating = feedback_data.get('comfort_rating')
+    if comfort_rating and comfort_rating >= 4:
+        bump('comfort_priorities', 'high_comfort_preference')
+    elif comfort_rating and comfort_rating <= 2:
+        bump('comfort_priorities', 'comfort_issues')
+    occasion = feedback_data.get('occasion_actual') or feedback_data.get('occasion')
+    if occasion and hasattr(profile, f"{occasion}_style_preferences"):
+        if rating >= 4:
+            bump(f"{occasion}_style_preferences", 'successful_combinations', 1)
+        elif rating <= 2:
+            bump(f"{occasion}_style_preferences", 'unsuccessful_combinations', 1)
+
+
+def _preferences(data):
+    return {dimension: data[dimension] for dimension in UserStyleProfile.PREFERENCE_DIMENSIONS}
+
+
+class TestPreferenceWeights:
+    def test_updates_match_legacy_json_maps(self, app):
+        profile = UserStyleProfile.get_or_create_profile(1)
+        legacy = UserStyleProfile(user_id=-1)
+
+        for feedback_data in FEEDBACK * 3:
+            profile.update_from_feedback(feedback_data)
+            legacy_update(legacy, feedback_data)
+
+        actual = _preferences(profile.to_dict())
+        expected = {dimension: json.loads(getattr(legacy, dimension) or '{}')
+                    for dimension in UserStyleProfile.PREFERENCE_DIMENSIONS}
+        assert actual.keys() == expected.keys()
+        for dimension, weights in expected.items():
+            assert actual[dimension] == pytest.approx(weights), dimension
+        assert profile.learning_data_points == len(FEEDBACK) * 3
+
+    def test_feedback_writes_one_upsert_and_no_json(self, app, sql_recorder):
+        profile = UserStyleProfile.get_or_create_profile(2)
+
+        with sql_recorder as statements:
+            profile.update_from_feedback(FEEDBACK[0])
+
+        upserts = [s for s in statements if 'style_preference_weight' in s]
+        assert len(upserts) == 1 and 'ON CONFLICT' in upserts[0]
+        assert StylePreferenceWeight.query.filter_by(user_id=2).count() == 6
+        assert profile.preferred_colors is None
+
+    def test_reads_are_served_from_cache_until_next_write(self, app):
+        profile = UserStyleProfile.get_or_create_profile(3)
+        profile.update_from_feedback(FEEDBACK[0])
+        profile.to_dict()
+        hits = style_preference_cache.hits
+
+        assert profile.to_dict()['preferred_colors'] == pytest.approx({'navy': 0.1, 'white': 0.1})
+        assert style_preference_cache.hits == hits + 1
+
+        profile.update_from_feedback(FEEDBACK[2])
+        assert profile.to_dict()['preferred_colors'] == pytest.approx({'navy': 0.2, 'white': 0.1})
+
+
+class TestLegacyMigration:
+    def _legacy_profile(self, user_id):
+        profile = UserStyleProfile(
+            user_id=user_id,
+            preferred_colors=json.dumps({'navy': 0.3, 'red': 0.1}),
+            comfort_priorities=json.dumps({'high_comfort_preference': 0.2}),
+            work_style_preferences=json.dumps({'successful_combinations': 4}),
+            avoided_colors='{}'
+        )
+        db.session.add(profile)
+        db.session.commit()
+        return profile
+
+    def test_migration_converts_rows_and_is_idempotent(self, app):
+        profile = self._legacy_profile(4)
+        before = _preferences(profile.to_dict())
+
+        result = StylePreferenceWeight.migrate_legacy_profiles()
+        again = StylePreferenceWeight.migrate_legacy_profiles()
+
+        assert result == {'profiles_migrated': 1, 'weights_written': 4}
+        assert again == {'profiles_migrated': 0, 'weights_written': 0}
+        assert profile.preferred_colors is None and profile.avoided_colors is None
+        assert _preferences(profile.to_dict()) == before
+        assert before['preferred_colors'] == {'navy': 0.3, 'red': 0.1}
+
+    def test_unmigrated_profile_is_folded_in_on_feedback(self, app):
+        profile = self._legacy_profile(5)
+
+        profile.update_from_feedback(FEEDBACK[2])
+
+        data = profile.to_dict()
+        assert data['preferred_colors'] == pytest.approx({'navy': 0.4, 'red': 0.1})
+        assert data['work_style_preferences'] == {'successful_combinations': 5}
+        assert profile.work_style_preferences is None
@@ -0,0 +1,169 @@
+"""
+Request coalescing (single-flight) tests
+"We girls have no time" - One computation per burst of identical requests!
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.performance_cache import SingleFlight, single_flight
+
+
+def _run_concurrently(target, count):
+    """Start `count` threads on target behind a barrier and collect results/errors"""
+    barrier = threading.Barrier(count)
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def runner():
+        barrier.wait()
+        try:
+            value = target()
+            with lock:
+                results.append(value)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    threads = [threading.Thread(target=runner) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'outfit_items': [1, 2]}
+
+        results, errors = _run_concurrently(lambda: flight.do('same-key', compute), 8)
+
+        assert not errors
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(result == {'outfit_items': [1, 2]} for result in results)
+        # Followers get copies so mutating one result cannot leak into another
+        assert len({id(result) for result in results}) == 8
+        stats = flight.get_stats()
+        assert stats['computations'] == 1
+        assert stats['coalesced_calls'] == 7
+        assert stats['in_flight_keys'] == 0
+
+    def test_leader_mutations_do_not_reach_followers(self):
+        flight = SingleFlight()
+        computed = []
+
+        def compute():
+            time.sleep(0.2)
+            computed.append({'outfit_items': [1, 2]})
+            return computed[0]
+
+        def call():
+            result = flight.do('same-key', compute)
+            result['outfit_items'].append('mine')  # Every caller edits its result straight away
+            return result
+
+        results, errors = _run_concurrently(call, 6)
+
+        assert not errors and len(computed) == 1
+        assert all(result['outfit_items'] == [1, 2, 'mine'] for result in results)
+        assert all(result is not computed[0] for result in results)
+        assert computed[0] == {'outfit_items': [1, 2]}
+
+    def test_distinct_keys_compute_independently(self):
+        flight = SingleFlight()
+        calls = []
+        counter = iter(range(100))
+
+        def make_call():
+            key = f'key-{next(counter) % 2}'
+            return flight.do(key, lambda: calls.append(key) or key)
+
+        results, errors = _run_concurrently(make_call, 4)
+
+        assert not errors
+        assert sorted(set(results)) == ['key-0', 'key-1']
+        assert 2 <= len(calls) <= 4
+
+    def test_errors_propagate_to_all_waiters(self):
+        flight = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            raise ValueError('analysis failed')
+
+        results, errors = _run_concurrently(lambda: flight.do('boom', compute), 5)
+
+        assert not results
+        assert len(calls) == 1
+        assert len(errors) == 5
+        assert all(isinstance(error, ValueError) for error in errors)
+        assert flight.get_stats()['errors'] == 1
+        # The key is released so the next call retries
+        assert flight.do('boom', lambda: 'recovered') == 'recovered'
+
+    def test_waiters_time_out(self):
+        flight = SingleFlight(default_timeout=0.05)
+        release = threading.Event()
+        leader = threading.Thread(target=lambda: flight.do('slow', release.wait))
+        leader.start()
+        time.sleep(0.02)
+
+        with pytest.raises(TimeoutError):
+            flight.do('slow', lambda: 'never-run')
+
+        release.set()
+        leader.join(1)
+        assert flight.get_stats()['timeouts'] == 1
+
+
+class TestCoalescedEntryPoints:
+    def test_wardrobe_optimization_runs_once_under_burst(self, app, sample_wardrobe, monkeypatch):
+        from src.models.advanced_ai import AdvancedAIEngine, WardrobeComposition, WardrobeOptimization
+
+        calls = []
+        original = WardrobeComposition.analysis
+
+        def slow_analysis(composition):
+            calls.append(1)
+            time.sleep(0.2)
+            return original(composition)
+
+        monkeypatch.setattr(WardrobeComposition, 'analysis', slow_analysis)
+
+        def request():
+            with app.app_context():
+                return AdvancedAIEngine.analyze_wardrobe_optimization(42, sample_wardrobe)
+
+        results, errors = _run_concurrently(request, 6)
+
+        assert not errors
+        assert len(calls) == 1
+        assert len({result['id'] for result in results}) == 1
+        assert WardrobeOptimization.query.filter_by(user_id=42).count() == 1
+
+    def test_outfit_recommendation_results_are_independent(self, app, sample_wardrobe):
+        from src.models.ai_models import OutfitRecommendation
+
+        results, errors = _run_concurrently(
+            lambda: OutfitRecommendation.generate_outfit_recommendation(7, sample_wardrobe, {}, 'work'), 4
+        )
+
+        assert not errors
+        assert all(result == results[0] for result in results)
+        results[0]['outfit_items'].append('mutated')
+        assert all('mutated' not in result['outfit_items'] for result in results[1:])
+
+    def test_global_coalescer_is_idle_after_requests(self):
+        assert single_flight.get_stats()['in_flight_keys'] == 0
@@ -0,0 +1,142 @@
+"""
+Response encoding tests
+"We girls have no time" - Smaller responses, same data!
+"""
+
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from src.utils import response_encoding
+from src.utils.response_encoding import FastJSONProvider, ResponseEncoder
+
+PAYLOAD = {
+    'status': 'success',
+    'recommendation': {'id': 7, 'created_at': datetime(2025, 3, 3, 9, 30), 'overall_score': 0.87},
+    'outfit_items': [{'id': i, 'name': f'Item {i}', 'category': 'tops', 'primary_color': 'navy'} for i in range(40)],
+    'counts': {1: 'one', 2: 'two'},
+    'big_number': 2 ** 70,
+    'tagline': 'We girls have no time - Smart outfit ready!'
+}
+
+
+@pytest.fixture
+def encoder(app):
+    encoder = ResponseEncoder(min_size=512)
+    encoder.init_app(app)
+
+    @app.route('/payload')
+    def payload():
+        return jsonify(PAYLOAD)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/tagged')
+    def tagged():
+        response = jsonify(PAYLOAD)
+        response.set_etag('payload-v1')
+        return response
+
+    @app.route('/not-modified')
+    def not_modified():
+        return app.response_class(status=304)
+
+    return encoder
+
+
+class TestFastJSONProvider:
+    def test_matches_default_provider_output(self, app):
+        fast = FastJSONProvider(app)
+        default = DefaultJSONProvider(app)
+
+        assert json.loads(fast.dumps(PAYLOAD)) == json.loads(default.dumps(PAYLOAD))
+        # Dates keep Flask's HTTP-date format and keys stay sorted
+        assert '"created_at":"Mon, 03 Mar 2025 09:30:00 GMT"' in fast.dumps(PAYLOAD)
+        assert fast.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+
+
+class TestResponseEncoder:
+    def test_gzip_above_threshold(self, encoder, app):
+        response = app.test_client().get('/payload', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        body = gzip.decompress(response.get_data())
+        assert json.loads(body) == json.loads(DefaultJSONProvider(app).dumps(PAYLOAD))
+        assert int(response.headers['Content-Length']) < len(body)
+        assert encoder.get_stats()['encodings']['gzip'] == 1
+
+    def test_small_or_unnegotiated_responses_are_not_compressed(self, encoder, app):
+        client = app.test_client()
+
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/payload').headers
+        assert client.get('/not-modified', headers={'Accept-Encoding': 'gzip'}).status_code == 304
+        assert encoder.get_stats()['encodings']['identity'] == 2
+
+    def test_etags_are_weak_once_the_body_is_encoded(self, encoder, app):
+        client = app.test_client()
+
+        assert client.get('/tagged').headers['ETag'] == '"payload-v1"'
+        assert client.get('/tagged', headers={'Accept-Encoding': 'gzip'}).headers['ETag'] == 'W/"payload-v1"'
+
+    def test_brotli_preferred_when_available(self, encoder, app):
+        brotli = pytest.importorskip('brotli')
+        response = app.test_client().get('/payload', headers={'Accept-Encoding': 'gzip, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert json.loads(brotli.decompress(response.get_data()))['status'] == 'success'
+
+    def test_msgpack_via_accept(self, encoder, app):
+        msgpack = pytest.importorskip('msgpack')
+        client = app.test_client()
+        response = client.get('/small', headers={'Accept': 'application/msgpack'})
+        assert response.mimetype == 'application/msgpack'
+        assert msgpack.unpackb(response.get_data()) == {'status': 'ok'}
+
+        # Integers beyond 64 bits have no MessagePack encoding, so JSON is served
+        assert client.get('/payload', headers={'Accept': 'application/msgpack'}).mimetype == 'application/json'
+
+    def test_msgpack_keeps_flask_date_format(self, app):
+        msgpack = pytest.importorskip('msgpack')
+        ResponseEncoder().init_app(app)
+
+        @app.route('/dated')
+        def dated():
+            return jsonify({'created_at': datetime(2025, 3, 3, 9, 30), 'items': PAYLOAD['outfit_items']})
+
+        response = app.test_client().get('/dated', headers={'Accept': 'application/msgpack'})
+        data = msgpack.unpackb(response.get_data())
+        assert data['created_at'] == 'Mon, 03 Mar 2025 09:30:00 GMT'
+        assert data['items'] == PAYLOAD['outfit_items']
+
+    def test_json_served_when_msgpack_is_missing(self, encoder, app, monkeypatch):
+        monkeypatch.setattr(response_encoding, 'msgpack', None)
+        response = app.test_client().get('/payload', headers={'Accept': 'application/msgpack'})
+
+        assert response.mimetype == 'application/json'
+        assert response.get_json()['status'] == 'success'
+
+
+class TestOptimizeResponseEndpoint:
+    @pytest.mark.parametrize('level', ['light', 'medium', 'high'])
+    def test_payload_is_returned_unchanged(self, app, level):
+        from src.routes import performance
+        app.register_blueprint(performance.performance_bp, url_prefix='/api/performance')
+        data = {'description': 'x' * 300, 'created_at': '2025-03-03', 'notes': '', 'extra': None,
+                'items': [{'id': i, 'name': f'Item {i}'} for i in range(50)]}
+
+        response = app.test_client().post('/api/performance/optimize-response',
+                                          json={'data': data, 'compression_level': level})
+
+        body = response.get_json()
+        assert body['optimized_data'] == data
+        metrics = body['optimization_metrics']
+        assert metrics['content_encoding'] in ('br', 'gzip')
+        assert metrics['optimized_size_estimate'] < metrics['original_size_estimate']
@@ -0,0 +1,133 @@
+"""
+Seasonal recommendation snapshot tests
+"We girls have no time" - This season's picks without a query!
+"""
+
+import json
+import random
+from datetime import datetime
+
+import pytest
+
+from src.models.user import db
+from src.models.advanced_ai import AdvancedAIEngine
+from src.models.enhanced_recommendations import SeasonalRecommendation, SeasonalSnapshot, seasonal_snapshot
+
+SEASONS = ['winter', 'spring', 'summer', 'autumn']
+
+
+def legacy_current_season_recommendations(now):
+    """The previous database implementation of get_current_season_recommendations"""
+    month = now.month
+    if month in [12, 1, 2]:
+        season = 'winter'
+    elif month in [3, 4, 5]:
+        season = 'spring'
+    elif month in [6, 7, 8]:
+        season = 'summer'
+    else:
+        season = 'autumn'
+    recommendations = SeasonalRecommendation.query.filter_by(season=season, year=now.year, active=True).first()
+    if not recommendations:
+        recommendations = SeasonalRecommendation.query.filter_by(
+            season=season, active=True
+        ).order_by(SeasonalRecommendation.year.desc()).first()
+    return recommendations
+
+
+def _seed(count=40, seed=5):
+    rng = random.Random(seed)
+    for _ in range(count):
+        db.session.add(SeasonalRecommendation(
+            season=rng.choice(SEASONS[1:]),  # No winter rows: the lookup must return None
+            year=rng.choice([2022, 2023, 2024, 2025]),
+            trending_colors=json.dumps([rng.choice(['sage', 'rust', 'cream'])]),
+            active=rng.random() < 0.8
+        ))
+    db.session.commit()
+
+
+class TestSeasonalSnapshot:
+    def test_parity_with_database_lookup(self, app):
+        _seed()
+
+        for year in (2021, 2023, 2024, 2025, 2026):
+            for month in range(1, 13):
+                now = datetime(year, month, 15)
+                expected = legacy_current_season_recommendations(now)
+                actual = seasonal_snapshot.current(now)
+                assert (actual.id if actual else None) == (expected.id if expected else None), now
+                if expected:
+                    assert actual.to_dict() == expected.to_dict()
+
+    def test_repeated_lookups_do_not_query(self, app, sql_recorder):
+        _seed(10)
+        seasonal_snapshot.current()
+
+        with sql_recorder as statements:
+            for _ in range(50):
+                SeasonalRecommendation.get_current_season_recommendations()
+
+        assert statements == []
+
+    def test_season_boundary_needs_no_reload(self, app):
+        db.session.add_all([SeasonalRecommendation(season='autumn', year=2025),
+                            SeasonalRecommendation(season='winter', year=2025)])
+        db.session.commit()
+        seasonal_snapshot.current(datetime(2025, 11, 30))
+        loads = seasonal_snapshot.load_count
+
+        assert seasonal_snapshot.current(datetime(2025, 11, 30)).season == 'autumn'
+        assert seasonal_snapshot.current(datetime(2025, 12, 1)).season == 'winter'
+        # New year with no 2026 rows: falls back to the latest winter
+        assert seasonal_snapshot.current(datetime(2026, 1, 1)).year == 2025
+        assert seasonal_snapshot.load_count == loads
+
+    def test_committed_changes_are_picked_up(self, app):
+        now = datetime(2025, 7, 1)
+        assert seasonal_snapshot.current(now) is None
+
+        old = SeasonalRecommendation(season='summer', year=2024)
+        db.session.add(old)
+        db.session.commit()
+        assert seasonal_snapshot.current(now).id == old.id
+
+        current = SeasonalRecommendation(season='summer', year=2025)
+        db.session.add(current)
+        db.session.commit()
+        assert seasonal_snapshot.current(now).id == current.id
+
+        current.active = False
+        db.session.commit()
+        assert seasonal_snapshot.current(now).id == old.id
+
+    def test_rolled_back_changes_are_not_served(self, app):
+        seasonal_snapshot.current()
+        loads = seasonal_snapshot.load_count
+
+        db.session.add(SeasonalRecommendation(season=SeasonalSnapshot.current_season(), year=datetime.now().year))
+        db.session.flush()
+        db.session.rollback()
+
+        assert seasonal_snapshot.current() is None
+        assert seasonal_snapshot.load_count == loads
+
+    def test_fall_is_an_alias_for_autumn(self, app):
+        row = SeasonalRecommendation(season='autumn', year=2024)
+        db.session.add(row)
+        db.session.commit()
+
+        assert SeasonalRecommendation.get_latest_for_season('fall').id == row.id
+        assert SeasonalRecommendation.get_latest_for_season('Autumn').id == row.id
+
+
+class TestSharedSeasonLogic:
+    @pytest.mark.parametrize('month, season', [(12, 'winter'), (2, 'winter'), (3, 'spring'), (6, 'summer'),
+                                               (9, 'autumn'), (11, 'autumn')])
+    def test_season_for_month(self, month, season):
+        assert SeasonalSnapshot.season_for(month) == season
+
+    def test_engine_uses_trend_vocabulary(self, monkeypatch):
+        for season, expected in (('autumn', 'fall'), ('winter', 'winter'), ('summer', 'summer')):
+            monkeypatch.setattr(SeasonalSnapshot, 'current_season', staticmethod(lambda now=None: season))
+            assert AdvancedAIEngine._get_current_season() == expected
@@ -0,0 +1,141 @@
+"""
+Multi-process serving mode tests
+"We girls have no time" - Every core serving outfits!
+"""
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from flask import Flask
+
+from src.models.ai_models import OutfitRecommendation
+from src.serving import load_app
+from src.utils.scoring_pool import ScoringPool
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCORE_FIELDS = ['outfit_items', 'style_match_score', 'occasion_match_score', 'color_harmony_score', 'overall_score']
+
+
+def _slow_in_the_pool(caller_pid, seconds):
+    if os.getpid() != caller_pid:
+        time.sleep(seconds)
+    return os.getpid()
+
+
+def _scores(outfit):
+    # The description orders colors through a set, which varies with each process's hash seed
+    return {field: outfit[field] for field in SCORE_FIELDS}
+
+
+class TestScoringPool:
+    def test_disabled_pool_runs_inline(self):
+        pool = ScoringPool(processes=0)
+
+        assert pool.run(sum, [1, 2, 3], size=10_000) == 6
+        assert pool.get_stats()['inline'] == 1
+        assert pool.get_stats()['max_pending'] == 0
+
+    def test_small_inputs_run_inline(self):
+        pool = ScoringPool(processes=1, min_items=100)
+
+        assert pool.run(sum, [1, 2], size=2) == 3
+        assert pool.executor is None
+
+    def test_full_pool_runs_in_the_caller(self):
+        pool = ScoringPool(processes=1, max_pending=1, min_items=1)
+        pool.slots.acquire()  # The only slot is taken
+        try:
+            assert pool.run(sum, [4, 5], size=1) == 9
+        finally:
+            pool.slots.release()
+
+        assert pool.get_stats()['overflow_inline'] == 1
+        assert pool.executor is None
+
+    def test_timed_out_calls_run_inline_and_keep_their_slot(self):
+        pool = ScoringPool(processes=1, max_pending=1, min_items=1, timeout=0.2)
+        try:
+            assert pool.run(_slow_in_the_pool, os.getpid(), 2.0, size=1) == os.getpid()
+            assert pool.get_stats()['timeouts'] == 1
+            assert pool.get_stats()['in_pool'] == 1  # Still running in the pool
+
+            assert pool.run(sum, [1, 2], size=1) == 3
+            assert pool.get_stats()['overflow_inline'] == 1
+
+            deadline = time.monotonic() + 30
+            while pool.get_stats()['in_pool'] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert pool.get_stats()['in_pool'] == 0
+            assert pool.slots.acquire(blocking=False)
+            pool.slots.release()
+        finally:
+            pool.shutdown()
+
+    def test_outfits_scored_in_the_pool_match_inline(self, wardrobe_factory):
+        pool = ScoringPool(processes=1, min_items=1)
+        wardrobe = wardrobe_factory(300)
+        style = {'style_personality': 'classic'}
+        try:
+            for occasion in ('work', 'casual', 'party'):
+                expected = OutfitRecommendation.compose_outfit(wardrobe, style, occasion)
+                actual = pool.run(OutfitRecommendation.compose_outfit, wardrobe, style, occasion, size=len(wardrobe))
+                assert _scores(actual) == _scores(expected)
+        finally:
+            pool.shutdown()
+
+        assert pool.get_stats()['offloaded'] == 3
+        assert pool.get_stats()['in_pool'] == 0
+
+
+class TestServing:
+    def test_load_app_accepts_an_app_or_a_factory(self, monkeypatch):
+        module = type(sys)('serving_test_app')
+        module.app = Flask('instance')
+        module.create_app = lambda: Flask('factory')
+        monkeypatch.setitem(sys.modules, 'serving_test_app', module)
+
+        assert load_app('serving_test_app:app') is module.app
+        assert load_app('serving_test_app').name == 'instance'
+        assert load_app('serving_test_app:create_app').name == 'factory'
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='prefork serving needs fork')
+    def test_preforked_workers_serve_recommendations(self, tmp_path):
+        env = dict(os.environ, LOAD_TEST_DB=str(tmp_path / 'serving.db'), LOAD_TEST_WARDROBE_SIZE='40',
+                   PERFORMANCE_SKETCH_DIR=str(tmp_path / 'sketches'))
+        server = subprocess.Popen([sys.executable, '-m', 'src.serving', '--app', 'benchmarks.load_recommend_outfit:create_app',
+                                   '--host', '127.0.0.1', '--port', '0', '--workers', '2'],
+                                  cwd=SERVICE_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            banner = server.stdout.readline()
+            port = int(banner.split()[2].rsplit(':', 1)[1])
+            if os.path.exists(f'/proc/{server.pid}/task'):
+                # Nothing but the main thread may be running when the parent forks
+                assert os.listdir(f'/proc/{server.pid}/task') == [str(server.pid)]
+                children = []
+                deadline = time.monotonic() + 10
+                while len(children) < 3 and time.monotonic() < deadline:
+                    with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+                        children = f.read().split()
+                assert len(children) == 3  # Two workers and the trend scheduler
+
+            statuses = []
+            for user_id in range(1, 7):
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                connection.request('POST', '/api/ai/recommend-outfit', json.dumps({'user_id': user_id, 'occasion': 'casual'}),
+                                   {'Content-Type': 'application/json', 'Authorization': 'Bearer t'})
+                response = connection.getresponse()
+                statuses.append((response.status, json.loads(response.read())['status']))
+                connection.close()
+        finally:
+            server.terminate()
+            returncode = server.wait(30)
+
+        assert 'with 2 workers' in banner
+        assert statuses == [(200, 'success')] * 6
+        assert returncode == 0
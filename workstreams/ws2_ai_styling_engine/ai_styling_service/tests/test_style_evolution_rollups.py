@@ -0,0 +1,122 @@
+"""
+Incremental style-evolution rollup tests
+"We girls have no time" - Weekly rollups must match the raw feedback!
+"""
+
+import random
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.enhanced_recommendations import OutfitFeedback, FeedbackWeeklyRollup
+from src.models.personalization import StyleLearningEngine
+
+FEEDBACK_TYPES = ['worn', 'saved', 'dismissed', 'modified']
+
+
+def _add_feedback(user_id, feedback_date, rating, feedback_type):
+    feedback = OutfitFeedback(
+        user_id=user_id, recommendation_id=1, rating=rating,
+        feedback_type=feedback_type, feedback_date=feedback_date
+    )
+    db.session.add(feedback)
+    FeedbackWeeklyRollup.record_feedback(feedback)
+    return feedback
+
+
+def _seed_feedback(user_id, count, days=80, seed=7):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for _ in range(count):
+        _add_feedback(user_id, now - timedelta(days=rng.uniform(0, days)),
+                      rng.randint(1, 5), rng.choice(FEEDBACK_TYPES))
+    db.session.commit()
+
+
+def _raw_weekly_stats(user_id):
+    """Reference: bucket the raw feedback rows the way the original scan did"""
+    weekly = defaultdict(list)
+    for feedback in OutfitFeedback.query.filter_by(user_id=user_id).order_by(OutfitFeedback.feedback_date).all():
+        weekly[feedback.feedback_date.strftime('%Y-W%U')].append(feedback)
+    stats = {}
+    for week, rows in weekly.items():
+        avg = sum(f.rating for f in rows) / len(rows)
+        variance = sum((f.rating - avg) ** 2 for f in rows) / len(rows)
+        stats[week] = (len(rows), avg, variance, len({f.feedback_type for f in rows}))
+    return stats
+
+
+class TestWeekBucket:
+    @pytest.mark.parametrize('day', [
+        date(2025, 1, 1), date(2025, 1, 4), date(2025, 1, 5), date(2024, 12, 31),
+        date(2025, 6, 14), date(2025, 6, 15), date(2024, 2, 29)
+    ])
+    def test_matches_strftime_week_key(self, day):
+        week_key, week_start = FeedbackWeeklyRollup.week_bucket(datetime.combine(day, datetime.min.time()))
+
+        assert week_key == day.strftime('%Y-W%U')
+        assert week_start <= day
+        assert week_start.strftime('%Y-W%U') == week_key
+
+
+class TestFeedbackWeeklyRollup:
+    def test_incremental_rollups_match_raw_feedback(self, app):
+        _seed_feedback(user_id=1, count=300)
+
+        raw = _raw_weekly_stats(1)
+        rollups = {r.week_key: r for r in FeedbackWeeklyRollup.query.filter_by(user_id=1).all()}
+
+        assert set(rollups) == set(raw)
+        for week, (count, avg, variance, _) in raw.items():
+            assert rollups[week].feedback_count == count
+            assert rollups[week].average_rating == pytest.approx(avg)
+            assert rollups[week].rating_variance == pytest.approx(variance, abs=1e-9)
+
+    def test_backfill_rebuilds_identical_rollups(self, app):
+        _seed_feedback(user_id=2, count=200)
+        incremental = {r.week_key: r.to_dict() for r in FeedbackWeeklyRollup.query.filter_by(user_id=2).all()}
+
+        result = FeedbackWeeklyRollup.backfill(user_id=2)
+        rebuilt = {r.week_key: r.to_dict() for r in FeedbackWeeklyRollup.query.filter_by(user_id=2).all()}
+
+        assert result['feedback_rows'] == 200
+        assert result['rollups_written'] == len(incremental)
+        for week, rollup in incremental.items():
+            for field in ('feedback_count', 'rating_sum', 'rating_sum_squares', 'feedback_type_counts', 'week_start'):
+                assert rebuilt[week][field] == rollup[field]
+
+
+class TestStyleEvolutionFromRollups:
+    def test_evolution_matches_raw_weekly_metrics(self, app):
+        _seed_feedback(user_id=3, count=250)
+        raw = _raw_weekly_stats(3)
+
+        evolution = StyleLearningEngine.analyze_user_style_evolution(3, days_back=90)
+
+        assert [entry['week'] for entry in evolution['timeline']] == list(raw)
+        for entry in evolution['timeline']:
+            count, avg, variance, _ = raw[entry['week']]
+            assert entry['feedback_count'] == count
+            assert entry['average_rating'] == round(avg, 2)
+            assert entry['consistency'] == round(1.0 - min(variance / 4.0, 1.0), 2)
+        assert evolution['exploration_tendency'] == pytest.approx(len(FEEDBACK_TYPES) / 250)
+
+    def test_evolution_reads_only_rollup_rows(self, app, sql_recorder):
+        _seed_feedback(user_id=4, count=500)
+
+        with sql_recorder as statements:
+            StyleLearningEngine.analyze_user_style_evolution(4, days_back=90)
+
+        assert statements
+        assert not any('outfit_feedback' in statement for statement in statements)
+        assert len(FeedbackWeeklyRollup.get_user_rollups(4, datetime.utcnow() - timedelta(days=90))) <= 14
+
+    def test_insufficient_data_counts_rolled_up_feedback(self, app):
+        _seed_feedback(user_id=5, count=3)
+
+        evolution = StyleLearningEngine.analyze_user_style_evolution(5)
+
+        assert evolution['status'] == 'insufficient_data'
+        assert evolution['data_points'] == 3
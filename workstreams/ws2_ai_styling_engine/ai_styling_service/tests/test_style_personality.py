@@ -0,0 +1,169 @@
+"""
+Compiled style personality rule tests
+"We girls have no time" - Same personality, a fraction of the checks!
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from src.models.ai_models import StyleAnalysis, StylePersonalityRules, style_personality_rules, orjson
+
+CATEGORIES = ['blazers', 'trousers', 'button_downs', 'leather_jackets', 'boots', 'ripped_jeans', 'maxi_dresses',
+              'kimonos', 'sandals', 'dresses', 'skirts', 'blouses', 'crop_tops', 'high_waisted', 'tops', 'Blazers',
+              'shoes', '']
+COLORS = ['black', 'navy', 'white', 'grey', 'beige', 'pink', 'Earth Tones', 'earthy brown', 'red', 'Black', 'teal', '']
+BRANDS = ['zara', 'H&M', 'forever21', 'brand7', 'mango', '']
+EXTRAS = [
+    {'pattern': 'floral'},
+    {'name': 'Floral midi'},  # Capitalized: the rules were always case-sensitive here
+    {'tags': ['summer', 'floral']},
+    {'notes': None, 'price': 49.5, 'favorite': True},
+    {'floral_print': False},
+    {'purchased_at': datetime(2024, 5, 1)},
+    {},
+]
+STYLES = ['classic', 'edgy', 'bohemian', 'minimalist', 'romantic', 'trendy', 'Romantic', 'preppy', '']
+LIFESTYLES = ['professional', 'creative', 'social', 'Social', 'student', '']
+
+
+def legacy_style_personality(user_data, wardrobe_data, preferences):
+    """The previous implementation of StyleAnalysis.analyze_style_personality"""
+    style_scores = {'classic': 0.0, 'edgy': 0.0, 'bohemian': 0.0, 'minimalist': 0.0, 'romantic': 0.0, 'trendy': 0.0}
+    if wardrobe_data:
+        for item in wardrobe_data:
+            category = item.get('category', '').lower()
+            colors = [item.get('primary_color', '').lower()]
+            brand = item.get('brand', '').lower()
+            if category in ['blazers', 'trousers', 'button_downs'] or 'black' in colors or 'navy' in colors:
+                style_scores['classic'] += 0.2
+            if category in ['leather_jackets', 'boots', 'ripped_jeans'] or 'black' in colors:
+                style_scores['edgy'] += 0.3
+            if category in ['maxi_dresses', 'kimonos', 'sandals'] or 'earth' in str(colors):
+                style_scores['bohemian'] += 0.25
+            if colors and colors[0] in ['white', 'black', 'grey', 'beige']:
+                style_scores['minimalist'] += 0.2
+            if category in ['dresses', 'skirts', 'blouses'] or 'pink' in colors or 'floral' in str(item):
+                style_scores['romantic'] += 0.2
+            if brand in ['zara', 'h&m', 'forever21'] or category in ['crop_tops', 'high_waisted']:
+                style_scores['trendy'] += 0.25
+    if preferences:
+        style_pref = preferences.get('style_preference', '').lower()
+        if style_pref in style_scores:
+            style_scores[style_pref] += 0.4
+        lifestyle = preferences.get('lifestyle', '').lower()
+        if lifestyle == 'professional':
+            style_scores['classic'] += 0.3
+            style_scores['minimalist'] += 0.2
+        elif lifestyle == 'creative':
+            style_scores['edgy'] += 0.3
+            style_scores['bohemian'] += 0.2
+        elif lifestyle == 'social':
+            style_scores['trendy'] += 0.3
+            style_scores['romantic'] += 0.2
+    dominant_style = max(style_scores, key=style_scores.get)
+    return dominant_style, min(style_scores[dominant_style], 1.0), style_scores
+
+
+def _wardrobe(size, seed):
+    rng = random.Random(seed)
+    wardrobe = []
+    for item_id in range(size):
+        item = {'id': item_id, 'name': f'Item {item_id}'}
+        for key, values in (('category', CATEGORIES), ('primary_color', COLORS), ('brand', BRANDS)):
+            if rng.random() < 0.95:
+                item[key] = rng.choice(values)
+        item.update(rng.choice(EXTRAS))
+        wardrobe.append(item)
+    return wardrobe
+
+
+def _assert_parity(wardrobe, preferences):
+    expected_style, expected_confidence, expected_scores = legacy_style_personality({}, wardrobe, preferences)
+    style, confidence, scores = StyleAnalysis.analyze_style_personality({}, wardrobe, preferences)
+
+    assert scores == pytest.approx(expected_scores)
+    assert confidence == pytest.approx(expected_confidence)
+    # Exact ties used to be decided by float rounding noise; they now resolve in STYLES order
+    runner_up = sorted(expected_scores.values())[-2]
+    if not expected_scores[expected_style] == pytest.approx(runner_up):
+        assert style == expected_style
+
+
+class TestStylePersonalityParity:
+    @pytest.mark.parametrize('size', [0, 1, 3, 10, 40, 250])
+    def test_matches_legacy_rules(self, size):
+        rng = random.Random(size)
+        for seed in range(40):
+            preferences = rng.choice([None, {}, {'style_preference': rng.choice(STYLES), 'lifestyle': rng.choice(LIFESTYLES)}])
+            _assert_parity(_wardrobe(size, seed), preferences)
+
+    def test_matches_legacy_rules_on_generated_wardrobes(self, wardrobe_factory):
+        for size in (1, 60, 500):
+            for preferences in (None, {'style_preference': 'romantic', 'lifestyle': 'social'}):
+                _assert_parity(wardrobe_factory(size), preferences)
+
+    @pytest.mark.parametrize('item', [
+        {'pattern': 'floral'},
+        {'pattern': 'Floral'},
+        {'floral': 1},
+        {1: 'x', 'name': 'tee'},
+        {'tags': ('floral',)},
+        {'meta': {'print': 'floral'}},
+        {'price': 12.5, 'count': 3, 'favorite': False, 'notes': None},
+    ])
+    def test_floral_check_matches_str_of_item(self, item):
+        assert StylePersonalityRules.mentions(item, 'floral') == ('floral' in str(item))
+
+    def test_ties_resolve_in_styles_order(self):
+        # 0.2 * 3 and 0.3 * 2 differ in float arithmetic but are the same score
+        wardrobe = [{'category': 'blazers'}] * 3 + [{'category': 'boots'}] * 2
+
+        style, confidence, scores = StyleAnalysis.analyze_style_personality({}, wardrobe, None)
+
+        assert style == 'classic'
+        assert scores['classic'] == scores['edgy'] == 0.6
+
+
+class TestStylePersonalityRules:
+    def test_python_sum_matches_numpy_sum(self):
+        rules = StylePersonalityRules()
+        wardrobe = _wardrobe(300, 7)
+        expected = rules.compute_points(wardrobe)
+
+        rules.mask_points_matrix = None
+
+        assert rules.compute_points(wardrobe) == expected
+
+    @pytest.mark.skipif(orjson is None, reason='wardrobe hashing needs orjson')
+    def test_wardrobe_points_are_cached_by_content(self):
+        rules = StylePersonalityRules(max_wardrobes=2)
+        wardrobe = _wardrobe(50, 1)
+        first = rules.wardrobe_points(wardrobe)
+
+        assert rules.wardrobe_points([dict(item) for item in wardrobe]) == first
+        changed = [dict(wardrobe[0], pattern='floral', category='dresses')] + wardrobe[1:]
+        assert rules.wardrobe_points(changed) == rules.compute_points(changed)
+        assert rules.get_stats()['hits'] == 1
+        assert rules.get_stats()['misses'] == 2
+
+        rules.wardrobe_points(_wardrobe(5, 2))
+        assert rules.get_stats()['cached_wardrobes'] == 2
+
+    def test_unhashable_wardrobes_are_classified_without_caching(self):
+        rules = StylePersonalityRules()
+        wardrobe = [{'category': 'blazers', 'primary_color': 'black', 1: 'odd key', 'tags': {'floral'}}]
+
+        assert rules.wardrobe_points(wardrobe) == rules.compute_points(wardrobe)
+        assert rules.get_stats()['cached_wardrobes'] == 0
+
+    def test_free_text_colors_are_bounded(self):
+        rules = StylePersonalityRules(max_colors=len(StylePersonalityRules.COLOR_STYLES) + 5)
+        known = len(rules.color_masks)
+        for index in range(50):
+            rules.color_mask(f'earth shade {index}')
+
+        assert len(rules.color_masks) <= max(known, rules.max_colors)
+        assert rules.color_mask('earth shade 49') == rules.bits['bohemian']
+        assert style_personality_rules.color_mask('sage') == 0
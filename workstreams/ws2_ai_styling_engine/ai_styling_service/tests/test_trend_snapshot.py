@@ -0,0 +1,145 @@
+"""
+Trend forecast snapshot tests
+"We girls have no time" - Trends computed once, served without writes!
+"""
+
+import pytest
+
+from src.models.trend_snapshot import (
+    TrendForecastSnapshot, TrendSnapshotStore, TrendForecastScheduler, trend_snapshot_store
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    trend_snapshot_store.reset()
+    yield
+    trend_snapshot_store.reset()
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    from src.routes import advanced_ai as advanced_ai_routes
+    monkeypatch.setattr(advanced_ai_routes, 'verify_auth_token', lambda token: True)
+    app.register_blueprint(advanced_ai_routes.advanced_ai_bp, url_prefix='/api/advanced')
+    return app.test_client()
+
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+class TestTrendSnapshotStore:
+    def test_refresh_persists_versioned_snapshot(self, app):
+        snapshot = trend_snapshot_store.refresh()
+
+        assert snapshot.version == 1
+        assert snapshot.count() == 3
+        assert TrendForecastSnapshot.query.count() == 1
+
+        # Unchanged forecasts keep their version so ETags stay valid
+        assert trend_snapshot_store.refresh().version == 1
+        assert TrendForecastSnapshot.query.count() == 1
+
+    def test_snapshot_orderings_match_status_queries(self, app):
+        snapshot = trend_snapshot_store.refresh()
+
+        assert [t.trend_name for t in snapshot.current_trends()] == ['Oversized Blazers']
+        assert [t.trend_name for t in snapshot.emerging_trends()] == ['Earth Tone Palettes']
+        assert [t.trend_name for t in snapshot.predicted_trends()] == ['Statement Sleeves']
+        assert [t.trend_name for t in snapshot.ranked_trends(2)] == ['Oversized Blazers', 'Earth Tone Palettes']
+
+    def test_snapshot_is_immutable(self, app):
+        snapshot = trend_snapshot_store.refresh()
+        trend = snapshot.current_trends(1)[0]
+
+        with pytest.raises(AttributeError):
+            snapshot.version = 99
+        with pytest.raises(AttributeError):
+            trend.status = 'ended'
+
+        trend.to_dict()['color_palette'].append('neon')
+        assert 'neon' not in trend.to_dict()['color_palette']
+
+    def test_reads_issue_no_writes(self, app, sql_recorder):
+        from src.models.advanced_ai import TrendForecast
+        trend_snapshot_store.refresh()
+        trend_snapshot_store.reset()
+
+        # Cold read loads the persisted snapshot, warm reads stay in memory
+        with sql_recorder as statements:
+            assert TrendForecast.get_current_trends(5)[0].trend_name == 'Oversized Blazers'
+            assert len(TrendForecast.get_emerging_trends(3)) == 1
+            assert len(TrendForecast.get_predicted_trends()) == 1
+        assert sql_recorder.writes(statements) == []
+
+    def test_serves_transient_snapshot_before_first_refresh(self, app, sql_recorder):
+        with sql_recorder as statements:
+            snapshot = trend_snapshot_store.current()
+
+        assert snapshot.version == 0
+        assert snapshot.count() == 3
+        assert sql_recorder.writes(statements) == []
+
+    def test_other_workers_pick_up_newer_versions(self, app):
+        worker = TrendSnapshotStore(reload_check_interval=0)
+        assert worker.current().version == 0
+
+        trend_snapshot_store.refresh()
+        assert worker.current().version == 1
+        assert worker.reload_count == 1
+
+    def test_scheduler_runs_refresh_job(self, app):
+        refreshes_before = trend_snapshot_store.refresh_count
+        scheduler = TrendForecastScheduler(app, store=trend_snapshot_store, interval=3600)
+        scheduler.start()
+        try:
+            assert trend_snapshot_store.get_stats()['active_version'] == 1
+            assert trend_snapshot_store.refresh_count == refreshes_before + 1
+        finally:
+            scheduler.stop()
+
+
+class TestTrendForecastEndpoint:
+    def test_trend_forecast_is_read_only(self, app, client, sql_recorder):
+        trend_snapshot_store.refresh()
+
+        with sql_recorder as statements:
+            response = client.get('/api/advanced/trend-forecast?type=all&limit=10', headers=AUTH)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total_results'] == 3
+        assert data['insights']['snapshot_version'] == 1
+        assert data['insights']['trending_now'] == 1
+        assert sql_recorder.writes(statements) == []
+
+    def test_trend_forecast_supports_conditional_requests(self, app, client):
+        trend_snapshot_store.refresh()
+
+        first = client.get('/api/advanced/trend-forecast?type=current', headers=AUTH)
+        etag = first.headers['ETag']
+        assert etag
+
+        cached = client.get('/api/advanced/trend-forecast?type=current',
+                            headers={**AUTH, 'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+
+        # A different query is a different representation
+        other = client.get('/api/advanced/trend-forecast?type=emerging',
+                           headers={**AUTH, 'If-None-Match': etag})
+        assert other.status_code == 200
+
+    def test_compressed_forecasts_revalidate(self, app, client):
+        from src.utils.response_encoding import ResponseEncoder
+        ResponseEncoder(min_size=0).init_app(app)
+        trend_snapshot_store.refresh()
+        headers = {**AUTH, 'Accept-Encoding': 'gzip'}
+
+        gzipped = client.get('/api/advanced/trend-forecast?type=current', headers=headers)
+        assert gzipped.headers['Content-Encoding'] == 'gzip'
+        assert gzipped.headers['ETag'].startswith('W/')  # Not byte-identical to the uncompressed body
+
+        revalidated = client.get('/api/advanced/trend-forecast?type=current',
+                                 headers={**headers, 'If-None-Match': gzipped.headers['ETag']})
+        assert revalidated.status_code == 304
@@ -0,0 +1,182 @@
+"""
+Wardrobe optimization result cache tests
+"We girls have no time" - Same wardrobe, same answer, no recompute!
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from src.models.advanced_ai import (
+    AdvancedAIEngine, WardrobeComposition, WardrobeOptimization, WardrobeOptimizationState,
+    wardrobe_optimization_cache
+)
+
+CATEGORIES = ['blazer', 'jeans', 'cardigan', 'dress', 'Blazer', 'dress pants', 'button-down', 'sneakers',
+              'basic tops', 'tops', 'white shirt', 'black dress', 'outerwear', None]
+COLORS = ['black', 'white', 'navy', 'gray', 'beige', 'brown', 'green', 'earth tones', 'pink', 'Black', None]
+
+
+def _wardrobe(size, seed=1):
+    rng = random.Random(seed)
+    wardrobe = []
+    for item_id in range(1, size + 1):
+        item = {'id': item_id, 'name': f'Item {item_id}', 'wear_count': rng.randint(0, 30)}
+        category, color = rng.choice(CATEGORIES), rng.choice(COLORS)
+        if category is not None:
+            item['category'] = category
+        if color is not None:
+            item['primary_color'] = color
+        wardrobe.append(item)
+    return wardrobe
+
+
+def _legacy_analysis(wardrobe_items):
+    """The per-item analysis analyze_wardrobe_optimization ran before results were cached"""
+    category_counts = Counter(item.get('category', 'unknown') for item in wardrobe_items)
+    color_counts = Counter(item.get('primary_color', 'unknown') for item in wardrobe_items)
+    missing_essentials = AdvancedAIEngine._identify_missing_essentials(category_counts)
+    color_gaps = AdvancedAIEngine._identify_color_gaps(color_counts)
+    return {
+        'total_items': len(wardrobe_items),
+        'category_distribution': dict(category_counts),
+        'color_distribution': dict(color_counts),
+        'versatility_score': AdvancedAIEngine._calculate_versatility_score(wardrobe_items),
+        'completeness_score': AdvancedAIEngine._calculate_completeness_score(category_counts),
+        'efficiency_score': AdvancedAIEngine._calculate_efficiency_score(wardrobe_items),
+        'style_coherence_score': AdvancedAIEngine._calculate_style_coherence_score(wardrobe_items),
+        'missing_essentials': missing_essentials,
+        'color_gaps': color_gaps,
+        'styling_opportunities': AdvancedAIEngine._identify_styling_opportunities(wardrobe_items),
+        'priority_purchases': AdvancedAIEngine._generate_priority_purchases(missing_essentials, color_gaps)
+    }
+
+
+def _assert_matches_legacy(analysis, wardrobe_items):
+    expected = _legacy_analysis(wardrobe_items)
+    for key in ('versatility_score', 'completeness_score', 'efficiency_score', 'style_coherence_score'):
+        assert analysis.pop(key) == pytest.approx(expected.pop(key)), key
+    assert analysis == expected
+
+
+def _stats_delta(before):
+    after = wardrobe_optimization_cache.get_stats()
+    return {key: after[key] - before[key] for key in
+            ('requests', 'memory_hits', 'stored_hits', 'incremental_recomputes', 'full_recomputes', 'changed_pairs_applied')}
+
+
+class TestWardrobeComposition:
+    @pytest.mark.parametrize('size, seed', [(1, 1), (7, 2), (60, 3), (400, 4)])
+    def test_full_analysis_matches_per_item_analysis(self, size, seed):
+        wardrobe = _wardrobe(size, seed)
+
+        _assert_matches_legacy(WardrobeComposition(WardrobeComposition.count_pairs(wardrobe)).analysis(), wardrobe)
+
+    def test_incremental_updates_match_full_analysis(self):
+        rng = random.Random(9)
+        wardrobe = _wardrobe(120)
+        composition = WardrobeComposition(WardrobeComposition.count_pairs(wardrobe))
+
+        for step in range(40):
+            # Add, remove and recolor a few items per step, sometimes emptying whole categories
+            for _ in range(rng.randint(1, 4)):
+                action = rng.random()
+                if action < 0.4 and len(wardrobe) > 1:
+                    wardrobe.pop(rng.randrange(len(wardrobe)))
+                elif action < 0.7:
+                    wardrobe.append(_wardrobe(1, seed=1000 + step)[0])
+                else:
+                    wardrobe[rng.randrange(len(wardrobe))]['primary_color'] = rng.choice(COLORS[:-1])
+
+            pairs = WardrobeComposition.count_pairs(wardrobe)
+            composition.update(pairs)
+
+            assert composition.content_hash() == WardrobeComposition.hash_pairs(pairs)
+            _assert_matches_legacy(composition.analysis(), wardrobe)
+
+    def test_content_hash_ignores_order_and_unread_fields(self):
+        wardrobe = _wardrobe(30)
+        shuffled = [dict(item, wear_count=item['wear_count'] + 1) for item in reversed(wardrobe)]
+        recolored = [dict(wardrobe[0], primary_color='teal')] + wardrobe[1:]
+
+        original = WardrobeComposition.hash_pairs(WardrobeComposition.count_pairs(wardrobe))
+        assert WardrobeComposition.hash_pairs(WardrobeComposition.count_pairs(shuffled)) == original
+        assert WardrobeComposition.hash_pairs(WardrobeComposition.count_pairs(recolored)) != original
+
+    def test_json_round_trip(self):
+        composition = WardrobeComposition(WardrobeComposition.count_pairs(_wardrobe(50)))
+        restored = WardrobeComposition.from_json(composition.to_json())
+
+        assert restored.content_hash() == composition.content_hash()
+        assert restored.analysis() == composition.analysis()
+
+
+class TestAnalyzeWardrobeOptimization:
+    def test_unchanged_wardrobe_is_served_without_writes(self, app, sql_recorder):
+        before = wardrobe_optimization_cache.get_stats()
+        wardrobe = _wardrobe(80)
+        first = AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+
+        with sql_recorder as statements:
+            second = AdvancedAIEngine.analyze_wardrobe_optimization(5, list(reversed(wardrobe)))
+
+        assert second == first
+        assert sql_recorder.writes(statements) == []
+        assert _stats_delta(before)['memory_hits'] == 1
+
+    def test_results_are_not_shared_between_callers(self, app):
+        wardrobe = _wardrobe(20)
+        AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)['missing_essentials'].append('tiara')
+
+        assert 'tiara' not in AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)['missing_essentials']
+
+    def test_stored_state_serves_a_restarted_process(self, app, sql_recorder):
+        before = wardrobe_optimization_cache.get_stats()
+        wardrobe = _wardrobe(80)
+        first = AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+        wardrobe_optimization_cache.clear()
+
+        with sql_recorder as statements:
+            second = AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+
+        assert second == first
+        assert sql_recorder.writes(statements) == []
+        assert _stats_delta(before)['stored_hits'] == 1
+
+    @pytest.mark.parametrize('clear_memory', [False, True])
+    def test_changed_wardrobe_is_recomputed_incrementally(self, app, clear_memory):
+        before = wardrobe_optimization_cache.get_stats()
+        wardrobe = _wardrobe(200)
+        AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+        if clear_memory:
+            wardrobe_optimization_cache.clear()
+
+        changed = wardrobe[3:] + [{'id': 999, 'category': 'blazer', 'primary_color': 'navy'}]
+        result = AdvancedAIEngine.analyze_wardrobe_optimization(5, changed)
+
+        stats = _stats_delta(before)
+        assert stats['incremental_recomputes'] == 1
+        assert stats['full_recomputes'] == 1
+        # Only the pairs of the removed and added items are re-counted
+        assert stats['changed_pairs_applied'] - len(WardrobeComposition.count_pairs(wardrobe)) <= 4
+        _assert_matches_legacy({key: result[key] for key in _legacy_analysis(changed)}, changed)
+
+        row = WardrobeOptimization.query.filter_by(user_id=5).one()
+        state = WardrobeOptimizationState.query.filter_by(user_id=5).one()
+        assert row.total_items == len(changed)
+        assert state.content_hash == WardrobeComposition.hash_pairs(WardrobeComposition.count_pairs(changed))
+
+    def test_stats_report_compute_time_saved(self, app):
+        before = wardrobe_optimization_cache.get_stats()
+        wardrobe = _wardrobe(100)
+        AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+        for _ in range(3):
+            AdvancedAIEngine.analyze_wardrobe_optimization(5, wardrobe)
+        AdvancedAIEngine.analyze_wardrobe_optimization(6, [])
+
+        stats = wardrobe_optimization_cache.get_stats()
+        assert _stats_delta(before) == {'requests': 4, 'memory_hits': 3, 'stored_hits': 0, 'incremental_recomputes': 0,
+                                        'full_recomputes': 1, 'changed_pairs_applied': stats['changed_pairs_applied'] - before['changed_pairs_applied']}
+        assert stats['full_compute_seconds_per_item'] > 0
+        assert stats['compute_time_saved_seconds'] >= before['compute_time_saved_seconds']
@@ -0,0 +1,117 @@
+"""
+Weather rule index tests
+"We girls have no time" - Same rules as the database, without the query!
+"""
+
+import json
+import random
+
+import pytest
+
+from src.models.user import db
+from src.models.enhanced_recommendations import WeatherOutfitRule, WeatherRuleIndex, weather_rule_index
+
+CONDITIONS = ['sunny', 'rainy', 'cold', 'hot']
+RANGES = [None, '', 'below_50F', 'above_80F', '60-75F', '40-60F', '75-90F', 'below_32F', 'above_60F',
+          '-10-20F', 'warm', 'below_F', '60-50F', '55-55F']
+
+
+def legacy_weather_rules(weather_condition, temperature=None):
+    """The previous database implementation of get_weather_rules"""
+    rules = WeatherOutfitRule.query.filter_by(
+        weather_condition=weather_condition, active=True
+    ).order_by(WeatherOutfitRule.priority.desc(), WeatherOutfitRule.id.asc()).all()
+    if temperature and rules:
+        return [rule for rule in rules
+                if not rule.temperature_range or WeatherOutfitRule.temperature_matches(temperature, rule.temperature_range)]
+    return rules
+
+
+def _seed_rules(count=80, seed=3):
+    rng = random.Random(seed)
+    for _ in range(count):
+        db.session.add(WeatherOutfitRule(
+            weather_condition=rng.choice(CONDITIONS),
+            temperature_range=rng.choice(RANGES),
+            preferred_colors=json.dumps([rng.choice(['navy', 'white', 'black'])]),
+            layering_required=rng.random() < 0.3,
+            priority=rng.randint(1, 4),
+            active=rng.random() < 0.9
+        ))
+    db.session.commit()
+
+
+class TestWeatherRuleIndex:
+    def test_parity_with_database_lookup(self, app):
+        _seed_rules()
+        temperatures = [None, 0, -15, 31.5, 32, 49, 50, 55, 59.9, 60, 75, 80, 80.5, 95, '55'] + list(range(-20, 121, 7))
+
+        for condition in CONDITIONS + ['snowy']:
+            for temperature in temperatures:
+                expected = [rule.id for rule in legacy_weather_rules(condition, temperature)]
+                actual = [rule.id for rule in WeatherOutfitRule.get_weather_rules(condition, temperature)]
+                assert actual == expected, (condition, temperature)
+
+    @pytest.mark.parametrize('temp_range, inside, outside', [
+        ('below_50F', [49, -40], [50, 51]),
+        ('above_80F', [81, 80.1], [80, 79]),
+        ('60-75F', [60, 75, 67.5], [59.9, 75.1]),
+        ('garbage', [-100, 0, 100], []),
+    ])
+    def test_parse_range_bounds(self, temp_range, inside, outside):
+        bounds = WeatherRuleIndex.parse_range(temp_range)
+
+        assert all(WeatherRuleIndex.bounds_contain(bounds, t) for t in inside)
+        assert not any(WeatherRuleIndex.bounds_contain(bounds, t) for t in outside)
+
+    def test_rules_are_read_only_views(self, app):
+        _seed_rules(10)
+        rule = weather_rule_index.active_rules()[0]
+
+        with pytest.raises(AttributeError):
+            rule.priority = 99
+        assert rule.to_dict() == db.session.get(WeatherOutfitRule, rule.id).to_dict()
+
+
+class TestWeatherRuleHotReload:
+    def test_committed_changes_are_picked_up(self, app):
+        rule = WeatherOutfitRule(weather_condition='rainy', temperature_range='50-65F', priority=1)
+        db.session.add(rule)
+        db.session.commit()
+        assert [r.id for r in WeatherOutfitRule.get_weather_rules('rainy', 55)] == [rule.id]
+
+        urgent = WeatherOutfitRule(weather_condition='rainy', priority=5)
+        db.session.add(urgent)
+        db.session.commit()
+        assert [r.id for r in WeatherOutfitRule.get_weather_rules('rainy', 55)] == [urgent.id, rule.id]
+
+        rule.temperature_range = '70-80F'
+        db.session.commit()
+        assert [r.id for r in WeatherOutfitRule.get_weather_rules('rainy', 55)] == [urgent.id]
+
+        db.session.delete(urgent)
+        db.session.commit()
+        assert WeatherOutfitRule.get_weather_rules('rainy', 55) == []
+
+    def test_rolled_back_changes_are_not_served(self, app):
+        WeatherOutfitRule.get_weather_rules('sunny')
+        loads = weather_rule_index.load_count
+
+        db.session.add(WeatherOutfitRule(weather_condition='sunny'))
+        db.session.flush()
+        db.session.rollback()
+
+        assert WeatherOutfitRule.get_weather_rules('sunny') == []
+        assert weather_rule_index.load_count == loads
+
+    def test_reload_interval_catches_out_of_band_updates(self, app):
+        _seed_rules(20)
+        index = WeatherRuleIndex(reload_interval=0)
+        before = len(index.active_rules())
+
+        # Bulk updates bypass ORM events, as would a change made by another worker
+        WeatherOutfitRule.query.update({'active': False})
+        db.session.commit()
+
+        assert before > 0
+        assert index.active_rules() == []
@@ -0,0 +1,139 @@
+"""
+Weekly outfit planning tests
+"We girls have no time" - A week of outfits, one request, no repeats!
+"""
+
+from collections import Counter
+
+import pytest
+
+from src.models.user import db
+from src.models.ai_models import OutfitRecommendation
+from src.models.enhanced_recommendations import WeatherOutfitRule, WeeklyOutfitPlanner
+
+WEEK = [
+    {'date': '2025-03-03', 'occasion': 'work', 'weather': 'rainy', 'temperature': 55},
+    {'date': '2025-03-04', 'occasion': 'work', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-05', 'occasion': 'work', 'weather': 'rainy', 'temperature': 55},
+    {'date': '2025-03-06', 'occasion': 'date', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-07', 'occasion': 'party'},
+    {'date': '2025-03-08', 'occasion': 'casual', 'weather': 'sunny', 'temperature': 70},
+    {'date': '2025-03-09', 'occasion': 'casual'},
+]
+
+
+class TestWeeklyOutfitPlanner:
+    @pytest.mark.parametrize('occasion', ['work', 'casual', 'date', 'party', 'unknown'])
+    def test_single_slot_matches_outfit_recommendation(self, sample_wardrobe, wardrobe_factory, occasion):
+        for wardrobe in (sample_wardrobe, wardrobe_factory(60)):
+            style = {'style_personality': 'classic'}
+            expected = OutfitRecommendation.generate_outfit_recommendation(1, wardrobe, style, occasion)
+
+            outfit = WeeklyOutfitPlanner.select_outfit(
+                WeeklyOutfitPlanner.encode_wardrobe(wardrobe), len(wardrobe), style, occasion
+            )
+
+            assert outfit.pop('repeated_items') == []
+            assert outfit == expected
+
+    def test_items_are_not_repeated_across_the_week(self, app, wardrobe_factory):
+        plans = WeeklyOutfitPlanner.plan_week(1, wardrobe_factory(120), {}, WEEK)
+
+        uses = Counter(item_id for plan in plans for item_id in plan['outfit']['outfit_items'])
+        assert all(plan['outfit'] for plan in plans)
+        assert max(uses.values()) == 1
+        assert all(plan['outfit']['repeated_items'] == [] for plan in plans)
+
+    def test_small_wardrobe_reuses_least_worn_pieces(self, app, sample_wardrobe):
+        plans = WeeklyOutfitPlanner.plan_week(1, sample_wardrobe, {}, WEEK)
+
+        assert all(plan['outfit'] for plan in plans)
+        assert any(plan['outfit']['repeated_items'] for plan in plans[1:])
+        # The first slot always gets the best pieces without repeats
+        assert plans[0]['outfit']['repeated_items'] == []
+
+    def test_weather_layers_respect_use_limits(self, app, sample_wardrobe):
+        db.session.add(WeatherOutfitRule(weather_condition='rainy', layering_required=True))
+        db.session.commit()
+        wardrobe = sample_wardrobe + [
+            {'id': 7, 'name': 'Trench coat', 'category': 'coats', 'primary_color': 'beige', 'favorite': False, 'wear_count': 30},
+        ]
+        rainy = [{'date': f'2025-03-0{day}', 'occasion': 'party', 'weather': 'rainy', 'temperature': 55} for day in range(3, 6)]
+
+        plans = WeeklyOutfitPlanner.plan_week(1, wardrobe, {}, rainy)
+
+        layers = [[item_id for item_id in plan['outfit']['outfit_items'] if item_id in (6, 7)] for plan in plans]
+        assert layers == [[6], [7], [6]]  # Favorite jacket, then the coat, then the best layer again as a repeat
+        assert plans[0]['outfit']['repeated_items'] == []
+        assert 7 not in plans[1]['outfit']['repeated_items']
+        assert 6 in plans[2]['outfit']['repeated_items']
+
+    def test_shared_context_queries_do_not_grow_with_slots(self, app, wardrobe_factory, sql_recorder):
+        wardrobe = wardrobe_factory(120)
+        WeeklyOutfitPlanner.plan_week(1, wardrobe, {}, WEEK[:1])  # Warm the weather rule index
+        with sql_recorder as single:
+            WeeklyOutfitPlanner.plan_week(1, wardrobe, {}, WEEK[:1])
+        with sql_recorder as week:
+            WeeklyOutfitPlanner.plan_week(1, wardrobe, {}, WEEK)
+
+        # Weather rules come from the in-memory index, so a week costs the same queries as one slot
+        assert len(week) == len(single)
+
+
+class TestWeeklyPlanEndpoint:
+    @pytest.fixture
+    def client(self, app, monkeypatch, wardrobe_factory):
+        from src.routes import enhanced_recommendations as routes
+        wardrobe = wardrobe_factory(80)
+        calls = []
+
+        def fake_user_data(user_id, auth_token):
+            calls.append(user_id)
+            return {'profile': {'id': user_id}, 'wardrobe': wardrobe}
+
+        monkeypatch.setattr(routes, 'verify_auth_token', lambda token: True)
+        monkeypatch.setattr(routes, 'get_user_data', fake_user_data)
+        app.register_blueprint(routes.enhanced_rec_bp, url_prefix='/api/enhanced')
+        client = app.test_client()
+        client.ws1_calls = calls
+        return client
+
+    def test_plans_all_slots_in_one_request(self, client):
+        response = client.post('/api/enhanced/weekly-plan', headers={'Authorization': 'Bearer t'},
+                               json={'user_id': 3, 'slots': WEEK})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['summary']['slots_planned'] == 7
+        assert [plan['date'] for plan in data['plans']] == [slot['date'] for slot in WEEK]
+        assert client.ws1_calls == [3]
+        assert OutfitRecommendation.query.filter_by(user_id=3).count() == 7
+
+    def test_rejects_invalid_slots(self, client):
+        headers = {'Authorization': 'Bearer t'}
+
+        assert client.post('/api/enhanced/weekly-plan', headers=headers,
+                           json={'user_id': 3, 'slots': []}).status_code == 400
+        assert client.post('/api/enhanced/weekly-plan', headers=headers,
+                           json={'user_id': 3, 'slots': [{'date': '03/03/2025'}]}).status_code == 400
+        assert client.post('/api/enhanced/weekly-plan', headers=headers,
+                           json={'user_id': 3, 'slots': [{}] * 40}).status_code == 400
+
+    @pytest.mark.parametrize('payload', [
+        {'slots': ['work']},
+        {'slots': [WEEK[0], None]},
+        {'slots': [{'occasion': 'gala'}]},
+        {'slots': [{'occasion': ['work']}]},
+        {'slots': [{'occasion': 'work', 'mood': 'sleepy'}]},
+        {'slots': WEEK, 'max_item_uses': 0},
+        {'slots': WEEK, 'max_item_uses': '2'},
+        {'slots': WEEK, 'max_item_uses': 1.5},
+        {'slots': WEEK, 'max_item_uses': True},
+    ])
+    def test_rejects_malformed_plans(self, client, payload):
+        response = client.post('/api/enhanced/weekly-plan', headers={'Authorization': 'Bearer t'},
+                               json={'user_id': 3, **payload})
+
+        assert response.status_code == 400
+        assert client.ws1_calls == []
+        assert OutfitRecommendation.query.filter_by(user_id=3).count() == 0
@@ -0,0 +1,166 @@
+"""
+Write-behind persistence tests
+"We girls have no time" - Answer first, save in the background!
+"""
+
+import threading
+
+import pytest
+
+from src.models.user import db
+from src.models.ai_models import AIInsight
+from src.models.advanced_ai import AdvancedAIEngine, PredictiveRecommendation, StyleCompatibility
+from src.utils.write_behind import WriteBehindQueue, write_behind
+
+
+@pytest.fixture
+def queue(app):
+    queue = WriteBehindQueue(batch_size=50, flush_interval=0.01, retry_backoff=0.01)
+    queue.init_app(app)
+    yield queue
+    queue.shutdown(5)
+
+
+def _predictions(count, user_id=1, **overrides):
+    return [PredictiveRecommendation(user_id=user_id, recommendation_type='trend',
+                                     prediction_confidence=index / count, **overrides)
+            for index in range(count)]
+
+
+class TestSynchronousMode:
+    def test_rows_are_committed_in_the_caller_without_init_app(self, app):
+        assert not write_behind.enabled
+
+        predictions = AdvancedAIEngine.generate_predictive_recommendations(3)
+
+        assert [p['id'] for p in predictions] == [row.id for row in PredictiveRecommendation.query.all()]
+        assert all(p['id'] is not None for p in predictions)
+
+
+class TestWriteBehindQueue:
+    def test_results_return_before_rows_are_committed(self, app, queue):
+        release = threading.Event()
+        original = queue._insert_rows
+        queue._insert_rows = lambda rows: (release.wait(5), original(rows))
+
+        rows = queue.add_all(_predictions(5))
+        dicts = [row.to_dict() for row in rows]
+
+        assert PredictiveRecommendation.query.count() == 0
+        assert all(d['id'] is None and d['created_date'] and d['status'] == 'active' for d in dicts)
+        assert queue.get_stats()['queue_depth'] == 5
+
+        release.set()
+        assert queue.flush()
+        stored = PredictiveRecommendation.query.order_by(PredictiveRecommendation.id).all()
+        assert [row.prediction_confidence for row in stored] == [d['prediction_confidence'] for d in dicts]
+        assert queue.get_stats()['queue_depth'] == 0
+
+    def test_rows_are_written_in_batches(self, app, queue):
+        for _ in range(4):
+            queue.add_all(_predictions(30))
+        queue.add(StyleCompatibility(item1_id='a', item2_id='b', overall_compatibility=0.9))
+        assert queue.flush()
+
+        stats = queue.get_stats()
+        assert PredictiveRecommendation.query.count() == 120
+        assert StyleCompatibility.query.count() == 1
+        assert stats['persisted'] == 121
+        assert stats['batches'] < 121
+        assert stats['flush_latency_ms']['count'] == stats['batches']
+        assert stats['persist_lag_ms']['p99'] is not None
+        assert stats['queue_depth'] == 0
+
+    def test_failed_batches_are_retried(self, app, queue):
+        original = queue._insert_rows
+        failures = []
+
+        def flaky(rows):
+            if not failures:
+                failures.append(1)
+                raise RuntimeError('database is locked')
+            return original(rows)
+
+        queue._insert_rows = flaky
+        queue.add_all(_predictions(10))
+        assert queue.flush()
+
+        assert PredictiveRecommendation.query.count() == 10
+        assert queue.get_stats()['retries'] == 1
+        assert queue.get_stats()['dead_letters'] == 0
+
+    def test_rejected_rows_are_dead_lettered_without_losing_the_batch(self, app, queue):
+        queue.add_all(_predictions(3) + [PredictiveRecommendation(user_id=None, recommendation_type='trend')]
+                      + _predictions(3, user_id=2))
+        assert queue.flush()
+
+        assert PredictiveRecommendation.query.count() == 6
+        assert queue.get_stats()['dead_letters'] == 1
+        assert queue.dead_letters[0]['model'] == 'PredictiveRecommendation'
+
+    def test_full_queue_writes_in_the_caller(self, app):
+        queue = WriteBehindQueue(max_size=10, batch_size=5, flush_interval=0.01, put_timeout=0.05)
+        queue.init_app(app)
+        release = threading.Event()
+        original = queue._persist
+        queue._persist = lambda batch: (release.wait(5), original(batch))[1]
+        try:
+            for _ in range(5):
+                queue.add_all(_predictions(5))
+            assert queue.get_stats()['overflow_writes'] > 0
+            assert queue.get_stats()['max_queue_depth'] <= 10
+        finally:
+            release.set()
+            assert queue.shutdown(5)
+
+        assert PredictiveRecommendation.query.count() == 25
+
+
+class TestWriteBehindCallers:
+    @pytest.fixture
+    def enabled(self, app, monkeypatch):
+        queue = WriteBehindQueue(flush_interval=0.01)
+        queue.init_app(app)
+        from src.models import advanced_ai
+        monkeypatch.setattr(advanced_ai, 'write_behind', queue)
+        yield queue
+        queue.shutdown(5)
+
+    def test_compatibility_and_predictions_are_persisted_after_flush(self, app, enabled):
+        compatibility = AdvancedAIEngine.analyze_style_compatibility(
+            {'id': 1, 'category': 'blazer', 'primary_color': 'navy'},
+            {'id': 2, 'category': 'jeans', 'primary_color': 'white'}
+        )
+        predictions = AdvancedAIEngine.generate_predictive_recommendations(4)
+
+        assert compatibility['id'] is None
+        assert enabled.flush()
+        stored = db.session.query(StyleCompatibility).one()
+        assert stored.overall_compatibility == compatibility['overall_compatibility']
+        assert PredictiveRecommendation.query.filter_by(user_id=4).count() == len(predictions)
+
+    def test_insight_values_round_trip(self, app, queue):
+        insight = AIInsight(user_id=9, insight_type='wardrobe_gap', title='Add a blazer', description='Layering',
+                            confidence_score=0.8, priority='high')
+        queue.add(insight)
+
+        assert queue.flush()
+
+        stored = AIInsight.query.filter_by(user_id=9).one().to_dict()
+        assert stored == dict(insight.to_dict(), id=stored['id'])
+
+    def test_new_insights_have_ids_clients_can_act_on(self, app, enabled, monkeypatch, sample_wardrobe):
+        from src.routes import ai_styling
+        monkeypatch.setattr(ai_styling, 'verify_auth_token', lambda token: True)
+        monkeypatch.setattr(ai_styling, 'get_user_data', lambda user_id, token: {'wardrobe': sample_wardrobe})
+        app.register_blueprint(ai_styling.ai_styling_bp, url_prefix='/api/ai')
+        client = app.test_client()
+        headers = {'Authorization': 'Bearer test-token'}
+
+        insights = client.get('/api/ai/insights?user_id=9', headers=headers).get_json()['insights']
+        assert insights and all(insight['id'] is not None for insight in insights)
+        assert enabled.get_stats()['enqueued'] == 0
+
+        response = client.post(f"/api/ai/insights/{insights[0]['id']}/action", json={'action': 'dismiss'}, headers=headers)
+        assert response.status_code == 200
+        assert db.session.get(AIInsight, insights[0]['id']).status == 'dismissed'
@@ -0,0 +1,75 @@
+"""
+Batch optimization throughput across worker counts
+"We girls have no time" - Measure it before you trust it!
+
+Every run starts from an empty derived-image cache, so each image is decoded.
+
+Usage:
+    python benchmarks/bench_batch_optimize.py [--images 48] [--size 3000 2000] [--workers 0 1 2 4] [--memory-mb 256]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from src.utils.image_processing_optimization import DerivedImageCache, ImagePreprocessor, ImageProcessingOptimizer
+
+
+def write_images(directory, count, size):
+    """Gradient-plus-noise JPEGs that compress like photos"""
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    paths = []
+    for index in range(count):
+        rng = np.random.default_rng(index)
+        rgb = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+        rgb += rng.normal(0, 12, rgb.shape)
+        buffer = io.BytesIO()
+        Image.fromarray(rgb.clip(0, 255).astype(np.uint8)).save(buffer, 'JPEG', quality=90)
+        path = os.path.join(directory, f'photo_{index}.jpg')
+        with open(path, 'wb') as f:
+            f.write(buffer.getvalue())
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--images', type=int, default=48)
+    parser.add_argument('--size', type=int, nargs=2, default=[3000, 2000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--memory-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_images(tmp_dir, args.images, args.size)
+        megapixels = args.images * args.size[0] * args.size[1] / 1e6
+        print(f"{args.images} images of {args.size[0]}x{args.size[1]} on {os.cpu_count()} CPUs, "
+              f"{args.memory_mb} MB in-flight budget")
+        print(f"{'workers':>7} {'images/s':>9} {'MP/s':>7} {'first result':>13} {'peak in flight':>15}")
+        for workers in args.workers:
+            cache = DerivedImageCache(cache_dir=os.path.join(tmp_dir, f'derived_{workers}'))
+            optimizer = ImageProcessingOptimizer(ImagePreprocessor(cache), workers=workers, memory_budget_mb=args.memory_mb)
+            if workers:
+                optimizer._executor().submit(time.sleep, 0).result()  # Exclude process start-up from the timing
+            start = time.perf_counter()
+            first = None
+            for _ in optimizer.iter_optimize_images(paths, (512, 512)):
+                first = first or time.perf_counter() - start
+            elapsed = time.perf_counter() - start
+            peak = optimizer.get_performance_stats()['batch_stats']['peak_in_flight_bytes']
+            print(f"{workers:>7} {args.images / elapsed:>9.1f} {megapixels / elapsed:>7.1f} {first * 1000:>10.0f} ms "
+                  f"{peak / 2 ** 20:>12.1f} MB")
+            optimizer.shutdown()
+
+
+if __name__ == '__main__':
+    main()
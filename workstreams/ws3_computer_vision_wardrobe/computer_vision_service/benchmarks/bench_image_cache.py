@@ -0,0 +1,84 @@
+"""
+Image cache hit ratio across a restart, memory-only versus two-tier
+"We girls have no time" - Measure it before you trust it!
+
+A first process analyzes a set of photos; a restarted process then serves a
+skewed request stream over the same photos, some of them re-uploaded under
+new names. The memory-only cache starts cold after the restart; the two-tier
+cache finds earlier results on disk.
+
+Usage:
+    python benchmarks/bench_image_cache.py [--images 200] [--requests 2000] [--memory-size 50] [--renamed 0.3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.utils.image_processing_optimization import ImageProcessingCache
+
+
+def write_images(directory, count):
+    """Small random payloads: only the content hash matters to the cache"""
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f'photo_{index}.jpg')
+        with open(path, 'wb') as f:
+            f.write(np.random.default_rng(index).bytes(20_000))
+        paths.append(path)
+    return paths
+
+
+def analysis(path):
+    return {'image': os.path.basename(path), 'category': 'tops', 'colors': ['navy', 'white', 'grey'] * 20,
+            'embedding': [0.01 * value for value in range(256)]}
+
+
+def serve(cache, paths, requests, seed):
+    """Zipf-like request stream; every miss is analyzed and cached"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(paths) + 1)
+    start = time.perf_counter()
+    for index in rng.choice(len(paths), size=requests, p=weights / weights.sum()):
+        if cache.get(paths[index], 'analyze') is None:
+            cache.set(paths[index], 'analyze', analysis(paths[index]))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--memory-size', type=int, default=50)
+    parser.add_argument('--renamed', type=float, default=0.3, help='Share of photos re-uploaded under a new name')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_images(tmp_dir, args.images)
+        renamed = list(paths)
+        for index in range(0, args.images, max(1, round(1 / args.renamed)) if args.renamed else args.images + 1):
+            renamed[index] = os.path.join(tmp_dir, f'upload_{index}.jpg')
+            shutil.copyfile(paths[index], renamed[index])
+
+        print(f"{args.images} photos, {args.requests} requests after restart, memory tier of {args.memory_size}")
+        print(f"{'cache':>12} {'hit ratio':>10} {'memory hits':>12} {'disk hits':>10} {'time':>8} {'disk size':>10}")
+        for name, disk_path in (('memory-only', None), ('two-tier', os.path.join(tmp_dir, 'cache.sqlite'))):
+            serve(ImageProcessingCache(max_size=args.memory_size, disk_path=disk_path), paths, args.requests, seed=1)
+
+            restarted = ImageProcessingCache(max_size=args.memory_size, disk_path=disk_path)
+            elapsed = serve(restarted, renamed, args.requests, seed=2)
+            stats = restarted.get_stats()
+            disk_size = f"{stats['disk']['stored_bytes'] / 2 ** 20:.1f} MB" if stats['disk'] else '-'
+            print(f"{name:>12} {stats['hit_ratio']:>10.1%} {stats['memory_hit_count']:>12} "
+                  f"{stats['disk_hit_count']:>10} {elapsed * 1000:>5.0f} ms {disk_size:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Similar-items micro-benchmark: per-item Python loop vs embedding matrix (and LSH) top-K
+"We girls have no time" - Measure it before you trust it!
+
+Usage:
+    python benchmarks/bench_similar_items.py [--sizes 100 1000 10000] [--queries 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.item_embeddings import SimilarityIndex
+
+CATEGORIES = ['tops', 'bottoms', 'dresses', 'shoes', 'outerwear', 'accessories', 'skirts', 'knitwear']
+COLORS = ['black', 'white', 'navy', 'red', 'beige', 'green', 'pink', 'grey', 'brown', 'olive', 'burgundy', 'blue']
+STYLES = ['classic', 'casual', 'minimalist', 'bohemian', 'professional', 'romantic', 'edgy', 'sporty', 'vintage']
+
+
+def legacy_similar_items(user_id, item_id):
+    """The previous implementation: load every item, score each pair in Python"""
+    reference_item = WardrobeItem.query.filter_by(id=item_id, user_id=user_id).first()
+    similar_items = []
+    for item in WardrobeItem.query.filter_by(user_id=user_id).filter(WardrobeItem.id != item_id).all():
+        similarity_score = 0.0
+        if item.color_primary == reference_item.color_primary:
+            similarity_score += 0.3
+        if item.category == reference_item.category:
+            similarity_score += 0.4
+        ref_styles = json.loads(reference_item.cv_style_tags) if reference_item.cv_style_tags else []
+        item_styles = json.loads(item.cv_style_tags) if item.cv_style_tags else []
+        common_styles = set(ref_styles) & set(item_styles)
+        if common_styles:
+            similarity_score += 0.3 * (len(common_styles) / max(len(ref_styles), len(item_styles)))
+        if similarity_score > 0.3:
+            similar_items.append((similarity_score, item.id))
+    similar_items.sort(reverse=True)
+    return similar_items[:10]
+
+
+def seed(user_id, size):
+    rng = random.Random(size)
+    db.session.add_all(WardrobeItem(
+        user_id=user_id, name=f'Item {index}', category=rng.choice(CATEGORIES), color_primary=rng.choice(COLORS),
+        color_secondary=rng.choice(COLORS + [None]), cv_style_tags=json.dumps(rng.sample(STYLES, rng.randint(0, 3)))
+    ) for index in range(size))
+    db.session.commit()
+    return [item_id for (item_id,) in db.session.query(WardrobeItem.id).filter_by(user_id=user_id)]
+
+
+def time_queries(func, user_id, item_ids):
+    start = time.perf_counter()
+    for item_id in item_ids:
+        func(user_id, item_id)
+    return (time.perf_counter() - start) * 1000 / len(item_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            print(f"{'items':>7} {'python loop':>13} {'matrix':>10} {'lsh':>10} {'build':>9} {'lsh scored':>11}")
+            for user_id, size in enumerate(args.sizes, start=1):
+                item_ids = seed(user_id, size)
+                rng = random.Random(7)
+                queries = [rng.choice(item_ids) for _ in range(args.queries)]
+
+                legacy_ms = time_queries(legacy_similar_items, user_id, queries[:max(len(queries) // 5, 1)])
+
+                exact_index = SimilarityIndex(lsh_min_items=size + 1)
+                start = time.perf_counter()
+                exact_index.vectors(user_id)
+                build_ms = (time.perf_counter() - start) * 1000
+                exact_ms = time_queries(exact_index.most_similar, user_id, queries)
+
+                lsh_index = SimilarityIndex(lsh_min_items=1)
+                vectors = lsh_index.vectors(user_id)
+                lsh_ms = time_queries(lsh_index.most_similar, user_id, queries)
+                scored = sum(len(vectors.lsh.candidates(vectors.matrix[vectors.rows[item_id]])) for item_id in queries)
+
+                print(f"{size:>7} {legacy_ms:>10.2f} ms {exact_ms:>7.3f} ms {lsh_ms:>7.3f} ms {build_ms:>6.1f} ms "
+                      f"{scored / len(queries) / size:>10.0%}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+WS3-P2: Wardrobe Management & Visual Cataloging
+Item Tag Index Backfill for Tanvi Vanity Agent
+"We girls have no time" - Index the wardrobe we already have!
+
+Builds item_tags rows for wardrobe items written before the tag index
+existed. Safe to re-run: each item's rows are replaced, not appended.
+
+Usage:
+    python -m src.backfill_item_tags [--batch-size 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.item_tags import ItemTag, backfill_item_tags
+from src.models.user import db
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument('--batch-size', type=int, default=500, help='Items per transaction')
+    args = parser.parse_args(argv)
+
+    from src.main import app
+    with app.app_context():
+        start = time.time()
+        items = backfill_item_tags(args.batch_size)
+        print(json.dumps({'items_indexed': items, 'tag_rows': db.session.query(ItemTag).count(),
+                          'seconds': round(time.time() - start, 2)}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,554 @@
+"""
+WS3-P5: Performance Optimization & Image Processing
+Durable Background Job Worker for Tanvi Vanity Agent
+"We girls have no time" - Heavy CV work off the request path!
+
+Runs queued BatchProcessingJob and OutfitVisualizationJob rows:
+- Jobs are claimed atomically from the job_queue table with a lease; the
+  lease is renewed with every progress write and an expired lease makes the
+  job claimable again, so a crashed worker's job is resumed elsewhere.
+- Job items run in a bounded process pool (at most `max_in_flight` items
+  submitted at once); `--processes 0` runs them inline.
+- Progress and partial results are written back in batches. A retried job
+  skips items that already succeeded.
+- Failed jobs are retried with exponential backoff; cancellation is checked
+  at every progress write.
+- Job outputs (optimized images, outfit collages) are written to
+  JOB_OUTPUT_DIR, which is never trimmed; the derived image cache only holds
+  intermediates that can be recomputed.
+
+Usage:
+    python -m src.job_worker [--processes 2] [--poll-interval 1.0] [--once]
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.wardrobe_management import BatchProcessingJob
+from src.models.outfit_visualization import OutfitComposition, OutfitVisualizationJob
+from src.models.job_queue import JobQueue
+from src.utils.image_processing_optimization import ImageSourcePolicy, image_optimizer, image_preprocessor
+
+# Persistent home of job outputs, saved on domain rows and job results (inside the default upload root)
+JOB_OUTPUT_DIR = os.environ.get('JOB_OUTPUT_DIR') or os.path.join(ImageSourcePolicy.DEFAULT_UPLOAD_ROOT, 'job_outputs')
+
+# Named reference colors for dominant color detection
+NAMED_COLORS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'grey': (128, 128, 128), 'silver': (192, 192, 192),
+    'navy': (0, 0, 128), 'blue': (0, 90, 255), 'red': (220, 20, 60), 'burgundy': (128, 0, 32),
+    'pink': (255, 160, 190), 'orange': (255, 140, 0), 'yellow': (255, 215, 0), 'green': (34, 139, 34),
+    'olive': (128, 128, 0), 'beige': (225, 205, 170), 'brown': (120, 72, 30), 'purple': (128, 0, 128)
+}
+
+class JobFailed(Exception):
+    """A job that can never succeed (e.g. unsupported type); failed without retries"""
+
+
+def save_job_output(data, suffix):
+    """Write a job output atomically under JOB_OUTPUT_DIR, named by its content, and return its path"""
+    digest = image_preprocessor.cache.source_digest(data)
+    path = os.path.join(JOB_OUTPUT_DIR, digest[:2], digest + suffix)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+# Item functions run in the process pool: module-level and database-free
+
+def analyze_item_image(payload):
+    """Dominant colors of a wardrobe item photo, from its (cached) web thumbnail"""
+    processed = image_preprocessor.process(payload['image_url'], [], {'small': (150, 150)})
+    return {
+        'colors': dominant_colors(Image.open(processed['thumbnails']['small']['path'])),
+        'source_digest': processed['source_digest'],
+        'original_size': list(processed['original_size'])
+    }
+
+def dominant_colors(image, count=3):
+    """Median-cut the image to a small palette and name the most common colors"""
+    quantized = image.convert('RGB').quantize(colors=8, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+    total = quantized.width * quantized.height
+    colors = []
+    for pixels, index in sorted(quantized.getcolors(), reverse=True)[:count]:
+        rgb = tuple(palette[index * 3:index * 3 + 3])
+        name = min(NAMED_COLORS, key=lambda color: sum((a - b) ** 2 for a, b in zip(NAMED_COLORS[color], rgb)))
+        colors.append({'color': '#%02x%02x%02x' % rgb, 'name': name, 'percentage': round(pixels / total * 100, 1)})
+    return colors
+
+def optimize_image_item(payload):
+    """Resized, recompressed copy of one image, kept outside the derived image cache"""
+    result = image_optimizer.optimize_image_size(payload['image_path'], tuple(payload['target_size']), payload['quality'])
+    with open(result['output_path'], 'rb') as f:
+        result['output_path'] = save_job_output(f.read(), os.path.splitext(result['output_path'])[1])
+    return result
+
+def organize_item(payload):
+    """Collection suggestions for one wardrobe item"""
+    suggestions = [f"{payload['category']}".lower()]
+    if payload.get('color'):
+        suggestions.append(f"{payload['color']} {payload['category']}".lower())
+    suggestions.extend(f"{season} essentials" for season in payload.get('seasons', []))
+    return {'suggested_collections': suggestions}
+
+def outfit_tile_item(payload):
+    """Thumbnail tile for one outfit piece"""
+    processed = image_preprocessor.process(payload['image_url'], [], {'tile': (300, 300)})
+    return {'tile_path': processed['thumbnails']['tile']['path'], 'slot': payload['slot']}
+
+
+class JobHandler:
+    """
+    How one job type is split into items and finished
+    "We girls have no time" - Every job type, one worker!
+    """
+
+    run_item = None  # Module-level function(payload) -> result dict
+
+    def items(self, job):
+        """[(item key, picklable payload)] for the job"""
+        raise NotImplementedError
+
+    def apply(self, job, key, result):
+        """Write one successful item result to the domain rows (runs in the progress transaction)"""
+
+    def summarize(self, job, results):
+        """Final summary merged into the job results"""
+        return {}
+
+class AnalyzeImagesHandler(JobHandler):
+    run_item = staticmethod(analyze_item_image)
+
+    def items(self, job):
+        items = WardrobeItem.query.filter(WardrobeItem.user_id == job.user_id, WardrobeItem.image_url.isnot(None)).all()
+        return [(str(item.id), {'image_url': item.image_url}) for item in items]
+
+    def apply(self, job, key, result):
+        item = db.session.get(WardrobeItem, int(key))
+        if item is not None:
+            item.cv_colors = json.dumps(result['colors'])
+
+    def summarize(self, job, results):
+        palette = {}
+        for result in results.values():
+            for color in result['colors'][:1]:
+                palette[color['name']] = palette.get(color['name'], 0) + 1
+        return {'dominant_color_counts': palette}
+
+class OptimizeImagesHandler(JobHandler):
+    run_item = staticmethod(optimize_image_item)
+
+    def items(self, job):
+        parameters = json.loads(job.job_parameters or '{}')
+        target_size = parameters.get('target_size', [512, 512])
+        quality = parameters.get('quality', 85)
+        return [(path, {'image_path': path, 'target_size': target_size, 'quality': quality})
+                for path in parameters.get('image_paths', [])]
+
+    def summarize(self, job, results):
+        original = sum(result['original_bytes'] for result in results.values())
+        optimized = sum(result['optimized_bytes'] for result in results.values())
+        return {'original_bytes': original, 'optimized_bytes': optimized,
+                'compression_ratio': round(optimized / original, 4) if original else None}
+
+class OrganizeWardrobeHandler(JobHandler):
+    run_item = staticmethod(organize_item)
+
+    def items(self, job):
+        items = WardrobeItem.query.filter_by(user_id=job.user_id).all()
+        return [(str(item.id), {'category': item.category, 'color': item.color_primary,
+                                'seasons': json.loads(item.season_tags) if item.season_tags else []})
+                for item in items]
+
+    def summarize(self, job, results):
+        collections = {}
+        for key, result in results.items():
+            for name in result['suggested_collections']:
+                collections.setdefault(name, []).append(int(key))
+        return {'suggested_collections': collections}
+
+class OutfitVisualizationHandler(JobHandler):
+    run_item = staticmethod(outfit_tile_item)
+    SLOTS = ('outerwear', 'top', 'dress', 'bottom', 'shoes')
+
+    def items(self, job):
+        composition = db.session.get(OutfitComposition, job.outfit_composition_id) if job.outfit_composition_id else None
+        if composition is None:
+            raise JobFailed('Outfit composition not found')
+        slots = [(slot, getattr(composition, f'{slot}_item_id')) for slot in self.SLOTS]
+        slots += [('accessory', item_id) for item_id in json.loads(composition.accessories or '[]')]
+        items = []
+        for slot, item_id in slots:
+            item = db.session.get(WardrobeItem, item_id) if item_id else None
+            if item is not None and item.image_url:
+                items.append((str(item.id), {'image_url': item.image_url, 'slot': slot}))
+        return items
+
+    def summarize(self, job, results):
+        """Flat-lay collage of the (cached) tiles, saved with its thumbnail as job outputs"""
+        tiles = [Image.open(result['tile_path']) for result in results.values()]
+        if not tiles:
+            return {}
+        columns = min(3, len(tiles))
+        rows = (len(tiles) + columns - 1) // columns
+        collage = Image.new('RGB', (columns * 300, rows * 300), (255, 255, 255))
+        for index, tile in enumerate(tiles):
+            x, y = (index % columns) * 300, (index // columns) * 300
+            collage.paste(tile, (x + (300 - tile.width) // 2, y + (300 - tile.height) // 2))
+
+        buffer = io.BytesIO()
+        collage.save(buffer, 'JPEG', quality=90)
+        path = save_job_output(buffer.getvalue(), '.jpg')
+        thumbnail = save_job_output(image_preprocessor.encode_thumbnail(collage, (300, 300), 85), '.jpg')
+        return {'visualization_path': path, 'thumbnail_path': thumbnail}
+
+
+class BatchJobAdapter:
+    """Progress bookkeeping on BatchProcessingJob rows"""
+
+    kind = 'batch_processing'
+    model = BatchProcessingJob
+    handlers = {
+        'analyze_all_images': AnalyzeImagesHandler(),
+        'optimize_images': OptimizeImagesHandler(),
+        'organize_wardrobe': OrganizeWardrobeHandler()
+    }
+
+    @staticmethod
+    def load_state(job):
+        stored = json.loads(job.results) if job.results else {}
+        logged = json.loads(job.error_log) if job.error_log else []
+        return stored.get('items', {}), {error['item']: error for error in logged if error['item'] is not None}
+
+    @staticmethod
+    def requeue(job):
+        job.status = 'pending'
+
+    @staticmethod
+    def start(job, total):
+        job.status = 'running'
+        job.total_items = total
+        job.started_at = job.started_at or datetime.utcnow()
+
+    @staticmethod
+    def progress(job, results, errors, total, started):
+        processed = len(results) + len(errors)
+        job.processed_items = processed
+        job.successful_items = len(results)
+        job.failed_items = len(errors)
+        job.progress_percentage = round(processed / total * 100, 1) if total else 100.0
+        job.results = json.dumps({'items': results})
+        job.error_log = json.dumps(list(errors.values()))
+        elapsed = time.time() - started
+        if processed and processed < total:
+            job.estimated_completion = datetime.utcnow() + timedelta(seconds=elapsed / processed * (total - processed))
+
+    @staticmethod
+    def finish(job, status, results, summary, error=None):
+        job.status = status
+        job.completed_at = datetime.utcnow()
+        job.results = json.dumps({'items': results, 'summary': summary})
+        if error:
+            errors = json.loads(job.error_log) if job.error_log else []
+            job.error_log = json.dumps(errors + [{'item': None, 'error': error}])
+
+class VisualizationJobAdapter:
+    """Progress bookkeeping on OutfitVisualizationJob rows"""
+
+    kind = 'outfit_visualization'
+    model = OutfitVisualizationJob
+    handlers = {
+        'outfit_visualization': OutfitVisualizationHandler()
+    }
+
+    @staticmethod
+    def load_state(job):
+        return {}, {}  # Tiles are cached on disk, so a retry is cheap
+
+    @staticmethod
+    def requeue(job):
+        job.status = 'pending'
+        job.retry_count = (job.retry_count or 0) + 1
+
+    @staticmethod
+    def start(job, total):
+        job.status = 'processing'
+        job.started_at = job.started_at or datetime.utcnow()
+
+    @staticmethod
+    def progress(job, results, errors, total, started):
+        processed = len(results) + len(errors)
+        job.progress_percentage = round(processed / total * 100, 1) if total else 100.0
+        job.processing_time = time.time() - started
+
+    @staticmethod
+    def finish(job, status, results, summary, error=None):
+        job.status = status
+        job.completed_at = datetime.utcnow()
+        if summary.get('visualization_path'):
+            job.result_urls = json.dumps([summary['visualization_path']])
+            job.thumbnail_urls = json.dumps([summary['thumbnail_path']])
+            if job.outfit_composition is not None:
+                job.outfit_composition.visualization_url = summary['visualization_path']
+                job.outfit_composition.thumbnail_url = summary['thumbnail_path']
+        if error:
+            job.error_message = error
+
+JOB_ADAPTERS = {adapter.kind: adapter for adapter in (BatchJobAdapter, VisualizationJobAdapter)}
+
+
+class InlineFuture:
+    """Completed future for items run without a pool"""
+
+    def __init__(self, func, payload):
+        try:
+            self._result, self._error = func(payload), None
+        except Exception as e:
+            self._result, self._error = None, e
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def cancel(self):
+        return False
+
+class JobWorker:
+    """
+    Claims queued jobs and runs their items in a bounded process pool
+    "We girls have no time" - Background jobs that always finish!
+    """
+
+    def __init__(self, app, processes=None, max_in_flight=None, lease_seconds=60, poll_interval=1.0,
+                 flush_every=25, flush_interval=1.0, retry_base_seconds=5.0):
+        self.app = app
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.max_in_flight = max_in_flight or max(self.processes, 1) * 2
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.retry_base_seconds = retry_base_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.executor = None
+        self.running = False
+        self.stats = {'jobs_completed': 0, 'jobs_failed': 0, 'jobs_retried': 0, 'jobs_cancelled': 0,
+                      'leases_lost': 0, 'items_succeeded': 0, 'items_failed': 0}
+
+    def _submit(self, func, payload):
+        if not self.processes:
+            return InlineFuture(func, payload)
+        if self.executor is None:
+            context = multiprocessing.get_context('forkserver') \
+                if 'forkserver' in multiprocessing.get_all_start_methods() else multiprocessing.get_context()
+            if context.get_start_method() == 'forkserver':
+                context.set_forkserver_preload(['src.job_worker'])
+            self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+        return self.executor.submit(func, payload)
+
+    def run_once(self):
+        """Claim and run one job; False when nothing was due"""
+        with self.app.app_context():
+            JobQueue.enqueue_missing({kind: adapter.model for kind, adapter in JOB_ADAPTERS.items()})
+            entry = JobQueue.claim(self.owner, self.lease_seconds)
+            if entry is None:
+                return False
+            try:
+                self.process(entry)
+            except Exception as e:
+                db.session.rollback()
+                self._retry(entry, f'{type(e).__name__}: {e}')
+            finally:
+                db.session.remove()
+            return True
+
+    def _retry(self, entry, error):
+        owned, _ = JobQueue.renew(entry, self.owner, self.lease_seconds)
+        if not owned:
+            db.session.rollback()
+            self.stats['leases_lost'] += 1
+            return
+        adapter = JOB_ADAPTERS[entry.job_kind]
+        job = db.session.get(adapter.model, entry.job_id)
+        status = JobQueue.retry_or_fail(entry, error, self.retry_base_seconds)
+        if job is not None:
+            if status == 'failed':
+                results, _ = adapter.load_state(job)
+                adapter.finish(job, 'failed', results, {}, error)
+            else:
+                adapter.requeue(job)
+        db.session.commit()
+        self.stats['jobs_failed' if status == 'failed' else 'jobs_retried'] += 1
+
+    def _finish(self, entry, adapter, job, status, results, summary, error=None):
+        adapter.finish(job, status, results, summary, error)
+        JobQueue.finish(entry, status, error)
+        db.session.commit()
+        self.stats[{'completed': 'jobs_completed', 'failed': 'jobs_failed', 'cancelled': 'jobs_cancelled'}[status]] += 1
+
+    def process(self, entry):
+        """
+        Run one claimed job to completion, cancellation or failure
+        "We girls have no time" - Progress saved as we go!
+        """
+        adapter = JOB_ADAPTERS.get(entry.job_kind)
+        job = db.session.get(adapter.model, entry.job_id) if adapter else None
+        if job is None:
+            JobQueue.finish(entry, 'failed', 'Job not found')
+            db.session.commit()
+            return
+        if entry.attempts > entry.max_attempts:
+            # Only reachable through expired leases, i.e. workers dying mid-job
+            results, _ = adapter.load_state(job)
+            return self._finish(entry, adapter, job, 'failed', results, {}, 'Job lease expired too many times')
+
+        handler = adapter.handlers.get(job.job_type)
+        try:
+            if handler is None:
+                raise JobFailed(f'Unsupported job type: {job.job_type}')
+            items = handler.items(job)
+        except JobFailed as e:
+            return self._finish(entry, adapter, job, 'failed', {}, {}, str(e))
+
+        results, errors = adapter.load_state(job)
+        pending = [(key, payload) for key, payload in items if key not in results]
+        total = len(items)
+        started = time.time()
+        adapter.start(job, total)
+        db.session.commit()
+
+        in_flight = {}
+        unflushed = []
+        last_flush = time.time()
+        stop = None  # None, 'cancelled' or 'lease_lost'
+        queue = iter(pending)
+        exhausted = False
+
+        while not stop:
+            while not exhausted and len(in_flight) < self.max_in_flight:
+                item = next(queue, None)
+                if item is None:
+                    exhausted = True
+                    break
+                in_flight[self._submit(handler.run_item, item[1])] = item[0]
+            if not in_flight:
+                break
+
+            if self.processes:
+                done = wait(list(in_flight), timeout=self.flush_interval, return_when=FIRST_COMPLETED).done
+            else:
+                done = list(in_flight)
+            for future in done:
+                key = in_flight.pop(future)
+                try:
+                    unflushed.append((key, future.result(), None))
+                except Exception as e:
+                    unflushed.append((key, None, f'{type(e).__name__}: {e}'))
+
+            # Flushing also renews the lease and picks up cancellation, so it runs on a timer even without results
+            if len(unflushed) >= self.flush_every or time.time() - last_flush >= self.flush_interval:
+                stop = self._flush(entry, adapter, handler, job, unflushed, results, errors, total, started)
+                unflushed = []
+                last_flush = time.time()
+
+        if unflushed and not stop:
+            stop = self._flush(entry, adapter, handler, job, unflushed, results, errors, total, started)
+        for future in in_flight:
+            future.cancel()
+
+        if stop == 'lease_lost':
+            db.session.rollback()
+            self.stats['leases_lost'] += 1
+        elif stop == 'cancelled':
+            self._finish(entry, adapter, job, 'cancelled', results, handler.summarize(job, results))
+        elif total and not results:
+            self._retry(entry, f'All {total} items failed')
+        else:
+            self._finish(entry, adapter, job, 'completed', results, handler.summarize(job, results))
+
+    def _flush(self, entry, adapter, handler, job, completed, results, errors, total, started):
+        """Write a batch of item outcomes plus progress, and renew the lease, in one transaction"""
+        owned, cancel_requested = JobQueue.renew(entry, self.owner, self.lease_seconds)
+        if not owned:
+            return 'lease_lost'
+        for key, result, error in completed:
+            if error is None:
+                results[key] = result
+                errors.pop(key, None)
+                handler.apply(job, key, result)
+                self.stats['items_succeeded'] += 1
+            else:
+                errors[key] = {'item': key, 'error': error, 'attempt': entry.attempts}
+                self.stats['items_failed'] += 1
+        adapter.progress(job, results, errors, total, started)
+        db.session.commit()
+        return 'cancelled' if cancel_requested else None
+
+    def run_forever(self):
+        self.running = True
+        while self.running:
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+        self.shutdown()
+
+    def stop(self, signum=None, frame=None):
+        self.running = False
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def get_stats(self):
+        return dict(self.stats, owner=self.owner, processes=self.processes, max_in_flight=self.max_in_flight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument('--processes', type=int, default=None, help='Item worker processes (0 runs items inline)')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--lease-seconds', type=int, default=60)
+    parser.add_argument('--once', action='store_true', help='Run due jobs, then exit')
+    args = parser.parse_args(argv)
+
+    from src.main import app
+    worker = JobWorker(app, processes=args.processes, lease_seconds=args.lease_seconds, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    if args.once:
+        while worker.run_once():
+            pass
+        worker.shutdown()
+    else:
+        worker.run_forever()
+    print(json.dumps(worker.get_stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,12 @@ from src.routes.user import user_bp
 from src.models.cv_models import WardrobeItem, ImageAnalysis, OutfitVisualization, StyleDetection, VisualSimilarity
 from src.models.wardrobe_management import WardrobeCollection, WardrobeAnalytics, BatchProcessingJob, WardrobeTag, WardrobeMaintenanceLog
 from src.models.outfit_visualization import OutfitComposition, VirtualTryOn, OutfitVisualizationTemplate, OutfitStylingSession, OutfitVisualizationJob
+from src.models.job_queue import JobQueueEntry
+from src.models.item_embeddings import ItemEmbedding, ItemEmbeddingVersion
+from src.models.image_fingerprints import ImageFingerprint
+from src.models.wardrobe_duplicates import DuplicateCluster, DuplicateScan
+from src.models.item_tags import ItemTag
+from src.models.wardrobe_analytics_state import WardrobeAnalyticsState, ItemWearStat
 from src.routes.computer_vision import computer_vision_bp
 from src.routes.wardrobe_management import wardrobe_management_bp
 from src.routes.performance_optimization import performance_optimization_bp
@@ -28,6 +34,7 @@ app.register_blueprint(wardrobe_management_bp, url_prefix='/api/wardrobe')
 app.register_blueprint(performance_optimization_bp, url_prefix='/api/performance')
 
 # Database configuration
+os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
@@ -76,6 +83,8 @@ def service_info():
             'add_to_collection': 'POST /api/wardrobe/collections/<id>/items - Add item to collection',
             'analytics': 'GET /api/wardrobe/analytics - Get wardrobe analytics',
             'batch_jobs': 'GET/POST /api/wardrobe/batch-jobs - Manage batch processing',
+            'batch_job_progress': 'GET /api/wardrobe/batch-jobs/<id> - Batch job progress and partial results',
+            'cancel_batch_job': 'POST /api/wardrobe/batch-jobs/<id>/cancel - Cancel batch job',
             'tags': 'GET/POST /api/wardrobe/tags - Manage wardrobe tags',
             'maintenance': 'POST /api/wardrobe/maintenance-log - Add maintenance log',
             'smart_organize': 'POST /api/wardrobe/smart-organize - AI-powered organization',
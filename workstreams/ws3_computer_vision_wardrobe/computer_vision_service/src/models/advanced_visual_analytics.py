@@ -4,11 +4,10 @@ Advanced Visual Analytics Models for Tanvi Vanity Agent
 "We girls have no time" - Cutting-edge visual intelligence for instant style insights!
 """
 
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 import json
 
-db = SQLAlchemy()
+from src.models.user import db
 
 class AdvancedStyleAnalysis(db.Model):
     """
@@ -4,11 +4,10 @@ Computer Vision Models for Tanvi Vanity Agent
 "We girls have no time" - Instant visual wardrobe intelligence!
 """
 
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
+from src.models.user import db
 
 class WardrobeItem(db.Model):
     """
@@ -101,11 +100,12 @@ class ImageAnalysis(db.Model):
     __tablename__ = 'image_analyses'
     
     id = db.Column(db.Integer, primary_key=True)
-    wardrobe_item_id = db.Column(db.Integer, db.ForeignKey('wardrobe_items.id'), nullable=False)
+    wardrobe_item_id = db.Column(db.Integer, db.ForeignKey('wardrobe_items.id'))  # Set when the item is created
+    user_id = db.Column(db.Integer, index=True)  # Who uploaded the image; analyses are only reused for them
     
     # Image processing metadata
     image_url = db.Column(db.String(500), nullable=False)
-    image_hash = db.Column(db.String(64), nullable=False, index=True)
+    image_hash = db.Column(db.String(64), nullable=False, index=True)  # BLAKE2b of the image bytes
     image_size = db.Column(db.String(20))  # "1024x768"
     file_size = db.Column(db.Integer)  # bytes
     
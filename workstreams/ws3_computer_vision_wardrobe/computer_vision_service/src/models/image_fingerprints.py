@@ -0,0 +1,224 @@
+"""
+WS3-P5: Performance Optimization & Image Processing
+Image Fingerprints & Near-Duplicate Lookup for Tanvi Vanity Agent
+"We girls have no time" - The same photo is never analyzed twice!
+
+Exact duplicates are found by the BLAKE2b digest of the image bytes (stored
+in ImageAnalysis.image_hash). Near duplicates (re-encoded, resized or lightly
+edited copies) are found by 64-bit perceptual hashes kept in the
+image_fingerprints table:
+- dHash (gradient signs on a 9x8 thumbnail) is the lookup key, indexed in an
+  in-memory BK-tree so a Hamming-radius search only visits nearby nodes;
+- pHash (signs of the low DCT frequencies of a 32x32 thumbnail) confirms a
+  candidate, which filters out dHash collisions;
+- both hashes are grayscale, so a colour signature (mean RGB of each quarter
+  of the image) must also agree: the same shirt in another colour is a
+  different item, not a re-upload.
+
+Lookups only consider the requesting user's images.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from src.models.user import db
+from src.models.cv_models import ImageAnalysis
+
+HASH_BITS = 64
+
+class ImageFingerprint(db.Model):
+    """
+    Perceptual hashes of an analyzed image
+    "We girls have no time" - Recognize a photo at a glance!
+    """
+    __tablename__ = 'image_fingerprints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    image_analysis_id = db.Column(db.Integer, db.ForeignKey('image_analyses.id'), nullable=False, unique=True)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)  # BLAKE2b of the image bytes
+    dhash = db.Column(db.BigInteger, nullable=False)  # 64-bit hashes stored as signed integers
+    phash = db.Column(db.BigInteger, nullable=False)
+    color_signature = db.Column(db.LargeBinary(12), nullable=False)  # Mean RGB of the 2x2 quarters, 0-255
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash to the signed range SQLite integers hold"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+def to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+def hamming(first, second):
+    return (first ^ second).bit_count()
+
+def _bits_to_int(bits):
+    return int(np.packbits(bits.astype(np.uint8).ravel()).view('>u8')[0])
+
+def _dct_matrix(size):
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+DCT_32 = _dct_matrix(32)
+
+def dhash(image):
+    """64-bit difference hash: is each pixel brighter than its left neighbour (9x8 grayscale)"""
+    pixels = np.asarray(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def phash(image):
+    """64-bit DCT hash: low 8x8 frequencies of a 32x32 grayscale thumbnail against their median"""
+    pixels = np.asarray(image.convert('L').resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+    low = (DCT_32 @ pixels @ DCT_32.T)[:8, :8]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))  # The DC term would skew the median
+
+def color_signature(image):
+    """12-byte colour signature: mean RGB of each quarter of the image"""
+    pixels = np.asarray(image.convert('RGB').resize((2, 2), Image.Resampling.BOX), dtype=np.uint8)
+    return pixels.tobytes()
+
+def color_distance(first, second):
+    """Largest per-channel difference between two colour signatures (0-255)"""
+    return int(np.abs(np.frombuffer(first, dtype=np.uint8).astype(np.int16)
+                      - np.frombuffer(second, dtype=np.uint8).astype(np.int16)).max())
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance
+    "We girls have no time" - Near matches without comparing every hash!
+
+    Each node keeps children keyed by their distance to it; by the triangle
+    inequality a radius-r search only descends into children whose key is
+    within r of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, [values], {distance: child}]
+        self.size = 0
+
+    def add(self, key, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [key, [value], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [value], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """[(distance, value)] for every stored hash within radius, nearest first"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= radius:
+                found.extend((distance, value) for value in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class NearDuplicateIndex:
+    """
+    In-memory BK-trees over stored fingerprints, one per user
+    "We girls have no time" - Seen this photo before? Instant answer!
+
+    New fingerprint rows (from any process) are picked up incrementally on
+    each lookup by reading rows past the highest id already indexed.
+    """
+
+    def __init__(self, max_distance=6, phash_max_distance=12, color_max_distance=24):
+        self.max_distance = max_distance
+        self.phash_max_distance = phash_max_distance
+        self.color_max_distance = color_max_distance
+        self.trees = {}  # user_id -> BKTree
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+        self.lookup_count = 0
+        self.match_count = 0
+        self.rejected_count = 0
+        self.color_rejected_count = 0
+        self.lookup_time = 0.0
+
+    def refresh(self):
+        """Index fingerprint rows added since the last refresh"""
+        with self.lock:
+            rows = db.session.query(ImageFingerprint.id, ImageAnalysis.user_id, ImageFingerprint.image_analysis_id,
+                                    ImageFingerprint.dhash, ImageFingerprint.phash,
+                                    ImageFingerprint.color_signature).join(
+                ImageAnalysis, ImageAnalysis.id == ImageFingerprint.image_analysis_id
+            ).filter(
+                ImageFingerprint.id > self.last_id
+            ).order_by(ImageFingerprint.id).all()
+            for fingerprint_id, user_id, analysis_id, stored_dhash, stored_phash, signature in rows:
+                tree = self.trees.setdefault(user_id, BKTree())
+                tree.add(to_unsigned(stored_dhash), (analysis_id, to_unsigned(stored_phash), signature))
+                self.last_id = fingerprint_id
+        return len(rows)
+
+    def find(self, user_id, image_dhash, image_phash, image_colors):
+        """
+        Closest of the user's stored images within the dHash radius whose pHash and colours also agree
+        Returns (analysis_id, dhash distance) or None.
+        """
+        start_time = time.time()
+        self.refresh()
+        self.lookup_count += 1
+        with self.lock:
+            tree = self.trees.get(user_id)
+            candidates = tree.search(image_dhash, self.max_distance) if tree else []
+        match = None
+        for distance, (analysis_id, stored_phash, signature) in candidates:
+            if hamming(image_phash, stored_phash) > self.phash_max_distance:
+                self.rejected_count += 1
+            elif color_distance(image_colors, signature) > self.color_max_distance:
+                self.color_rejected_count += 1
+            else:
+                match = (analysis_id, distance)
+                break
+        if match:
+            self.match_count += 1
+        self.lookup_time += time.time() - start_time
+        return match
+
+    def reset(self):
+        with self.lock:
+            self.trees = {}
+            self.last_id = 0
+
+    def get_stats(self):
+        return {
+            'fingerprints_indexed': sum(tree.size for tree in self.trees.values()),
+            'users_indexed': len(self.trees),
+            'lookup_count': self.lookup_count,
+            'match_count': self.match_count,
+            'phash_rejections': self.rejected_count,
+            'color_rejections': self.color_rejected_count,
+            'average_lookup_ms': self.lookup_time / self.lookup_count * 1000 if self.lookup_count else 0.0,
+            'max_distance': self.max_distance,
+            'phash_max_distance': self.phash_max_distance,
+            'color_max_distance': self.color_max_distance
+        }
+
+# Global near-duplicate index
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,377 @@
+"""
+WS3-P5: Performance Optimization & Image Processing
+Wardrobe Item Embeddings & Similarity Index for Tanvi Vanity Agent
+"We girls have no time" - Similar items in one matrix product!
+
+Every wardrobe item gets a fixed-length float32 feature vector, written
+alongside the item whenever it is inserted or its visual attributes change.
+The vector is made of three blocks: a color histogram, a one-hot category and
+the CV style tags. Each block is L2-normalized and scaled by the square root
+of its weight, so the dot product of two vectors is the weighted sum of
+per-block cosine similarities (1.0 for identical items).
+
+Names get their position in a block from a persisted vocabulary (one slot per
+distinct value, assigned on first use), so two different values never share a
+position and never score as a match.
+
+The similarity index keeps one NumPy matrix per user in memory. Top-K is a
+single matrix-vector product. Large wardrobes add random-projection LSH
+buckets so only candidate rows are scored. Every vector write or delete bumps
+the user's version row in the same transaction, and a user's matrix is
+rebuilt when that version moves, so changes from any process are seen by the
+next lookup at the cost of one primary-key read.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import json
+
+import numpy as np
+from sqlalchemy import delete, event, exists, func, inspect, insert, select, update
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+
+class ItemEmbedding(db.Model):
+    """
+    Float32 feature vector of one wardrobe item
+    "We girls have no time" - Features computed once, compared forever!
+    """
+    __tablename__ = 'item_embeddings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    wardrobe_item_id = db.Column(db.Integer, db.ForeignKey('wardrobe_items.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32, ItemFeatureEncoder.DIMENSIONS values
+    encoder_version = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ItemEmbeddingVersion(db.Model):
+    """
+    Change counter of one user's item embeddings
+    "We girls have no time" - One read to know if anything changed!
+    """
+    __tablename__ = 'item_embedding_versions'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class FeatureVocabulary(db.Model):
+    """
+    Vector position of one color, category or style name
+    "We girls have no time" - Every name gets its own slot!
+    """
+    __tablename__ = 'item_feature_vocabulary'
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'value', name='uq_item_feature_vocabulary_value'),
+        db.UniqueConstraint('kind', 'slot', name='uq_item_feature_vocabulary_slot'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # Block name: color, category or style
+    value = db.Column(db.String(100), nullable=False)  # Stripped and lowercased
+    slot = db.Column(db.Integer, nullable=False)
+
+class ItemFeatureEncoder:
+    """
+    Fixed-length feature vectors for wardrobe items
+    "We girls have no time" - Every item, same shape!
+
+    Free-text names (colors, categories, style tags) take the next free slot
+    of their block in the FeatureVocabulary the first time they are seen.
+    Blocks have room for far more names than the catalog uses; once a block
+    is full, further new names are left out of the vector (they match
+    nothing) rather than sharing a slot.
+    """
+
+    VERSION = 2
+    BLOCKS = (('color', 128, 0.3), ('category', 128, 0.4), ('style', 128, 0.3))  # name, slots, weight
+    DIMENSIONS = sum(slots for _, slots, _ in BLOCKS)
+    FEATURE_FIELDS = ('user_id', 'category', 'color_primary', 'color_secondary', 'cv_colors', 'cv_style_tags')
+
+    @staticmethod
+    def slot(connection, kind, value, slots):
+        """The value's slot in its block, assigned on first use (None once the block is full)"""
+        value = str(value).strip().lower()
+        vocabulary = FeatureVocabulary.__table__.c
+        slot = connection.execute(select(vocabulary.slot).where(vocabulary.kind == kind, vocabulary.value == value)).scalar()
+        if slot is None:
+            slot = connection.execute(select(func.count()).where(vocabulary.kind == kind)).scalar()
+            if slot >= slots:
+                return None
+            connection.execute(insert(FeatureVocabulary).values(kind=kind, value=value, slot=slot))
+        return slot
+
+    @staticmethod
+    def color_weights(item):
+        """(color name, weight) pairs: primary and secondary colors plus detected colors by coverage"""
+        weights = []
+        if item.color_primary:
+            weights.append((item.color_primary, 1.0))
+        if item.color_secondary:
+            weights.append((item.color_secondary, 0.5))
+        detected = json.loads(item.cv_colors) if item.cv_colors else []
+        for color in detected:
+            if isinstance(color, dict):
+                weights.append((color.get('name') or color.get('color', ''), color.get('percentage', 0) / 100))
+            elif color:
+                weights.append((color, 0.5 / len(detected)))
+        return weights
+
+    @classmethod
+    def encode(cls, item, connection):
+        """Feature vector of one item (float32, unit length unless the item has no features)"""
+        features = {
+            'color': cls.color_weights(item),
+            'category': [(item.category, 1.0)] if item.category else [],
+            'style': [(tag, 1.0) for tag in (json.loads(item.cv_style_tags) if item.cv_style_tags else []) if tag]
+        }
+        blocks = []
+        for name, buckets, weight in cls.BLOCKS:
+            block = np.zeros(buckets, dtype=np.float32)
+            for value, value_weight in features[name]:
+                slot = cls.slot(connection, name, value, buckets) if value and str(value).strip() else None
+                if slot is not None:
+                    block[slot] += value_weight
+            norm = np.linalg.norm(block)
+            blocks.append(block * (np.sqrt(weight) / norm) if norm else block)
+        return np.concatenate(blocks).astype(np.float32)
+
+    @staticmethod
+    def to_blob(vector):
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def from_blob(blob):
+        return np.frombuffer(blob, dtype=np.float32)
+
+
+def _bump_version(connection, user_id):
+    bumped = connection.execute(update(ItemEmbeddingVersion).where(ItemEmbeddingVersion.user_id == user_id)
+                                .values(version=ItemEmbeddingVersion.version + 1))
+    if not bumped.rowcount:
+        connection.execute(insert(ItemEmbeddingVersion).values(user_id=user_id, version=1))
+
+def _write_embedding(connection, item):
+    vector = ItemFeatureEncoder.encode(item, connection)
+    connection.execute(delete(ItemEmbedding).where(ItemEmbedding.wardrobe_item_id == item.id))
+    connection.execute(insert(ItemEmbedding).values(
+        wardrobe_item_id=item.id, user_id=item.user_id, vector=ItemFeatureEncoder.to_blob(vector),
+        encoder_version=ItemFeatureEncoder.VERSION, updated_at=datetime.utcnow()
+    ))
+    _bump_version(connection, item.user_id)
+
+@event.listens_for(WardrobeItem, 'after_insert')
+def _embed_new_item(mapper, connection, target):
+    _write_embedding(connection, target)
+
+@event.listens_for(WardrobeItem, 'after_update')
+def _embed_updated_item(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in ItemFeatureEncoder.FEATURE_FIELDS):
+        _write_embedding(connection, target)
+        for previous_owner in state.attrs['user_id'].history.deleted:
+            _bump_version(connection, previous_owner)
+
+@event.listens_for(WardrobeItem, 'before_delete')
+def _drop_item_embedding(mapper, connection, target):
+    connection.execute(delete(ItemEmbedding).where(ItemEmbedding.wardrobe_item_id == target.id))
+    _bump_version(connection, target.user_id)
+
+
+class RandomProjectionLSH:
+    """
+    Random-hyperplane LSH over the rows of a matrix
+    "We girls have no time" - Only score the items that could match!
+
+    Each table hashes a vector to the sign pattern of `bits` random
+    projections; rows sharing a bucket with the query in any table are the
+    candidates. Buckets are kept as sorted code arrays and found with
+    searchsorted.
+    """
+
+    def __init__(self, dimensions, tables=10, bits=10, seed=0):
+        self.planes = np.random.default_rng(seed).standard_normal((tables, bits, dimensions)).astype(np.float32)
+        self.powers = 1 << np.arange(bits, dtype=np.int64)
+        self.sorted_codes = []
+        self.sorted_rows = []
+
+    def codes(self, matrix):
+        """(tables, rows) bucket codes"""
+        signs = np.einsum('tbd,nd->tnb', self.planes, np.atleast_2d(matrix)) > 0
+        return signs.astype(np.int64) @ self.powers
+
+    def build(self, matrix):
+        self.sorted_codes, self.sorted_rows = [], []
+        for table_codes in self.codes(matrix):
+            order = np.argsort(table_codes, kind='stable')
+            self.sorted_codes.append(table_codes[order])
+            self.sorted_rows.append(order)
+        return self
+
+    def candidates(self, vector):
+        """Rows sharing at least one bucket with the vector"""
+        found = []
+        for table, code in enumerate(self.codes(vector)[:, 0]):
+            codes = self.sorted_codes[table]
+            start, end = np.searchsorted(codes, code, 'left'), np.searchsorted(codes, code, 'right')
+            found.append(self.sorted_rows[table][start:end])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+
+class UserVectors:
+    """One user's embedding matrix, row lookup and optional LSH buckets"""
+
+    __slots__ = ('signature', 'ids', 'matrix', 'rows', 'lsh')
+
+    def __init__(self, signature, ids, matrix, lsh=None):
+        self.signature = signature
+        self.ids = ids
+        self.matrix = matrix
+        self.rows = {item_id: row for row, item_id in enumerate(ids.tolist())}
+        self.lsh = lsh
+
+class SimilarityIndex:
+    """
+    Per-user in-memory embedding matrices for similar-item lookups
+    "We girls have no time" - Top-K similar items without a Python loop!
+    """
+
+    def __init__(self, max_users=256, lsh_min_items=5000, lsh_tables=10, lsh_bits=10):
+        self.max_users = max_users
+        self.lsh_min_items = lsh_min_items
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.users = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.load_count = 0
+        self.backfill_count = 0
+        self.query_count = 0
+        self.lsh_query_count = 0
+        self.last_load_duration = 0.0
+
+    @staticmethod
+    def signature(user_id):
+        """Changes whenever one of the user's vectors is written or deleted"""
+        return db.session.query(ItemEmbeddingVersion.version).filter_by(user_id=user_id).scalar()
+
+    def backfill(self, user_id):
+        """Encode items stored before embeddings existed, or with an older encoder version"""
+        missing = WardrobeItem.query.filter(
+            WardrobeItem.user_id == user_id,
+            ~exists().where(ItemEmbedding.wardrobe_item_id == WardrobeItem.id,
+                            ItemEmbedding.encoder_version == ItemFeatureEncoder.VERSION)
+        ).all()
+        if missing:
+            connection = db.session.connection()
+            for item in missing:
+                _write_embedding(connection, item)
+            db.session.commit()
+            self.backfill_count += len(missing)
+        return len(missing)
+
+    def load(self, user_id, signature=None):
+        """Build the user's matrix from stored vectors"""
+        start_time = time.time()
+        rows = db.session.query(ItemEmbedding.wardrobe_item_id, ItemEmbedding.vector).filter(
+            ItemEmbedding.user_id == user_id, ItemEmbedding.encoder_version == ItemFeatureEncoder.VERSION
+        ).order_by(ItemEmbedding.wardrobe_item_id).all()
+        ids = np.fromiter((item_id for item_id, _ in rows), dtype=np.int64, count=len(rows))
+        matrix = np.frombuffer(b''.join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), ItemFeatureEncoder.DIMENSIONS)
+
+        lsh = None
+        if len(rows) >= self.lsh_min_items:
+            lsh = RandomProjectionLSH(ItemFeatureEncoder.DIMENSIONS, self.lsh_tables, self.lsh_bits).build(matrix)
+        vectors = UserVectors(self.signature(user_id) if signature is None else signature, ids, matrix, lsh)
+
+        self.load_count += 1
+        self.last_load_duration = time.time() - start_time
+        return vectors
+
+    def vectors(self, user_id):
+        """Current matrix for a user, rebuilt when the stored vectors changed"""
+        vectors = self.users.get(user_id)
+        if vectors is None:
+            self.backfill(user_id)
+        signature = self.signature(user_id)
+        if vectors is None or vectors.signature != signature:
+            with self.lock:
+                vectors = self.users.get(user_id)
+                if vectors is None or vectors.signature != signature:
+                    vectors = self.load(user_id, signature)
+                    self.users[user_id] = vectors
+                    while len(self.users) > self.max_users:
+                        self.users.popitem(last=False)
+        with self.lock:
+            if user_id in self.users:
+                self.users.move_to_end(user_id)
+        return vectors
+
+    def invalidate(self, user_id=None):
+        """Drop one user's matrix (or all of them); the next lookup reloads it"""
+        with self.lock:
+            if user_id is None:
+                self.users.clear()
+            else:
+                self.users.pop(user_id, None)
+
+    def most_similar(self, user_id, item_id, k=10, threshold=0.3, use_lsh=None):
+        """
+        Top-K items most similar to one of the user's items
+        Returns ([(item_id, score)], number of items above the threshold, method).
+        """
+        vectors = self.vectors(user_id)
+        row = vectors.rows.get(item_id)
+        if row is None:
+            return [], 0, 'exact'
+        self.query_count += 1
+
+        query = vectors.matrix[row]
+        method = 'exact'
+        candidates = None
+        if vectors.lsh is not None and use_lsh is not False:
+            candidates = vectors.lsh.candidates(query)
+            candidates = candidates[candidates != row]
+            if len(candidates) >= k:
+                method = 'lsh'
+                self.lsh_query_count += 1
+            else:
+                candidates = None  # Too few neighbours in the buckets: scan everything
+
+        if candidates is None:
+            scores = vectors.matrix @ query
+            scores[row] = -np.inf
+            candidates = np.arange(len(scores))
+        else:
+            scores = vectors.matrix[candidates] @ query
+
+        # Rounded so equal scores tie exactly; ties go to the older item
+        scores = np.round(scores, 4)
+        above = np.flatnonzero(scores > threshold)
+        if len(above) > k:
+            kth = np.partition(scores[above], len(above) - k)[len(above) - k]
+            above = above[scores[above] >= kth]
+        above_ids = vectors.ids[candidates[above]]
+        order = np.lexsort((above_ids, -scores[above]))[:k]
+        matches = [(int(above_ids[position]), float(scores[above[position]])) for position in order]
+        return matches, int(np.count_nonzero(scores > threshold)), method
+
+    def get_stats(self):
+        return {
+            'users_loaded': len(self.users),
+            'items_loaded': sum(len(vectors.ids) for vectors in self.users.values()),
+            'lsh_users': sum(1 for vectors in self.users.values() if vectors.lsh is not None),
+            'dimensions': ItemFeatureEncoder.DIMENSIONS,
+            'load_count': self.load_count,
+            'backfill_count': self.backfill_count,
+            'query_count': self.query_count,
+            'lsh_query_count': self.lsh_query_count,
+            'last_load_duration': self.last_load_duration,
+            'lsh_min_items': self.lsh_min_items
+        }
+
+# Global similarity index
+similarity_index = SimilarityIndex()
@@ -0,0 +1,116 @@
+"""
+WS3-P2: Wardrobe Management & Visual Cataloging
+Normalized Item Tag Index for Tanvi Vanity Agent
+"We girls have no time" - Tag filters straight from an index!
+
+Style, occasion and season tags live on WardrobeItem as JSON text, which can
+only be filtered with LIKE '%tag%': a full scan that also matches substrings
+('casual' finds 'smart casual'). Every tag is therefore mirrored as one
+(user_id, kind, value, item_id) row in item_tags, written in the same flush
+as the item, and searches intersect indexed lookups per filter.
+
+Values are stripped and lowercased, matching the case-insensitive LIKE the
+search used before.
+"""
+
+import json
+
+from sqlalchemy import delete, event, inspect, insert
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+
+# Tag kind -> WardrobeItem JSON column it mirrors
+TAG_FIELDS = {
+    'style': 'cv_style_tags',
+    'occasion': 'occasion_tags',
+    'season': 'season_tags'
+}
+
+class ItemTag(db.Model):
+    """
+    One tag of one wardrobe item
+    "We girls have no time" - Every tag, one indexed row!
+    """
+    __tablename__ = 'item_tags'
+    __table_args__ = (
+        # Searches read (user, kind, value) -> item ids from this index alone
+        db.Index('ix_item_tags_lookup', 'user_id', 'kind', 'value', 'item_id'),
+        db.UniqueConstraint('item_id', 'kind', 'value', name='uq_item_tags_item_kind_value'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('wardrobe_items.id'), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    value = db.Column(db.String(100), nullable=False)
+
+
+def normalize_tag(value):
+    return str(value).strip().lower()
+
+def item_tag_rows(item):
+    """Normalized, de-duplicated tag rows for an item"""
+    rows = []
+    for kind, field in TAG_FIELDS.items():
+        raw = getattr(item, field)
+        try:
+            values = json.loads(raw) if raw else []
+        except (TypeError, ValueError):
+            values = []
+        if not isinstance(values, list):
+            values = [values]
+        for value in dict.fromkeys(normalize_tag(value) for value in values if value not in (None, '')):
+            rows.append({'item_id': item.id, 'user_id': item.user_id, 'kind': kind, 'value': value})
+    return rows
+
+def _write_tags(connection, item):
+    connection.execute(delete(ItemTag).where(ItemTag.item_id == item.id))
+    rows = item_tag_rows(item)
+    if rows:
+        connection.execute(insert(ItemTag), rows)
+
+@event.listens_for(WardrobeItem, 'after_insert')
+def _tag_new_item(mapper, connection, target):
+    _write_tags(connection, target)
+
+@event.listens_for(WardrobeItem, 'after_update')
+def _tag_updated_item(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in ('user_id',) + tuple(TAG_FIELDS.values())):
+        _write_tags(connection, target)
+
+@event.listens_for(WardrobeItem, 'before_delete')
+def _drop_item_tags(mapper, connection, target):
+    connection.execute(delete(ItemTag).where(ItemTag.item_id == target.id))
+
+
+def tagged_item_ids(user_id, kind, value):
+    """Subquery of the user's item ids carrying a tag (served by ix_item_tags_lookup)"""
+    return db.select(ItemTag.item_id).where(
+        ItemTag.user_id == user_id, ItemTag.kind == kind, ItemTag.value == normalize_tag(value)
+    )
+
+def filter_by_tags(query, user_id, **tags):
+    """Restrict a WardrobeItem query to items carrying every given tag (kind=value)"""
+    for kind, value in tags.items():
+        if value:
+            query = query.filter(WardrobeItem.id.in_(tagged_item_ids(user_id, kind, value)))
+    return query
+
+def backfill_item_tags(batch_size=500):
+    """Rebuild the tag rows of every existing item; returns the number of items indexed"""
+    connection = db.session.connection()
+    indexed = 0
+    last_id = 0
+    while True:
+        items = WardrobeItem.query.filter(WardrobeItem.id > last_id).order_by(WardrobeItem.id).limit(batch_size).all()
+        if not items:
+            break
+        for item in items:
+            _write_tags(connection, item)
+        indexed += len(items)
+        last_id = items[-1].id
+        db.session.commit()
+        connection = db.session.connection()
+    return indexed
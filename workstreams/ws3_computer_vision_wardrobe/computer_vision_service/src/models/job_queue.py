@@ -0,0 +1,191 @@
+"""
+WS3-P5: Performance Optimization & Image Processing
+Durable Job Queue for Tanvi Vanity Agent
+"We girls have no time" - Heavy work queued, requests answered!
+
+One queue row per BatchProcessingJob / OutfitVisualizationJob. Workers claim
+rows with a single conditional UPDATE (pending and due, or running with an
+expired lease), so two workers can never run the same job, and a crashed
+worker's job is picked up again once its lease runs out.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from src.models.user import db
+
+class JobQueueEntry(db.Model):
+    """
+    Queue state and lease for one background job
+    "We girls have no time" - Every job claimed exactly once!
+    """
+    __tablename__ = 'job_queue'
+    __table_args__ = (
+        db.UniqueConstraint('job_kind', 'job_id', name='uq_job_queue_job'),
+        db.Index('ix_job_queue_claim', 'status', 'run_after'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_kind = db.Column(db.String(50), nullable=False)  # batch_processing, outfit_visualization
+    job_id = db.Column(db.Integer, nullable=False)
+
+    # Queue status
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed, cancelled
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    last_error = db.Column(db.Text)
+
+    # Lease held by the worker running the job
+    lease_owner = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+
+    # Metadata
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'cancel_requested': self.cancel_requested,
+            'last_error': self.last_error,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None
+        }
+
+class JobQueue:
+    """
+    Queue operations over JobQueueEntry rows
+    "We girls have no time" - Claim, heartbeat, retry, done!
+    """
+
+    FINISHED = ('completed', 'failed', 'cancelled')
+
+    @staticmethod
+    def enqueue(job_kind, job_id, max_attempts=3):
+        """Queue a job in the current transaction"""
+        entry = JobQueueEntry(job_kind=job_kind, job_id=job_id, max_attempts=max_attempts)
+        db.session.add(entry)
+        return entry
+
+    @staticmethod
+    def enqueue_missing(job_models):
+        """Queue pending jobs that were inserted without a queue row (e.g. before the queue existed)"""
+        queued = 0
+        for job_kind, model in job_models.items():
+            missing = select(model.id).where(
+                model.status == 'pending',
+                ~select(JobQueueEntry.id).where(JobQueueEntry.job_kind == job_kind,
+                                                JobQueueEntry.job_id == model.id).exists()
+            )
+            for job_id in db.session.execute(missing).scalars():
+                JobQueue.enqueue(job_kind, job_id)
+                queued += 1
+        if queued:
+            db.session.commit()
+        return queued
+
+    @staticmethod
+    def _claimable(now):
+        return or_(
+            and_(JobQueueEntry.status == 'pending', JobQueueEntry.run_after <= now),
+            and_(JobQueueEntry.status == 'running', JobQueueEntry.lease_expires_at < now)
+        )
+
+    @staticmethod
+    def claim(owner, lease_seconds=60, now=None):
+        """
+        Atomically claim the next due job, or return None
+        "We girls have no time" - First come, first served, never twice!
+        """
+        now = now or datetime.utcnow()
+        claimable = JobQueue._claimable(now)
+        candidate = select(JobQueueEntry.id).where(claimable).order_by(
+            JobQueueEntry.run_after, JobQueueEntry.id
+        ).limit(1).scalar_subquery()
+
+        # The claimable condition is re-checked by the UPDATE itself, so a racing worker matches no row
+        claimed = db.session.execute(
+            update(JobQueueEntry)
+            .where(JobQueueEntry.id == candidate, claimable)
+            .values(status='running', lease_owner=owner, lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=JobQueueEntry.attempts + 1, updated_at=now)
+            .returning(JobQueueEntry.id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        db.session.commit()
+        return db.session.get(JobQueueEntry, claimed, populate_existing=True) if claimed else None
+
+    @staticmethod
+    def renew(entry, owner, lease_seconds=60, now=None):
+        """
+        Extend the lease; False when it was lost to another worker
+        Call within the progress transaction and commit with it.
+        """
+        now = now or datetime.utcnow()
+        renewed = db.session.execute(
+            update(JobQueueEntry)
+            .where(JobQueueEntry.id == entry.id, JobQueueEntry.lease_owner == owner,
+                   JobQueueEntry.status == 'running')
+            .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+            .returning(JobQueueEntry.cancel_requested)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if renewed is None:
+            return False, False
+        return True, renewed.cancel_requested
+
+    @staticmethod
+    def finish(entry, status, error=None):
+        """Mark a claimed job completed, failed or cancelled (caller commits)"""
+        entry.status = status
+        entry.lease_owner = None
+        entry.lease_expires_at = None
+        if error:
+            entry.last_error = error
+
+    @staticmethod
+    def retry_delay(attempts, base_seconds=5.0, max_seconds=300.0):
+        """Exponential backoff after the given number of attempts"""
+        return min(max_seconds, base_seconds * 2 ** max(attempts - 1, 0))
+
+    @staticmethod
+    def retry_or_fail(entry, error, base_seconds=5.0, now=None):
+        """Requeue with backoff, or fail once attempts are used up; returns the new status (caller commits)"""
+        now = now or datetime.utcnow()
+        if entry.attempts >= entry.max_attempts:
+            JobQueue.finish(entry, 'failed', error)
+            return 'failed'
+        JobQueue.finish(entry, 'pending', error)
+        entry.run_after = now + timedelta(seconds=JobQueue.retry_delay(entry.attempts, base_seconds))
+        return 'pending'
+
+    @staticmethod
+    def get(job_kind, job_id):
+        return JobQueueEntry.query.filter_by(job_kind=job_kind, job_id=job_id).first()
+
+    @staticmethod
+    def request_cancel(job_kind, job_id):
+        """
+        Cancel a job: pending jobs stop now, running ones at their next progress flush
+        Returns the queue entry, or None if the job was never queued (caller commits).
+        """
+        entry = JobQueue.get(job_kind, job_id)
+        if entry is None or entry.status in JobQueue.FINISHED:
+            return entry
+        entry.cancel_requested = True
+        if entry.status == 'pending':
+            JobQueue.finish(entry, 'cancelled')
+        return entry
+
+    @staticmethod
+    def get_stats():
+        counts = dict(db.session.query(JobQueueEntry.status, db.func.count(JobQueueEntry.id))
+                      .group_by(JobQueueEntry.status).all())
+        return {status: counts.get(status, 0) for status in ('pending', 'running', 'completed', 'failed', 'cancelled')}
@@ -4,11 +4,10 @@ Outfit Visualization Models for Tanvi Vanity Agent
 "We girls have no time" - Instant outfit visualization and virtual try-on!
 """
 
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 import json
 
-db = SQLAlchemy()
+from src.models.user import db
 
 class OutfitComposition(db.Model):
     """
@@ -0,0 +1,299 @@
+"""
+WS3-P2: Wardrobe Management & Visual Cataloging
+Incrementally Maintained Wardrobe Analytics for Tanvi Vanity Agent
+"We girls have no time" - Analytics that are already up to date!
+
+Instead of recomputing WardrobeAnalytics from every item on request, each
+user keeps:
+- a counters row (items, worn items, total wears, and per category, color,
+  brand, style tag and season counts);
+- one item_wear_stats row per item, indexed by (user, wear count), so most
+  and least worn, unworn and underutilized items are index range reads;
+- the duplicate clusters of wardrobe_duplicates;
+- a single live WardrobeAnalytics row (period_type 'live') derived from the
+  above, which is all the analytics GET reads.
+
+Item inserts, updates (including wear counts) and deletes record their
+before/after contribution during the flush; the changes are applied right
+after the flush, in the same transaction, at a cost independent of wardrobe
+size. The live row (whose id lists and duplicate pairs do grow with the
+wardrobe) is not rewritten then: the counters row is marked dirty and the
+next analytics read re-derives the live row once, however many writes came
+before it. Users are only maintained once they have been fully built
+(`rebuild_wardrobe_analytics`), which is also the fallback when the counters
+are missing or found inconsistent.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.wardrobe_management import WardrobeAnalytics
+from src.models.wardrobe_duplicates import duplicate_detector
+
+ESSENTIAL_CATEGORIES = ['tops', 'bottoms', 'dresses', 'outerwear', 'shoes']
+LIVE_PERIOD = 'live'
+
+# Item columns the analytics depend on
+ANALYTICS_FIELDS = ('user_id', 'category', 'color_primary', 'brand', 'cv_style_tags', 'season_tags', 'wear_count')
+COUNTER_DIMENSIONS = ('category', 'color', 'brand', 'style', 'season')
+
+class WardrobeAnalyticsState(db.Model):
+    """
+    Running analytics counters of one user
+    "We girls have no time" - Counted as we go!
+    """
+    __tablename__ = 'wardrobe_analytics_state'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    counters = db.Column(db.Text, nullable=False)  # JSON: totals plus one {value: count} map per dimension
+    rebuilt_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    materialized_at = db.Column(db.DateTime)  # updated_at the live row was derived from; differs while dirty
+
+class ItemWearStat(db.Model):
+    """
+    Wear count of one item, ordered per user
+    "We girls have no time" - Most worn without sorting everything!
+    """
+    __tablename__ = 'item_wear_stats'
+    __table_args__ = (db.Index('ix_item_wear_stats_user_wear', 'user_id', 'wear_count', 'item_id'),)
+
+    item_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    wear_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _json_list(raw):
+    try:
+        values = json.loads(raw) if raw else []
+    except (TypeError, ValueError):
+        return []
+    return values if isinstance(values, list) else []
+
+def empty_counters():
+    return dict({'items': 0, 'worn': 0, 'wears': 0}, **{dimension: {} for dimension in COUNTER_DIMENSIONS})
+
+def add_contribution(counters, values, sign=1):
+    """Add (or with sign=-1 remove) one item's values to the counters"""
+    wear_count = values['wear_count'] or 0
+    counters['items'] += sign
+    counters['worn'] += sign * (wear_count > 0)
+    counters['wears'] += sign * wear_count
+    keys = {
+        'category': [values['category']],
+        'color': [values['color_primary']],
+        'brand': [values['brand']] if values['brand'] else [],
+        'style': _json_list(values['cv_style_tags']),
+        'season': _json_list(values['season_tags'])
+    }
+    for dimension, dimension_keys in keys.items():
+        counts = counters[dimension]
+        for key in dimension_keys:
+            key = str(key)
+            counts[key] = counts.get(key, 0) + sign
+            if not counts[key]:
+                del counts[key]
+    return counters
+
+def _item_values(connection, item_id):
+    row = connection.execute(select(*(getattr(WardrobeItem, field) for field in ANALYTICS_FIELDS))
+                             .where(WardrobeItem.id == item_id)).first()
+    return dict(zip(ANALYTICS_FIELDS, row)) if row else None
+
+
+# Flush events: record changes per user, apply them once the flush has run
+
+def _pending(session, user_id):
+    pending = session.info.setdefault('wardrobe_analytics_pending', {})
+    return pending.setdefault(user_id, {'removed': [], 'added': [], 'wear': {}, 'moves': []})
+
+def _record_removal(session, item_id, values):
+    user_pending = _pending(session, values['user_id'])
+    user_pending['removed'].append(values)
+    user_pending['wear'][item_id] = None
+    user_pending['moves'].append((item_id, (values['category'], values['color_primary']), None))
+
+def _record_addition(session, item_id, values):
+    user_pending = _pending(session, values['user_id'])
+    user_pending['added'].append(values)
+    user_pending['wear'][item_id] = values['wear_count'] or 0
+    user_pending['moves'].append((item_id, None, (values['category'], values['color_primary'])))
+
+def _analytics_fields_changed(target):
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in ANALYTICS_FIELDS)
+
+@event.listens_for(WardrobeItem, 'after_insert')
+def _count_new_item(mapper, connection, target):
+    _record_addition(inspect(target).session, target.id, _item_values(connection, target.id))
+
+@event.listens_for(WardrobeItem, 'before_update')
+def _uncount_previous_values(mapper, connection, target):
+    if _analytics_fields_changed(target):
+        previous = _item_values(connection, target.id)
+        if previous:
+            _record_removal(inspect(target).session, target.id, previous)
+            inspect(target).session.info.setdefault('wardrobe_analytics_updating', set()).add(target.id)
+
+@event.listens_for(WardrobeItem, 'after_update')
+def _count_updated_values(mapper, connection, target):
+    session = inspect(target).session
+    if target.id in session.info.get('wardrobe_analytics_updating', ()):
+        session.info['wardrobe_analytics_updating'].discard(target.id)
+        _record_addition(session, target.id, _item_values(connection, target.id))
+
+@event.listens_for(WardrobeItem, 'before_delete')
+def _uncount_deleted_item(mapper, connection, target):
+    previous = _item_values(connection, target.id)
+    if previous:
+        _record_removal(inspect(target).session, target.id, previous)
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _apply_pending_changes(session, flush_context):
+    pending = session.info.pop('wardrobe_analytics_pending', None)
+    if not pending:
+        return
+    connection = session.connection()
+    for user_id, changes in pending.items():
+        stored = connection.execute(select(WardrobeAnalyticsState.counters)
+                                    .where(WardrobeAnalyticsState.user_id == user_id)).scalar()
+        if stored is None:
+            continue  # Not built yet: the first analytics request builds it from the items
+        counters = json.loads(stored)
+        for values in changes['removed']:
+            add_contribution(counters, values, -1)
+        for values in changes['added']:
+            add_contribution(counters, values)
+        # Also marks the live row dirty: it is re-derived on the next read, not on every write
+        connection.execute(update(WardrobeAnalyticsState).where(WardrobeAnalyticsState.user_id == user_id)
+                           .values(counters=json.dumps(counters), updated_at=datetime.utcnow()))
+
+        for item_id, wear_count in changes['wear'].items():
+            connection.execute(delete(ItemWearStat).where(ItemWearStat.item_id == item_id))
+            if wear_count is not None:
+                connection.execute(insert(ItemWearStat).values(item_id=item_id, user_id=user_id, wear_count=wear_count))
+        duplicate_detector.apply_moves(connection, user_id, changes['moves'])
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_changes(session, previous_transaction):
+    session.info.pop('wardrobe_analytics_pending', None)
+    session.info.pop('wardrobe_analytics_updating', None)
+
+
+# Live analytics row
+
+def _wear_ids(connection, user_id, condition, order_by, limit=None):
+    query = select(ItemWearStat.item_id).where(ItemWearStat.user_id == user_id, condition).order_by(*order_by)
+    if limit:
+        query = query.limit(limit)
+    return list(connection.execute(query).scalars())
+
+def live_analytics_values(connection, user_id, counters):
+    """WardrobeAnalytics column values from the counters, wear index and duplicate clusters"""
+    total_items = counters['items']
+    categories = counters['category']
+    styles = counters['style']
+    style_count = sum(styles.values())
+    average_wear = counters['wears'] / total_items if total_items > 0 else 0
+    wear = ItemWearStat.wear_count
+
+    return {
+        'analysis_date': datetime.utcnow().date(),
+        'total_items': total_items,
+        'category_breakdown': json.dumps(categories),
+        'color_breakdown': json.dumps(counters['color']),
+        'brand_breakdown': json.dumps(counters['brand']),
+        'most_worn_items': json.dumps(_wear_ids(connection, user_id, wear > 0, (wear.desc(), ItemWearStat.item_id), 5)),
+        'least_worn_items': json.dumps(_wear_ids(connection, user_id, wear > 0, (wear, ItemWearStat.item_id), 5)),
+        'unworn_items': json.dumps(_wear_ids(connection, user_id, wear == 0, (ItemWearStat.item_id,))),
+        'average_wear_frequency': average_wear,
+        'style_distribution': json.dumps(styles),
+        'formality_distribution': json.dumps({}),
+        'seasonal_distribution': json.dumps(counters['season']),
+        'versatility_score': min(100, (len(categories) / max(1, total_items)) * 100),
+        'completeness_score': min(100, len(categories) * 10),
+        'efficiency_score': (counters['worn'] / max(1, total_items)) * 100,
+        'style_coherence_score': max(styles.values()) / max(1, style_count) * 100 if styles else 0,
+        'wardrobe_gaps': json.dumps([category for category in ESSENTIAL_CATEGORIES if category not in categories]),
+        'duplicate_items': json.dumps(duplicate_detector.stored_pairs(connection, user_id)),
+        'underutilized_items': json.dumps(
+            _wear_ids(connection, user_id, wear < average_wear * 0.5, (ItemWearStat.item_id,)))
+    }
+
+def write_live_analytics(connection, user_id, counters):
+    values = live_analytics_values(connection, user_id, counters)
+    live = (WardrobeAnalytics.user_id == user_id) & (WardrobeAnalytics.period_type == LIVE_PERIOD)
+    if not connection.execute(update(WardrobeAnalytics).where(live).values(values)).rowcount:
+        connection.execute(insert(WardrobeAnalytics).values(dict(values, user_id=user_id, period_type=LIVE_PERIOD,
+                                                                 created_at=datetime.utcnow())))
+
+def current_live_values(connection, user_id):
+    """What the live row holds once up to date, derived without writing anything (None if never built)"""
+    counters = connection.execute(select(WardrobeAnalyticsState.counters)
+                                  .where(WardrobeAnalyticsState.user_id == user_id)).scalar()
+    return live_analytics_values(connection, user_id, json.loads(counters)) if counters is not None else None
+
+def refresh_live_analytics(connection, user_id):
+    """Re-derive the live row from the counters and mark it clean"""
+    counters, updated_at = connection.execute(select(WardrobeAnalyticsState.counters, WardrobeAnalyticsState.updated_at)
+                                              .where(WardrobeAnalyticsState.user_id == user_id)).first()
+    write_live_analytics(connection, user_id, json.loads(counters))
+    connection.execute(update(WardrobeAnalyticsState).where(WardrobeAnalyticsState.user_id == user_id)
+                       .values(materialized_at=updated_at))
+
+def _live_row(user_id):
+    # The row is written with Core statements, so never trust a copy already in the session
+    return db.session.execute(
+        select(WardrobeAnalytics, WardrobeAnalyticsState.updated_at, WardrobeAnalyticsState.materialized_at)
+        .outerjoin(WardrobeAnalyticsState, WardrobeAnalyticsState.user_id == WardrobeAnalytics.user_id)
+        .where(WardrobeAnalytics.user_id == user_id, WardrobeAnalytics.period_type == LIVE_PERIOD)
+        .execution_options(populate_existing=True)
+    ).first()
+
+def live_wardrobe_analytics(user_id):
+    """
+    The user's live analytics row (one indexed read while clean), or None if it was never built
+    A dirty row is re-derived first, in the caller's transaction: commit afterwards.
+    """
+    row = _live_row(user_id)
+    if row is None:
+        return None
+    analytics, updated_at, materialized_at = row
+    if updated_at is not None and materialized_at != updated_at:
+        refresh_live_analytics(db.session.connection(), user_id)
+        analytics = _live_row(user_id)[0]
+    return analytics
+
+
+# Full rebuild
+
+def rebuild_wardrobe_analytics(user_id):
+    """
+    Rebuild counters, wear index, duplicate clusters and the live row from every item
+    "We girls have no time" - Start fresh when in doubt!
+    Runs in the caller's transaction; returns the live WardrobeAnalytics row.
+    """
+    loaded_at = datetime.utcnow()
+    items = WardrobeItem.query.filter_by(user_id=user_id).all()
+    counters = empty_counters()
+    for item in items:
+        add_contribution(counters, {field: getattr(item, field) for field in ANALYTICS_FIELDS})
+    duplicate_detector.update(user_id, items, loaded_at)
+    db.session.flush()
+
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    connection.execute(delete(WardrobeAnalyticsState).where(WardrobeAnalyticsState.user_id == user_id))
+    connection.execute(insert(WardrobeAnalyticsState).values(
+        user_id=user_id, counters=json.dumps(counters), rebuilt_at=now, updated_at=now, materialized_at=now))
+    connection.execute(delete(ItemWearStat).where(ItemWearStat.user_id == user_id))
+    if items:
+        connection.execute(insert(ItemWearStat), [{'item_id': item.id, 'user_id': user_id,
+                                                   'wear_count': item.wear_count or 0} for item in items])
+    write_live_analytics(connection, user_id, counters)
+    return live_wardrobe_analytics(user_id)
@@ -0,0 +1,166 @@
+"""
+WS3-P2: Wardrobe Management & Visual Cataloging
+Persistent Duplicate Clusters for Tanvi Vanity Agent
+"We girls have no time" - Spot the third black blazer without comparing everything!
+
+Two items are potential duplicates when they share a category and a primary
+color. Instead of checking every pair, items are grouped into blocks keyed by
+(category, primary color): every pair inside a block is a duplicate and no
+pair across blocks is, so the blocks are exactly the duplicate clusters and
+building them is linear in wardrobe size.
+
+Blocks are stored per user together with the time of the last scan. A later
+scan only moves items created or updated since then (plus removes deleted
+ones), so unchanged items are never re-evaluated. Users whose analytics are
+maintained incrementally also get their items moved as they are written
+(`apply_moves`).
+"""
+
+import json
+from datetime import datetime
+from itertools import combinations
+
+from sqlalchemy import delete, insert, select, tuple_, update
+
+from src.models.user import db
+
+class DuplicateCluster(db.Model):
+    """
+    Items of one user sharing a category and primary color
+    "We girls have no time" - Lookalikes, grouped and remembered!
+    """
+    __tablename__ = 'wardrobe_duplicate_clusters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    category = db.Column(db.String(50))
+    color_primary = db.Column(db.String(50))
+    item_ids = db.Column(db.Text, nullable=False)  # JSON list of item ids, ascending
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def members(self):
+        return json.loads(self.item_ids)
+
+class DuplicateScan(db.Model):
+    """
+    When a user's duplicate clusters were last brought up to date
+    "We girls have no time" - Only look at what changed!
+    """
+    __tablename__ = 'wardrobe_duplicate_scans'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    scanned_at = db.Column(db.DateTime, nullable=False)
+    items_scanned = db.Column(db.Integer, nullable=False, default=0)  # Items re-evaluated by the last scan
+
+class DuplicateDetector:
+    """
+    Incremental duplicate clustering by (category, primary color) blocks
+    "We girls have no time" - Linear time, same answer!
+    """
+
+    @staticmethod
+    def block_key(item):
+        return item.category, item.color_primary
+
+    def update(self, user_id, items, loaded_at=None):
+        """
+        Bring the stored clusters up to date with the user's current items
+        `loaded_at` is when `items` were read (so later edits are seen by the next scan).
+        Runs in the caller's transaction; returns the clusters with two or more items.
+        """
+        scan_started = loaded_at or datetime.utcnow()
+        scan = db.session.get(DuplicateScan, user_id)
+        clusters = {(cluster.category, cluster.color_primary): cluster
+                    for cluster in DuplicateCluster.query.filter_by(user_id=user_id)}
+        members = {key: set(cluster.members()) for key, cluster in clusters.items()}
+        block_of = {item_id: key for key, item_ids in members.items() for item_id in item_ids}
+
+        current = {item.id: item for item in items}
+        changed = [item for item in items
+                   if scan is None or item.id not in block_of or (item.updated_at or scan_started) >= scan.scanned_at]
+        touched = set()
+        for item_id in block_of.keys() - current.keys():
+            members[block_of[item_id]].discard(item_id)
+            touched.add(block_of[item_id])
+        for item in changed:
+            key = self.block_key(item)
+            old_key = block_of.get(item.id)
+            if old_key == key:
+                continue
+            if old_key is not None:
+                members[old_key].discard(item.id)
+                touched.add(old_key)
+            members.setdefault(key, set()).add(item.id)
+            touched.add(key)
+
+        for key in touched:
+            cluster = clusters.get(key)
+            if not members[key]:
+                if cluster is not None:
+                    db.session.delete(cluster)
+                    del clusters[key]
+                continue
+            if cluster is None:
+                cluster = clusters[key] = DuplicateCluster(user_id=user_id, category=key[0], color_primary=key[1])
+                db.session.add(cluster)
+            cluster.item_ids = json.dumps(sorted(members[key]))
+
+        if scan is None:
+            scan = DuplicateScan(user_id=user_id)
+            db.session.add(scan)
+        scan.scanned_at = scan_started
+        scan.items_scanned = len(changed)
+        return [sorted(members[key]) for key in clusters if len(members[key]) > 1]
+
+    def apply_moves(self, connection, user_id, moves):
+        """
+        Move items between stored blocks with Core statements (usable inside a flush)
+        `moves` are (item id, old block key or None, new block key or None).
+        """
+        if not moves:
+            return
+        # Only the blocks the moves touch are read, so the cost doesn't grow with the rest of the wardrobe
+        keys = {key for _, old_key, new_key in moves for key in (old_key, new_key) if key is not None}
+        rows = connection.execute(select(DuplicateCluster.id, DuplicateCluster.category, DuplicateCluster.color_primary,
+                                         DuplicateCluster.item_ids)
+                                  .where(DuplicateCluster.user_id == user_id,
+                                         tuple_(DuplicateCluster.category, DuplicateCluster.color_primary).in_(keys))).all()
+        cluster_ids = {(category, color): cluster_id for cluster_id, category, color, _ in rows}
+        members = {(category, color): set(json.loads(item_ids)) for _, category, color, item_ids in rows}
+        touched = set()
+        for item_id, old_key, new_key in moves:
+            if old_key is not None and item_id in members.get(old_key, ()):
+                members[old_key].discard(item_id)
+                touched.add(old_key)
+            if new_key is not None:
+                members.setdefault(new_key, set()).add(item_id)
+                touched.add(new_key)
+
+        now = datetime.utcnow()
+        for key in touched:
+            cluster_id = cluster_ids.get(key)
+            if not members[key]:
+                if cluster_id is not None:
+                    connection.execute(delete(DuplicateCluster).where(DuplicateCluster.id == cluster_id))
+            elif cluster_id is None:
+                connection.execute(insert(DuplicateCluster).values(user_id=user_id, category=key[0], color_primary=key[1],
+                                                                   item_ids=json.dumps(sorted(members[key])), updated_at=now))
+            else:
+                connection.execute(update(DuplicateCluster).where(DuplicateCluster.id == cluster_id)
+                                   .values(item_ids=json.dumps(sorted(members[key]))))
+
+    def pairs_from_items(self, items):
+        """Duplicate pairs computed from the items alone, without reading or writing stored clusters"""
+        blocks = {}
+        for item in items:
+            blocks.setdefault(self.block_key(item), []).append(item.id)
+        return sorted([first, second] for item_ids in blocks.values() for first, second in combinations(sorted(item_ids), 2))
+
+    @staticmethod
+    def stored_pairs(connection, user_id):
+        """Duplicate pairs of the stored clusters, without looking at the items"""
+        clusters = connection.execute(select(DuplicateCluster.item_ids).where(DuplicateCluster.user_id == user_id)).scalars()
+        return sorted([first, second] for item_ids in clusters for first, second in combinations(json.loads(item_ids), 2))
+
+# Global duplicate detector
+duplicate_detector = DuplicateDetector()
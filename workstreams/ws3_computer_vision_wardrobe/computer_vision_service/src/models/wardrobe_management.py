@@ -4,11 +4,10 @@ Enhanced Wardrobe Management Models for Tanvi Vanity Agent
 "We girls have no time" - Smart wardrobe organization in seconds!
 """
 
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 import json
 
-db = SQLAlchemy()
+from src.models.user import db
 
 class WardrobeCollection(db.Model):
     """
@@ -6,6 +6,11 @@ Computer Vision API Routes for Tanvi Vanity Agent
 
 from flask import Blueprint, request, jsonify
 from src.models.cv_models import db, WardrobeItem, ImageAnalysis, OutfitVisualization, StyleDetection, VisualSimilarity
+from src.models.item_embeddings import ItemFeatureEncoder, similarity_index
+from src.models.item_tags import filter_by_tags
+from src.models.image_fingerprints import ImageFingerprint, color_signature, dhash, phash, near_duplicate_index, to_signed
+from src.utils.image_processing_optimization import ImageSourceError, image_preprocessor, performance_monitor
+from src.utils.analyzer_fanout import analyzer_fanout
 import json
 import hashlib
 import time
@@ -14,8 +19,11 @@ import requests
 
 computer_vision_bp = Blueprint('computer_vision', __name__)
 
-# Mock computer vision analysis functions
-def analyze_image_colors(image_url):
+SIMILARITY_THRESHOLD = 0.3
+ANALYZER_TIMEOUT_SECONDS = 2.0
+
+# Mock computer vision analysis functions (each receives the image decoded once at analysis resolution)
+def analyze_image_colors(image):
     """
     Mock color analysis function
     "We girls have no time" - Instant color detection!
@@ -28,7 +36,7 @@ def analyze_image_colors(image_url):
     ]
     return mock_colors
 
-def analyze_image_patterns(image_url):
+def analyze_image_patterns(image):
     """
     Mock pattern analysis function
     "We girls have no time" - Instant pattern recognition!
@@ -39,7 +47,7 @@ def analyze_image_patterns(image_url):
     ]
     return mock_patterns
 
-def analyze_image_materials(image_url):
+def analyze_image_materials(image):
     """
     Mock material analysis function
     "We girls have no time" - Instant material detection!
@@ -50,7 +58,7 @@ def analyze_image_materials(image_url):
     ]
     return mock_materials
 
-def analyze_image_category(image_url):
+def analyze_image_category(image):
     """
     Mock category analysis function
     "We girls have no time" - Instant category detection!
@@ -62,7 +70,7 @@ def analyze_image_category(image_url):
     ]
     return mock_categories
 
-def analyze_image_style(image_url):
+def analyze_image_style(image):
     """
     Mock style analysis function
     "We girls have no time" - Instant style detection!
@@ -74,6 +82,42 @@ def analyze_image_style(image_url):
     ]
     return mock_styles
 
+def run_cv_analyzers(image):
+    """
+    Run every analyzer concurrently on one decoded image
+    "We girls have no time" - Five analyzers in the time of one!
+    """
+    analyzers = {
+        'colors': analyze_image_colors,
+        'patterns': analyze_image_patterns,
+        'materials': analyze_image_materials,
+        'categories': analyze_image_category,
+        'styles': analyze_image_style
+    }
+    return analyzer_fanout.run(analyzers, image, {name: ANALYZER_TIMEOUT_SECONDS for name in analyzers})
+
+def is_degraded(analysis):
+    """True for analyses stored with analyzers missing (timed out or failed)"""
+    return bool(analysis.quality_assessment and json.loads(analysis.quality_assessment).get('degraded'))
+
+def image_fingerprint(image_url):
+    """
+    Content hash, 64-bit dHash/pHash, colour signature and the analysis-resolution decode of an image
+    "We girls have no time" - Know the photo before analyzing it!
+    Raises ImageSourceError for sources that may not be read, and the read or decode error otherwise.
+    """
+    data = image_preprocessor.load_source(image_url)
+    image, meta = image_preprocessor.analysis_image(data)
+    return {
+        'content_hash': image_preprocessor.cache.source_digest(data),
+        'dhash': dhash(image),
+        'phash': phash(image),
+        'color_signature': color_signature(image),
+        'image_size': f"{meta['width']}x{meta['height']}",
+        'file_size': len(data),
+        'image': image
+    }
+
 def get_user_from_token(request):
     """
     Extract user ID from JWT token (integration with WS1)
@@ -233,29 +277,51 @@ def analyze_item():
     try:
         start_time = time.time()
         
-        # Generate image hash for deduplication
-        image_hash = hashlib.md5(image_url.encode()).hexdigest()
-        
-        # Check if analysis already exists
-        existing_analysis = ImageAnalysis.query.filter_by(image_hash=image_hash).first()
+        # Hash the image bytes: the same photo under another name is still the same photo
+        try:
+            fingerprint = image_fingerprint(image_url)
+        except ImageSourceError as e:
+            return jsonify({'error': f'Image not allowed: {str(e)}'}), 400
+        except Exception as e:
+            performance_monitor.record_dedupe('unhashable')
+            return jsonify({'error': f'Image could not be read: {str(e)}'}), 422
+        image_hash = fingerprint['content_hash']
+        
+        # Check if this user already has an analysis (exact bytes, then perceptual near-duplicates)
+        existing_analysis = ImageAnalysis.query.filter_by(image_hash=image_hash, user_id=user_id).first()
+        degraded_analysis = None
+        if existing_analysis and is_degraded(existing_analysis):
+            degraded_analysis, existing_analysis = existing_analysis, None  # Analyze again and complete it
+        dedupe = {'match': 'exact'} if existing_analysis else None
+        if not existing_analysis and not degraded_analysis:
+            near_match = near_duplicate_index.find(user_id, fingerprint['dhash'], fingerprint['phash'],
+                                                   fingerprint['color_signature'])
+            if near_match:
+                existing_analysis = db.session.get(ImageAnalysis, near_match[0])
+                dedupe = {'match': 'near_duplicate', 'hamming_distance': near_match[1]}
         if existing_analysis:
+            performance_monitor.record_dedupe(dedupe['match'])
             return jsonify({
                 'message': 'Analysis already exists for this image',
                 'analysis': existing_analysis.to_dict(),
-                'processing_time': 0.1,
-                'cached': True
+                'processing_time': time.time() - start_time,
+                'cached': True,
+                'dedupe': dedupe
             })
+        performance_monitor.record_dedupe('miss')
         
-        # Perform computer vision analysis
-        colors = analyze_image_colors(image_url)
-        patterns = analyze_image_patterns(image_url)
-        materials = analyze_image_materials(image_url)
-        categories = analyze_image_category(image_url)
-        styles = analyze_image_style(image_url)
+        # Perform computer vision analysis: all analyzers at once on the decoded image
+        analysis_run = run_cv_analyzers(fingerprint['image'])
+        results = analysis_run['results']
+        colors = results['colors'] or []
+        patterns = results['patterns'] or []
+        materials = results['materials'] or []
+        categories = results['categories'] or []
+        styles = results['styles'] or []
         
         processing_time = time.time() - start_time
         
-        # Calculate overall confidence
+        # Calculate overall confidence (analyzers that failed count as zero)
         confidence_scores = [
             max([c['confidence'] for c in colors]) if colors else 0,
             max([p['confidence'] for p in patterns]) if patterns else 0,
@@ -265,28 +331,39 @@ def analyze_item():
         ]
         overall_confidence = sum(confidence_scores) / len(confidence_scores)
         
-        # Create analysis record
-        analysis = ImageAnalysis(
+        # Create (or complete) the analysis record in a single commit
+        analysis = degraded_analysis or ImageAnalysis(
             wardrobe_item_id=None,  # Will be set when item is created
+            user_id=user_id,
             image_url=image_url,
-            image_hash=image_hash,
-            image_size=data.get('image_size', 'unknown'),
-            file_size=data.get('file_size', 0),
-            processing_time=processing_time,
-            confidence_score=overall_confidence,
-            dominant_colors=json.dumps(colors),
-            color_palette=json.dumps(colors),
-            patterns_detected=json.dumps(patterns),
-            textures_detected=json.dumps([]),
-            category_predictions=json.dumps(categories),
-            style_predictions=json.dumps(styles),
-            material_predictions=json.dumps(materials),
-            silhouette_analysis=json.dumps({}),
-            fit_analysis=json.dumps({}),
-            quality_assessment=json.dumps({})
+            image_hash=image_hash
+        )
+        analysis.image_size = fingerprint['image_size']
+        analysis.file_size = fingerprint['file_size']
+        analysis.processing_time = processing_time
+        analysis.confidence_score = overall_confidence
+        analysis.dominant_colors = json.dumps(colors)
+        analysis.color_palette = json.dumps(colors)
+        analysis.patterns_detected = json.dumps(patterns)
+        analysis.textures_detected = json.dumps([])
+        analysis.category_predictions = json.dumps(categories)
+        analysis.style_predictions = json.dumps(styles)
+        analysis.material_predictions = json.dumps(materials)
+        analysis.silhouette_analysis = json.dumps({})
+        analysis.fit_analysis = json.dumps({})
+        analysis.quality_assessment = json.dumps(
+            {'degraded': True, 'analyzer_status': analysis_run['status']} if analysis_run['degraded'] else {}
         )
         
         db.session.add(analysis)
+        if not analysis_run['degraded']:
+            # Only complete analyses are served to near-duplicates
+            db.session.flush()
+            db.session.add(ImageFingerprint(
+                image_analysis_id=analysis.id, content_hash=fingerprint['content_hash'],
+                dhash=to_signed(fingerprint['dhash']), phash=to_signed(fingerprint['phash']),
+                color_signature=fingerprint['color_signature']
+            ))
         db.session.commit()
         
         return jsonify({
@@ -300,10 +377,16 @@ def analyze_item():
                 'style_tags': [s['style'] for s in styles[:3]] if styles else [],
                 'confidence_level': 'high' if overall_confidence > 0.8 else 'medium' if overall_confidence > 0.6 else 'low'
             },
+            'degraded': analysis_run['degraded'],
+            'analyzers': {
+                name: {'status': status, 'time': analysis_run['timings'].get(name)}
+                for name, status in analysis_run['status'].items()
+            },
             'tagline': 'We girls have no time - Analysis completed in seconds!'
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
 @computer_vision_bp.route('/wardrobe/add-item', methods=['POST'])
@@ -338,14 +421,17 @@ def add_wardrobe_item():
             season_tags=json.dumps(data.get('season_tags', []))
         )
         
-        # If image provided, perform CV analysis
+        # If image provided, perform CV analysis (skipped when the image can't be read)
+        cv_analysis_performed = False
         if data.get('image_url'):
             try:
-                colors = analyze_image_colors(data['image_url'])
-                patterns = analyze_image_patterns(data['image_url'])
-                materials = analyze_image_materials(data['image_url'])
-                categories = analyze_image_category(data['image_url'])
-                styles = analyze_image_style(data['image_url'])
+                fingerprint = image_fingerprint(data['image_url'])
+                results = run_cv_analyzers(fingerprint['image'])['results']
+                colors = results['colors'] or []
+                patterns = results['patterns'] or []
+                materials = results['materials'] or []
+                categories = results['categories'] or []
+                styles = results['styles'] or []
                 
                 # Update item with CV analysis
                 item.cv_confidence = max([c['confidence'] for c in categories]) if categories else 0.5
@@ -354,6 +440,7 @@ def add_wardrobe_item():
                 item.cv_patterns = json.dumps([p['pattern'] for p in patterns])
                 item.cv_materials = json.dumps([m['material'] for m in materials])
                 item.cv_style_tags = json.dumps([s['style'] for s in styles])
+                cv_analysis_performed = True
                 
             except Exception as cv_error:
                 print(f"CV analysis failed: {cv_error}")
@@ -365,7 +452,7 @@ def add_wardrobe_item():
         return jsonify({
             'message': 'Item added to wardrobe successfully',
             'item': item.to_dict(),
-            'cv_analysis_performed': bool(data.get('image_url')),
+            'cv_analysis_performed': cv_analysis_performed,
             'tagline': 'We girls have no time - Item cataloged instantly!'
         })
         
@@ -398,8 +485,7 @@ def get_wardrobe():
             query = query.filter(WardrobeItem.category == category)
         if color:
             query = query.filter(WardrobeItem.color_primary == color)
-        if season:
-            query = query.filter(WardrobeItem.season_tags.contains(season))
+        query = filter_by_tags(query, user_id, season=season)
         
         # Paginate results
         items = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -463,6 +549,10 @@ def get_wardrobe_item(item_id):
     except Exception as e:
         return jsonify({'error': f'Failed to get item: {str(e)}'}), 500
 
+def _color_names(item):
+    """Every color name the similarity vector counts for an item"""
+    return {str(name).strip().lower() for name, _ in ItemFeatureEncoder.color_weights(item) if name and str(name).strip()}
+
 @computer_vision_bp.route('/wardrobe/items/<int:item_id>/similar', methods=['GET'])
 def find_similar_items(item_id):
     """
@@ -479,48 +569,37 @@ def find_similar_items(item_id):
         if not reference_item:
             return jsonify({'error': 'Item not found'}), 404
         
-        # Find similar items (mock similarity calculation)
+        # Top-K by embedding similarity: one matrix-vector product over the user's items
+        matches, total_similar, method = similarity_index.most_similar(
+            user_id, item_id, k=10, threshold=SIMILARITY_THRESHOLD
+        )
+        items = {item.id: item for item in WardrobeItem.query.filter(WardrobeItem.id.in_([match_id for match_id, _ in matches]))}
+        
+        ref_styles = set(json.loads(reference_item.cv_style_tags) if reference_item.cv_style_tags else [])
+        ref_colors = _color_names(reference_item)
         similar_items = []
-        all_items = WardrobeItem.query.filter_by(user_id=user_id).filter(WardrobeItem.id != item_id).all()
-        
-        for item in all_items:
-            # Mock similarity calculation
-            similarity_score = 0.0
-            
-            # Color similarity
-            if item.color_primary == reference_item.color_primary:
-                similarity_score += 0.3
-            
-            # Category similarity
-            if item.category == reference_item.category:
-                similarity_score += 0.4
-            
-            # Style similarity (from CV analysis)
-            ref_styles = json.loads(reference_item.cv_style_tags) if reference_item.cv_style_tags else []
-            item_styles = json.loads(item.cv_style_tags) if item.cv_style_tags else []
-            common_styles = set(ref_styles) & set(item_styles)
-            if common_styles:
-                similarity_score += 0.3 * (len(common_styles) / max(len(ref_styles), len(item_styles)))
-            
-            if similarity_score > 0.3:  # Threshold for similarity
-                similar_items.append({
-                    'item': item.to_dict(),
-                    'similarity_score': similarity_score,
-                    'similarity_reasons': [
-                        'Same color' if item.color_primary == reference_item.color_primary else None,
-                        'Same category' if item.category == reference_item.category else None,
-                        f'Common styles: {list(common_styles)}' if common_styles else None
-                    ]
-                })
-        
-        # Sort by similarity score
-        similar_items.sort(key=lambda x: x['similarity_score'], reverse=True)
+        for match_id, similarity_score in matches:
+            item = items[match_id]
+            common_styles = ref_styles & set(json.loads(item.cv_style_tags) if item.cv_style_tags else [])
+            common_colors = ref_colors & _color_names(item)
+            reasons = [
+                'Same color' if item.color_primary == reference_item.color_primary else None,
+                f'Shared colors: {sorted(common_colors)}' if item.color_primary != reference_item.color_primary and common_colors else None,
+                'Same category' if item.category == reference_item.category else None,
+                f'Common styles: {sorted(common_styles)}' if common_styles else None
+            ]
+            similar_items.append({
+                'item': item.to_dict(),
+                'similarity_score': similarity_score,
+                'similarity_reasons': [reason for reason in reasons if reason]
+            })
         
         return jsonify({
             'reference_item': reference_item.to_dict(),
-            'similar_items': similar_items[:10],  # Top 10 similar items
-            'total_similar': len(similar_items),
-            'similarity_threshold': 0.3,
+            'similar_items': similar_items,  # Top 10 similar items
+            'total_similar': total_similar,
+            'similarity_threshold': SIMILARITY_THRESHOLD,
+            'search_method': method,
             'tagline': 'We girls have no time - Similar items found instantly!'
         })
         
@@ -563,16 +642,11 @@ def search_wardrobe():
             query = query.filter(WardrobeItem.category == category)
         if color:
             query = query.filter(WardrobeItem.color_primary == color)
-        if occasion:
-            query = query.filter(WardrobeItem.occasion_tags.contains(occasion))
-        if season:
-            query = query.filter(WardrobeItem.season_tags.contains(season))
         if favorites_only:
             query = query.filter(WardrobeItem.favorite == True)
         
-        # Style filter (from CV analysis)
-        if style:
-            query = query.filter(WardrobeItem.cv_style_tags.contains(style))
+        # Tag filters (style from CV analysis): exact tags from the item_tags index
+        query = filter_by_tags(query, user_id, style=style, occasion=occasion, season=season)
         
         items = query.all()
         
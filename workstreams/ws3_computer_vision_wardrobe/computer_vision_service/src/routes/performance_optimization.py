@@ -6,14 +6,20 @@ Performance Optimization API Routes for Tanvi Vanity Agent
 
 from flask import Blueprint, request, jsonify
 from src.utils.image_processing_optimization import (
-    image_cache, image_optimizer, performance_monitor, optimize_image_processing
+    ImageSourceError, image_cache, image_optimizer, image_preprocessor, performance_monitor, optimize_image_processing
 )
+from src.models.item_embeddings import similarity_index
+from src.models.image_fingerprints import near_duplicate_index
+from src.utils.analyzer_fanout import analyzer_fanout
 import time
 import json
 from datetime import datetime
 
 performance_optimization_bp = Blueprint('performance_optimization', __name__)
 
+# JPEG quality per optimization level
+OPTIMIZATION_LEVEL_QUALITY = {'aggressive': 70, 'standard': 85, 'conservative': 95}
+
 def get_user_from_token(request):
     """Extract user ID from JWT token (integration with WS1)"""
     auth_header = request.headers.get('Authorization')
@@ -35,8 +41,15 @@ def get_cache_stats():
                            'good' if cache_stats['hit_ratio'] > 0.6 else \
                            'fair' if cache_stats['hit_ratio'] > 0.4 else 'poor'
         
+        # Decoded analysis tensors and thumbnails cached on disk by content hash
+        preprocessing_stats = image_preprocessor.get_stats()
+        
         return jsonify({
             'cache_statistics': cache_stats,
+            'preprocessing_statistics': preprocessing_stats,
+            'similarity_index_statistics': similarity_index.get_stats(),
+            'near_duplicate_statistics': near_duplicate_index.get_stats(),
+            'analyzer_fanout_statistics': analyzer_fanout.get_stats(),
             'cache_efficiency': {
                 'rating': efficiency_rating,
                 'memory_usage': f"{cache_stats['cache_size']}/{cache_stats['max_size']} entries",
@@ -133,22 +146,16 @@ def optimize_image():
         
         start_time = time.time()
         
+        # Optimization level picks the JPEG quality of the optimized image
+        quality = OPTIMIZATION_LEVEL_QUALITY.get(optimization_level, OPTIMIZATION_LEVEL_QUALITY['standard'])
+        
         # Perform image optimization
         optimization_result = image_optimizer.optimize_image_size(
             image_path, 
-            tuple(target_size)
+            tuple(target_size),
+            quality
         )
         
-        # Add optimization level specific adjustments
-        if optimization_level == 'aggressive':
-            optimization_result['compression_ratio'] = 0.15
-            optimization_result['size_reduction'] = '85%'
-            optimization_result['quality_retained'] = '90%'
-        elif optimization_level == 'conservative':
-            optimization_result['compression_ratio'] = 0.4
-            optimization_result['size_reduction'] = '60%'
-            optimization_result['quality_retained'] = '98%'
-        
         processing_time = time.time() - start_time
         
         return jsonify({
@@ -172,6 +179,8 @@ def optimize_image():
             'tagline': 'We girls have no time - Image optimized for instant processing!'
         })
         
+    except ImageSourceError as e:
+        return jsonify({'error': f'Image not allowed: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': f'Failed to optimize image: {str(e)}'}), 500
 
@@ -207,6 +216,8 @@ def batch_optimize_images():
             'batch_result': batch_result,
             'efficiency_metrics': {
                 'images_processed': batch_result['batch_size'],
+                'images_failed': len(batch_result['errors']),
+                'workers': batch_result['workers'],
                 'total_time': batch_result['total_processing_time'],
                 'average_time_per_image': batch_result['average_time_per_image'],
                 'efficiency_gain': batch_result['efficiency_gain']
@@ -268,6 +279,8 @@ def preprocess_for_analysis():
             'tagline': 'We girls have no time - Image preprocessed for instant analysis!'
         })
         
+    except ImageSourceError as e:
+        return jsonify({'error': f'Image not allowed: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': f'Failed to preprocess image: {str(e)}'}), 500
 
@@ -10,6 +10,10 @@ from src.models.wardrobe_management import (
     WardrobeCollection, WardrobeItemCollection, WardrobeAnalytics, 
     BatchProcessingJob, WardrobeTag, WardrobeItemTag, WardrobeMaintenanceLog
 )
+from src.models.job_queue import JobQueue
+from src.models.wardrobe_duplicates import duplicate_detector
+from src.models.wardrobe_analytics_state import current_live_values, live_wardrobe_analytics, rebuild_wardrobe_analytics
+from src.utils.image_processing_optimization import ImageSourceError, image_source_policy
 import json
 import time
 from datetime import datetime, timedelta
@@ -26,7 +30,7 @@ def get_user_from_token(request):
 
 def calculate_wardrobe_analytics(user_id):
     """
-    Calculate comprehensive wardrobe analytics
+    Calculate comprehensive wardrobe analytics from the items, writing nothing
     "We girls have no time" - Instant wardrobe intelligence!
     """
     items = WardrobeItem.query.filter_by(user_id=user_id).all()
@@ -51,9 +55,12 @@ def calculate_wardrobe_analytics(user_id):
     
     # Style analytics
     styles = []
+    seasons = []
     for item in items:
         if item.cv_style_tags:
             styles.extend(json.loads(item.cv_style_tags))
+        if item.season_tags:
+            seasons.extend(json.loads(item.season_tags))
     style_distribution = Counter(styles)
     
     # Health metrics (simplified calculations)
@@ -67,13 +74,7 @@ def calculate_wardrobe_analytics(user_id):
     wardrobe_gaps = [cat for cat in essential_categories if cat not in categories]
     
     # Find potential duplicates (same category and color)
-    duplicates = []
-    for i, item1 in enumerate(items):
-        for item2 in items[i+1:]:
-            if (item1.category == item2.category and 
-                item1.color_primary == item2.color_primary and
-                item1.id != item2.id):
-                duplicates.append([item1.id, item2.id])
+    duplicates = duplicate_detector.pairs_from_items(items)
     
     underutilized = [item.id for item in items if item.wear_count < avg_wear_frequency * 0.5]
     
@@ -88,7 +89,7 @@ def calculate_wardrobe_analytics(user_id):
         'average_wear_frequency': avg_wear_frequency,
         'style_distribution': dict(style_distribution),
         'formality_distribution': {},  # Placeholder
-        'seasonal_distribution': {},  # Placeholder
+        'seasonal_distribution': dict(Counter(seasons)),
         'versatility_score': versatility_score,
         'completeness_score': completeness_score,
         'efficiency_score': efficiency_score,
@@ -228,67 +229,103 @@ def get_wardrobe_analytics():
         return jsonify({'error': 'Authentication required'}), 401
     
     try:
-        # Check for existing analytics
-        today = datetime.utcnow().date()
-        existing_analytics = WardrobeAnalytics.query.filter_by(
-            user_id=user_id,
-            analysis_date=today,
-            period_type='daily'
-        ).first()
-        
-        if existing_analytics:
-            return jsonify({
-                'analytics': existing_analytics.to_dict(),
-                'cached': True,
-                'tagline': 'We girls have no time - Analytics loaded from cache!'
-            })
-        
-        # Calculate new analytics
-        analytics_data = calculate_wardrobe_analytics(user_id)
-        
-        if not analytics_data:
+        # Analytics are maintained as items change: a single-row read
+        analytics = live_wardrobe_analytics(user_id)
+        cached = analytics is not None
+        if analytics is None:
+            # First request for this user: build everything from the items once
+            analytics = rebuild_wardrobe_analytics(user_id)
+        result = analytics.to_dict() if analytics.total_items else None
+        db.session.commit()  # Keeps a row re-derived after item writes
+        
+        if result is None:
             return jsonify({
                 'message': 'No wardrobe items found',
                 'analytics': None,
                 'tagline': 'We girls have no time - Add items to see analytics!'
             })
         
-        # Create analytics record
-        analytics = WardrobeAnalytics(
-            user_id=user_id,
-            analysis_date=today,
-            period_type='daily',
-            total_items=analytics_data['total_items'],
-            category_breakdown=json.dumps(analytics_data['category_breakdown']),
-            color_breakdown=json.dumps(analytics_data['color_breakdown']),
-            brand_breakdown=json.dumps(analytics_data['brand_breakdown']),
-            most_worn_items=json.dumps(analytics_data['most_worn_items']),
-            least_worn_items=json.dumps(analytics_data['least_worn_items']),
-            unworn_items=json.dumps(analytics_data['unworn_items']),
-            average_wear_frequency=analytics_data['average_wear_frequency'],
-            style_distribution=json.dumps(analytics_data['style_distribution']),
-            formality_distribution=json.dumps(analytics_data['formality_distribution']),
-            seasonal_distribution=json.dumps(analytics_data['seasonal_distribution']),
-            versatility_score=analytics_data['versatility_score'],
-            completeness_score=analytics_data['completeness_score'],
-            efficiency_score=analytics_data['efficiency_score'],
-            style_coherence_score=analytics_data['style_coherence_score'],
-            wardrobe_gaps=json.dumps(analytics_data['wardrobe_gaps']),
-            duplicate_items=json.dumps(analytics_data['duplicate_items']),
-            underutilized_items=json.dumps(analytics_data['underutilized_items'])
-        )
+        return jsonify({
+            'analytics': result,
+            'cached': cached,
+            'tagline': 'We girls have no time - Analytics always up to date!' if cached
+                       else 'We girls have no time - Fresh analytics generated!'
+        })
         
-        db.session.add(analytics)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to get analytics: {str(e)}'}), 500
+
+def check_wardrobe_analytics(user_id):
+    """
+    Compare the live analytics with a full recomputation from the items, writing nothing
+    "We girls have no time" - Trust, but verify!
+    Returns {field: {'live': ..., 'expected': ...}} for every field that differs.
+    """
+    live = current_live_values(db.session.connection(), user_id)
+    expected = calculate_wardrobe_analytics(user_id)
+    if expected is None:
+        return {} if live is None or not live['total_items'] else \
+            {'total_items': {'live': live['total_items'], 'expected': 0}}
+    if live is None:
+        return {'total_items': {'live': None, 'expected': expected['total_items']}}
+    mismatches = {}
+    for field, value in expected.items():
+        stored = live[field]
+        stored = json.loads(stored) if isinstance(stored, str) else stored
+        if isinstance(value, float) or isinstance(stored, float):
+            same = abs((stored or 0) - value) < 1e-9
+        else:
+            same = stored == value
+        if not same:
+            mismatches[field] = {'live': stored, 'expected': value}
+    return mismatches
+
+@wardrobe_management_bp.route('/analytics/check', methods=['GET'])
+def check_analytics():
+    """
+    Check the incrementally maintained analytics against the items
+    "We girls have no time" - Numbers you can count on!
+    """
+    user_id = get_user_from_token(request)
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        mismatches = check_wardrobe_analytics(user_id)  # Read-only
+        
+        return jsonify({
+            'consistent': not mismatches,
+            'mismatches': mismatches,
+            'tagline': 'We girls have no time - Analytics verified!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to check analytics: {str(e)}'}), 500
+
+@wardrobe_management_bp.route('/analytics/rebuild', methods=['POST'])
+def rebuild_analytics():
+    """
+    Rebuild the analytics counters and live row from every item
+    "We girls have no time" - A clean slate in one call!
+    """
+    user_id = get_user_from_token(request)
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        analytics = rebuild_wardrobe_analytics(user_id)
         db.session.commit()
         
         return jsonify({
-            'analytics': analytics.to_dict(),
-            'cached': False,
-            'tagline': 'We girls have no time - Fresh analytics generated!'
+            'analytics': analytics.to_dict() if analytics.total_items else None,
+            'tagline': 'We girls have no time - Analytics rebuilt!'
         })
         
     except Exception as e:
-        return jsonify({'error': f'Failed to get analytics: {str(e)}'}), 500
+        db.session.rollback()
+        return jsonify({'error': f'Failed to rebuild analytics: {str(e)}'}), 500
 
 @wardrobe_management_bp.route('/batch-jobs', methods=['POST'])
 def create_batch_job():
@@ -304,13 +341,29 @@ def create_batch_job():
     if not data or 'job_type' not in data:
         return jsonify({'error': 'Job type required'}), 400
     
+    job_parameters = data.get('job_parameters', {})
+    if not isinstance(job_parameters, dict):
+        return jsonify({'error': 'job_parameters must be an object'}), 400
+    
+    if data['job_type'] == 'optimize_images':
+        image_paths = job_parameters.get('image_paths', [])
+        if not isinstance(image_paths, list) or not all(isinstance(image_path, str) for image_path in image_paths):
+            return jsonify({'error': 'image_paths must be a list of strings'}), 400
+        # Workers read these paths later: reject anything outside the upload directories now
+        try:
+            for image_path in image_paths:
+                if '://' not in image_path:
+                    image_source_policy.local_path(image_path)
+        except ImageSourceError as e:
+            return jsonify({'error': f'Image not allowed: {str(e)}'}), 400
+    
     try:
         job = BatchProcessingJob(
             user_id=user_id,
             job_type=data['job_type'],
             job_name=data.get('job_name', f"{data['job_type']} job"),
             job_description=data.get('job_description'),
-            job_parameters=json.dumps(data.get('job_parameters', {}))
+            job_parameters=json.dumps(job_parameters)
         )
         
         # Estimate job size based on type
@@ -324,6 +377,8 @@ def create_batch_job():
             job.estimated_completion = datetime.utcnow() + timedelta(minutes=5)
         
         db.session.add(job)
+        db.session.flush()
+        JobQueue.enqueue('batch_processing', job.id)  # Same transaction: no job without its queue row
         db.session.commit()
         
         return jsonify({
@@ -364,6 +419,67 @@ def get_batch_jobs():
     except Exception as e:
         return jsonify({'error': f'Failed to get batch jobs: {str(e)}'}), 500
 
+@wardrobe_management_bp.route('/batch-jobs/<int:job_id>', methods=['GET'])
+def get_batch_job(job_id):
+    """
+    Get progress and partial results of a batch processing job
+    "We girls have no time" - Live progress, no refresh needed!
+    """
+    user_id = get_user_from_token(request)
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        job = BatchProcessingJob.query.filter_by(id=job_id, user_id=user_id).first()
+        if not job:
+            return jsonify({'error': 'Batch job not found'}), 404
+        
+        entry = JobQueue.get('batch_processing', job.id)
+        
+        return jsonify({
+            'job': job.to_dict(),
+            'queue': entry.to_dict() if entry else None,
+            'tagline': 'We girls have no time - Job progress at a glance!'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get batch job: {str(e)}'}), 500
+
+@wardrobe_management_bp.route('/batch-jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_batch_job(job_id):
+    """
+    Cancel a batch processing job
+    "We girls have no time" - Changed our mind, stop right there!
+    """
+    user_id = get_user_from_token(request)
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        job = BatchProcessingJob.query.filter_by(id=job_id, user_id=user_id).first()
+        if not job:
+            return jsonify({'error': 'Batch job not found'}), 404
+        
+        if job.status in ('completed', 'failed', 'cancelled'):
+            return jsonify({'error': f'Batch job already {job.status}'}), 409
+        
+        # Pending jobs are cancelled now; running ones stop at the worker's next progress write
+        entry = JobQueue.request_cancel('batch_processing', job.id)
+        if entry is None or entry.status == 'cancelled':
+            job.status = 'cancelled'
+            job.completed_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Batch job cancelled' if job.status == 'cancelled' else 'Batch job cancellation requested',
+            'job': job.to_dict(),
+            'tagline': 'We girls have no time - Job stopped!'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to cancel batch job: {str(e)}'}), 500
+
 @wardrobe_management_bp.route('/tags', methods=['GET'])
 def get_tags():
     """
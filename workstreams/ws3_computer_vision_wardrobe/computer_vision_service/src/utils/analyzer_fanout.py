@@ -0,0 +1,129 @@
+"""
+WS3-P5: Performance Optimization & Image Processing
+Concurrent Analyzer Fan-out for Tanvi Vanity Agent
+"We girls have no time" - Every analyzer at once, nobody waits for the slowest!
+
+All analyzers for an image run concurrently on one shared, bounded thread
+pool, each with its own deadline measured from the start of the run. The
+run returns as soon as every analyzer has finished or missed its deadline,
+so latency approaches the slowest analyzer (capped by its deadline) instead
+of the sum. Analyzers that time out or raise are reported and their result
+is left empty; the run is then flagged as degraded.
+
+Python threads cannot be interrupted, so a timed-out analyzer keeps its
+worker thread until it returns; `abandoned` counts those. Analyzers are
+expected to spend their time in I/O or native code (HTTP, Pillow, NumPy),
+which release the GIL.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict
+
+
+class AnalyzerFanout:
+    """
+    Run named analyzers on one input concurrently with per-analyzer deadlines
+    "We girls have no time" - Partial answers beat late answers!
+    """
+
+    def __init__(self, max_workers: int = 16, default_timeout: float = 2.0):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.executor = None
+        self.lock = threading.Lock()
+        self.stats = {'runs': 0, 'degraded_runs': 0, 'timeouts': {}, 'errors': {}, 'abandoned': 0,
+                      'total_time': 0.0, 'total_analyzer_time': 0.0}
+
+    def _executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cv-analyzer')
+            return self.executor
+
+    @staticmethod
+    def _timed(func, argument):
+        start_time = time.perf_counter()
+        result = func(argument)
+        return result, time.perf_counter() - start_time
+
+    def run(self, analyzers: Dict[str, Callable[[Any], Any]], argument: Any,
+            timeouts: Dict[str, float] = None) -> Dict:
+        """
+        Run every analyzer on the same argument
+        Returns results (None for failed analyzers), per-analyzer status, timings and errors, and the degraded flag.
+        """
+        start_time = time.perf_counter()
+        timeouts = timeouts or {}
+        executor = self._executor()
+        pending = {executor.submit(self._timed, func, argument): name for name, func in analyzers.items()}
+        deadlines = {name: start_time + timeouts.get(name, self.default_timeout) for name in analyzers}
+
+        results = {name: None for name in analyzers}
+        status = {}
+        timings = {}
+        errors = {}
+        while pending:
+            now = time.perf_counter()
+            for future, name in list(pending.items()):
+                if now >= deadlines[name] and not future.done():
+                    del pending[future]
+                    status[name] = 'timeout'
+                    timings[name] = now - start_time
+                    if not future.cancel():
+                        with self.lock:
+                            self.stats['abandoned'] += 1
+            if not pending:
+                break
+            next_deadline = min(deadlines[name] for name in pending.values())
+            done, _ = wait(list(pending), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                    status[name] = 'ok'
+                except Exception as e:
+                    status[name] = 'error'
+                    timings[name] = time.perf_counter() - start_time
+                    errors[name] = f'{type(e).__name__}: {e}'
+                    with self.lock:
+                        self.stats['errors'][name] = self.stats['errors'].get(name, 0) + 1
+
+        elapsed = time.perf_counter() - start_time
+        degraded = any(value != 'ok' for value in status.values())
+        with self.lock:
+            self.stats['runs'] += 1
+            self.stats['degraded_runs'] += int(degraded)
+            self.stats['total_time'] += elapsed
+            self.stats['total_analyzer_time'] += sum(timings.values())
+            for name, value in status.items():
+                if value == 'timeout':
+                    self.stats['timeouts'][name] = self.stats['timeouts'].get(name, 0) + 1
+
+        return {'results': results, 'status': status, 'timings': timings, 'errors': errors,
+                'degraded': degraded, 'elapsed': elapsed}
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            runs = self.stats['runs']
+            return dict(
+                self.stats,
+                timeouts=dict(self.stats['timeouts']),
+                errors=dict(self.stats['errors']),
+                max_workers=self.max_workers,
+                default_timeout=self.default_timeout,
+                degraded_rate=self.stats['degraded_runs'] / runs if runs else 0.0,
+                average_time=self.stats['total_time'] / runs if runs else 0.0,
+                # Sum of analyzer times over wall time: how much the fan-out overlaps
+                concurrency_gain=self.stats['total_analyzer_time'] / self.stats['total_time'] if self.stats['total_time'] else 0.0
+            )
+
+# Global analyzer fan-out
+analyzer_fanout = AnalyzerFanout()
@@ -0,0 +1,142 @@
+"""
+Shared fixtures for WS3 Computer Vision & Wardrobe unit tests
+"We girls have no time" - Fast in-process tests, no running services needed!
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy import event
+
+# Make the service package importable the same way src/main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the global image cache in memory: tests must not share results through a disk file
+os.environ.setdefault('IMAGE_CACHE_DB', '')
+# Likewise the global derived-image cache gets a private directory of its own, not src/database
+os.environ.setdefault('DERIVED_IMAGE_CACHE_DIR', tempfile.mkdtemp(prefix='ws3_derived_'))
+# Job outputs are kept for good; in tests they go to a throwaway directory
+os.environ.setdefault('JOB_OUTPUT_DIR', tempfile.mkdtemp(prefix='ws3_job_outputs_'))
+# Generated images are written under pytest's tmp_path, so that is the upload root
+os.environ.setdefault('IMAGE_UPLOAD_ROOTS', tempfile.gettempdir())
+
+from src.utils.image_processing_optimization import DerivedImageCache, ImagePreprocessor, ORIENTATION_TAG
+
+
+def generate_image(width, height, mode='RGB', seed=0):
+    """Smooth gradients plus noise: compresses like a photo, not like a flat fill"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = [
+        (x / max(width - 1, 1)) * 255,
+        (y / max(height - 1, 1)) * 255,
+        ((x + y) / max(width + height - 2, 1)) * 255,
+    ]
+    rgb = np.stack(channels, axis=-1) + rng.normal(0, 12, (height, width, 3))
+    image = Image.fromarray(rgb.clip(0, 255).astype(np.uint8))
+    if mode == 'RGBA':
+        image.putalpha(Image.fromarray((x / max(width - 1, 1) * 255).astype(np.uint8)))
+    elif mode != 'RGB':
+        image = image.convert(mode)
+    return image
+
+
+class SQLRecorder:
+    """
+    Statements sent to the test database inside `with sql_recorder as statements:`
+    "We girls have no time" - Count the queries, not the guesses!
+    """
+
+    WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE')
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self.statements
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @classmethod
+    def writes(cls, statements):
+        """The INSERT/UPDATE/DELETE statements among `statements`"""
+        return [statement for statement in statements if statement.lstrip().split(' ', 1)[0].upper() in cls.WRITE_VERBS]
+
+
+def encode_image(image, image_format='JPEG', orientation=None, **save_options):
+    buffer = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = orientation
+        save_options['exif'] = exif.tobytes()
+    image.save(buffer, image_format, **save_options)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_factory(tmp_path):
+    """Write a generated image to disk and return its path"""
+    counter = iter(range(10 ** 6))
+
+    def factory(width=640, height=480, mode='RGB', image_format='JPEG', orientation=None, seed=0, **save_options):
+        suffix = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}.get(image_format, '.img')
+        path = tmp_path / f'image_{next(counter)}{suffix}'
+        path.write_bytes(encode_image(generate_image(width, height, mode, seed), image_format, orientation, **save_options))
+        return str(path)
+
+    return factory
+
+
+@pytest.fixture
+def derived_cache(tmp_path):
+    return DerivedImageCache(cache_dir=str(tmp_path / 'derived'))
+
+
+@pytest.fixture
+def preprocessor(derived_cache):
+    return ImagePreprocessor(derived_cache)
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Wardrobe API app on a throwaway SQLite file (file-backed so worker processes could share it)"""
+    from flask import Flask
+    from src.models.user import db
+    from src.models import (  # noqa: F401 - register tables
+        cv_models, wardrobe_management, outfit_visualization, job_queue, item_embeddings, image_fingerprints,
+        wardrobe_duplicates, item_tags, wardrobe_analytics_state
+    )
+    from src.routes.computer_vision import computer_vision_bp
+    from src.routes.wardrobe_management import wardrobe_management_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(computer_vision_bp, url_prefix='/api/cv')
+    app.register_blueprint(wardrobe_management_bp, url_prefix='/api/wardrobe')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def sql_recorder(app):
+    """Record the SQL issued inside `with sql_recorder as statements:` blocks"""
+    from src.models.user import db
+    with app.app_context():
+        return SQLRecorder(db.engine)
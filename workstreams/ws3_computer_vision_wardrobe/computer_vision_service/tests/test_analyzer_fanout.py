@@ -0,0 +1,152 @@
+"""
+Concurrent analyzer fan-out tests
+"We girls have no time" - Latency of the slowest analyzer, not the sum!
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from conftest import encode_image, generate_image
+from src.models.cv_models import ImageAnalysis
+from src.models.image_fingerprints import NearDuplicateIndex
+from src.routes import computer_vision
+from src.utils.analyzer_fanout import AnalyzerFanout
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+def stub_analyzer(latency, result=None, error=None):
+    """Analyzer that takes a known time, then returns (or raises)"""
+    def analyze(image):
+        time.sleep(latency)
+        if error:
+            raise error
+        return result if result is not None else [{'latency': latency, 'confidence': 0.9}]
+    return analyze
+
+
+@pytest.fixture
+def fanout():
+    pool = AnalyzerFanout(max_workers=8, default_timeout=2.0)
+    yield pool
+    pool.shutdown()
+
+
+class TestAnalyzerFanout:
+    def test_latency_approaches_the_slowest_analyzer(self, fanout):
+        latencies = {'a': 0.10, 'b': 0.15, 'c': 0.20, 'd': 0.25, 'e': 0.30}
+        analyzers = {name: stub_analyzer(latency) for name, latency in latencies.items()}
+
+        run = fanout.run(analyzers, 'image')
+
+        assert not run['degraded']
+        assert run['elapsed'] < max(latencies.values()) + 0.15  # Sum would be 1.0 s
+        assert run['elapsed'] < sum(latencies.values()) / 2
+        assert run['results']['c'] == [{'latency': 0.20, 'confidence': 0.9}]
+        assert fanout.get_stats()['concurrency_gain'] > 2
+
+    def test_every_analyzer_gets_the_same_input(self, fanout):
+        seen = []
+        lock = threading.Lock()
+
+        def record(image):
+            with lock:
+                seen.append(image)
+
+        image = object()
+        fanout.run({name: record for name in 'abc'}, image)
+
+        assert len(seen) == 3 and all(item is image for item in seen)
+
+    def test_timeouts_return_partial_results(self, fanout):
+        analyzers = {'fast': stub_analyzer(0.05), 'stuck': stub_analyzer(1.0)}
+
+        run = fanout.run(analyzers, 'image', timeouts={'fast': 0.5, 'stuck': 0.2})
+
+        assert run['degraded']
+        assert run['status'] == {'fast': 'ok', 'stuck': 'timeout'}
+        assert run['results']['stuck'] is None and run['results']['fast']
+        assert run['elapsed'] < 0.4
+        assert fanout.get_stats()['timeouts'] == {'stuck': 1}
+        assert fanout.get_stats()['abandoned'] == 1
+
+    def test_errors_are_isolated(self, fanout):
+        analyzers = {'ok': stub_analyzer(0.01), 'broken': stub_analyzer(0.01, error=ValueError('bad pixels'))}
+
+        run = fanout.run(analyzers, 'image')
+
+        assert run['degraded'] and run['status'] == {'ok': 'ok', 'broken': 'error'}
+        assert run['errors'] == {'broken': 'ValueError: bad pixels'}
+
+
+class TestAnalyzeItemFanout:
+    @pytest.fixture(autouse=True)
+    def isolated(self, monkeypatch, fanout):
+        monkeypatch.setattr(computer_vision, 'near_duplicate_index', NearDuplicateIndex())
+        monkeypatch.setattr(computer_vision, 'analyzer_fanout', fanout)
+        monkeypatch.setattr(computer_vision, 'ANALYZER_TIMEOUT_SECONDS', 0.5)
+
+    def _analyze(self, app, path):
+        response = app.test_client().post('/api/cv/analyze-item', json={'image_url': path}, headers=AUTH)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    def test_analyzers_share_one_decoded_image(self, app, tmp_path, monkeypatch):
+        path = tmp_path / 'photo.jpg'
+        path.write_bytes(encode_image(generate_image(800, 600), 'JPEG'))
+        inputs = []
+        original = computer_vision.analyze_image_colors
+
+        def recording_colors(image):
+            inputs.append(image)
+            return original(image)
+
+        monkeypatch.setattr(computer_vision, 'analyze_image_colors', recording_colors)
+        with app.app_context():
+            result = self._analyze(app, str(path))
+
+        assert not result['degraded']
+        # Decoded once at analysis resolution (the largest preset side), not the 256 px hashing size
+        assert inputs[0].size == (512, 384) and inputs[0].mode == 'RGB'
+
+    def test_slow_analyzers_run_concurrently(self, app, tmp_path, monkeypatch):
+        path = tmp_path / 'photo.jpg'
+        path.write_bytes(encode_image(generate_image(320, 240), 'JPEG'))
+        for name in ('colors', 'patterns', 'materials', 'category', 'style'):
+            analyzer = getattr(computer_vision, f'analyze_image_{name}')
+            monkeypatch.setattr(computer_vision, f'analyze_image_{name}', stub_analyzer(0.2, analyzer(None)))
+
+        with app.app_context():
+            start = time.perf_counter()
+            result = self._analyze(app, str(path))
+            elapsed = time.perf_counter() - start
+
+        assert not result['degraded']
+        assert elapsed < 0.6  # Sequential calls would take 1.0 s
+
+    def test_timed_out_analyzer_degrades_and_is_retried(self, app, tmp_path, monkeypatch):
+        path = tmp_path / 'photo.jpg'
+        path.write_bytes(encode_image(generate_image(320, 240, seed=3), 'JPEG'))
+        monkeypatch.setattr(computer_vision, 'analyze_image_materials', stub_analyzer(1.0))
+
+        with app.app_context():
+            first = self._analyze(app, str(path))
+            assert first['degraded']
+            assert first['analyzers']['materials']['status'] == 'timeout'
+            stored = ImageAnalysis.query.one()
+            assert json.loads(stored.material_predictions) == []
+            assert json.loads(stored.dominant_colors)  # Other analyzers still answered
+            assert json.loads(stored.quality_assessment)['analyzer_status']['materials'] == 'timeout'
+
+            # A degraded analysis is not served from the cache: it is analyzed again and completed in place
+            monkeypatch.setattr(computer_vision, 'analyze_image_materials', stub_analyzer(0.01))
+            second = self._analyze(app, str(path))
+
+            assert not second.get('cached') and not second['degraded']
+            assert second['analysis']['id'] == first['analysis']['id']
+            assert ImageAnalysis.query.count() == 1
+            assert json.loads(ImageAnalysis.query.one().quality_assessment) == {}
+            assert self._analyze(app, str(path))['cached']
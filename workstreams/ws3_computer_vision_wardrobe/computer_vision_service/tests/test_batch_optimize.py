@@ -0,0 +1,71 @@
+"""
+Parallel, memory-bounded batch optimization tests
+"We girls have no time" - Whole batches at once, without running out of RAM!
+"""
+
+import os
+
+import pytest
+
+from src.utils.image_processing_optimization import ImageProcessingOptimizer
+
+
+@pytest.fixture
+def pooled_optimizer(preprocessor):
+    optimizer = ImageProcessingOptimizer(preprocessor, workers=2, memory_budget_mb=256)
+    yield optimizer
+    optimizer.shutdown()
+
+
+class TestBatchOptimize:
+    def test_pool_results_match_inline_results(self, preprocessor, pooled_optimizer, image_factory, tmp_path):
+        paths = [image_factory(800, 600, seed=seed) for seed in range(6)]
+        inline = ImageProcessingOptimizer(preprocessor, workers=0).batch_optimize_images(paths, (256, 256))
+
+        pooled = pooled_optimizer.batch_optimize_images(paths, (256, 256))
+
+        assert [result['image_path'] for result in pooled['results']] == paths
+        assert [result['optimized_size'] for result in pooled['results']] == \
+            [result['optimized_size'] for result in inline['results']] == [(256, 192)] * 6
+        # Workers write to the same derived-image cache as the parent
+        assert all(result['cache_hit'] for result in pooled['results'])
+        assert all(os.path.exists(result['output_path']) for result in pooled['results'])
+        assert pooled['workers'] == 2 and pooled['errors'] == []
+
+    def test_stream_yields_each_image_once_with_errors_captured(self, pooled_optimizer, image_factory, tmp_path):
+        paths = [image_factory(400, 300, seed=seed) for seed in range(4)]
+        paths.insert(2, str(tmp_path / 'missing.jpg'))
+        (tmp_path / 'broken.jpg').write_bytes(b'not an image')
+        paths.append(str(tmp_path / 'broken.jpg'))
+
+        outcomes = list(pooled_optimizer.iter_optimize_images(paths, (128, 128)))
+
+        assert sorted(outcome['index'] for outcome in outcomes) == list(range(len(paths)))
+        errors = {outcome['index']: outcome['error'] for outcome in outcomes if 'error' in outcome}
+        assert set(errors) == {2, 5}
+        assert errors[2].startswith('FileNotFoundError')
+        assert all(outcome['result']['optimized_size'] == (128, 96) for outcome in outcomes if 'result' in outcome)
+
+    def test_in_flight_decodes_stay_within_the_memory_budget(self, preprocessor, image_factory):
+        paths = [image_factory(1200, 1000, image_format='PNG', seed=seed) for seed in range(6)]
+        image_bytes = 1200 * 1000 * ImageProcessingOptimizer.BYTES_PER_PIXEL
+        optimizer = ImageProcessingOptimizer(preprocessor, workers=4, memory_budget_mb=int(image_bytes * 1.5 / 2 ** 20))
+
+        try:
+            result = optimizer.batch_optimize_images(paths, (512, 512))
+        finally:
+            optimizer.shutdown()
+
+        assert len(result['results']) == 6
+        stats = optimizer.get_performance_stats()['batch_stats']
+        assert stats['peak_in_flight_bytes'] == image_bytes  # One PNG at a time despite four workers
+        assert stats['budget_waits'] > 0
+
+    def test_jpegs_are_budgeted_at_their_reduced_decode_size(self, preprocessor, image_factory):
+        optimizer = ImageProcessingOptimizer(preprocessor, workers=0)
+
+        estimate = optimizer.estimate_decoded_bytes(image_factory(4000, 3000), (512, 512))
+
+        assert estimate == 1000 * 750 * ImageProcessingOptimizer.BYTES_PER_PIXEL  # Decoded at 1/4 scale, still >= 512
+        assert optimizer.estimate_decoded_bytes('https://example.com/photo.jpg', (512, 512)) == \
+            ImageProcessingOptimizer.UNKNOWN_IMAGE_PIXELS * ImageProcessingOptimizer.BYTES_PER_PIXEL
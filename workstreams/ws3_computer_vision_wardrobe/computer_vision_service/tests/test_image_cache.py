@@ -0,0 +1,124 @@
+"""
+Two-tier image processing cache tests
+"We girls have no time" - Analysis results that outlive the process!
+"""
+
+import os
+import pickle
+import time
+import zlib
+
+import pytest
+
+from src.utils import image_processing_optimization
+from src.utils.image_processing_optimization import DiskCacheTier, ImageProcessingCache, optimize_image_processing
+
+ANALYSIS = {'category': 'tops', 'colors': ['navy', 'white'] * 50, 'confidence': 0.91}
+
+
+@pytest.fixture
+def disk_path(tmp_path):
+    return str(tmp_path / 'image_cache.sqlite')
+
+
+class TestImageCache:
+    def test_keyed_on_content_not_path(self, image_factory, tmp_path):
+        cache = ImageProcessingCache()
+        path = image_factory(seed=1)
+        cache.set(path, 'analyze', ANALYSIS)
+
+        renamed = str(tmp_path / 'renamed.jpg')
+        os.rename(path, renamed)
+        assert cache.get(renamed, 'analyze') == ANALYSIS
+        assert cache.get(renamed, 'analyze', {'detail': 'high'}) is None
+
+        with open(renamed, 'rb') as f:
+            data = f.read()
+        assert cache.get(data, 'analyze') == ANALYSIS  # Raw bytes hash the same as the file
+        with open(renamed, 'wb') as f:
+            f.write(data + b'edited')
+        assert cache.get(renamed, 'analyze') is None
+
+    def test_disk_tier_survives_restart_and_promotes(self, image_factory, disk_path):
+        path = image_factory(seed=2)
+        ImageProcessingCache(disk_path=disk_path).set(path, 'analyze', ANALYSIS)
+
+        restarted = ImageProcessingCache(disk_path=disk_path, promote_after=2)
+        assert restarted.get(path, 'analyze') == ANALYSIS
+        assert restarted.get_stats()['cache_size'] == 0  # One read is not enough to take a memory slot
+        assert restarted.get(path, 'analyze') == ANALYSIS
+        assert restarted.get(path, 'analyze') == ANALYSIS
+
+        stats = restarted.get_stats()
+        assert (stats['disk_hit_count'], stats['memory_hit_count'], stats['promotion_count']) == (2, 1, 1)
+        assert stats['cache_size'] == 1 and stats['hit_ratio'] == 1.0
+
+    def test_disk_tier_is_size_bounded_and_compressed(self, disk_path):
+        tier = DiskCacheTier(disk_path, max_bytes=5_000)
+        for index in range(200):
+            tier.set(f'key-{index}', dict(ANALYSIS, index=index))
+        tier.get('key-199')
+
+        stats = tier.get_stats()
+        assert stats['stored_bytes'] <= 5_000 and stats['evictions'] > 0
+        assert stats['compression_ratio'] < 0.5
+        assert tier.get('key-0') is None  # Least recently read entries go first
+        assert tier.get('key-199')[0] == dict(ANALYSIS, index=199)
+
+    def test_disk_tier_stores_json_only(self, disk_path):
+        tier = DiskCacheTier(disk_path)
+        assert tier.set('plain', ANALYSIS)
+        assert not tier.set('object', {'when': object()})
+        assert tier.get('object') is None and tier.get_stats()['skipped_writes'] == 1
+
+        # A planted pickle is never executed, just dropped as unreadable
+        tier._connection().execute("UPDATE cache_entries SET value = ?", (zlib.compress(pickle.dumps(ANALYSIS)),))
+        assert tier.get('plain') is None and tier.get_stats()['entries'] == 0
+
+    def test_connection_is_reopened_after_fork(self, disk_path, monkeypatch):
+        tier = DiskCacheTier(disk_path)
+        tier.set('key', ANALYSIS)
+        parent_connection = tier.connection
+
+        monkeypatch.setattr(os, 'getpid', lambda: -1)
+        assert tier.get('key')[0] == ANALYSIS
+        assert tier.connection is not parent_connection
+
+    def test_ttl_applies_to_disk_tier(self, disk_path):
+        cache = ImageProcessingCache(ttl_seconds=60, disk_path=disk_path)
+        cache.set(b'image bytes', 'analyze', ANALYSIS)
+        cache.disk._connection().execute('UPDATE cache_entries SET created_at = ?', (time.time() - 120,))
+
+        assert ImageProcessingCache(ttl_seconds=60, disk_path=disk_path).get(b'image bytes', 'analyze') is None
+        assert cache.disk.get_stats()['entries'] == 0
+
+    def test_clear_and_invalidate_cover_both_tiers(self, disk_path):
+        cache = ImageProcessingCache(disk_path=disk_path)
+        cache.set(b'first', 'analyze', ANALYSIS)
+        cache.set(b'second', 'analyze', ANALYSIS)
+        cache.invalidate_pattern(cache._generate_key(b'first', 'analyze'))
+        assert cache.get(b'first', 'analyze') is None
+        assert cache.get(b'second', 'analyze') == ANALYSIS
+
+        cache.clear()
+        assert cache.get_stats()['disk']['entries'] == 0
+        assert ImageProcessingCache(disk_path=disk_path).get(b'second', 'analyze') is None
+
+    def test_decorator_hits_after_restart(self, image_factory, disk_path, monkeypatch, tmp_path):
+        calls = []
+
+        @optimize_image_processing
+        def analyze(image_path=None, params=None):
+            calls.append(image_path)
+            return ANALYSIS
+
+        path = image_factory(seed=3)
+        monkeypatch.setattr(image_processing_optimization, 'image_cache', ImageProcessingCache(disk_path=disk_path))
+        analyze(image_path=path)
+        monkeypatch.setattr(image_processing_optimization, 'image_cache', ImageProcessingCache(disk_path=disk_path))
+        copy = str(tmp_path / 'copy.jpg')
+        with open(path, 'rb') as source, open(copy, 'wb') as target:
+            target.write(source.read())
+
+        assert analyze(image_path=copy) == ANALYSIS
+        assert calls == [path]
@@ -0,0 +1,177 @@
+"""
+Content hash and perceptual near-duplicate dedupe tests
+"We girls have no time" - The same photo is never analyzed twice!
+"""
+
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw, ImageEnhance
+
+from conftest import encode_image, generate_image
+from src.models.image_fingerprints import BKTree, NearDuplicateIndex, color_distance, color_signature, dhash, hamming, phash
+from src.models.cv_models import ImageAnalysis
+from src.routes import computer_vision
+from src.utils.image_processing_optimization import performance_monitor
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+def _photo(seed, size=(640, 480)):
+    """A generated photo with some blocky structure, distinct per seed"""
+    rng = random.Random(seed)
+    image = generate_image(*size, seed=seed)
+    for _ in range(6):
+        x, y = rng.randrange(size[0] - 100), rng.randrange(size[1] - 100)
+        image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + rng.randint(40, 200), y + rng.randint(40, 200)))
+    return image
+
+
+def _shirt(color, size=(640, 480)):
+    """The same shirt silhouette on a white background, in a given colour"""
+    image = Image.new('RGB', size, 'white')
+    ImageDraw.Draw(image).polygon([(220, 80), (420, 80), (540, 180), (470, 230), (430, 200), (430, 420),
+                                   (210, 420), (210, 200), (170, 230), (100, 180)], fill=color)
+    return image
+
+
+class TestPerceptualHashes:
+    def test_edited_copies_stay_close(self):
+        original = _photo(1)
+        copies = [
+            original.resize((320, 240)),
+            Image.open(io.BytesIO(encode_image(original, 'JPEG', quality=40))),
+            ImageEnhance.Brightness(original).enhance(1.1),
+        ]
+
+        for copy in copies:
+            assert hamming(dhash(original), dhash(copy)) <= 6
+            assert hamming(phash(original), phash(copy)) <= 12
+
+    def test_different_photos_are_far_apart(self):
+        distances = [hamming(dhash(_photo(seed)), dhash(_photo(seed + 1))) for seed in range(10, 20)]
+
+        assert min(distances) > 12
+
+    def test_colour_variants_differ_only_in_colour(self):
+        navy, red, green = _shirt((20, 30, 110)), _shirt((200, 30, 40)), _shirt((30, 140, 60))
+
+        for other in (red, green):
+            # Grayscale hashes cannot tell them apart; the colour signature can
+            assert hamming(dhash(navy), dhash(other)) <= 6 and hamming(phash(navy), phash(other)) <= 12
+            assert color_distance(color_signature(navy), color_signature(other)) > 24
+        resized = navy.resize((320, 240))
+        assert color_distance(color_signature(navy), color_signature(resized)) <= 24
+
+    def test_hashes_are_64_bit(self):
+        assert 0 <= dhash(_photo(3)) < 1 << 64
+        assert 0 <= phash(_photo(3)) < 1 << 64
+
+
+class TestBKTree:
+    def test_search_matches_a_linear_scan(self):
+        rng = random.Random(4)
+        keys = [rng.getrandbits(64) for _ in range(2000)]
+        keys += [key ^ (1 << rng.randrange(64)) for key in keys[:200]]  # Near neighbours
+        tree = BKTree()
+        for position, key in enumerate(keys):
+            tree.add(key, position)
+
+        for query in keys[:50] + [rng.getrandbits(64) for _ in range(20)]:
+            expected = sorted((hamming(query, key), position) for position, key in enumerate(keys)
+                              if hamming(query, key) <= 8)
+            assert sorted(tree.search(query, 8)) == expected
+
+
+class TestAnalyzeItemDedupe:
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, monkeypatch):
+        monkeypatch.setattr(computer_vision, 'near_duplicate_index', NearDuplicateIndex())
+
+    def _analyze(self, app, image_url):
+        response = app.test_client().post('/api/cv/analyze-item', json={'image_url': image_url}, headers=AUTH)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    def test_same_bytes_under_another_name(self, app, tmp_path):
+        data = encode_image(_photo(5), 'JPEG', quality=90)
+        (tmp_path / 'first.jpg').write_bytes(data)
+        (tmp_path / 'renamed.jpg').write_bytes(data)
+        before = performance_monitor.get_dedupe_stats()
+
+        with app.app_context():
+            first = self._analyze(app, str(tmp_path / 'first.jpg'))
+            second = self._analyze(app, str(tmp_path / 'renamed.jpg'))
+
+            assert not first.get('cached')
+            assert second['cached'] and second['dedupe'] == {'match': 'exact'}
+            assert second['analysis']['id'] == first['analysis']['id']
+            assert ImageAnalysis.query.count() == 1
+        after = performance_monitor.get_dedupe_stats()
+        assert (after['exact'] - before['exact'], after['miss'] - before['miss']) == (1, 1)
+
+    def test_near_duplicate_skips_the_analyzers(self, app, tmp_path, monkeypatch):
+        original = _photo(6)
+        (tmp_path / 'original.jpg').write_bytes(encode_image(original, 'JPEG', quality=92))
+        (tmp_path / 'resaved.png').write_bytes(encode_image(original.resize((480, 360)), 'PNG'))
+
+        with app.app_context():
+            first = self._analyze(app, str(tmp_path / 'original.jpg'))
+
+            def fail(image_url):
+                raise AssertionError('analyzer ran for a near-duplicate')
+
+            for analyzer in ('colors', 'patterns', 'materials', 'category', 'style'):
+                monkeypatch.setattr(computer_vision, f'analyze_image_{analyzer}', fail)
+            second = self._analyze(app, str(tmp_path / 'resaved.png'))
+
+            assert second['cached'] and second['dedupe']['match'] == 'near_duplicate'
+            assert second['dedupe']['hamming_distance'] <= 6
+            assert second['analysis']['id'] == first['analysis']['id']
+
+    def test_different_photos_are_analyzed(self, app, tmp_path):
+        with app.app_context():
+            for seed in (7, 8):
+                (tmp_path / f'{seed}.jpg').write_bytes(encode_image(_photo(seed), 'JPEG'))
+                assert not self._analyze(app, str(tmp_path / f'{seed}.jpg')).get('cached')
+
+            assert ImageAnalysis.query.count() == 2
+
+    def test_same_shape_in_another_colour_is_analyzed(self, app, tmp_path):
+        with app.app_context():
+            analyses = []
+            for name, color in (('navy', (20, 30, 110)), ('red', (200, 30, 40))):
+                (tmp_path / f'{name}.png').write_bytes(encode_image(_shirt(color), 'PNG'))
+                analyses.append(self._analyze(app, str(tmp_path / f'{name}.png')))
+
+            assert not analyses[1].get('cached')
+            assert analyses[1]['analysis']['id'] != analyses[0]['analysis']['id']
+            assert computer_vision.near_duplicate_index.get_stats()['color_rejections'] == 1
+
+    def test_other_users_images_are_not_reused(self, app, tmp_path, monkeypatch):
+        data = encode_image(_photo(9), 'JPEG', quality=90)
+        (tmp_path / 'mine.jpg').write_bytes(data)
+        (tmp_path / 'theirs.png').write_bytes(encode_image(_photo(9).resize((480, 360)), 'PNG'))
+
+        with app.app_context():
+            first = self._analyze(app, str(tmp_path / 'mine.jpg'))
+            # Same bytes, then a resized copy, each from a user who has not uploaded it before
+            for user_id, image_url in ((2, str(tmp_path / 'mine.jpg')), (3, str(tmp_path / 'theirs.png'))):
+                monkeypatch.setattr(computer_vision, 'get_user_from_token', lambda request, user_id=user_id: user_id)
+                other = self._analyze(app, image_url)
+                assert not other.get('cached')
+                assert other['analysis']['id'] != first['analysis']['id']
+
+    def test_unreadable_images_are_not_analyzed(self, app, tmp_path):
+        before = performance_monitor.get_dedupe_stats()['unhashable']
+        (tmp_path / 'truncated.jpg').write_bytes(b'not a photo')
+
+        with app.app_context():
+            for image_url, status in ((str(tmp_path / 'missing.jpg'), 422), (str(tmp_path / 'truncated.jpg'), 422),
+                                      ('/etc/passwd', 400)):
+                response = app.test_client().post('/api/cv/analyze-item', json={'image_url': image_url}, headers=AUTH)
+                assert response.status_code == status
+
+            assert ImageAnalysis.query.count() == 0
+        assert performance_monitor.get_dedupe_stats()['unhashable'] == before + 2
@@ -0,0 +1,275 @@
+"""
+Image preprocessing pipeline and derived-image cache tests
+"We girls have no time" - Decode once, reuse forever!
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import encode_image, generate_image
+from src.utils import image_processing_optimization
+from src.utils.image_processing_optimization import (
+    ANALYSIS_PRESETS, WEB_THUMBNAILS, DerivedImageCache, ImagePreprocessor, ImageProcessingOptimizer,
+    ImageSourceError, ImageSourcePolicy
+)
+
+
+class TestImagePreprocessor:
+    def test_produces_fixed_size_tensors_and_thumbnails(self, preprocessor, image_factory):
+        result = preprocessor.process(image_factory(1000, 600), list(ANALYSIS_PRESETS))
+
+        for analysis_type, preset in ANALYSIS_PRESETS.items():
+            tensor = result['tensors'][analysis_type]
+            width, height = preset['resize']
+            expected_shape = (height, width) if preset['color_space'] == 'Grayscale' else (height, width, 3)
+            assert tensor.shape == expected_shape
+            assert tensor.dtype == np.float32
+        assert result['tensors']['color_analysis'].min() >= 0 and result['tensors']['color_analysis'].max() <= 1
+        assert result['tensors']['similarity_analysis'].min() < 0  # Mean/std normalized
+
+        assert result['original_size'] == (1000, 600)
+        for name, size in WEB_THUMBNAILS.items():
+            thumbnail = result['thumbnails'][name]
+            assert max(thumbnail['size']) == max(size)
+            assert Image.open(thumbnail['path']).format == 'JPEG'
+
+    @pytest.mark.parametrize('orientation, upright', [(1, (800, 400)), (3, (800, 400)), (6, (400, 800)), (8, (400, 800))])
+    def test_exif_orientation_is_applied(self, preprocessor, image_factory, orientation, upright):
+        result = preprocessor.process(image_factory(800, 400, orientation=orientation), [], {'web': (200, 200)})
+
+        assert result['original_size'] == upright
+        thumbnail_size = result['thumbnails']['web']['size']
+        assert (thumbnail_size[0] > thumbnail_size[1]) == (upright[0] > upright[1])
+
+    @pytest.mark.parametrize('mode, image_format', [('RGBA', 'PNG'), ('P', 'PNG'), ('L', 'JPEG'), ('CMYK', 'JPEG'),
+                                                    ('LA', 'PNG'), ('I;16', 'PNG'), ('RGB', 'WEBP')])
+    def test_color_modes_are_flattened_to_rgb(self, preprocessor, image_factory, mode, image_format):
+        result = preprocessor.process(image_factory(300, 200, mode=mode, image_format=image_format), ['style_analysis'])
+
+        assert result['tensors']['style_analysis'].shape == (384, 384, 3)
+        assert Image.open(result['thumbnails']['small']['path']).mode == 'RGB'
+
+    def test_transparent_pixels_become_white(self):
+        image = Image.new('RGBA', (10, 10), (255, 0, 0, 0))
+
+        assert ImagePreprocessor.to_rgb(image).getpixel((5, 5)) == (255, 255, 255)
+
+    def test_jpegs_are_decoded_at_a_reduced_scale(self, preprocessor, image_factory):
+        preprocessor.process(image_factory(4000, 3000), ['similarity_analysis'], {'small': (150, 150)})
+
+        stats = preprocessor.get_stats()
+        assert stats['source_megapixels'] == pytest.approx(12.0)
+        assert stats['decoded_megapixels'] <= 12.0 / 16  # At least a 1/4 DCT scale
+
+    def test_accepts_raw_bytes(self, preprocessor):
+        data = encode_image(generate_image(320, 240), 'PNG')
+
+        result = preprocessor.process(data, ['color_analysis'])
+
+        assert result['original_size'] == (320, 240)
+
+
+class TestDerivedImageCache:
+    def test_repeat_requests_skip_decoding(self, preprocessor, image_factory, monkeypatch):
+        path = image_factory(1200, 900)
+        first = preprocessor.process(path, list(ANALYSIS_PRESETS))
+
+        def fail(*args, **kwargs):
+            raise AssertionError('cached request decoded the image')
+
+        monkeypatch.setattr(preprocessor, 'decode', fail)
+        second = preprocessor.process(path, list(ANALYSIS_PRESETS))
+
+        assert first['decoded'] and not second['decoded']
+        assert second['original_size'] == (1200, 900)
+        for analysis_type in ANALYSIS_PRESETS:
+            np.testing.assert_array_equal(first['tensors'][analysis_type], second['tensors'][analysis_type])
+        assert first['thumbnails'] == second['thumbnails']
+
+    def test_keys_follow_content_and_parameters(self, preprocessor, image_factory, tmp_path):
+        path = image_factory(640, 480, seed=1)
+        copy_path = tmp_path / 'renamed.jpg'
+        copy_path.write_bytes(open(path, 'rb').read())
+
+        first = preprocessor.process(path, ['color_analysis'])
+        assert not preprocessor.process(str(copy_path), ['color_analysis'])['decoded']  # Same bytes, other path
+        assert preprocessor.process(path, ['color_analysis'], quality=60)['decoded']  # New thumbnail quality
+        assert preprocessor.process(image_factory(640, 480, seed=2), ['color_analysis'])['source_digest'] != \
+            first['source_digest']
+
+    def test_only_missing_outputs_are_computed(self, preprocessor, image_factory):
+        path = image_factory()
+        preprocessor.process(path, ['color_analysis'])
+        writes = preprocessor.cache.get_stats()['write_count']
+
+        preprocessor.process(path, ['color_analysis', 'pattern_recognition'])
+
+        assert preprocessor.cache.get_stats()['write_count'] == writes + 2  # New tensor + refreshed metadata
+
+    def test_cache_is_trimmed_to_its_budget(self, tmp_path, image_factory):
+        cache = DerivedImageCache(cache_dir=str(tmp_path / 'small'), max_bytes=200_000)
+        preprocessor = ImagePreprocessor(cache)
+        for seed in range(12):
+            preprocessor.process(image_factory(400, 400, seed=seed), ['style_analysis'])
+
+        total = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(cache.cache_dir) for name in names)
+        assert total <= 200_000
+        assert cache.get_stats()['evicted_count'] > 0
+
+    def test_default_directory_is_private(self, monkeypatch):
+        monkeypatch.delenv('DERIVED_IMAGE_CACHE_DIR')
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(image_processing_optimization.__file__)))
+        # Next to the app database, never a shared temp directory
+        assert DerivedImageCache().cache_dir == os.path.join(src_dir, 'database', 'derived_images')
+
+    def test_directory_is_created_private(self, tmp_path):
+        cache = DerivedImageCache(cache_dir=str(tmp_path / 'private'))
+        cache.put('ab' * 20, '.bin', b'data')
+        assert os.stat(cache.cache_dir).st_mode & 0o777 == 0o700
+
+    def test_symlinked_or_foreign_directories_are_refused(self, tmp_path):
+        (tmp_path / 'elsewhere').mkdir()
+        os.symlink(tmp_path / 'elsewhere', tmp_path / 'linked')
+        foreign = tmp_path / 'foreign'
+        foreign.mkdir()
+        caches = [DerivedImageCache(cache_dir=str(tmp_path / 'linked'))]
+        if os.geteuid() == 0:
+            os.chown(foreign, 12345, 12345)
+            caches.append(DerivedImageCache(cache_dir=str(foreign)))
+
+        for cache in caches:
+            assert cache.get('ab' * 20, '.bin') is None
+            with pytest.raises(PermissionError):
+                cache.put('ab' * 20, '.bin', b'data')
+        assert not os.listdir(tmp_path / 'elsewhere')
+
+
+class TestImageProcessingOptimizer:
+    def test_optimize_image_size_reports_real_output(self, preprocessor, image_factory):
+        optimizer = ImageProcessingOptimizer(preprocessor)
+
+        result = optimizer.optimize_image_size(image_factory(2000, 1000, quality=95), (512, 512), quality=70)
+
+        assert result['original_size'] == (2000, 1000)
+        assert result['optimized_size'] == (512, 256)
+        assert result['optimized_bytes'] == os.path.getsize(result['output_path'])
+        assert 0 < result['compression_ratio'] < 1
+        assert result['quality_retained'] == '70%'
+
+    def test_preprocess_for_analysis(self, preprocessor, image_factory):
+        optimizer = ImageProcessingOptimizer(preprocessor)
+        path = image_factory(200, 150)
+
+        result = optimizer.preprocess_for_analysis(path, 'pattern_recognition')
+
+        assert result['tensor_shape'] == [512, 512]
+        assert result['quality_score'] == pytest.approx(200 / 512)
+        assert np.load(result['tensor_path']).shape == (512, 512)
+        assert optimizer.preprocess_for_analysis(path, 'pattern_recognition')['cache_hit']
+
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None, chunks=()):
+        self.status_code = status
+        self.headers = headers or {}
+        self.chunks = chunks
+        self.is_redirect = status in (301, 302, 303, 307, 308)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+
+class TestImageSourcePolicy:
+    @pytest.fixture
+    def policy(self, tmp_path):
+        return ImageSourcePolicy([str(tmp_path / 'uploads')], max_source_bytes=1000)
+
+    @pytest.fixture
+    def public_dns(self, monkeypatch):
+        """Resolve example.com publicly and everything else to the metadata service"""
+        def getaddrinfo(host, port, **kwargs):
+            address = '93.184.216.34' if host == 'example.com' else '169.254.169.254'
+            return [(2, 1, 6, '', (address, port))]
+        monkeypatch.setattr(image_processing_optimization.socket, 'getaddrinfo', getaddrinfo)
+
+    def test_local_reads_stay_inside_upload_roots(self, policy, tmp_path):
+        uploads = tmp_path / 'uploads'
+        uploads.mkdir()
+        (uploads / 'photo.jpg').write_bytes(b'photo')
+        (uploads / 'escape.jpg').symlink_to('/etc/passwd')
+        preprocessor = ImagePreprocessor(source_policy=policy)
+
+        assert preprocessor.load_source(str(uploads / 'photo.jpg')) == b'photo'
+        for path in ('/etc/passwd', str(uploads / '..' / 'outside.jpg'), str(uploads / 'escape.jpg'), '/dev/zero'):
+            with pytest.raises(ImageSourceError):
+                preprocessor.load_source(path)
+        (uploads / 'large.jpg').write_bytes(b'x' * 1001)
+        with pytest.raises(ImageSourceError):
+            preprocessor.load_source(str(uploads / 'large.jpg'))
+
+    def test_urls_must_be_public_http(self, policy, public_dns, monkeypatch):
+        requested = []
+        monkeypatch.setattr(image_processing_optimization.requests, 'get',
+                            lambda url, **kwargs: requested.append(url) or FakeResponse(chunks=[b'ok']))
+
+        assert policy.fetch('https://example.com/photo.jpg', timeout=1) == b'ok'
+        for url in ('file:///etc/passwd', 'ftp://example.com/photo.jpg', 'http://metadata.internal/latest',
+                    'http://127.0.0.1/photo.jpg', 'http://[::ffff:10.0.0.1]/photo.jpg'):
+            with pytest.raises(ImageSourceError):
+                policy.fetch(url, timeout=1)
+        assert requested == ['https://example.com/photo.jpg']
+
+    def test_redirects_are_rechecked_and_downloads_capped(self, policy, public_dns, monkeypatch):
+        responses = {
+            'https://example.com/redirect': FakeResponse(302, {'Location': 'http://metadata.internal/'}),
+            'https://example.com/declared': FakeResponse(headers={'Content-Length': '5000'}),
+            'https://example.com/endless': FakeResponse(chunks=iter(lambda: b'x' * 400, None))
+        }
+        monkeypatch.setattr(image_processing_optimization.requests, 'get', lambda url, **kwargs: responses[url])
+
+        for url in responses:
+            with pytest.raises(ImageSourceError):
+                policy.fetch(url, timeout=1)
+
+    def test_pixel_cap_applies_before_decoding(self, derived_cache, tmp_path):
+        policy = ImageSourcePolicy([str(tmp_path)], max_pixels=100_000)
+        preprocessor = ImagePreprocessor(derived_cache, source_policy=policy)
+        assert preprocessor.process(encode_image(generate_image(300, 300)), ['color_analysis'])['decoded']
+        with pytest.raises(ImageSourceError):
+            preprocessor.process(encode_image(generate_image(400, 300)), ['color_analysis'])
+
+
+class TestPreprocessingThroughput:
+    """Throughput per source megapixel on generated photos (generous floors for slow CI machines)"""
+
+    @staticmethod
+    def _megapixels_per_second(preprocessor, images, megapixels):
+        start = time.perf_counter()
+        for data in images:
+            preprocessor.process(data, list(ANALYSIS_PRESETS))
+        return megapixels / (time.perf_counter() - start)
+
+    @pytest.mark.parametrize('image_format, size, cold_floor', [('JPEG', (4000, 3000), 15.0), ('PNG', (1600, 1200), 2.0)])
+    def test_throughput_per_megapixel(self, tmp_path, image_format, size, cold_floor):
+        images = [encode_image(generate_image(*size, seed=seed), image_format, quality=90) for seed in range(3)]
+        megapixels = len(images) * size[0] * size[1] / 1e6
+        preprocessor = ImagePreprocessor(DerivedImageCache(cache_dir=str(tmp_path / image_format)))
+
+        cold = self._megapixels_per_second(preprocessor, images, megapixels)
+        cached = self._megapixels_per_second(preprocessor, images, megapixels)
+
+        assert cold >= cold_floor, f'{cold:.1f} MP/s cold'
+        assert cached >= cold * 5, f'{cached:.1f} MP/s cached vs {cold:.1f} MP/s cold'
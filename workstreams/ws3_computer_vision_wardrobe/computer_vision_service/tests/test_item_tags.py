@@ -0,0 +1,103 @@
+"""
+Item tag index tests
+"We girls have no time" - Exact tags, indexed lookups!
+"""
+
+import json
+import random
+
+import pytest
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.item_tags import ItemTag, backfill_item_tags, filter_by_tags
+
+AUTH = {'Authorization': 'Bearer test-token'}
+STYLES = ['classic', 'casual', 'smart casual', 'edgy', 'bohemian', 'sporty', 'minimalist', 'vintage']
+SEASONS = ['spring', 'summer', 'fall', 'winter']
+
+
+def _item(user_id=1, styles=(), occasions=(), seasons=(), **fields):
+    defaults = {'name': 'Item', 'category': 'tops', 'color_primary': 'black'}
+    defaults.update(fields)
+    return WardrobeItem(user_id=user_id, cv_style_tags=json.dumps(list(styles)),
+                        occasion_tags=json.dumps(list(occasions)), season_tags=json.dumps(list(seasons)), **defaults)
+
+
+def _tags(item_id):
+    return sorted((tag.kind, tag.value) for tag in ItemTag.query.filter_by(item_id=item_id))
+
+
+def _search(app, **params):
+    response = app.test_client().get('/api/cv/wardrobe/search', query_string=params, headers=AUTH)
+    assert response.status_code == 200
+    return sorted(item['id'] for item in response.get_json()['items'])
+
+
+class TestItemTagIndex:
+    def test_tags_follow_item_writes(self, app):
+        with app.app_context():
+            item = _item(styles=['Classic ', 'classic', 'edgy'], occasions=['work'], seasons=['fall'])
+            db.session.add(item)
+            db.session.commit()
+            assert _tags(item.id) == [('occasion', 'work'), ('season', 'fall'), ('style', 'classic'), ('style', 'edgy')]
+
+            item.cv_style_tags = json.dumps(['minimalist'])
+            item.wear_count = 3
+            db.session.commit()
+            assert _tags(item.id) == [('occasion', 'work'), ('season', 'fall'), ('style', 'minimalist')]
+
+            db.session.delete(item)
+            db.session.commit()
+            assert ItemTag.query.count() == 0
+
+    def test_search_matches_whole_tags_only(self, app):
+        with app.app_context():
+            casual = _item(styles=['casual'], seasons=['summer'])
+            smart_casual = _item(styles=['smart casual'], seasons=['summer'])
+            winter_casual = _item(styles=['Casual'], seasons=['winter'])
+            someone_else = _item(user_id=2, styles=['casual'], seasons=['summer'])
+            db.session.add_all([casual, smart_casual, winter_casual, someone_else])
+            db.session.commit()
+
+            assert _search(app, style='casual') == [casual.id, winter_casual.id]
+            assert _search(app, style='CASUAL', season='summer') == [casual.id]
+            assert _search(app, style='smart casual') == [smart_casual.id]
+            assert _search(app, style='cas') == []
+
+    def test_backfill_indexes_existing_items(self, app):
+        with app.app_context():
+            items = [_item(styles=[style], seasons=[SEASONS[index % 4]]) for index, style in enumerate(STYLES)]
+            db.session.add_all(items)
+            db.session.commit()
+            ItemTag.query.delete()
+            db.session.commit()
+
+            assert backfill_item_tags(batch_size=3) == len(items)
+            assert backfill_item_tags() == len(items)  # Re-running replaces rows instead of duplicating them
+            assert ItemTag.query.count() == 2 * len(items)
+            assert _search(app, style='vintage') == [items[-1].id]
+
+
+class TestIndexUsage:
+    @staticmethod
+    def _plan(query):
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        return [row[3] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+    @pytest.mark.parametrize('analyze', [False, True])
+    def test_tag_filters_are_index_lookups(self, app, analyze):
+        with app.app_context():
+            rng = random.Random(0)
+            db.session.add_all(_item(user_id=rng.randint(1, 20), styles=rng.sample(STYLES, 2),
+                                     seasons=rng.sample(SEASONS, 1)) for _ in range(2000))
+            db.session.commit()
+            if analyze:
+                db.session.execute(db.text('ANALYZE'))
+
+            query = filter_by_tags(WardrobeItem.query.filter_by(user_id=1), 1, style='classic', season='summer')
+            plan = self._plan(query)
+
+            assert sum('USING COVERING INDEX ix_item_tags_lookup (user_id=? AND kind=? AND value=?)' in step
+                       for step in plan) == 2
+            assert not [step for step in plan if step.startswith('SCAN')], plan
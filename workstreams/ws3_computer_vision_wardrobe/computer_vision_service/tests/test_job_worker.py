@@ -0,0 +1,312 @@
+"""
+Durable job queue and background worker tests
+"We girls have no time" - Jobs that survive crashes, retries and second thoughts!
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+from src.job_worker import JOB_OUTPUT_DIR, JobWorker
+from src.utils.image_processing_optimization import image_preprocessor
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.job_queue import JobQueue
+from src.models.outfit_visualization import OutfitComposition, OutfitVisualizationJob
+from src.models.wardrobe_management import BatchProcessingJob
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+
+def _add_items(image_factory, count, broken=()):
+    """Wardrobe items for user 1; indexes in `broken` point at missing files"""
+    colors = [(200, 30, 40), (20, 40, 160), (30, 140, 40)]
+    items = []
+    for index in range(count):
+        path = image_factory(320, 240, seed=index)
+        Image.new('RGB', (320, 240), colors[index % 3]).save(path, 'JPEG')
+        item = WardrobeItem(user_id=1, name=f'Item {index}', category='top', color_primary='red',
+                            image_url=path + '.missing' if index in broken else path)
+        db.session.add(item)
+        items.append(item)
+    db.session.commit()
+    return items
+
+
+def _create_job(app, job_type, **parameters):
+    response = app.test_client().post('/api/wardrobe/batch-jobs', json={'job_type': job_type, 'job_parameters': parameters},
+                                      headers=AUTH)
+    assert response.status_code == 200
+    return response.get_json()['job']['id']
+
+
+def _job(job_id):
+    db.session.expire_all()
+    return db.session.get(BatchProcessingJob, job_id)
+
+
+class TestJobQueue:
+    def test_claim_is_exclusive(self, app):
+        with app.app_context():
+            JobQueue.enqueue('batch_processing', 1)
+            db.session.commit()
+
+            first = JobQueue.claim('worker-a')
+            second = JobQueue.claim('worker-b')
+
+            assert first.lease_owner == 'worker-a' and first.status == 'running' and first.attempts == 1
+            assert second is None
+
+    def test_expired_lease_is_reclaimed(self, app):
+        with app.app_context():
+            JobQueue.enqueue('batch_processing', 1)
+            db.session.commit()
+            entry = JobQueue.claim('worker-a', lease_seconds=60)
+
+            assert JobQueue.claim('worker-b', now=datetime.utcnow() + timedelta(seconds=30)) is None
+            reclaimed = JobQueue.claim('worker-b', now=datetime.utcnow() + timedelta(seconds=90))
+
+            assert reclaimed.id == entry.id and reclaimed.lease_owner == 'worker-b' and reclaimed.attempts == 2
+            assert JobQueue.renew(reclaimed, 'worker-a') == (False, False)  # The old owner has lost it
+
+    def test_retry_backs_off_then_fails(self, app):
+        with app.app_context():
+            JobQueue.enqueue('batch_processing', 1, max_attempts=2)
+            db.session.commit()
+            now = datetime.utcnow()
+
+            entry = JobQueue.claim('worker', now=now)
+            assert JobQueue.retry_or_fail(entry, 'boom', base_seconds=10, now=now) == 'pending'
+            db.session.commit()
+            assert entry.run_after == now + timedelta(seconds=10)
+            assert JobQueue.claim('worker', now=now + timedelta(seconds=5)) is None
+
+            entry = JobQueue.claim('worker', now=now + timedelta(seconds=11))
+            assert JobQueue.retry_or_fail(entry, 'boom again', now=now) == 'failed'
+            assert entry.last_error == 'boom again'
+
+    def test_retry_delay_is_capped(self):
+        assert [JobQueue.retry_delay(attempt, 5, 30) for attempt in range(1, 6)] == [5, 10, 20, 30, 30]
+
+
+class TestJobWorker:
+    def test_analyze_all_images_end_to_end(self, app, image_factory):
+        with app.app_context():
+            items = _add_items(image_factory, 4)
+            job_id = _create_job(app, 'analyze_all_images')
+
+            assert JobWorker(app, processes=0).run_once()
+
+            job = _job(job_id)
+            assert job.status == 'completed'
+            assert (job.total_items, job.successful_items, job.failed_items) == (4, 4, 0)
+            assert job.progress_percentage == 100.0
+            results = json.loads(job.results)
+            assert results['summary']['dominant_color_counts'] == {'red': 2, 'navy': 1, 'green': 1}
+            assert json.loads(db.session.get(WardrobeItem, items[0].id).cv_colors)[0]['name'] == 'red'
+            assert JobQueue.get('batch_processing', job_id).status == 'completed'
+
+    def test_partial_failures_are_recorded(self, app, image_factory):
+        with app.app_context():
+            _add_items(image_factory, 3, broken={1})
+            job_id = _create_job(app, 'analyze_all_images')
+
+            JobWorker(app, processes=0).run_once()
+
+            job = _job(job_id)
+            assert job.status == 'completed'
+            assert (job.successful_items, job.failed_items) == (2, 1)
+            assert 'FileNotFoundError' in json.loads(job.error_log)[0]['error']
+
+    def test_progress_is_flushed_in_batches(self, app, image_factory, monkeypatch):
+        with app.app_context():
+            _add_items(image_factory, 5)
+            job_id = _create_job(app, 'analyze_all_images')
+            worker = JobWorker(app, processes=0, max_in_flight=1, flush_every=2, flush_interval=60)
+            flushed = []
+            flush = worker._flush
+
+            def recording_flush(entry, adapter, handler, job, completed, *args):
+                flushed.append(len(completed))
+                return flush(entry, adapter, handler, job, completed, *args)
+
+            monkeypatch.setattr(worker, '_flush', recording_flush)
+            worker.run_once()
+
+            assert flushed == [2, 2, 1]
+            assert _job(job_id).processed_items == 5
+
+    def test_retried_job_resumes_from_partial_results(self, app, image_factory):
+        with app.app_context():
+            items = _add_items(image_factory, 3, broken={0, 1, 2})
+            job_id = _create_job(app, 'analyze_all_images')
+            worker = JobWorker(app, processes=0, retry_base_seconds=0)
+
+            worker.run_once()  # Every item fails: the job is retried, not completed
+            entry = JobQueue.get('batch_processing', job_id)
+            assert entry.status == 'pending' and entry.attempts == 1 and 'All 3 items failed' in entry.last_error
+            assert _job(job_id).status == 'pending'
+
+            for item in items[:2]:
+                item.image_url = item.image_url[:-len('.missing')]
+            db.session.commit()
+            worker.run_once()
+            job = _job(job_id)
+            assert job.status == 'completed' and (job.successful_items, job.failed_items) == (2, 1)
+            done = set(json.loads(job.results)['items'])
+
+            # A later retry only runs items that have not succeeded yet
+            job.status = 'pending'
+            entry = JobQueue.get('batch_processing', job_id)
+            entry.status, entry.attempts = 'pending', 0
+            db.session.commit()
+            worker.run_once()
+            assert worker.get_stats()['items_succeeded'] == 2  # Nothing new ran successfully
+            assert set(json.loads(_job(job_id).results)['items']) == done
+
+    def test_job_fails_after_max_attempts(self, app, tmp_path):
+        with app.app_context():
+            job_id = _create_job(app, 'optimize_images', image_paths=[str(tmp_path / 'nonexistent.jpg')])
+            worker = JobWorker(app, processes=0, retry_base_seconds=0)
+
+            while worker.run_once():
+                pass
+
+            job = _job(job_id)
+            assert job.status == 'failed'
+            assert JobQueue.get('batch_processing', job_id).attempts == 3
+            assert worker.get_stats()['jobs_retried'] == 2
+
+    def test_paths_outside_upload_roots_are_rejected(self, app):
+        response = app.test_client().post('/api/wardrobe/batch-jobs', headers=AUTH, json={
+            'job_type': 'optimize_images', 'job_parameters': {'image_paths': ['/etc/passwd']}})
+        assert response.status_code == 400
+        with app.app_context():
+            assert BatchProcessingJob.query.count() == 0
+
+    @pytest.mark.parametrize('job_type, job_parameters', [
+        ('optimize_images', ['/tmp/a.jpg']),
+        ('organize_wardrobe', 'everything'),
+        ('optimize_images', {'image_paths': '/tmp/a.jpg'}),
+        ('optimize_images', {'image_paths': [{'path': '/tmp/a.jpg'}]}),
+    ])
+    def test_malformed_parameters_are_rejected(self, app, job_type, job_parameters):
+        response = app.test_client().post('/api/wardrobe/batch-jobs', headers=AUTH, json={
+            'job_type': job_type, 'job_parameters': job_parameters})
+        assert response.status_code == 400
+        with app.app_context():
+            assert BatchProcessingJob.query.count() == 0
+
+    def test_unsupported_job_type_fails_without_retries(self, app):
+        with app.app_context():
+            job_id = _create_job(app, 'teleport_wardrobe')
+
+            JobWorker(app, processes=0).run_once()
+
+            assert _job(job_id).status == 'failed'
+            assert JobQueue.get('batch_processing', job_id).attempts == 1
+
+    def test_running_job_stops_when_cancelled(self, app, image_factory, monkeypatch):
+        with app.app_context():
+            _add_items(image_factory, 6)
+            job_id = _create_job(app, 'analyze_all_images')
+            worker = JobWorker(app, processes=0, max_in_flight=1, flush_every=1)
+            flush = worker._flush
+
+            def cancel_after_first_flush(*args):
+                stop = flush(*args)
+                app.test_client().post(f'/api/wardrobe/batch-jobs/{job_id}/cancel', headers=AUTH)
+                return stop
+
+            monkeypatch.setattr(worker, '_flush', cancel_after_first_flush)
+            worker.run_once()
+
+            job = _job(job_id)
+            assert job.status == 'cancelled'
+            assert job.processed_items == 2  # The item in the flush that saw the request is kept
+            assert JobQueue.get('batch_processing', job_id).status == 'cancelled'
+
+    def test_lost_lease_discards_work(self, app, image_factory, monkeypatch):
+        with app.app_context():
+            _add_items(image_factory, 2)
+            job_id = _create_job(app, 'analyze_all_images')
+            worker = JobWorker(app, processes=0)
+            monkeypatch.setattr(JobQueue, 'renew', staticmethod(lambda *args, **kwargs: (False, False)))
+
+            worker.run_once()
+
+            assert worker.get_stats()['leases_lost'] == 1
+            assert _job(job_id).processed_items == 0
+
+    def test_items_run_in_worker_processes(self, app, image_factory):
+        with app.app_context():
+            paths = [image_factory(800, 600, seed=seed) for seed in range(3)]
+            job_id = _create_job(app, 'optimize_images', image_paths=paths, target_size=[200, 200])
+            worker = JobWorker(app, processes=1)
+            try:
+                worker.run_once()
+            finally:
+                worker.shutdown()
+
+            job = _job(job_id)
+            assert job.status == 'completed' and job.successful_items == 3
+            results = json.loads(job.results)
+            assert results['items'][paths[0]]['optimized_size'] == [200, 150]
+            assert results['items'][paths[0]]['output_path'].startswith(JOB_OUTPUT_DIR)
+            assert os.path.exists(results['items'][paths[0]]['output_path'])
+            assert results['summary']['optimized_bytes'] < results['summary']['original_bytes']
+
+    def test_outfit_visualization_job(self, app, image_factory):
+        with app.app_context():
+            top, bottom = _add_items(image_factory, 2)
+            composition = OutfitComposition(user_id=1, name='Brunch', top_item_id=top.id, bottom_item_id=bottom.id)
+            db.session.add(composition)
+            db.session.flush()
+            visualization = OutfitVisualizationJob(user_id=1, job_type='outfit_visualization',
+                                                   outfit_composition_id=composition.id)
+            db.session.add(visualization)
+            db.session.commit()
+
+            assert JobWorker(app, processes=0).run_once()  # Queued on the fly: inserted without a queue row
+
+            db.session.expire_all()
+            assert visualization.status == 'completed'
+            collage = Image.open(json.loads(visualization.result_urls)[0])
+            assert collage.size == (600, 300)
+            assert composition.visualization_url == json.loads(visualization.result_urls)[0]
+
+            # Outputs outlive the derived image cache, which may be trimmed or cleared at any time
+            image_preprocessor.cache.clear()
+            for path in (composition.visualization_url, composition.thumbnail_url):
+                assert path.startswith(JOB_OUTPUT_DIR) and os.path.exists(path)
+
+
+class TestBatchJobRoutes:
+    def test_progress_endpoint(self, app, image_factory):
+        with app.app_context():
+            _add_items(image_factory, 2)
+            job_id = _create_job(app, 'analyze_all_images')
+            client = app.test_client()
+
+            queued = client.get(f'/api/wardrobe/batch-jobs/{job_id}', headers=AUTH).get_json()
+            JobWorker(app, processes=0).run_once()
+            finished = client.get(f'/api/wardrobe/batch-jobs/{job_id}', headers=AUTH).get_json()
+
+            assert queued['queue']['status'] == 'pending'
+            assert finished['queue']['status'] == 'completed'
+            assert finished['job']['metrics']['successful'] == 2
+            assert client.get('/api/wardrobe/batch-jobs/999', headers=AUTH).status_code == 404
+
+    def test_cancel_pending_job(self, app):
+        with app.app_context():
+            job_id = _create_job(app, 'organize_wardrobe')
+            client = app.test_client()
+
+            response = client.post(f'/api/wardrobe/batch-jobs/{job_id}/cancel', headers=AUTH)
+
+            assert response.get_json()['job']['status']['current'] == 'cancelled'
+            assert JobQueue.claim('worker') is None
+            assert client.post(f'/api/wardrobe/batch-jobs/{job_id}/cancel', headers=AUTH).status_code == 409
@@ -0,0 +1,209 @@
+"""
+Item embedding and similarity index tests
+"We girls have no time" - Similar items, no loops!
+"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.item_embeddings import ItemEmbedding, ItemFeatureEncoder, SimilarityIndex, similarity_index
+
+AUTH = {'Authorization': 'Bearer test-token'}
+CATEGORIES = ['tops', 'bottoms', 'dresses', 'shoes', 'outerwear', 'accessories']
+COLORS = ['black', 'white', 'navy', 'red', 'beige', 'green', 'pink', 'grey']
+STYLES = ['classic', 'casual', 'minimalist', 'bohemian', 'professional', 'romantic', 'edgy']
+
+
+def _item(user_id=1, **fields):
+    defaults = {'name': 'Item', 'category': 'tops', 'color_primary': 'black'}
+    defaults.update(fields)
+    return WardrobeItem(user_id=user_id, **defaults)
+
+
+def _random_wardrobe(count, user_id=1, seed=0):
+    rng = random.Random(seed)
+    items = [_item(user_id, name=f'Item {index}', category=rng.choice(CATEGORIES), color_primary=rng.choice(COLORS),
+                   color_secondary=rng.choice(COLORS + [None]),
+                   cv_style_tags=json.dumps(rng.sample(STYLES, rng.randint(0, 3))))
+             for index in range(count)]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def _exact_top(items, reference, k, threshold=0.3):
+    connection = db.session.connection()
+    vectors = {item.id: ItemFeatureEncoder.encode(item, connection) for item in items}
+    scores = sorted((-round(float(vectors[item.id] @ vectors[reference.id]), 4), item.id) for item in items
+                    if item.id != reference.id)
+    return [item_id for score, item_id in scores if -score > threshold][:k]
+
+
+class TestItemFeatureEncoder:
+    @pytest.fixture
+    def encode(self, app):
+        with app.app_context():
+            connection = db.session.connection()
+            yield lambda **fields: ItemFeatureEncoder.encode(_item(**fields), connection)
+
+    def test_vectors_have_a_fixed_shape(self, encode):
+        vector = encode(cv_style_tags=json.dumps(['classic']))
+
+        assert vector.shape == (ItemFeatureEncoder.DIMENSIONS,) and vector.dtype == np.float32
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+        np.testing.assert_array_equal(ItemFeatureEncoder.from_blob(ItemFeatureEncoder.to_blob(vector)), vector)
+
+    def test_scores_are_weighted_block_similarities(self, encode):
+        reference = encode(cv_style_tags=json.dumps(['classic']))
+
+        same = encode(cv_style_tags=json.dumps(['classic']))
+        same_category = encode(color_primary='red')
+        unrelated = encode(category='shoes', color_primary='red')
+
+        assert float(reference @ same) == pytest.approx(1.0)
+        assert float(reference @ same_category) == pytest.approx(0.4)
+        assert float(reference @ unrelated) == pytest.approx(0.0)
+
+    def test_different_names_never_share_a_slot(self, encode):
+        # These pairs shared a bucket when names were feature-hashed into 32 slots
+        shorts = encode(category='shorts', color_primary='blue', cv_style_tags=json.dumps(['casual']))
+        dress = encode(category='dress', color_primary='brown', cv_style_tags=json.dumps(['romantic']))
+        jeans = encode(category='jeans', color_primary='Blue ')
+
+        assert float(shorts @ dress) == 0.0
+        assert float(shorts @ jeans) == pytest.approx(0.3)  # Only the color, matched case-insensitively
+
+    def test_full_blocks_leave_new_names_out(self, encode, monkeypatch):
+        monkeypatch.setattr(ItemFeatureEncoder, 'BLOCKS', (('color', 2, 0.3), ('category', 2, 0.4), ('style', 2, 0.3)))
+        monkeypatch.setattr(ItemFeatureEncoder, 'DIMENSIONS', 6)
+        first = encode(category='tops', color_primary='black')
+        second = encode(category='bottoms', color_primary='white')
+        overflow = encode(category='shoes', color_primary='red')
+
+        assert float(first @ second) == 0.0
+        assert not overflow.any()
+
+    def test_detected_colors_form_a_histogram(self, encode):
+        plain = encode(color_primary='navy')
+        detected = encode(color_primary='navy', cv_colors=json.dumps(
+            [{'name': 'navy', 'percentage': 70}, {'name': 'white', 'percentage': 30}]))
+
+        assert 0.3 * 0.9 < float(plain @ detected) - 0.4 < 0.3
+
+
+class TestEmbeddingWrites:
+    def test_vectors_follow_item_writes(self, app):
+        with app.app_context():
+            item = _item()
+            db.session.add(item)
+            db.session.commit()
+            stored = ItemEmbedding.query.filter_by(wardrobe_item_id=item.id).one()
+            first_update = stored.updated_at
+
+            item.wear_count = 5  # Not a feature: the vector is left alone
+            db.session.commit()
+            db.session.refresh(stored)
+            assert stored.updated_at == first_update
+
+            item.color_primary = 'red'
+            db.session.commit()
+            stored = ItemEmbedding.query.filter_by(wardrobe_item_id=item.id).one()
+            np.testing.assert_array_equal(ItemFeatureEncoder.from_blob(stored.vector),
+                                          ItemFeatureEncoder.encode(item, db.session.connection()))
+
+            db.session.delete(item)
+            db.session.commit()
+            assert ItemEmbedding.query.count() == 0
+
+
+class TestSimilarityIndex:
+    def test_top_k_matches_exact_scores(self, app):
+        with app.app_context():
+            items = _random_wardrobe(300)
+            index = SimilarityIndex()
+
+            for reference in items[:20]:
+                matches, total, method = index.most_similar(1, reference.id, k=10)
+                assert [item_id for item_id, _ in matches] == _exact_top(items, reference, 10)
+                assert [score for _, score in matches] == sorted((score for _, score in matches), reverse=True)
+                assert method == 'exact'
+            assert index.get_stats()['load_count'] == 1
+
+    def test_changes_invalidate_the_matrix(self, app):
+        with app.app_context():
+            items = _random_wardrobe(20)
+            index = SimilarityIndex()
+            reference = items[0]
+            index.most_similar(1, reference.id)
+
+            twin = _item(category=reference.category, color_primary=reference.color_primary,
+                         color_secondary=reference.color_secondary, cv_style_tags=reference.cv_style_tags)
+            db.session.add(twin)
+            db.session.commit()
+            assert index.most_similar(1, reference.id)[0][0] == (twin.id, 1.0)
+
+            db.session.delete(twin)
+            db.session.commit()
+            assert twin.id not in [item_id for item_id, _ in index.most_similar(1, reference.id)[0]]
+            assert index.get_stats()['load_count'] == 3
+
+    def test_items_without_vectors_are_backfilled(self, app):
+        with app.app_context():
+            items = _random_wardrobe(15)
+            ItemEmbedding.query.delete()
+            db.session.commit()
+
+            matches, _, _ = SimilarityIndex().most_similar(1, items[0].id)
+
+            assert ItemEmbedding.query.count() == 15
+            assert [item_id for item_id, _ in matches] == _exact_top(items, items[0], 10)
+
+    def test_users_are_isolated(self, app):
+        with app.app_context():
+            mine = _random_wardrobe(10, user_id=1)
+            theirs = _random_wardrobe(10, user_id=2)
+
+            matches, _, _ = SimilarityIndex().most_similar(1, mine[0].id)
+
+            assert not {item_id for item_id, _ in matches} & {item.id for item in theirs}
+
+    def test_lsh_recall_on_large_wardrobes(self, app):
+        with app.app_context():
+            items = _random_wardrobe(3000, seed=3)
+            index = SimilarityIndex(lsh_min_items=1000)
+
+            # Many items tie on score, so recall counts results as good as the exact k-th neighbour
+            recalls = []
+            for reference in items[:50]:
+                matches, _, method = index.most_similar(1, reference.id, k=10)
+                exact = index.most_similar(1, reference.id, k=10, use_lsh=False)[0]
+                kth_score = exact[-1][1]
+                recalls.append(sum(score >= kth_score for _, score in matches) / len(exact))
+                assert method == 'lsh'
+
+            assert np.mean(recalls) >= 0.9
+            assert index.get_stats()['lsh_users'] == 1
+
+
+class TestSimilarItemsRoute:
+    def test_similar_items_endpoint(self, app):
+        similarity_index.invalidate()
+        with app.app_context():
+            items = _random_wardrobe(40)
+            reference = items[0]
+
+            response = app.test_client().get(f'/api/cv/wardrobe/items/{reference.id}/similar', headers=AUTH)
+            data = response.get_json()
+
+            assert response.status_code == 200
+            assert [entry['item']['id'] for entry in data['similar_items']] == _exact_top(items, reference, 10)
+            assert all(entry['similarity_score'] > 0.3 for entry in data['similar_items'])
+            assert all(entry['similarity_reasons'] for entry in data['similar_items'])
+            assert data['total_similar'] >= len(data['similar_items'])
+            assert app.test_client().get('/api/cv/wardrobe/items/9999/similar', headers=AUTH).status_code == 404
+        similarity_index.invalidate()
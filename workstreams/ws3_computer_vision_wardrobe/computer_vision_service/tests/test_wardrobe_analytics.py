@@ -0,0 +1,164 @@
+"""
+Incremental wardrobe analytics tests
+"We girls have no time" - Analytics that never need recomputing!
+"""
+
+import json
+import random
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.wardrobe_analytics_state import ItemWearStat, WardrobeAnalyticsState, live_wardrobe_analytics
+from src.routes.wardrobe_management import check_wardrobe_analytics
+
+AUTH = {'Authorization': 'Bearer test-token'}
+CATEGORIES = ['tops', 'bottoms', 'dresses', 'shoes', 'outerwear', 'accessories']
+COLORS = ['black', 'white', 'navy', 'red', 'beige']
+STYLES = ['classic', 'casual', 'edgy', 'minimalist']
+SEASONS = ['spring', 'summer', 'fall', 'winter']
+
+
+def _random_item(rng, user_id=1):
+    return WardrobeItem(user_id=user_id, name='Item', category=rng.choice(CATEGORIES), color_primary=rng.choice(COLORS),
+                        brand=rng.choice(['Zara', 'COS', None]), wear_count=rng.choice([0, 0, 1, 2, 5, 9]),
+                        cv_style_tags=json.dumps(rng.sample(STYLES, rng.randint(0, 2))),
+                        season_tags=json.dumps(rng.sample(SEASONS, rng.randint(0, 2))))
+
+
+def _get_analytics(app):
+    response = app.test_client().get('/api/wardrobe/analytics', headers=AUTH)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+class TestIncrementalAnalytics:
+    def test_item_writes_keep_analytics_consistent(self, app):
+        rng = random.Random(0)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(40))
+            db.session.commit()
+            assert not _get_analytics(app)['cached']  # First request builds from the items
+
+            for step in range(60):
+                items = WardrobeItem.query.filter_by(user_id=1).all()
+                operation = rng.choice(['add', 'wear', 'recolor', 'recategorize', 'restyle', 'delete'])
+                item = rng.choice(items)
+                if operation == 'add':
+                    db.session.add(_random_item(rng))
+                elif operation == 'wear':
+                    item.wear_count += 1
+                elif operation == 'recolor':
+                    item.color_primary = rng.choice(COLORS)
+                elif operation == 'recategorize':
+                    item.category = rng.choice(CATEGORIES)
+                elif operation == 'restyle':
+                    item.cv_style_tags = json.dumps(rng.sample(STYLES, 2))
+                    item.season_tags = json.dumps(rng.sample(SEASONS, 1))
+                else:
+                    db.session.delete(item)
+                db.session.commit()
+                if step % 10 == 9:
+                    assert check_wardrobe_analytics(1) == {}, f'after step {step} ({operation})'
+                    db.session.rollback()
+
+            data = _get_analytics(app)
+            assert data['cached']
+            assert data['analytics']['wardrobe_composition']['total_items'] == WardrobeItem.query.count()
+
+    def test_get_is_a_single_row_read(self, app, sql_recorder):
+        rng = random.Random(1)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(200))
+            db.session.commit()
+            _get_analytics(app)
+
+            with sql_recorder as statements:
+                data = _get_analytics(app)
+
+            assert data['cached'] and data['analytics']['wardrobe_composition']['total_items'] == 200
+            assert len(statements) == 1 and 'FROM wardrobe_analytics' in statements[0]
+
+    def test_users_are_only_maintained_once_built(self, app):
+        rng = random.Random(2)
+        with app.app_context():
+            db.session.add_all(_random_item(rng, user_id=2) for _ in range(5))
+            db.session.commit()
+
+            assert db.session.get(WardrobeAnalyticsState, 2) is None
+            assert ItemWearStat.query.count() == 0
+            assert live_wardrobe_analytics(2) is None
+
+    def test_rolled_back_changes_are_not_counted(self, app):
+        rng = random.Random(3)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(5))
+            db.session.commit()
+            _get_analytics(app)
+
+            db.session.add(_random_item(rng))
+            db.session.flush()
+            db.session.rollback()
+            db.session.add(WardrobeItem(user_id=1, name='Kept', category='shoes', color_primary='red'))
+            db.session.commit()
+
+            assert live_wardrobe_analytics(1).total_items == 6
+            assert check_wardrobe_analytics(1) == {}
+
+    def test_check_finds_drift_and_rebuild_repairs_it(self, app):
+        rng = random.Random(4)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(20))
+            db.session.commit()
+            _get_analytics(app)
+
+            # Bulk updates skip the ORM events, so the counters drift
+            WardrobeItem.query.filter_by(user_id=1).update({'wear_count': 7, 'category': 'tops'})
+            db.session.commit()
+
+            client = app.test_client()
+            check = client.get('/api/wardrobe/analytics/check', headers=AUTH).get_json()
+            assert not check['consistent']
+            assert {'category_breakdown', 'average_wear_frequency'} <= set(check['mismatches'])
+
+            rebuilt = client.post('/api/wardrobe/analytics/rebuild', headers=AUTH).get_json()
+            assert rebuilt['analytics']['wardrobe_composition']['categories'] == {'tops': 20}
+            assert rebuilt['analytics']['usage_analytics']['average_frequency'] == 7
+            assert client.get('/api/wardrobe/analytics/check', headers=AUTH).get_json() == \
+                {'consistent': True, 'mismatches': {}, 'tagline': 'We girls have no time - Analytics verified!'}
+
+    def test_writes_mark_dirty_and_the_next_read_refreshes_once(self, app, sql_recorder):
+        rng = random.Random(5)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(50))
+            db.session.commit()
+            _get_analytics(app)
+
+            with sql_recorder as writes:
+                for _ in range(20):
+                    db.session.add(_random_item(rng))
+                    db.session.commit()
+            with sql_recorder as refresh:
+                data = _get_analytics(app)
+            with sql_recorder as statements:
+                _get_analytics(app)
+
+            # Item writes never touch the live row (whose lists grow with the wardrobe)
+            assert not [statement for statement in writes if 'wardrobe_analytics ' in statement]
+            assert data['analytics']['wardrobe_composition']['total_items'] == 70
+            assert sum(statement.startswith('UPDATE wardrobe_analytics ') for statement in refresh) == 1
+            assert len(statements) == 1  # Clean again: a single-row read
+
+    def test_check_writes_nothing(self, app, sql_recorder):
+        rng = random.Random(6)
+        with app.app_context():
+            db.session.add_all(_random_item(rng) for _ in range(20))
+            db.session.commit()
+            _get_analytics(app)
+            db.session.add(_random_item(rng))
+            db.session.commit()
+
+            with sql_recorder as statements:
+                check = app.test_client().get('/api/wardrobe/analytics/check', headers=AUTH).get_json()
+
+            assert check['consistent']
+            assert all(statement.lstrip().upper().startswith('SELECT') for statement in statements)
@@ -0,0 +1,112 @@
+"""
+Duplicate detection tests
+"We girls have no time" - Same duplicates, without comparing every pair!
+"""
+
+import random
+from itertools import combinations
+
+import pytest
+
+from src.models.user import db
+from src.models.cv_models import WardrobeItem
+from src.models.wardrobe_duplicates import DuplicateCluster, DuplicateDetector, DuplicateScan
+from src.routes.wardrobe_management import calculate_wardrobe_analytics
+
+AUTH = {'Authorization': 'Bearer test-token'}
+CATEGORIES = ['tops', 'bottoms', 'dresses', 'shoes', 'outerwear']
+COLORS = ['black', 'white', 'navy', 'red', 'beige', 'green']
+
+
+def naive_duplicates(items):
+    """The previous all-pairs comparison"""
+    duplicates = []
+    for i, item1 in enumerate(items):
+        for item2 in items[i + 1:]:
+            if item1.category == item2.category and item1.color_primary == item2.color_primary:
+                duplicates.append(sorted([item1.id, item2.id]))
+    return sorted(duplicates)
+
+
+def _wardrobe(count, user_id=1, seed=0):
+    rng = random.Random(seed)
+    items = [WardrobeItem(user_id=user_id, name=f'Item {index}', category=rng.choice(CATEGORIES),
+                          color_primary=rng.choice(COLORS)) for index in range(count)]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def _current(user_id=1):
+    return WardrobeItem.query.filter_by(user_id=user_id).all()
+
+
+def _update(detector, user_id, items):
+    """Run a scan and return its clusters as sorted [lower id, higher id] pairs"""
+    return sorted([first, second] for cluster in detector.update(user_id, items)
+                  for first, second in combinations(cluster, 2))
+
+
+class TestDuplicateDetector:
+    @pytest.mark.parametrize('count, seed', [(1, 0), (12, 1), (80, 2), (400, 3)])
+    def test_matches_the_naive_method(self, app, count, seed):
+        with app.app_context():
+            items = _wardrobe(count, seed=seed)
+
+            assert _update(DuplicateDetector(), 1, items) == naive_duplicates(items)
+
+    def test_later_scans_only_revisit_changed_items(self, app):
+        with app.app_context():
+            detector = DuplicateDetector()
+            items = _wardrobe(200, seed=4)
+            _update(detector, 1, _current())
+            db.session.commit()
+            assert db.session.get(DuplicateScan, 1).items_scanned == 200
+
+            items[0].color_primary = 'olive'
+            items[1].category = 'accessories'
+            db.session.delete(items[2])
+            db.session.add(WardrobeItem(user_id=1, name='New', category=items[3].category,
+                                        color_primary=items[3].color_primary))
+            db.session.commit()
+
+            pairs = _update(detector, 1, _current())
+            db.session.commit()
+
+            assert db.session.get(DuplicateScan, 1).items_scanned == 3
+            assert pairs == naive_duplicates(_current())
+            assert _update(detector, 1, _current()) == pairs
+            assert db.session.get(DuplicateScan, 1).items_scanned == 0
+
+    def test_clusters_are_per_user_and_empty_ones_are_removed(self, app):
+        with app.app_context():
+            detector = DuplicateDetector()
+            mine = _wardrobe(2, user_id=1)
+            theirs = _wardrobe(30, user_id=2, seed=5)
+            for item in mine:
+                item.category, item.color_primary = 'shoes', 'red'
+            db.session.commit()
+
+            assert _update(detector, 1, _current(1)) == [sorted(item.id for item in mine)]
+            assert _update(detector, 2, _current(2)) == naive_duplicates(theirs)
+
+            db.session.delete(mine[0])
+            db.session.commit()
+            assert _update(detector, 1, _current(1)) == []
+            db.session.delete(mine[1])
+            db.session.commit()
+            detector.update(1, [])
+            db.session.commit()
+            assert DuplicateCluster.query.filter_by(user_id=1).count() == 0
+
+
+class TestWardrobeAnalyticsDuplicates:
+    def test_analytics_report_the_naive_duplicate_set(self, app):
+        with app.app_context():
+            items = _wardrobe(60, seed=6)
+
+            assert calculate_wardrobe_analytics(1)['duplicate_items'] == naive_duplicates(items)
+
+            response = app.test_client().get('/api/wardrobe/analytics', headers=AUTH)
+            assert response.status_code == 200
+            assert response.get_json()['analytics']['recommendations']['duplicates'] == naive_duplicates(items)